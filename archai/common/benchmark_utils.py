@@ -0,0 +1,195 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+import torch
+
+STATISTICS = ['mean', 'median', 'p90', 'p99', 'min', 'max']
+
+
+class BenchmarkResult():
+    def __init__(self, times: List[float], confidence: float = 0.95) -> None:
+        """Wall-clock times (in seconds) of the trials of a benchmark.
+
+        Args:
+            times (List[float]): Time of each trial.
+            confidence (float, optional): Confidence level of `median_ci`. Defaults to 0.95.
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.confidence = confidence
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def mean(self) -> float:
+        return float(np.mean(self.times))
+
+    @property
+    def median(self) -> float:
+        return float(np.median(self.times))
+
+    @property
+    def p90(self) -> float:
+        return float(np.percentile(self.times, 90))
+
+    @property
+    def p99(self) -> float:
+        return float(np.percentile(self.times, 99))
+
+    @property
+    def min(self) -> float:
+        return float(np.min(self.times))
+
+    @property
+    def max(self) -> float:
+        return float(np.max(self.times))
+
+    @property
+    def median_ci(self) -> Optional[tuple]:
+        """Distribution-free confidence interval of the median, or `None` if there are not
+        enough trials to compute it."""
+        return median_ci(self.times, self.confidence)
+
+    @property
+    def rel_ci_width(self) -> float:
+        """Width of `median_ci` relative to the median (`inf` if it can't be computed)."""
+        ci = self.median_ci
+        median = self.median
+
+        if ci is None or median <= 0:
+            return float('inf')
+
+        return (ci[1] - ci[0]) / median
+
+    def get(self, statistic: str) -> float:
+        """Gets a statistic (one of 'mean', 'median', 'p90', 'p99', 'min' or 'max') of the trial times."""
+        assert statistic in STATISTICS, f'`statistic` should be one of {STATISTICS}.'
+        return getattr(self, statistic)
+
+    def to_dict(self) -> dict:
+        return dict({s: self.get(s) for s in STATISTICS}, n_trials=len(self), rel_ci_width=self.rel_ci_width)
+
+    def __repr__(self) -> str:
+        return (
+            f'BenchmarkResult(n_trials={len(self)}, median={self.median:.4g}, '
+            f'p90={self.p90:.4g}, p99={self.p99:.4g}, rel_ci_width={self.rel_ci_width:.3g})'
+        )
+
+
+def median_ci(times: np.ndarray, confidence: float = 0.95) -> Optional[tuple]:
+    """Computes a distribution-free confidence interval of the median from order statistics.
+
+    Latencies are skewed by background load, so normal-theory intervals of the mean are too
+    optimistic. The number of samples below the median is Binomial(n, 1/2), which gives the
+    ranks of the interval bounds (using its normal approximation).
+
+    Args:
+        times (np.ndarray): Samples.
+        confidence (float, optional): Confidence level. Defaults to 0.95.
+
+    Returns:
+        Optional[tuple]: Lower and upper bounds, or `None` if there are too few samples.
+    """
+    n = len(times)
+    # Two-sided standard normal quantile (`statistics.NormalDist` is not available on Python 3.7)
+    z = math.sqrt(2) * torch.erfinv(torch.tensor(confidence, dtype=torch.float64)).item()
+
+    lower = int(math.floor(n / 2 - z * math.sqrt(n) / 2))
+    upper = int(math.ceil(n / 2 + z * math.sqrt(n) / 2))
+
+    if lower < 0 or upper > n - 1:
+        return None
+
+    sorted_times = np.sort(times)
+    return float(sorted_times[lower]), float(sorted_times[upper])
+
+
+@contextmanager
+def cpu_affinity(cpus: Optional[List[int]]) -> Iterator[None]:
+    """Pins the calling thread to a set of CPUs, restoring its previous affinity on exit.
+
+    Only the calling thread (and threads it starts) is pinned, so concurrent benchmarks
+    running on other threads (e.g `evaluate_models(..., executor='thread')`) do not change
+    each other's affinity. Pinning is skipped (with a warning) on platforms where it is not
+    supported (e.g macOS and Windows).
+
+    Args:
+        cpus (Optional[List[int]]): CPU indices. If `None`, the affinity is not changed.
+    """
+    if cpus is None or not hasattr(os, 'sched_setaffinity'):
+        if cpus is not None:
+            logging.warning('CPU affinity is not supported on this platform and will not be set.')
+
+        yield
+        return
+
+    # On Linux, pid 0 refers to the calling thread
+    previous_cpus = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous_cpus)
+
+
+def benchmark(fn: Callable[[], None], n_warmup: int = 1, min_trials: int = 5, max_trials: int = 100,
+              rel_ci_width: Optional[float] = None, time_budget: Optional[float] = None,
+              confidence: float = 0.95, cpus: Optional[List[int]] = None) -> BenchmarkResult:
+    """Measures the wall-clock time of `fn` with adaptive stopping.
+
+    After `n_warmup` untimed calls, `fn` is timed once per trial until `max_trials` trials
+    are run, the relative width of the median confidence interval falls below `rel_ci_width`
+    (after at least `min_trials` trials) or `time_budget` seconds are spent, whichever comes first.
+
+    Args:
+        fn (Callable[[], None]): Function to benchmark.
+        n_warmup (int, optional): Number of untimed warmup calls. Defaults to 1.
+        min_trials (int, optional): Minimum number of timed trials before checking `rel_ci_width`.
+            Defaults to 5.
+        max_trials (int, optional): Maximum number of timed trials. Defaults to 100.
+        rel_ci_width (Optional[float], optional): Target width of the median confidence interval,
+            relative to the median (e.g 0.05). If `None`, runs `max_trials` trials. Defaults to None.
+        time_budget (Optional[float], optional): Maximum time (in seconds) spent on timed trials.
+            At least one trial is always run. Defaults to None.
+        confidence (float, optional): Confidence level of the interval. Defaults to 0.95.
+        cpus (Optional[List[int]], optional): CPUs the calling thread is pinned to while benchmarking.
+            Defaults to None.
+
+    Returns:
+        BenchmarkResult: Trial times.
+    """
+    assert max_trials >= 1, '`max_trials` should be at least 1.'
+    min_trials = min(min_trials, max_trials)
+
+    times = []
+
+    with cpu_affinity(cpus):
+        for _ in range(n_warmup):
+            fn()
+
+        start_time = time.perf_counter()
+
+        while len(times) < max_trials:
+            trial_start = time.perf_counter()
+            fn()
+            trial_end = time.perf_counter()
+
+            times.append(trial_end - trial_start)
+
+            if time_budget is not None and trial_end - start_time >= time_budget:
+                break
+
+            if rel_ci_width is not None and len(times) >= min_trials:
+                if BenchmarkResult(times, confidence).rel_ci_width <= rel_ci_width:
+                    break
+
+    return BenchmarkResult(times, confidence)
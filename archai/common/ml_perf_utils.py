@@ -1,4 +1,6 @@
-from typing import Callable, Tuple
+from typing import Callable, Tuple, Optional, Dict, Any
+from contextlib import contextmanager
+from functools import partial
 import psutil
 import os
 import tracemalloc
@@ -7,6 +9,8 @@ from torch import profiler
 from torch import nn
 import gc
 
+from archai.common.benchmark_utils import benchmark, BenchmarkResult
+
 def model_memory(create_model:Callable[[], nn.Module])->Tuple[nn.Module, int]:
     # returns model and memory occupied by the model in process
     gc.collect()
@@ -23,8 +27,33 @@ def model_memory(create_model:Callable[[], nn.Module])->Tuple[nn.Module, int]:
 
     return model, new_mem-baseline_mem
 
-def inference_stats(model:nn.Module, **inputs)->Tuple[int, int, int]:
+@contextmanager
+def num_threads(n_threads:Optional[int]):
+    # temporarily sets the number of torch intra-op threads
+    prev_threads = torch.get_num_threads()
+    if n_threads is not None:
+        torch.set_num_threads(n_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(prev_threads)
+
+def _forward(model:nn.Module, inputs:Dict[str, Any])->None:
+    with torch.no_grad():
+        model(**inputs)
+
+def inference_latency(model:nn.Module, n_threads:Optional[int]=None,
+                      benchmark_kwargs:Optional[Dict[str, Any]]=None, **inputs)->BenchmarkResult:
+    # returns wall-clock times of model inference in seconds,
+    # see archai.common.benchmark_utils.benchmark for benchmark_kwargs
+    with num_threads(n_threads):
+        return benchmark(partial(_forward, model, inputs), **(benchmark_kwargs or {}))
+
+def inference_stats(model:nn.Module, n_warmup:int=0, n_threads:Optional[int]=None,
+                    **inputs)->Tuple[int, int, int, int]:
     # return memory usage in bytes, cpu time in us
+    # n_warmup untimed runs are done before profiling, so one-time
+    # allocations and lazy initialization are not counted
     # We basically sum "self" time of individual ops,
     # i.e., not including child time.
     # Pytorch also has record_function which gives
@@ -32,7 +61,9 @@ def inference_stats(model:nn.Module, **inputs)->Tuple[int, int, int]:
     # time spent other than ops.
     # Sometime profiler also generates [memory] node
     # which has negative value of memory.
-    with torch.no_grad():
+    with num_threads(n_threads), torch.no_grad():
+        for _ in range(n_warmup):
+            model(**inputs)
         with profiler.profile(activities=[profiler.ProfilerActivity.CPU], profile_memory=True, record_shapes=True, with_flops=True) as prof:
             with profiler.record_function('model_inference'):
                 _ = model(**inputs)
@@ -2,11 +2,16 @@
 # Licensed under the MIT license.
 
 from overrides.overrides import overrides
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 import random
+import threading
 from typing import Tuple, List, Union, Dict, Optional
 from tqdm import tqdm
 
+import numpy as np
+
 from archai.common.utils import create_logger
 from archai.discrete_search import (
     ArchaiModel, Objective, AsyncObjective, Searcher, 
@@ -14,7 +19,8 @@ from archai.discrete_search import (
 )
 
 from archai.discrete_search.api.search_space import EvolutionarySearchSpace
-from archai.discrete_search.utils.evaluation import evaluate_models
+from archai.discrete_search.utils.evaluation import evaluate_models, _evaluate_objective
+from archai.discrete_search.utils.multi_objective import _find_pareto_frontier_points
 
 
 class EvolutionParetoSearch(Searcher):
@@ -26,8 +32,47 @@ class EvolutionParetoSearch(Searcher):
                  num_random_mix: int = 5, max_unseen_population: int = 100,
                  mutations_per_parent: int = 1, num_crossovers: int = 5, 
                  obj_valid_ranges: Optional[List[Tuple[float, float]]] = None,
-                 crowd_sorting: Optional[Dict[str, Union[bool, float]]] = None, seed: int = 1):
-        
+                 crowd_sorting: Optional[Dict[str, Union[bool, float]]] = None, seed: int = 1,
+                 steady_state: bool = False, max_in_flight: int = 4):
+        """Evolutionary multi-objective search that mutates and crosses over the models
+        of the current Pareto-frontier.
+
+        By default, the search is generational: each iteration evaluates a whole population
+        and then selects the parents of the next one. With `steady_state=True`, up to
+        `max_in_flight` models are evaluated concurrently and each completed evaluation
+        immediately updates the Pareto archive and schedules a new child, so a slow evaluation
+        does not idle the remaining workers. Results are still recorded (and saved) in
+        iterations, of `max_unseen_population` models each after the initial population, and
+        `on_search_iteration_start` is called at the start of each of these iterations with the
+        models that are queued or being evaluated.
+
+        Args:
+            search_space (EvolutionarySearchSpace): Search space.
+            objectives (Dict[str, Union[Objective, AsyncObjective]]): Objectives of the search.
+            dataset_provider (DatasetProvider): Dataset provider used by the objectives.
+            output_dir (str): Output directory.
+            num_iters (int, optional): Number of search iterations. Defaults to 10.
+            init_num_models (int, optional): Number of random models of the initial population.
+                Defaults to 10.
+            initial_population_paths (Optional[List[str]], optional): Paths of architectures used
+                as the initial population instead of random models. Defaults to None.
+            num_random_mix (int, optional): Number of random models added to each population.
+                Defaults to 5.
+            max_unseen_population (int, optional): Maximum number of models evaluated in each
+                iteration. Defaults to 100.
+            mutations_per_parent (int, optional): Number of mutations of each parent. Defaults to 1.
+            num_crossovers (int, optional): Number of crossovers in each iteration. Defaults to 5.
+            obj_valid_ranges (Optional[List[Tuple[float, float]]], optional): Valid range of each
+                objective. Models outside these ranges are not used as parents. Defaults to None.
+            crowd_sorting (Optional[Dict[str, Union[bool, float]]], optional): Crowd sorting
+                settings of the mutations. Defaults to None.
+            seed (int, optional): Random seed. Defaults to 1.
+            steady_state (bool, optional): Whether to use the asynchronous steady-state mode.
+                Defaults to False.
+            max_in_flight (int, optional): Number of concurrent evaluations in the steady-state
+                mode. Synchronous objectives are evaluated in a thread pool, while each asynchronous
+                objective evaluates one model at a time. Defaults to 4.
+        """
         assert isinstance(search_space, EvolutionarySearchSpace), \
             f'{str(search_space.__class__)} is not compatible with {str(self.__class__)}'
         
@@ -48,6 +93,8 @@ class EvolutionParetoSearch(Searcher):
         self.num_crossovers = num_crossovers
         self.obj_valid_ranges = obj_valid_ranges
         self.crowd_sorting = crowd_sorting
+        self.steady_state = steady_state
+        self.max_in_flight = max_in_flight
 
         # Utils
         self.search_state = SearchResults(search_space, objectives)
@@ -61,6 +108,7 @@ class EvolutionParetoSearch(Searcher):
         assert self.num_iters > 0
         assert self.num_random_mix > 0
         assert self.max_unseen_population > 0
+        assert self.max_in_flight > 0
 
     def filter_population(self, population: List[ArchaiModel]):
         ''' Filter the population based on the objectives constraints '''
@@ -160,6 +208,195 @@ class EvolutionParetoSearch(Searcher):
         random.shuffle(current_pop)
         return current_pop[:self.max_unseen_population]
 
+    def _record_iteration_results(self, models: List[ArchaiModel],
+                                  results: Dict[str, np.ndarray]) -> List[ArchaiModel]:
+        ''' Stores and saves the results of the current iteration and returns the Pareto-frontier '''
+        self.search_state.add_iteration_results(
+            models, results,
+
+            # Mutation and crossover info
+            extra_model_data={
+                'parent': [p.metadata.get('parent', None) for p in models],
+                'parents': [p.metadata.get('parents', None) for p in models],
+            }
+        )
+
+        # Records evaluated archs to avoid computing the same architecture twice
+        self.evaluated_architectures.update([m.archid for m in models])
+
+        # update the pareto frontier
+        self.logger.info(f'iter {self.iter_num - 1}: updating the pareto')
+        pareto = self.search_state.get_pareto_frontier()['models']
+        self.logger.info(f'iter {self.iter_num - 1}: found {len(pareto)} members')
+
+        # Saves search iteration results
+        self.search_state.save_search_state(
+            str(self.output_dir / f'search_state_{self.iter_num}.csv')
+        )
+
+        self.search_state.save_pareto_frontier_models(
+            str(self.output_dir / f'pareto_models_iter_{self.iter_num}')
+        )
+
+        self.search_state.save_all_2d_pareto_evolution_plots(str(self.output_dir))
+
+        return pareto
+
+    def _evaluate_model(self, model: ArchaiModel) -> Dict[str, float]:
+        ''' Evaluates all objectives on a single model (steady-state mode) '''
+        results = {}
+
+        for obj_name, obj in self.objectives.items():
+            if isinstance(obj, AsyncObjective):
+                # `send` and `fetch_all` calls of different models must not interleave
+                with self._async_locks[obj_name]:
+                    obj.send(model, self.dataset_provider)
+                    results[obj_name] = obj.fetch_all()[0]
+            else:
+                results[obj_name] = _evaluate_objective(obj, model, self.dataset_provider)
+
+        return results
+
+    def _update_archive(self, model: ArchaiModel, results: Dict[str, float]) -> None:
+        ''' Adds a model to the Pareto archive of the steady-state mode '''
+        if any(results[obj_name] is None or np.isnan(results[obj_name]) for obj_name in self.objectives):
+            return
+
+        point = [
+            -results[obj_name] if obj.higher_is_better else results[obj_name]
+            for obj_name, obj in self.objectives.items()
+        ]
+
+        models = self._archive_models + [model]
+        points = np.concatenate([self._archive_points, np.array([point], dtype=np.float64)])
+        pareto_indices = _find_pareto_frontier_points(points)
+
+        self._archive_models = [models[i] for i in pareto_indices]
+        self._archive_points = points[pareto_indices]
+
+    def _generate_child(self, in_flight: set, patience: int = 20) -> Optional[ArchaiModel]:
+        ''' Generates a new model from the current Pareto archive (steady-state mode) '''
+        parents = self.filter_population(self._archive_models)
+
+        # Keeps the same proportion of mutations, crossovers and random models of an iteration
+        weights = [
+            self.mutations_per_parent * len(parents),
+            self.num_crossovers if len(parents) >= 2 else 0,
+            self.num_random_mix
+        ]
+
+        if sum(weights) == 0:
+            weights = [0, 0, 1]
+
+        for _ in range(patience):
+            op = self.rng.choices(['mutation', 'crossover', 'random'], weights=weights)[0]
+
+            if op == 'mutation':
+                parent = self.rng.choice(parents)
+                children = self.search_space.mutate(parent)
+                children = children if isinstance(children, list) else [children]
+
+                for child in children:
+                    child.metadata['parent'] = parent.archid
+            elif op == 'crossover':
+                p1, p2 = self.rng.sample(parents, 2)
+                children = [self.search_space.crossover([p1, p2])]
+
+                if children[0]:
+                    children[0].metadata['parents'] = f'{p1.archid},{p2.archid}'
+            else:
+                children = self.sample_random_models(1)
+
+            for child in children:
+                if child and child.archid not in self.evaluated_architectures and child.archid not in in_flight:
+                    child.metadata['generation'] = self.iter_num
+                    return child
+
+        return None
+
+    def _search_steady_state(self, initial_pop: List[ArchaiModel]) -> SearchResults:
+        self._archive_models = []
+        self._archive_points = np.empty((0, len(self.objectives)), dtype=np.float64)
+        self._async_locks = defaultdict(threading.Lock)
+
+        # Iteration sizes follow the generational mode
+        iter_sizes = [len(initial_pop)] + [self.max_unseen_population] * (self.num_iters - 1)
+        num_evals = sum(iter_sizes)
+
+        queue = deque(initial_pop)
+        in_flight = {}
+        iter_models, iter_results = [], []
+        num_submitted = 0
+
+        self.iter_num = 1
+        self.logger.info(
+            f'starting steady-state evolution pareto with {self.max_in_flight} concurrent evaluations'
+        )
+
+        self.logger.info('starting evolution pareto iter 0')
+        self.on_search_iteration_start(list(initial_pop))
+
+        with ThreadPoolExecutor(self.max_in_flight) as pool:
+            def _submit_jobs():
+                nonlocal num_submitted
+
+                while len(in_flight) < self.max_in_flight and num_submitted < num_evals:
+                    if queue:
+                        model = queue.popleft()
+                    else:
+                        model = self._generate_child({m.archid for m in in_flight.values()})
+
+                        if model is None:
+                            self.logger.info('could not generate a new model, waiting for running evaluations')
+                            break
+
+                        # update the set of architectures ever visited
+                        self.all_pop.append(model)
+
+                    in_flight[pool.submit(self._evaluate_model, model)] = model
+                    num_submitted += 1
+
+            _submit_jobs()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    model = in_flight.pop(future)
+                    results = future.result()
+
+                    self.evaluated_architectures.add(model.archid)
+                    self._update_archive(model, results)
+
+                    iter_models.append(model)
+                    iter_results.append(results)
+
+                    # Records results in iterations of the same size of the generational mode
+                    if len(iter_models) == iter_sizes[self.iter_num - 1]:
+                        self.logger.info(f'iter {self.iter_num - 1}: evaluated {len(iter_models)} models')
+                        self._record_iteration_results(iter_models, {
+                            obj_name: np.array([r[obj_name] for r in iter_results], dtype=np.float64)
+                            for obj_name in self.objectives
+                        })
+
+                        iter_models, iter_results = [], []
+                        self.iter_num += 1
+
+                        if self.iter_num <= len(iter_sizes):
+                            self.logger.info(f'starting evolution pareto iter {self.iter_num - 1}')
+                            self.on_search_iteration_start(list(in_flight.values()) + list(queue))
+
+                _submit_jobs()
+
+        # Records remaining results if the search space was exhausted
+        if iter_models:
+            self._record_iteration_results(iter_models, {
+                obj_name: np.array([r[obj_name] for r in iter_results], dtype=np.float64)
+                for obj_name in self.objectives
+            })
+
+        return self.search_state
+
     @overrides
     def search(self) -> SearchResults:
         # sample the initial population
@@ -180,6 +417,9 @@ class EvolutionParetoSearch(Searcher):
 
         self.all_pop = unseen_pop
 
+        if self.steady_state:
+            return self._search_steady_state(unseen_pop)
+
         for i in range(self.num_iters):
             self.iter_num = i + 1
 
@@ -193,34 +433,7 @@ class EvolutionParetoSearch(Searcher):
             )
 
             results = evaluate_models(unseen_pop, self.objectives, self.dataset_provider)
-            self.search_state.add_iteration_results(
-                unseen_pop, results,
-
-                # Mutation and crossover info
-                extra_model_data={
-                    'parent': [p.metadata.get('parent', None) for p in unseen_pop],
-                    'parents': [p.metadata.get('parents', None) for p in unseen_pop],
-                }
-            )
-
-            # Records evaluated archs to avoid computing the same architecture twice
-            self.evaluated_architectures.update([m.archid for m in unseen_pop])
-
-            # update the pareto frontier
-            self.logger.info(f'iter {i}: updating the pareto')
-            pareto = self.search_state.get_pareto_frontier()['models']
-            self.logger.info(f'iter {i}: found {len(pareto)} members')
-
-            # Saves search iteration results
-            self.search_state.save_search_state(
-                str(self.output_dir / f'search_state_{self.iter_num}.csv')
-            )
-
-            self.search_state.save_pareto_frontier_models(
-                str(self.output_dir / f'pareto_models_iter_{self.iter_num}')
-            )
-
-            self.search_state.save_all_2d_pareto_evolution_plots(str(self.output_dir))
+            pareto = self._record_iteration_results(unseen_pop, results)
 
             # select parents for the next iteration from 
             # the current estimate of the frontier while
@@ -1,31 +1,56 @@
-
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 class ArchaiModel():
     """Wraps a model object with an architecture id and optionally a metadata dictionary.
 
         Args:
-            arch (Any): Model object (e.g torch.nn.Module)
-            
+            arch (Any): Model object (e.g torch.nn.Module). Can be `None` if `arch_fn` is provided.
+
             archid (str): **Architecture** string identifier of `arch` object. Will be used to deduplicate
-                models of the same architecture, so architecture hashes are prefered. `archid` should only 
+                models of the same architecture, so architecture hashes are prefered. `archid` should only
                 identify neural network architectures and not model weight information.
-            
+
             metadata (Optional[Dict], optional): Optional model metadata dictionary. Defaults to None.
+
+            arch_fn (Optional[Callable[[], Any]], optional): Function that builds the model object. If
+                provided and `arch=None`, the model is only built on the first access to `ArchaiModel.arch`,
+                so candidate architectures can be sampled, deduplicated and encoded without allocating
+                model weights. Should be picklable (e.g `functools.partial` of a model class) when models are
+                sent to other processes. Defaults to None.
         """
 
-    def __init__(self, arch: Any, archid: str, metadata: Optional[Dict] = None):
-        self.arch = arch
+    def __init__(self, arch: Any, archid: str, metadata: Optional[Dict] = None,
+                 arch_fn: Optional[Callable[[], Any]] = None):
+        self._arch = arch
+        self.arch_fn = arch_fn
         self.archid = archid
         self.metadata = metadata or dict()
 
+    @property
+    def arch(self) -> Any:
+        if self._arch is None and self.arch_fn is not None:
+            self._arch = self.arch_fn()
+
+        return self._arch
+
+    @arch.setter
+    def arch(self, arch: Any) -> None:
+        self._arch = arch
+
+    @property
+    def is_materialized(self) -> bool:
+        """Whether the model object was already built."""
+        return self._arch is not None
+
     def __repr__(self):
+        arch_repr = self._arch if self.is_materialized else '<not materialized>'
+
         return (
             f'ArchaiModel(\n\tarchid={self.archid}, \n\t'
-            f'metadata={self.metadata}, \n\tarch={self.arch}\n)'
+            f'metadata={self.metadata}, \n\tarch={arch_repr}\n)'
         )
 
     def __str__(self):
@@ -1,11 +1,100 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
+import json
+import warnings
 from abc import abstractmethod
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Optional
+
 from overrides import EnforceOverrides
 
 
+class _NotSerializable(Exception):
+    pass
+
+
+def _to_serializable(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+
+    if isinstance(value, Path):
+        return str(value)
+
+    if isinstance(value, (list, tuple)):
+        return [_to_serializable(v) for v in value]
+
+    if isinstance(value, dict) or hasattr(value, 'items'):
+        return {str(k): _to_serializable(v) for k, v in value.items()}
+
+    # Objects without a stable representation (datasets, tensors, etc.) could
+    # hold different data with the same type
+    raise _NotSerializable(f'{type(value).__module__}.{type(value).__qualname__}')
+
+
+def _hash_object_state(obj: Any) -> Optional[str]:
+    try:
+        state = {
+            'class': f'{type(obj).__module__}.{type(obj).__qualname__}',
+            'attributes': _to_serializable(getattr(obj, '__dict__', {}))
+        }
+    except _NotSerializable:
+        return None
+
+    return sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_dataset_fingerprint(dataset: Any) -> Optional[str]:
+    """Gets a stable string identifier of a dataset provider object, that does
+    not change across processes or search runs.
+
+    If the object implements a `fingerprint()` method, its result is used. Otherwise,
+    the fingerprint is a hash of the class name and the JSON-serializable attributes
+    of the object.
+
+    Args:
+        dataset (Any): Dataset provider object (or `None`).
+
+    Returns:
+        Optional[str]: Dataset fingerprint, or `None` if the object holds attributes that
+            are not JSON-serializable (e.g datasets or tensors), since equal fingerprints
+            could then identify different data.
+    """
+    if dataset is None:
+        return 'None'
+
+    if callable(getattr(dataset, 'fingerprint', None)):
+        fingerprint = dataset.fingerprint()
+    else:
+        fingerprint = _hash_object_state(dataset)
+
+    if fingerprint is None:
+        warnings.warn(
+            f'{type(dataset).__qualname__} has attributes that are not JSON-serializable, so its '
+            'evaluation results will not be cached. Please implement `fingerprint()` to identify its data.'
+        )
+        return None
+
+    return str(fingerprint)
+
+
 class DatasetProvider(EnforceOverrides):
     @abstractmethod
     def get_train_val_datasets(self, *args, **kwargs):
         pass
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable identifier of the data served by this provider, used to share
+        objective evaluation results across processes and search runs
+        (see `archai.discrete_search.api.objective_cache`).
+
+        The default implementation hashes the class name and the attributes of the
+        provider, and returns `None` (results are not cached) if any attribute is not
+        JSON-serializable. Subclasses holding such attributes (e.g datasets or tensors)
+        or state that is not captured by its attributes should override this method.
+
+        Returns:
+            Optional[str]: Dataset fingerprint.
+        """
+        return _hash_object_state(self)
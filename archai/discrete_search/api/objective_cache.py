@@ -0,0 +1,182 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import os
+import sqlite3
+import threading
+from abc import abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from overrides import EnforceOverrides, overrides
+
+
+# Cache key: (obj_name, is_proxy, archid, dataset fingerprint, budget)
+CacheKey = Tuple[str, bool, str, str, Optional[float]]
+
+
+class ObjectiveCache(EnforceOverrides):
+    """Abstract base class for objective evaluation caches used by
+    `archai.discrete_search.api.search_objectives.SearchObjectives`.
+
+    Entries are indexed by `(obj_name, is_proxy, archid, dataset_fingerprint, budget)`,
+    where `dataset_fingerprint` is obtained with
+    `archai.discrete_search.api.dataset.get_dataset_fingerprint`. Subclasses are
+    expected to implement `get` and `set`. Hit and miss counters are tracked
+    per objective by `lookup`.
+    """
+
+    def __init__(self) -> None:
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Optional[float]:
+        """Gets a cached evaluation result.
+
+        Args:
+            key (CacheKey): Cache key.
+
+        Returns:
+            Optional[float]: Cached result or `None` if `key` is not in the cache.
+        """
+
+    @abstractmethod
+    def set(self, key: CacheKey, value: float) -> None:
+        """Stores an evaluation result.
+
+        Args:
+            key (CacheKey): Cache key.
+            value (float): Evaluation result.
+        """
+
+    def lookup(self, key: CacheKey) -> Optional[float]:
+        """Gets a cached evaluation result and updates the hit/miss counters
+        of the respective objective.
+
+        Args:
+            key (CacheKey): Cache key.
+
+        Returns:
+            Optional[float]: Cached result or `None` if `key` is not in the cache.
+        """
+        value = self.get(key)
+
+        if value is None:
+            self.misses[key[0]] += 1
+        else:
+            self.hits[key[0]] += 1
+
+        return value
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Gets the hit/miss counters of each objective since the cache was created.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Dictionary mapping objective names to
+                a dictionary with 'hits' and 'misses' keys.
+        """
+        return {
+            obj_name: {'hits': self.hits[obj_name], 'misses': self.misses[obj_name]}
+            for obj_name in sorted(set(self.hits) | set(self.misses))
+        }
+
+
+class InMemoryObjectiveCache(ObjectiveCache):
+    """Process-local objective evaluation cache backed by a dictionary."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.data: Dict[CacheKey, float] = {}
+
+    @overrides
+    def get(self, key: CacheKey) -> Optional[float]:
+        return self.data.get(key)
+
+    @overrides
+    def set(self, key: CacheKey, value: float) -> None:
+        self.data[key] = value
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class SqliteObjectiveCache(ObjectiveCache):
+    def __init__(self, path: Union[str, Path], timeout: float = 60.0) -> None:
+        """Persistent objective evaluation cache stored in a SQLite database.
+
+        The database can be shared by several search processes running on the same
+        machine: it uses write-ahead logging, so readers do not block writers, and
+        each thread/process opens its own connection lazily (the cache can be pickled
+        or inherited by forked workers).
+
+        Args:
+            path (Union[str, Path]): Path to the database file. Created if it does not exist.
+            timeout (float, optional): Seconds to wait for a concurrent writer to release
+                the database lock. Defaults to 60.0.
+        """
+        super().__init__()
+
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._create_table()
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Connections cannot be shared across threads or forked processes
+        if getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+
+            self._local.connection = conn
+            self._local.pid = os.getpid()
+
+        return self._local.connection
+
+    def _create_table(self) -> None:
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS objective_cache ('
+            'obj_name TEXT NOT NULL, is_proxy INTEGER NOT NULL, archid TEXT NOT NULL, '
+            'dataset TEXT NOT NULL, budget TEXT NOT NULL, result REAL NOT NULL, '
+            'PRIMARY KEY (obj_name, is_proxy, archid, dataset, budget))'
+        )
+
+    def _to_row(self, key: CacheKey) -> Tuple:
+        obj_name, is_proxy, archid, dataset, budget = key
+
+        # `budget` is stored as text since NULL values are never equal in SQL
+        return (str(obj_name), int(is_proxy), str(archid), str(dataset), repr(budget))
+
+    @overrides
+    def get(self, key: CacheKey) -> Optional[float]:
+        row = self.connection.execute(
+            'SELECT result FROM objective_cache WHERE obj_name=? AND is_proxy=? '
+            'AND archid=? AND dataset=? AND budget=?',
+            self._to_row(key)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    @overrides
+    def set(self, key: CacheKey, value: float) -> None:
+        self.connection.execute(
+            'INSERT OR REPLACE INTO objective_cache VALUES (?, ?, ?, ?, ?, ?)',
+            self._to_row(key) + (float(value),)
+        )
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM objective_cache').fetchone()[0]
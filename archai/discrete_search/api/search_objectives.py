@@ -5,27 +5,53 @@ from typing import Union, Optional, Tuple, List, Dict, Callable
 
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.discrete_search.api.objective import Objective, AsyncObjective
-from archai.discrete_search.api.dataset import DatasetProvider
+from archai.discrete_search.api.dataset import DatasetProvider, get_dataset_fingerprint
+from archai.discrete_search.api.objective_cache import ObjectiveCache, InMemoryObjectiveCache
+from archai.discrete_search.utils.evaluation import evaluate_sync_objectives
 
 import numpy as np
 from tqdm import tqdm
 
 
 class SearchObjectives():
-    def __init__(self, cache_objective_evaluation: bool = True, progress_bar: bool = True) -> None:
+    def __init__(self, cache_objective_evaluation: bool = True, progress_bar: bool = True,
+                 cache: Optional[ObjectiveCache] = None, executor: Optional[str] = None,
+                 max_workers: Optional[int] = None) -> None:
+        """Groups cheap, expensive and proxy objectives of a search.
+
+        Args:
+            cache_objective_evaluation (bool, optional): Whether to cache objective evaluation results.
+                Defaults to True.
+            progress_bar (bool, optional): Whether to show progress bars. Defaults to True.
+            cache (Optional[ObjectiveCache], optional): Cache backend used when `cache_objective_evaluation=True`,
+                e.g `archai.discrete_search.api.objective_cache.SqliteObjectiveCache` to share results
+                across processes and search runs. If `None`, uses an in-memory cache. Defaults to None.
+            executor (Optional[str], optional): Executor used to compute synchronous objectives concurrently
+                ('thread' or 'process'). If `None`, synchronous objectives are computed serially.
+                See `archai.discrete_search.utils.evaluation.evaluate_sync_objectives`. Defaults to None.
+            max_workers (Optional[int], optional): Maximum number of executor workers. Defaults to None.
+        """
         self.cheap_objs = {}
         self.exp_objs = {}
         self.proxy_objs = {}
 
         self.progress_bar = progress_bar
         self.cache_objective_evaluation = cache_objective_evaluation
+        self.executor = executor
+        self.max_workers = max_workers
         
-        # Cache key: (obj_name, is_proxy, archid, dataset obj, budget)
-        self.cache: Dict[Tuple[str, bool, str, DatasetProvider, Optional[float]], Optional[float]] = {}
+        # Cache key: (obj_name, is_proxy, archid, dataset fingerprint, budget)
+        self.cache = cache if cache is not None else InMemoryObjectiveCache()
+
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Cache hit/miss counters of each objective."""
+        return self.cache.get_stats()
 
     def add_cheap_objective(self, objective_name: str, objective: Union[Objective, AsyncObjective],
                             higher_is_better: bool,
-                            constraint: Optional[Tuple[float, float]] = None) -> None:
+                            constraint: Optional[Tuple[float, float]] = None,
+                            max_concurrency: Optional[int] = None) -> None:
         assert isinstance(objective, (AsyncObjective, Objective))
         assert objective_name not in dict(self.cheap_objs, **self.exp_objs),\
             f'There is already an objective named {objective_name}.'
@@ -33,15 +59,17 @@ class SearchObjectives():
         self.cheap_objs[objective_name] = {
             'objective': objective,
             'higher_is_better': higher_is_better,
-            'constraint': constraint or [-float('-inf'), float('+inf')],
-            'proxy': False
+            'constraint': constraint or [float('-inf'), float('+inf')],
+            'proxy': False,
+            'max_concurrency': max_concurrency
         }
     
     def add_expensive_objective(self, objective_name: str,
                                 objective: Union[Objective, AsyncObjective],
                                 higher_is_better: bool,
                                 constraint: Optional[Tuple[float, float]] = None,
-                                proxy_constraint: Optional[Tuple[Union[Objective, AsyncObjective], float, float]] = None) -> None:
+                                proxy_constraint: Optional[Tuple[Union[Objective, AsyncObjective], float, float]] = None,
+                                max_concurrency: Optional[int] = None) -> None:
         assert isinstance(objective, (AsyncObjective, Objective))
         assert objective_name not in dict(self.cheap_objs, **self.exp_objs),\
             f'There is already an objective named {objective_name}.'
@@ -49,8 +77,9 @@ class SearchObjectives():
         self.exp_objs[objective_name] = {
             'objective': objective,
             'higher_is_better': higher_is_better,
-            'constraint': constraint or [-float('-inf'), float('+inf')],
-            'proxy': False
+            'constraint': constraint or [float('-inf'), float('+inf')],
+            'proxy': False,
+            'max_concurrency': max_concurrency
         }
 
         if proxy_constraint:
@@ -60,7 +89,8 @@ class SearchObjectives():
                 'objective': proxy_objective,
                 'higher_is_better': higher_is_better,
                 'constraint': p_constraint,
-                'proxy': True
+                'proxy': True,
+                'max_concurrency': max_concurrency
             }
 
     def _filter_objs(self, objs: Dict[str, Dict], field_name: str, query_fn: Callable) -> Dict[str, Dict]:
@@ -91,15 +121,20 @@ class SearchObjectives():
         sync_objs = self._filter_objs(objs, 'objective', lambda x: isinstance(x, Objective))
         async_objs = self._filter_objs(objs, 'objective', lambda x: isinstance(x, AsyncObjective))
 
-        assert all(len(dataset_providers) == len(models) == b for b in budgets.values())
+        assert all(len(dataset_providers) == len(models) == len(b) for b in budgets.values())
+
+        # Fingerprints are computed once per distinct dataset provider object, and are
+        # `None` for providers that cannot be identified across runs
+        fingerprints = {id(data): get_dataset_fingerprint(data) for data in dataset_providers}
+        dataset_fingerprints = [fingerprints[id(data)] for data in dataset_providers]
 
         # Initializes evaluation results with cached results
         eval_results = {
             obj_name: [
-                self.cache.get(
-                    (obj_name, obj_d['proxy'], model.archid, data, budget)
-                )
-                for model, data, budget in zip(models, dataset_providers, budgets[obj_name])
+                self.cache.lookup(
+                    (obj_name, obj_d['proxy'], model.archid, data_fp, budget)
+                ) if self.cache_objective_evaluation and data_fp is not None else None
+                for model, data_fp, budget in zip(models, dataset_fingerprints, budgets[obj_name])
             ]
             for obj_name, obj_d in objs.items()
         }
@@ -122,17 +157,28 @@ class SearchObjectives():
                     models[i], dataset_providers[i], budgets[obj_name][i]
                 )
 
-        # Calculates synchronous objectives in order
-        for obj_name, obj_d in sync_objs.items():
-            pbar = (
-                tqdm(eval_indices[obj_name], desc=f'Calculating "{obj_name}"...')
-                if progress_bar else eval_indices[obj_name]
-            )
+        # Calculates synchronous objectives, optionally using `self.executor`
+        sync_results = evaluate_sync_objectives(
+            {obj_name: obj_d['objective'] for obj_name, obj_d in sync_objs.items()},
+            {
+                obj_name: [
+                    (models[i], dataset_providers[i], budgets[obj_name][i])
+                    for i in eval_indices[obj_name]
+                ]
+                for obj_name in sync_objs
+            },
+            executor=self.executor, max_workers=self.max_workers,
+            max_concurrency={
+                obj_name: obj_d['max_concurrency']
+                for obj_name, obj_d in sync_objs.items()
+                if obj_d['max_concurrency']
+            },
+            progress_bar=progress_bar
+        )
 
-            for i in pbar:
-                eval_results[obj_name][i] = obj_d['objective'].evaluate(
-                    models[i], dataset_providers[i], budgets[obj_name][i]
-                )
+        for obj_name, obj_results in sync_results.items():
+            for result_i, eval_i in enumerate(eval_indices[obj_name]):
+                eval_results[obj_name][eval_i] = obj_results[result_i]
 
         # Gets results from async objectives
         pbar = (
@@ -154,18 +200,22 @@ class SearchObjectives():
         if self.cache_objective_evaluation:
             for obj_name, obj_d in objs.items():
                 for i in eval_indices[obj_name]:
+                    # Providers without a fingerprint (see `get_dataset_fingerprint`) are not cached
+                    if eval_results[obj_name][i] is None or dataset_fingerprints[i] is None:
+                        continue
+
                     cache_tuple = (
                         obj_name, obj_d['proxy'],
-                        models[i].archid, dataset_providers[i],
+                        models[i].archid, dataset_fingerprints[i],
                         budgets[obj_name][i]
                     )
 
-                    self.cache[cache_tuple] = eval_results[obj_name][i]
+                    self.cache.set(cache_tuple, eval_results[obj_name][i])
 
         assert len(set(len(r) for r in eval_results.values())) == 1
 
         return {
-            obj_name: np.ndarray(obj_results, dtype=np.float64)
+            obj_name: np.array(obj_results, dtype=np.float64)
             for obj_name, obj_results in eval_results.items()
         }
 
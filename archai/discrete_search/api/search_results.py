@@ -9,34 +9,104 @@ import numpy as np
 import pandas as pd
 
 from archai.discrete_search import AsyncObjective, Objective, ArchaiModel, DiscreteSearchSpace
-from archai.discrete_search.utils.multi_objective import _find_pareto_frontier_points, get_pareto_frontier
+from archai.discrete_search.utils.multi_objective import _find_pareto_frontier_points
 
 
 class SearchResults():
     def __init__(self, search_space: DiscreteSearchSpace,
                  objectives: Dict[str, Union[Objective, AsyncObjective]]):
+        """Stores the results of a search.
+
+        Evaluation results are stored in columnar (NumPy) buffers and the Pareto-frontier of
+        all evaluated models is maintained incrementally as new iteration results are added.
+
+        Args:
+            search_space (DiscreteSearchSpace): Search space.
+            objectives (Dict[str, Union[Objective, AsyncObjective]]): Objectives of the search.
+        """
         self.search_space = search_space
         self.objectives = objectives
         self.iteration_num = 0
         
         self.init_time = time()
-        self.search_walltimes = []
-        self.results = []
+
+        # Columnar storage of all evaluated models
+        self.models: List[ArchaiModel] = []
+        self.archids: List[str] = []
+        self.extra_model_data: Dict[str, List] = {}
+        self._iteration_offsets = [0]
+        self._num_results = 0
+        self._columns = {
+            obj_name: np.empty(0, dtype=np.float64) for obj_name in self.objectives
+        }
+        self._columns.update({
+            'iteration_num': np.empty(0, dtype=np.int64),
+            'search_walltime': np.empty(0, dtype=np.float64)
+        })
+
+        # Incremental Pareto archive, stored as indices of `self.models` 
+        self._pareto_indices = np.empty(0, dtype=np.int64)
+
+    def _append_columns(self, values: Dict[str, np.ndarray]) -> None:
+        num_values = len(next(iter(values.values())))
+        new_size = self._num_results + num_values
+
+        # Grows buffers geometrically to avoid copying all results at every iteration
+        capacity = len(self._columns['iteration_num'])
+        if new_size > capacity:
+            new_capacity = max(new_size, 2 * capacity)
+
+            for col_name, col in self._columns.items():
+                new_col = np.empty(new_capacity, dtype=col.dtype)
+                new_col[:self._num_results] = col[:self._num_results]
+                self._columns[col_name] = new_col
+        
+        for col_name, col_values in values.items():
+            self._columns[col_name][self._num_results:new_size] = col_values
+
+        self._num_results = new_size
+
+    def _get_column(self, col_name: str, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        end = self._num_results if end is None else end
+        return self._columns[col_name][start:end]
+
+    def _get_minimization_array(self, indices: np.ndarray) -> np.ndarray:
+        """Gets an array of shape (len(indices), len(objectives)) with maximization objectives inverted."""
+        return np.vstack([
+            -self._columns[obj_name][indices] if obj.higher_is_better else self._columns[obj_name][indices]
+            for obj_name, obj in self.objectives.items()
+        ]).T
+
+    @property
+    def results(self) -> List[Dict[str, Any]]:
+        """Results of each search iteration (list of dictionaries with 'archid', 'models',
+        objective results and extra model data)."""
+        return [
+            {
+                'archid': self.archids[start:end],
+                'models': self.models[start:end],
+                **{obj_name: self._get_column(obj_name, start, end).copy() for obj_name in self.objectives},
+                **{col_name: col[start:end] for col_name, col in self.extra_model_data.items()}
+            }
+            for start, end in zip(self._iteration_offsets[:-1], self._iteration_offsets[1:])
+        ]
+
+    @property
+    def search_walltimes(self) -> List[float]:
+        return self._get_column('search_walltime').tolist()
 
     @property
     def all_evaluation_results(self):
         return {
-            obj_name: np.array([
-                r 
-                for iter_results in self.results
-                for r in iter_results[obj_name]
-            ], dtype=np.float32) for obj_name in self.objectives
+            obj_name: self._get_column(obj_name).astype(np.float32)
+            for obj_name in self.objectives
         }
 
     def add_iteration_results(self, models: List[ArchaiModel],
                               evaluation_results: Dict[str, np.ndarray],
                               extra_model_data: Optional[Dict[str, List]] = None):
-        """Stores results of the current search iteration.
+        """Stores results of the current search iteration and updates the Pareto-frontier
+        archive with the new models.
 
         Args:
             models (List[ArchaiModel]): Models evaluated in the search iteration
@@ -52,24 +122,44 @@ class SearchResults():
         
         if extra_model_data:
             assert all(len(v) == len(models) for v in extra_model_data.values())
-        
-        evaluation_results = copy.deepcopy(evaluation_results)
-        evaluation_results.update(extra_model_data)
 
-        self.results.append({
-            'archid': [m.archid for m in models],
-            'models': [m for m in models], # To avoid creating a reference to `models` variable
-            **evaluation_results
-        })
+        start = self._num_results
+
+        self.models.extend(models)
+        self.archids.extend([m.archid for m in models])
+
+        # Extra data columns not seen before are filled with `None` for previous iterations
+        for col_name in set(self.extra_model_data) | set(extra_model_data):
+            self.extra_model_data.setdefault(col_name, [None] * start).extend(
+                list(extra_model_data.get(col_name, [None] * len(models)))
+            )
 
         # Adds current search duration in hours
-        self.search_walltimes += [(time() - self.init_time) / 3600] * len(models)
+        self._append_columns({
+            **{
+                obj_name: np.asarray(evaluation_results[obj_name], dtype=np.float64)
+                for obj_name in self.objectives
+            },
+            'iteration_num': np.full(len(models), self.iteration_num, dtype=np.int64),
+            'search_walltime': np.full(len(models), (time() - self.init_time) / 3600, dtype=np.float64)
+        })
+
+        self._iteration_offsets.append(self._num_results)
         self.iteration_num += 1
 
+        # Only the current archive and the new points can be on the updated frontier.
+        # Archive indices precede new indices, so duplicated points keep their first occurrence
+        candidates = np.concatenate([self._pareto_indices, np.arange(start, self._num_results)])
+        self._pareto_indices = candidates[
+            _find_pareto_frontier_points(self._get_minimization_array(candidates))
+        ]
+
     def get_pareto_frontier(self, start_iteration: int = 0, end_iteration: Optional[int] = None) -> Dict:
         """Gets the pareto-frontier using the search results from iterations `start_iteration` to `end_iteration`.
         If `end_iteration=None`, uses the last iteration. 
 
+        The frontier of all iterations is kept incrementally and is returned without recomputation.
+
         Args:
             start_iteration (int, optional): Start search iteration. Defaults to 0
             end_iteration (Optional[int], optional): End search iteration. If `None`, uses
@@ -80,50 +170,45 @@ class SearchResults():
              'indices' and 'iteration_nums' for all pareto-frontier members.
         """        
         end_iteration = end_iteration or self.iteration_num
+        start = self._iteration_offsets[start_iteration]
+        end = self._iteration_offsets[end_iteration]
+
+        if start == 0 and end == self._num_results:
+            pareto_indices = self._pareto_indices
+        else:
+            pareto_indices = start + np.array(
+                _find_pareto_frontier_points(self._get_minimization_array(np.arange(start, end))),
+                dtype=np.int64
+            )
 
-        all_models = [
-            model 
-            for it in range(start_iteration, end_iteration)
-            for model in self.results[it]['models']
-        ]
-        
-        all_results = {
-            obj_name: np.concatenate([
-                self.results[it][obj_name]
-                for it in range(start_iteration, end_iteration)
-            ], axis=0)
-            for obj_name in self.objectives.keys()
+        return {
+            'models': [self.models[idx] for idx in pareto_indices],
+            'evaluation_results': {
+                obj_name: self._columns[obj_name][pareto_indices]
+                for obj_name in self.objectives
+            },
+            'indices': pareto_indices - start,
+            'iteration_nums': self._columns['iteration_num'][pareto_indices]
         }
 
-        all_iteration_nums = np.array([
-            it 
-            for it in range(start_iteration, end_iteration)
-            for _ in range(len(self.results[it]['models']))
-        ])
-
-        pareto_frontier = get_pareto_frontier(all_models, all_results, self.objectives)
-        pareto_frontier.update({'iteration_nums': all_iteration_nums[pareto_frontier['indices']]})
-
-        return pareto_frontier
-
     def get_search_state_df(self) -> pd.DataFrame:
         """Gets the search state pd.DataFrame
 
         Returns:
             pd.DataFrame: search state DataFrame.
         """        
-        state_df = pd.concat([
-            pd.DataFrame(it_results).assign(iteration_num=it)
-            for it, it_results in enumerate(self.results)
-        ], axis=0).reset_index(drop=True)
-        state_df['Search walltime (hours)'] = self.search_walltimes
-
-        pareto_frontier = self.get_pareto_frontier()
+        state_df = pd.DataFrame({
+            'archid': self.archids,
+            **{obj_name: self._get_column(obj_name) for obj_name in self.objectives},
+            **self.extra_model_data,
+            'iteration_num': self._get_column('iteration_num'),
+            'Search walltime (hours)': self._get_column('search_walltime')
+        })
 
         state_df['is_pareto'] = False
-        state_df.loc[pareto_frontier['indices'], 'is_pareto'] = True
+        state_df.loc[self._pareto_indices, 'is_pareto'] = True
 
-        return state_df.drop(['models'], axis=1)
+        return state_df
 
     def save_search_state(self, file: Union[str, Path]) -> None:
         state_df = self.get_search_state_df()
@@ -160,11 +245,16 @@ class SearchResults():
         colors = plt.cm.plasma(np.linspace(0, 1, self.iteration_num + 1))
         sm = plt.cm.ScalarMappable(cmap=plt.cm.plasma, norm=plt.Normalize(vmin=0, vmax=self.iteration_num + 1))
 
+        # Frontier of iterations <= s is the frontier of (frontier of iterations < s) + iteration s
+        points = status_df[['x', 'y']].values
+        iteration_nums = status_df['iteration_num'].values
+        pareto_indices = np.empty(0, dtype=np.int64)
+
         for s in status_range:
-            generation_df = status_df.query(f'iteration_num <= {s}').copy()
-            
-            points = generation_df[['x', 'y']].values
-            pareto_df = generation_df.iloc[_find_pareto_frontier_points(points)].copy()
+            candidates = np.concatenate([pareto_indices, np.where(iteration_nums == s)[0]])
+            pareto_indices = candidates[_find_pareto_frontier_points(points[candidates])]
+
+            pareto_df = status_df.iloc[pareto_indices].copy()
             pareto_df = pareto_df.sort_values('x')
 
             ax.step(
@@ -1,8 +1,9 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from typing import List, Tuple, Optional, Dict, Any, Callable
+from typing import List, Tuple, Optional, Dict, Any, Callable, Union
 from pathlib import Path
+import os
 
 import lmdb
 import torch
@@ -16,8 +17,59 @@ from torch.utils.data import Dataset
 from archai.discrete_search import DatasetProvider
 from archai.common.config import Config
 from archai.common.common import logger
+from archai.common.lru_cache import LRUCache
 from archai.common import utils
 
+# LMDB environments can only be opened once per process, so datasets of the same LMDB share them
+_LMDB_ENVS: Dict[Tuple[int, str], lmdb.Environment] = {}
+
+
+def _get_lmdb_env(lmdb_path: str) -> lmdb.Environment:
+    env_key = (os.getpid(), os.path.realpath(lmdb_path))
+
+    if env_key not in _LMDB_ENVS:
+        # Environments inherited from the parent process (e.g by forked `DataLoader` workers)
+        # can't be used and must be closed before the same LMDB is opened again
+        for inherited_key in [k for k in _LMDB_ENVS if k[1] == env_key[1]]:
+            _LMDB_ENVS.pop(inherited_key).close()
+
+        _LMDB_ENVS[env_key] = lmdb.open(
+            lmdb_path, subdir=False, readonly=True, lock=False,
+            readahead=True, map_size=1099511627776 * 2, max_readers=100
+        )
+
+    return _LMDB_ENVS[env_key]
+
+
+def normalize_images(images: torch.Tensor, device: Optional[Union[str, torch.device]] = None,
+                     mean: Optional[Tuple[float, ...]] = None,
+                     std: Optional[Tuple[float, ...]] = None) -> torch.Tensor:
+    """Converts a batch of `uint8` images (e.g from `TensorpackLmdbImageDataset(normalize=False)`)
+    to float images in [0, 1], optionally moving them to `device` first and standardizing them.
+
+    Copying `uint8` batches to the device moves 4x less data than float batches, and a single
+    batched conversion is cheaper than per-sample conversions in the data loader workers.
+
+    Args:
+        images (torch.Tensor): (N, C, H, W) `uint8` images.
+        device (Optional[Union[str, torch.device]], optional): Device of the output. Defaults to None.
+        mean (Optional[Tuple[float, ...]], optional): Per-channel mean (in [0, 1] scale). Defaults to None.
+        std (Optional[Tuple[float, ...]], optional): Per-channel standard deviation (in [0, 1] scale).
+            Defaults to None.
+
+    Returns:
+        torch.Tensor: (N, C, H, W) float images.
+    """
+    images = images.to(device, non_blocking=True).float().div_(255.0)
+
+    if mean is not None:
+        images.sub_(torch.tensor(mean, device=images.device).view(1, -1, 1, 1))
+
+    if std is not None:
+        images.div_(torch.tensor(std, device=images.device).view(1, -1, 1, 1))
+
+    return images
+
 
 class TensorpackLmdbImageDataset(Dataset):
     def __init__(self, lmdb_path: str, img_key: str,
@@ -28,8 +80,15 @@ class TensorpackLmdbImageDataset(Dataset):
                  is_bgr: bool = True, valid_resolutions: Optional[List[Tuple]] = None,
                  augmentation_fn: Optional[Callable] = None,
                  mask_interpolation_method: int = cv2.INTER_NEAREST,
+                 normalize: bool = True, cache_size: int = 0,
+                 index_path: Optional[str] = None,
                  **kwargs):
         """Tensorpack LMDB torch Dataset.
+
+        The list of LMDB keys is stored in an index file next to the LMDB (see `index_path`),
+        so it is only built once by iterating over the database. The LMDB environment is opened
+        lazily by each process, so the dataset can be used by forked `DataLoader` workers.
+
         Args:
             lmdb_path (str): path to LMDB
             img_key (str): key of image in LMDB
@@ -47,16 +106,20 @@ class TensorpackLmdbImageDataset(Dataset):
             aug_fn(image: np.ndarray, mask: np.ndarray) and returns a dictionary with
             'image' and 'mask' keys. Defaults to None.
             mask_interpolation_method (int, optional): interpolation method for mask. Defaults to cv2.INTER_NEAREST.
+            normalize (bool, optional): if images should be returned as float tensors in [0, 1]. If False,
+            images are returned as `uint8` tensors, to be converted in batches with `normalize_images`.
+            Defaults to True.
+            cache_size (int, optional): maximum number of decoded images (and masks) cached by each
+            process, before augmentation and resizing. Useful for small datasets. Defaults to 0.
+            index_path (Optional[str], optional): path to the key index file. If the file is missing or
+            outdated, it is rebuilt from the LMDB. Defaults to `{lmdb_path}.keys`.
         """
         self.lmdb_path = lmdb_path
-        self.db = lmdb.open(
-            lmdb_path, subdir=False, readonly=True, lock=False,
-            readahead=True, map_size=1099511627776 * 2, max_readers=100
-        )
+        self.index_path = index_path or f'{lmdb_path}.keys'
         self.img_key = img_key
         self.mask_key = mask_key
-        self.txn = self.db.begin()
-        self.keys = [k for k, _ in self.txn.cursor() if k != b'__keys__']
+        self._pid = None
+        self.keys = self._load_keys()
         self.img_size = img_size
         self.serializer = serializer
         self.img_format = img_format
@@ -76,6 +139,83 @@ class TensorpackLmdbImageDataset(Dataset):
         self.valid_resolutions = valid_resolutions
         self.augmentation_fn = augmentation_fn
         self.mask_interpolation_method = mask_interpolation_method
+        self.normalize = normalize
+        self.cache_size = cache_size
+        self.cache = LRUCache(maxsize=cache_size)
+
+    def __getstate__(self) -> Dict:
+        # LMDB transactions can't be shared across processes
+        state = self.__dict__.copy()
+        state['_pid'] = None
+        state.pop('_txn', None)
+
+        return state
+
+    @property
+    def txn(self) -> lmdb.Transaction:
+        # Opens the environment on the first access of each process
+        if self._pid != os.getpid():
+            self._txn = _get_lmdb_env(self.lmdb_path).begin()
+            self._pid = os.getpid()
+
+        return self._txn
+
+    def _load_keys(self) -> List[bytes]:
+        stat = os.stat(self.lmdb_path)
+        lmdb_info = {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = msgpack.load(f)
+
+            if index['lmdb'] == lmdb_info:
+                return index['keys']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        logger.info(f'Building key index of {self.lmdb_path}')
+
+        with _get_lmdb_env(self.lmdb_path).begin() as txn:
+            keys = [k for k in txn.cursor().iternext(keys=True, values=False) if k != b'__keys__']
+
+        # Index is written to a temporary file first, so concurrent readers never see partial files
+        try:
+            tmp_index_path = f'{self.index_path}.{os.getpid()}.tmp'
+
+            with open(tmp_index_path, 'wb') as f:
+                msgpack.dump({'lmdb': lmdb_info, 'keys': keys}, f)
+
+            os.replace(tmp_index_path, self.index_path)
+        except OSError as e:
+            logger.info(f'Could not save key index to {self.index_path}: {e}')
+
+        return keys
+
+    def _decode(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        if idx in self.cache:
+            return self.cache[idx]
+
+        sample = self._get_datapoint(idx)
+
+        img = np.frombuffer(sample[self.img_key], dtype=np.uint8).reshape((-1, 1))
+        img = cv2.imdecode(img, cv2.IMREAD_COLOR)
+        img = img[..., ::-1].copy() if self.is_bgr else img
+
+        if self.ones_mask:
+            mask = np.ones(img.shape[:2], dtype=np.uint8)
+        elif self.zeroes_mask or len(sample[self.mask_key]) == 0:
+            mask = np.zeros(img.shape[:2], dtype=np.uint8)
+        else:
+            mask_cv2_buf = np.frombuffer(sample[self.mask_key], dtype=np.uint8).reshape((-1, 1))
+            mask = cv2.imdecode(mask_cv2_buf, cv2.IMREAD_GRAYSCALE)
+
+        if self.cache_size > 0:
+            # Cached arrays are shared by all accesses, so they are made read-only
+            img.setflags(write=False)
+            mask.setflags(write=False)
+            self.cache[idx] = (img, mask)
+
+        return img, mask
 
     def _get_datapoint(self, idx) -> Dict:
         key = self.keys[idx]
@@ -101,21 +241,8 @@ class TensorpackLmdbImageDataset(Dataset):
 
     def __getitem__(self, idx: int) -> Optional[Dict]:
         try:
-            sample = self._get_datapoint(idx)
-
             if self.img_format == 'numpy':
-                img = np.frombuffer(sample[self.img_key], dtype=np.uint8).reshape((-1, 1))
-                img = cv2.imdecode(img, cv2.IMREAD_COLOR)
-                img = img[..., ::-1].copy() if self.is_bgr else img
-
-                if self.ones_mask:
-                    mask = np.ones(img.shape[:2], dtype=np.uint8)
-                elif self.zeroes_mask or len(sample[self.mask_key]) == 0:
-                    mask = np.zeros(img.shape[:2], dtype=np.uint8)
-                else:
-                    mask_cv2_buf = np.frombuffer(sample[self.mask_key], dtype=np.uint8).reshape((-1, 1))
-                    mask = cv2.imdecode(mask_cv2_buf, cv2.IMREAD_GRAYSCALE)
-                
+                img, mask = self._decode(idx)
                 sample = {'image': img, 'mask': mask}
 
                 if self.augmentation_fn:
@@ -136,11 +263,11 @@ class TensorpackLmdbImageDataset(Dataset):
                 raise NotImplementedError(f'unsupported image format {self.img_format}')
 
 
+            image = torch.from_numpy(np.ascontiguousarray(sample['image'].transpose(2, 0, 1)))
+
             return {
-                'image': torch.tensor(
-                    sample['image'].transpose(2, 0, 1) / 255.0, dtype=torch.float
-                ),
-                'mask': torch.tensor(sample['mask'], dtype=torch.long),
+                'image': image.float().div_(255.0) if self.normalize else image,
+                'mask': torch.from_numpy(sample['mask'].astype(np.int64)),
                 'dataset_path': self.lmdb_path,
                 'key': self.keys[idx]
             }
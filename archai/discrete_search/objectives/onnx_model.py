@@ -1,5 +1,6 @@
 from typing import Tuple, Union, List, Dict, Optional
-import io
+from functools import partial
+import os
 
 import torch
 from overrides import overrides
@@ -8,7 +9,29 @@ import onnxruntime as rt
 from archai.discrete_search.api.archai_model import ArchaiModel
 from archai.cv.datasets.dataset_provider import DatasetProvider
 from archai.discrete_search.api.objective import Objective
-from archai.common.timing import MeasureBlockTime
+from archai.discrete_search.utils.onnx_cache import OnnxModelCache
+from archai.common.benchmark_utils import benchmark
+
+
+# Properties of `onnxruntime.SessionOptions`, which cannot be copied with `copy`
+SESSION_OPTIONS_PROPERTIES = [
+    'enable_cpu_mem_arena', 'enable_mem_pattern', 'enable_mem_reuse', 'enable_profiling',
+    'execution_mode', 'execution_order', 'graph_optimization_level', 'inter_op_num_threads',
+    'intra_op_num_threads', 'log_severity_level', 'log_verbosity_level', 'logid',
+    'optimized_model_filepath', 'profile_file_prefix', 'use_deterministic_compute'
+]
+
+
+def _copy_session_options(sess_options: Optional[rt.SessionOptions]) -> rt.SessionOptions:
+    # Session options passed by users are not modified
+    new_sess_options = rt.SessionOptions()
+
+    if sess_options is not None:
+        for name in SESSION_OPTIONS_PROPERTIES:
+            if hasattr(sess_options, name):
+                setattr(new_sess_options, name, getattr(sess_options, name))
+
+    return new_sess_options
 
 
 class AvgOnnxLatency(Objective):
@@ -16,17 +39,47 @@ class AvgOnnxLatency(Objective):
 
     def __init__(self, input_shape: Union[Tuple, List[Tuple]], num_trials: int = 1,
                  input_dtype: str = 'torch.FloatTensor', rand_range: Tuple[float, float] = (0.0, 1.0),
-                 export_kwargs: Optional[Dict] = None, inf_session_kwargs: Optional[Dict] = None):
+                 export_kwargs: Optional[Dict] = None, inf_session_kwargs: Optional[Dict] = None,
+                 cache_dir: Optional[str] = None, max_sessions: int = 8,
+                 n_warmup: int = 1, rel_ci_width: Optional[float] = None,
+                 time_budget: Optional[float] = None, statistic: str = 'mean',
+                 num_threads: Optional[int] = None, cpus: Optional[List[int]] = None):
         """Uses the average ONNX Latency (in seconds) of an architecture as an objective function for
         minimization.
 
+        Latency is measured with `archai.common.benchmark_utils.benchmark`, which can stop
+        early once the median latency is known to a target precision.
+
+        Exported models are cached by architecture id (see
+        `archai.discrete_search.utils.onnx_cache.OnnxModelCache`), so repeated evaluations of
+        an architecture reuse its exported graph and inference session.
+
         Args:
             input_shape (Union[Tuple, List[Tuple]]): Model Input shape or list of model input shapes.
-            num_trials (int, optional): Number of trials. Defaults to 1.
+            num_trials (int, optional): Maximum number of timed trials. Defaults to 1.
             export_kwargs (Optional[Dict], optional): Optional dictionary of key-value args passed to
                 `torch.onnx.export`. Defaults to None.
             inf_session_kwargs (Optional[Dict], optional): Optional dictionary of key-value args 
                 passed to `onnxruntime.InferenceSession()`. Defaults to None.
+            cache_dir (Optional[str], optional): Directory of the exported models cache, which
+                can be shared across processes and search runs. If `None`, uses a temporary
+                directory. Defaults to None.
+            max_sessions (int, optional): Maximum number of inference sessions kept in memory.
+                Defaults to 8.
+            n_warmup (int, optional): Number of untimed warmup runs. Defaults to 1.
+            rel_ci_width (Optional[float], optional): Stops timing once the confidence interval
+                of the median is narrower than this fraction of the median (e.g 0.05). If `None`,
+                runs `num_trials` trials. Defaults to None.
+            time_budget (Optional[float], optional): Maximum time (in seconds) spent timing each
+                architecture. Defaults to None.
+            statistic (str, optional): Statistic of the trial times used as the objective value
+                ('mean', 'median', 'p90', 'p99', 'min' or 'max'). Defaults to 'mean'.
+            num_threads (Optional[int], optional): Number of intra-op threads of the inference
+                sessions. If `None`, uses the ONNXRuntime default. If set, the properties of the
+                `sess_options` in `inf_session_kwargs` are copied to new session options, without
+                the entries added by its methods (e.g `add_session_config_entry`). Defaults to None.
+            cpus (Optional[List[int]], optional): CPUs the timing thread is pinned to.
+                Defaults to None.
         """
         input_shapes = [input_shape] if isinstance(input_shape, tuple) else input_shape            
         
@@ -39,32 +92,57 @@ class AvgOnnxLatency(Objective):
         self.input_dtype = input_dtype
         self.rand_range = rand_range
         self.num_trials = num_trials
+        self.n_warmup = n_warmup
+        self.rel_ci_width = rel_ci_width
+        self.time_budget = time_budget
+        self.statistic = statistic
+        self.num_threads = num_threads
+        self.cpus = cpus
         self.export_kwargs = export_kwargs or dict()
         self.inf_session_kwargs = inf_session_kwargs or dict()
 
-    @overrides
-    def evaluate(self, model: ArchaiModel, dataset_provider: DatasetProvider,
-                budget: Optional[float] = None) -> float:
+        self.onnx_cache = OnnxModelCache(cache_dir, max_sessions=max_sessions, session_fn=self._load_session)
+
+    def _load_session(self, model_path: str) -> rt.InferenceSession:
+        inf_session_kwargs = dict(self.inf_session_kwargs)
+
+        if self.num_threads is not None:
+            sess_options = _copy_session_options(inf_session_kwargs.get('sess_options'))
+            sess_options.intra_op_num_threads = self.num_threads
+            inf_session_kwargs['sess_options'] = sess_options
+
+        return rt.InferenceSession(model_path, **inf_session_kwargs)
+
+    def _export(self, model: ArchaiModel, output_dir: str) -> str:
         model.arch.to('cpu')
 
-        # Exports model to ONNX
-        exported_model_buffer = io.BytesIO()
+        output_path = os.path.join(output_dir, 'model.onnx')
         torch.onnx.export(
-            model.arch, self.sample_input, exported_model_buffer,
+            model.arch, self.sample_input, output_path,
             input_names=[f'input_{i}' for i in range(len(self.sample_input))],
             **self.export_kwargs
         )
-        
-        exported_model_buffer.seek(0)
 
-        # Benchmarks ONNX model
-        onnx_session = rt.InferenceSession(exported_model_buffer.read(), **self.inf_session_kwargs)
+        return output_path
+
+    @overrides
+    def evaluate(self, model: ArchaiModel, dataset_provider: DatasetProvider,
+                budget: Optional[float] = None) -> float:
+        # Exported graphs only depend on the architecture and export settings
+        key = self.onnx_cache.get_key(model.archid, {
+            'input_shapes': [list(inp.shape) for inp in self.sample_input],
+            'input_dtype': self.input_dtype,
+            'export_kwargs': self.export_kwargs
+        })
+
+        # Exports model to ONNX (if not cached) and benchmarks it
+        onnx_session = self.onnx_cache.get_session(key, partial(self._export, model))
         sample_input = {f'input_{i}': inp.numpy() for i, inp in enumerate(self.sample_input)}
-        inf_times = []
 
-        for _ in range(self.num_trials):
-            with MeasureBlockTime('onnx_inference') as t:
-                onnx_session.run(None, input_feed=sample_input)
-            inf_times.append(t.elapsed)
+        result = benchmark(
+            partial(onnx_session.run, None, input_feed=sample_input),
+            n_warmup=self.n_warmup, max_trials=self.num_trials,
+            rel_ci_width=self.rel_ci_width, time_budget=self.time_budget, cpus=self.cpus
+        )
 
-        return sum(inf_times) / self.num_trials
+        return result.get(self.statistic)
@@ -0,0 +1,346 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import threading
+import time
+import datetime
+from abc import abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Union, Tuple, Optional, Any
+
+import torch
+from overrides import EnforceOverrides, overrides
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.api.dataset import DatasetProvider
+from archai.discrete_search.api.objective import AsyncObjective
+
+
+# `torch.onnx.export` relies on global state, so exports from worker threads are serialized
+_EXPORT_LOCK = threading.Lock()
+
+
+def get_utc_date():
+    current_date = datetime.datetime.now()
+    current_date = current_date.replace(tzinfo=datetime.timezone.utc)
+    return current_date.isoformat()
+
+
+class BenchmarkStorage(EnforceOverrides):
+    """Abstract base class for the storage used by `RemoteBenchmarkObjective`.
+
+    A storage holds a table of entities (dictionaries) indexed by architecture id, which
+    is used to communicate the status and results of benchmark jobs with remote workers,
+    and a blob store with the uploaded models. Implementations should be thread-safe,
+    since models are uploaded from a pool of worker threads.
+    """
+
+    @abstractmethod
+    def get_entity(self, archid: str) -> Optional[Dict]:
+        """Gets the entity of an architecture.
+
+        Args:
+            archid (str): Architecture id.
+
+        Returns:
+            Optional[Dict]: Entity or `None` if there is no entity for `archid`.
+        """
+
+    @abstractmethod
+    def get_entities(self, archids: List[str]) -> Dict[str, Dict]:
+        """Gets the entities of a list of architectures with as few requests as possible.
+
+        Args:
+            archids (List[str]): Architecture ids.
+
+        Returns:
+            Dict[str, Dict]: Dictionary mapping architecture ids to entities. Architectures
+                without an entity are not included.
+        """
+
+    @abstractmethod
+    def update_entity(self, archid: str, entity: Dict) -> None:
+        """Creates or replaces the entity of an architecture.
+
+        Args:
+            archid (str): Architecture id.
+            entity (Dict): Entity.
+        """
+
+    @abstractmethod
+    def upload_blob(self, src_path: str, dst_path: str) -> None:
+        """Uploads a file to the blob store.
+
+        Args:
+            src_path (str): Path to the local file.
+            dst_path (str): Destination path in the blob store.
+        """
+
+
+class LocalBenchmarkStorage(BenchmarkStorage):
+    def __init__(self, root_dir: Union[str, Path], partition_key: str = 'main', timeout: float = 60.0) -> None:
+        """Benchmark storage backed by a SQLite table and a local directory of blobs.
+
+        Useful to run and test the benchmark pipeline offline or with workers that share
+        a filesystem. Entities are stored in `root_dir/benchmark.db` and blobs in `root_dir/blobs`.
+
+        Args:
+            root_dir (Union[str, Path]): Root directory of the storage. Created if it does not exist.
+            partition_key (str, optional): Partition used to record all entities. Defaults to 'main'.
+            timeout (float, optional): Seconds to wait for a concurrent writer to release
+                the database lock. Defaults to 60.0.
+        """
+        self.root_dir = Path(root_dir)
+        self.blob_dir = self.root_dir / 'blobs'
+        self.blob_dir.mkdir(exist_ok=True, parents=True)
+
+        self.partition_key = partition_key
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entities ('
+            'partition_key TEXT NOT NULL, row_key TEXT NOT NULL, entity TEXT NOT NULL, '
+            'PRIMARY KEY (partition_key, row_key))'
+        )
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Connections cannot be shared across threads or forked processes
+        if getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(str(self.root_dir / 'benchmark.db'), timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+
+            self._local.connection = conn
+            self._local.pid = os.getpid()
+
+        return self._local.connection
+
+    @overrides
+    def get_entity(self, archid: str) -> Optional[Dict]:
+        return self.get_entities([archid]).get(archid)
+
+    @overrides
+    def get_entities(self, archids: List[str]) -> Dict[str, Dict]:
+        entities = {}
+
+        # SQLite limits the number of parameters of a statement
+        for i in range(0, len(archids), 500):
+            chunk = [str(archid) for archid in archids[i:i + 500]]
+            rows = self.connection.execute(
+                f'SELECT row_key, entity FROM entities WHERE partition_key=? '
+                f'AND row_key IN ({", ".join("?" * len(chunk))})',
+                [self.partition_key] + chunk
+            ).fetchall()
+
+            entities.update({row_key: json.loads(entity) for row_key, entity in rows})
+
+        return entities
+
+    @overrides
+    def update_entity(self, archid: str, entity: Dict) -> None:
+        entity = dict(entity, PartitionKey=self.partition_key, RowKey=str(archid))
+
+        self.connection.execute(
+            'INSERT OR REPLACE INTO entities VALUES (?, ?, ?)',
+            (self.partition_key, str(archid), json.dumps(entity))
+        )
+
+    @overrides
+    def upload_blob(self, src_path: str, dst_path: str) -> None:
+        src_path = Path(src_path)
+        assert src_path.is_file(), f'{src_path} does not exist or is not a file'
+
+        dst_path = self.blob_dir / dst_path
+        dst_path.parent.mkdir(exist_ok=True, parents=True)
+
+        # Copies to a temporary file first, so workers never read partially written blobs
+        tmp_path = dst_path.with_name(f'.{dst_path.name}.{threading.get_ident()}')
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+
+
+class RemoteBenchmarkObjective(AsyncObjective):
+    higher_is_better: bool = False
+
+    def __init__(self,
+                 input_shape: Union[Tuple, List[Tuple]],
+                 storage: BenchmarkStorage,
+                 metric_key: str,
+                 max_retries: int = 5,
+                 retry_interval: float = 120,
+                 backoff_factor: float = 2.0,
+                 max_retry_interval: Optional[float] = None,
+                 max_workers: int = 4,
+                 onnx_export_kwargs: Optional[Dict[str, Any]] = None):
+        """Benchmarks architectures asynchronously on remote workers.
+
+        `send` schedules the ONNX export and upload of an architecture on a pool of
+        background threads and returns immediately. Each model is uploaded to `storage`
+        and recorded with status 'new', to be picked up by remote benchmark workers that
+        write the result to the `metric_key` field of the entity. `fetch_all` waits for the
+        uploads and polls the results of all pending architectures with a single
+        `BenchmarkStorage.get_entities` request per retry, waiting exponentially longer
+        between retries. Architectures whose export or upload failed are logged and have
+        a `None` result, without affecting the rest of the batch.
+
+        Args:
+            input_shape (Union[Tuple, List[Tuple]]): Model Input shape or list of model input shapes for ONNX export.
+            storage (BenchmarkStorage): Storage used to upload models and record entities.
+            metric_key (str): Column that should be used as result
+            max_retries (int, optional): Maximum number of polls in `fetch_all`. Defaults to 5.
+            retry_interval (float, optional): Interval (in seconds) before the second poll. Defaults to 120.
+            backoff_factor (float, optional): Factor by which the interval grows after each poll.
+                Defaults to 2.0.
+            max_retry_interval (Optional[float], optional): Maximum interval between polls. Defaults to None.
+            max_workers (int, optional): Number of threads used to export and upload models. Defaults to 4.
+            onnx_export_kwargs (Dict, optional): Dictionary containing key-value arguments for `torch.onnx.export`
+        """
+        input_shapes = [input_shape] if isinstance(input_shape, tuple) else input_shape
+        self.sample_input = tuple([torch.rand(*input_shape) for input_shape in input_shapes])
+
+        self.storage = storage
+        self.metric_key = metric_key
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.backoff_factor = backoff_factor
+        self.max_retry_interval = max_retry_interval
+        self.max_workers = max_workers
+        self.onnx_export_kwargs = onnx_export_kwargs or dict()
+
+        # Architecture list and upload jobs of the current batch
+        self.archids = []
+        self.jobs: Dict[str, Future] = {}
+        self._executor = None
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state['jobs'], state['_executor'] = {}, None
+        return state
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers)
+
+        return self._executor
+
+    def __contains__(self, rowkey_id: str):
+        return self.storage.get_entity(rowkey_id) is not None
+
+    def get_entity(self, rowkey_id: str) -> Optional[Dict]:
+        return self.storage.get_entity(rowkey_id)
+
+    def update_entity(self, rowkey_id: str, entity_dict: Dict) -> None:
+        self.storage.update_entity(rowkey_id, entity_dict)
+
+    def upload_blob(self, src_path: str, dst_path: str) -> None:
+        self.storage.upload_blob(src_path, dst_path)
+
+    def _has_result(self, entity: Optional[Dict]) -> bool:
+        return entity is not None and self.metric_key in entity and bool(entity[self.metric_key])
+
+    def _export_and_upload(self, nas_model: ArchaiModel) -> None:
+        archid = str(nas_model.archid)
+
+        # Checks if architecture was already benchmarked
+        entity = self.storage.get_entity(archid)
+        if entity is not None and (entity.get('status') == 'complete' or self._has_result(entity)):
+            return
+
+        entity = {
+            'status': 'uploading', 'name': archid, 'node': platform.node(),
+            'benchmark_only': 1, 'model_date': get_utc_date(),
+            'model_name': 'model.onnx'
+        }
+
+        with TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+
+            # Exports model to ONNX
+            with _EXPORT_LOCK:
+                nas_model.arch.to('cpu')
+
+                torch.onnx.export(
+                    nas_model.arch, self.sample_input, str(tmp_dir / 'model.onnx'),
+                    input_names=[f'input_{i}' for i in range(len(self.sample_input))],
+                    **self.onnx_export_kwargs
+                )
+
+            # Uploads ONNX file to blob storage and updates the table entry
+            self.storage.update_entity(archid, entity)
+            self.storage.upload_blob(str(tmp_dir / 'model.onnx'), f'{archid}/model.onnx')
+
+        # Updates model status
+        del entity['node']
+        entity['status'] = 'new'
+
+        self.storage.update_entity(archid, entity)
+
+    @overrides
+    def send(self, nas_model: ArchaiModel, dataset_provider: DatasetProvider,
+             budget: Optional[float] = None) -> None:
+        archid = str(nas_model.archid)
+
+        # Duplicated architectures in a batch are only uploaded once
+        if archid not in self.jobs:
+            self.jobs[archid] = self.executor.submit(self._export_and_upload, nas_model)
+
+        self.archids.append(archid)
+
+    @overrides
+    def fetch_all(self) -> List[Union[float, None]]:
+        archids, jobs = self.archids, self.jobs
+
+        # Resets state
+        self.archids, self.jobs = [], {}
+
+        # Failed exports or uploads only affect their own architectures
+        failed = set()
+        for archid, job in jobs.items():
+            try:
+                job.result()
+            except Exception:
+                logging.exception(f'Failed to export or upload architecture {archid}.')
+                failed.add(archid)
+
+        results = {}
+        interval = self.retry_interval
+
+        for retry in range(self.max_retries):
+            pending = [archid for archid in jobs if archid not in results and archid not in failed]
+            if not pending:
+                break
+
+            entities = self.storage.get_entities(pending)
+
+            results.update({
+                archid: entity[self.metric_key]
+                for archid, entity in entities.items()
+                if self._has_result(entity)
+            })
+
+            if len(results) + len(failed) == len(jobs) or retry == self.max_retries - 1:
+                break
+
+            time.sleep(interval)
+            interval = min(interval * self.backoff_factor, self.max_retry_interval or float('inf'))
+
+        return [results.get(archid) for archid in archids]
@@ -0,0 +1,375 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import copy
+from abc import abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+import torch
+from overrides import overrides
+from torch import nn
+from torch.nn import functional as F
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.api.dataset import DatasetProvider, get_dataset_fingerprint
+from archai.discrete_search.api.objective import AsyncObjective, Objective
+
+
+Batch = Tuple[torch.Tensor, torch.Tensor]
+
+# Modules whose weights are scored by pruning-at-initialization proxies
+PRUNABLE_MODULES = (nn.Conv1d, nn.Conv2d, nn.Conv3d, nn.Linear)
+
+
+def get_logits(output: Any) -> torch.Tensor:
+    """Gets the logits from the output of a model.
+
+    Tuples and lists are assumed to end with the logits (e.g `(features, logits)` of
+    NATS-Bench models) and objects with a `logits` attribute (e.g HuggingFace outputs)
+    are unwrapped.
+
+    Args:
+        output (Any): Model output.
+
+    Returns:
+        torch.Tensor: Logits.
+    """
+    if isinstance(output, (tuple, list)):
+        return output[-1]
+
+    if hasattr(output, 'logits'):
+        return output.logits
+
+    return output
+
+
+def get_prunable_weights(model: nn.Module) -> List[torch.Tensor]:
+    """Gets the weights of the convolutional and linear layers of a model.
+
+    Args:
+        model (nn.Module): PyTorch model.
+
+    Returns:
+        List[torch.Tensor]: Weights of the prunable layers.
+    """
+    return [
+        m.weight for m in model.modules()
+        if isinstance(m, PRUNABLE_MODULES) and m.weight is not None and m.weight.requires_grad
+    ]
+
+
+class ZeroCostProxy(Objective):
+    def __init__(self, batch_size: int = 64, num_batches: int = 1,
+                 device: str = 'cpu', max_workers: int = 1,
+                 loss_fn: Optional[Callable] = None, seed: int = 0,
+                 max_cached_datasets: int = 4):
+        """Base class of zero-cost proxies, which estimate the trainability of an untrained
+        architecture from a few minibatches of the training set of a `DatasetProvider`.
+
+        Minibatches are sampled once per dataset (identified by `get_dataset_fingerprint`, or by
+        the provider object if it has no fingerprint) and reused for every architecture, so all
+        architectures are scored on the same data. Models are copied before being scored, so
+        evaluations do not change their weights, gradients or normalization statistics.
+
+        Several architectures can be scored at once with `evaluate_batch` (or with
+        `BatchedZeroCostProxy`, when used with `evaluate_models` and search algorithms).
+
+        Subclasses are expected to implement `ZeroCostProxy.score`.
+
+        Args:
+            batch_size (int, optional): Minibatch size. Defaults to 64.
+            num_batches (int, optional): Number of minibatches used to score each architecture.
+                Scores of each minibatch are averaged. Defaults to 1.
+            device (str, optional): Device used to score the architectures. Defaults to 'cpu'.
+            max_workers (int, optional): Number of architectures scored concurrently by
+                `evaluate_batch`, which can increase the throughput of models too small to
+                use all CPU cores. Defaults to 1.
+            loss_fn (Optional[Callable], optional): Loss function `loss_fn(logits, targets)` used
+                by proxies that require a loss. If `None`, uses cross-entropy. Defaults to None.
+            seed (int, optional): Seed used to sample the minibatches. Defaults to 0.
+            max_cached_datasets (int, optional): Maximum number of datasets whose minibatches are
+                kept in memory. Defaults to 4.
+        """
+        assert batch_size > 0 and num_batches > 0
+        assert max_workers > 0
+
+        self.batch_size = batch_size
+        self.num_batches = num_batches
+        self.device = device
+        self.max_workers = max_workers
+        self.loss_fn = loss_fn or F.cross_entropy
+        self.seed = seed
+        self.max_cached_datasets = max_cached_datasets
+
+        self._batches = OrderedDict()
+
+    def get_batches(self, dataset: DatasetProvider, num_batches: Optional[int] = None) -> List[Batch]:
+        """Gets the minibatches used to score architectures.
+
+        Args:
+            dataset (DatasetProvider): Dataset provider.
+            num_batches (Optional[int], optional): Number of minibatches. If `None`,
+                uses `num_batches`. Defaults to None.
+
+        Returns:
+            List[Batch]: List of (inputs, targets) minibatches.
+        """
+        num_batches = num_batches or self.num_batches
+
+        # Providers without a fingerprint are identified by the object itself, which is
+        # kept in the cache so its id is not reused
+        fingerprint = get_dataset_fingerprint(dataset)
+        key = fingerprint if fingerprint is not None else id(dataset)
+
+        _, batches = self._batches.get(key, (None, []))
+        if len(batches) < num_batches:
+            train_data, _ = dataset.get_train_val_datasets()
+            dataloader = torch.utils.data.DataLoader(
+                train_data, batch_size=self.batch_size, shuffle=True, drop_last=True,
+                generator=torch.Generator().manual_seed(self.seed)
+            )
+
+            batches = []
+            for x, y in dataloader:
+                batches.append((x.to(self.device), y.to(self.device)))
+
+                if len(batches) == num_batches:
+                    break
+
+            if len(batches) < num_batches:
+                raise ValueError(
+                    f'Training set has less than {num_batches} minibatches of size {self.batch_size}.'
+                )
+
+        self._batches[key] = (dataset, batches)
+        self._batches.move_to_end(key)
+        while len(self._batches) > self.max_cached_datasets:
+            self._batches.popitem(last=False)
+
+        return batches[:num_batches]
+
+    @abstractmethod
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        """Scores a model on a minibatch.
+
+        Args:
+            model (nn.Module): Copy of the evaluated model, in training mode, which can
+                be freely modified.
+            batch (Batch): (inputs, targets) minibatch.
+
+        Returns:
+            float: Proxy score.
+        """
+
+    def _evaluate(self, model: ArchaiModel, batches: List[Batch]) -> float:
+        arch = copy.deepcopy(model.arch).to(self.device).train()
+        return sum(self.score(arch, batch) for batch in batches) / len(batches)
+
+    def _get_num_batches(self, budget: Optional[float] = None) -> int:
+        if budget is None:
+            return self.num_batches
+
+        return max(1, round(self.num_batches * budget))
+
+    @overrides
+    def evaluate(self, model: ArchaiModel, dataset: DatasetProvider,
+                 budget: Optional[float] = None) -> float:
+        return self._evaluate(model, self.get_batches(dataset, self._get_num_batches(budget)))
+
+    def evaluate_batch(self, models: List[ArchaiModel], dataset: DatasetProvider,
+                       budget: Optional[float] = None) -> List[float]:
+        """Scores a list of architectures on the same minibatches, using up to
+        `max_workers` concurrent evaluations.
+
+        Args:
+            models (List[ArchaiModel]): Evaluated models.
+            dataset (DatasetProvider): Dataset provider.
+            budget (Optional[float], optional): Multiplier of the number of minibatches.
+                Defaults to None.
+
+        Returns:
+            List[float]: Scores of each model.
+        """
+        batches = self.get_batches(dataset, self._get_num_batches(budget))
+
+        if self.max_workers == 1 or len(models) == 1:
+            return [self._evaluate(model, batches) for model in models]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda model: self._evaluate(model, batches), models))
+
+
+class GradNorm(ZeroCostProxy):
+    """Sum of the L2 norms of the loss gradients of the prunable weights
+    (Abdelfattah et al., 2021). Higher is better."""
+
+    higher_is_better: bool = True
+
+    @overrides
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        x, y = batch
+        weights = get_prunable_weights(model)
+
+        loss = self.loss_fn(get_logits(model(x)), y)
+        grads = torch.autograd.grad(loss, weights, allow_unused=True)
+
+        return sum(g.norm().item() for g in grads if g is not None)
+
+
+class Snip(ZeroCostProxy):
+    """Sum of the connection sensitivities `|w * dL/dw|` of the prunable weights
+    (Lee et al., 2019). Higher is better."""
+
+    higher_is_better: bool = True
+
+    @overrides
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        x, y = batch
+        weights = get_prunable_weights(model)
+
+        loss = self.loss_fn(get_logits(model(x)), y)
+        grads = torch.autograd.grad(loss, weights, allow_unused=True)
+
+        return sum((w * g).abs().sum().item() for w, g in zip(weights, grads) if g is not None)
+
+
+class Synflow(ZeroCostProxy):
+    """Synaptic flow `sum(w * dR/dw)` of the prunable weights, where `R` is the sum of
+    the outputs of the linearized model (absolute weights) on an all-ones input
+    (Tanaka et al., 2020). Data-independent, except for the input shape. Higher is better."""
+
+    higher_is_better: bool = True
+
+    @overrides
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        x, _ = batch
+
+        # Evaluation mode with untrained statistics turns batch normalization
+        # into an affine layer, as in the original formulation
+        model = model.double().eval()
+
+        with torch.no_grad():
+            for p in model.state_dict().values():
+                if p.is_floating_point():
+                    p.abs_()
+
+        weights = get_prunable_weights(model)
+
+        output = get_logits(model(torch.ones_like(x[:1], dtype=torch.double)))
+        grads = torch.autograd.grad(output.sum(), weights, allow_unused=True)
+
+        return sum((w * g).sum().item() for w, g in zip(weights, grads) if g is not None)
+
+
+class JacobianCovariance(ZeroCostProxy):
+    higher_is_better: bool = True
+
+    def __init__(self, *args, eps: float = 1e-5, **kwargs):
+        """Correlation of the input Jacobians of a minibatch (Mellor et al., 2021). Architectures
+        whose Jacobians are less correlated across inputs are better at distinguishing them.
+        Higher is better.
+
+        Args:
+            eps (float, optional): Constant added to the eigenvalues of the correlation
+                matrix. Defaults to 1e-5.
+            *args, **kwargs: Arguments of `ZeroCostProxy`.
+        """
+        super().__init__(*args, **kwargs)
+        self.eps = eps
+
+    @overrides
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        x, _ = batch
+        x = x.clone().requires_grad_(True)
+
+        output = get_logits(model(x))
+        jacobian, = torch.autograd.grad(output.sum(), x)
+
+        corr = torch.corrcoef(jacobian.reshape(x.size(0), -1).double())
+        if not torch.isfinite(corr).all():
+            return float('-inf')
+
+        eigvals = torch.linalg.eigvalsh(corr)
+
+        return -torch.sum(torch.log(eigvals + self.eps) + 1.0 / (eigvals + self.eps)).item()
+
+
+class NtkConditionNumber(ZeroCostProxy):
+    higher_is_better: bool = False
+
+    def __init__(self, *args, ntk_batch_size: Optional[int] = 32, **kwargs):
+        """Condition number of the empirical neural tangent kernel of the prunable weights
+        on a minibatch (Chen et al., 2021). Lower is better.
+
+        Args:
+            ntk_batch_size (Optional[int], optional): Number of inputs of each minibatch used to
+                calculate the kernel, which requires one backward pass per input. If `None`, uses
+                the whole minibatch. Defaults to 32.
+            *args, **kwargs: Arguments of `ZeroCostProxy`.
+        """
+        super().__init__(*args, **kwargs)
+        self.ntk_batch_size = ntk_batch_size
+
+    @overrides
+    def score(self, model: nn.Module, batch: Batch) -> float:
+        x, _ = batch
+        x = x[:self.ntk_batch_size]
+        weights = get_prunable_weights(model)
+
+        output = get_logits(model(x))
+
+        # Gradients of the summed logits of each input. On CPU, one backward pass per
+        # input is faster than a vectorized pass (`is_grads_batched=True`)
+        grads = []
+        for i in range(x.size(0)):
+            input_grads = torch.autograd.grad(output[i].sum(), weights, retain_graph=True, allow_unused=True)
+            grads.append(torch.cat([g.flatten() for g in input_grads if g is not None]))
+
+        grads = torch.stack(grads).double()
+
+        eigvals = torch.linalg.eigvalsh(grads @ grads.t())
+        if eigvals[0] <= 0:
+            return float('inf')
+
+        return (eigvals[-1] / eigvals[0]).item()
+
+
+class BatchedZeroCostProxy(AsyncObjective):
+    def __init__(self, proxy: ZeroCostProxy):
+        """Asynchronous wrapper of a `ZeroCostProxy`, that scores all the architectures
+        sent with `send` in a single `ZeroCostProxy.evaluate_batch` call when `fetch_all`
+        is called (e.g by `evaluate_models` and search algorithms).
+
+        Args:
+            proxy (ZeroCostProxy): Zero-cost proxy.
+        """
+        self.proxy = proxy
+        self.higher_is_better = proxy.higher_is_better
+        self.queue = []
+
+    @overrides
+    def send(self, arch: ArchaiModel, dataset: DatasetProvider,
+             budget: Optional[float] = None) -> None:
+        self.queue.append((arch, dataset, budget))
+
+    @overrides
+    def fetch_all(self) -> List[Union[float, None]]:
+        results = [None] * len(self.queue)
+
+        # Architectures with the same dataset and budget are scored together
+        groups = OrderedDict()
+        for idx, (arch, dataset, budget) in enumerate(self.queue):
+            groups.setdefault((id(dataset), budget), []).append(idx)
+
+        for (_, budget), indices in groups.items():
+            dataset = self.queue[indices[0]][1]
+            scores = self.proxy.evaluate_batch([self.queue[i][0] for i in indices], dataset, budget)
+
+            for idx, score in zip(indices, scores):
+                results[idx] = score
+
+        self.queue = []
+
+        return results
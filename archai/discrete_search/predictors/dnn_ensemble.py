@@ -1,5 +1,7 @@
+import math
+from typing import Optional
+
 from overrides.overrides import overrides
-from tqdm import tqdm
 import torch
 import torch.nn as nn
 import torch.nn.functional as f
@@ -10,54 +12,110 @@ from archai.discrete_search.api.predictor import Predictor, MeanVar
 
 class PredictiveDNNEnsemble(Predictor):
     def __init__(self, num_ensemble_members: int = 5, num_layers: int = 5,
-                 width: int = 64, lr: float = 1e-4, num_tr_steps: int = 2_000):
+                 width: int = 64, lr: float = 1e-4, num_tr_steps: int = 2_000,
+                 device: Optional[str] = None, warm_start: bool = True,
+                 val_fraction: float = 0.2, patience: int = 100,
+                 min_rel_improvement: float = 1e-3, seed: Optional[int] = None):
         """Deep Neural Network Ensemble predictor. Predicts the outcome of a set
         of expensive objectives using an ensemble of MLP models.
 
+        All members are trained together as a single batched model (see `FFEnsemble`). Each
+        member holds out a different random subset of the data, which is used for early stopping
+        and keeps the members diverse. When `warm_start=True`, subsequent calls to `fit`
+        (e.g from `MoBananasSearch`) continue training from the previous weights.
+
         Args:
             num_ensemble_members (int, optional): Number of ensemble members. Defaults to 5.
             num_layers (int, optional): Number of layers of each member. Defaults to 5.
             width (int, optional): Number of neurons in each hidden layer. Defaults to 64.
             lr (float, optional): Learning rate of each ensemble mmember. Defaults to 1e-4.
-            num_tr_steps (int, optional): Number of training steps of each member. Defaults to 2_000.
+            num_tr_steps (int, optional): Maximum number of training steps of each fit. Defaults to 2_000.
+            device (Optional[str], optional): Training and inference device. If `None`, uses
+                'cuda' when available and 'cpu' otherwise. Defaults to None.
+            warm_start (bool, optional): Whether to initialize the ensemble with the weights of the
+                previous fit. Defaults to True.
+            val_fraction (float, optional): Fraction of the data held out by each member for
+                early stopping. If 0, trains for `num_tr_steps` steps on all data. Defaults to 0.2.
+            patience (int, optional): Number of steps without improvement in the held-out loss
+                of all members before training stops. Defaults to 100.
+            min_rel_improvement (float, optional): Minimum relative decrease of the held-out loss
+                of a member that counts as an improvement. Defaults to 1e-3.
+            seed (Optional[int], optional): Random seed of weight initialization and data splits.
+                Defaults to None.
         """
+        assert 0 <= val_fraction < 1, '`val_fraction` should be in [0, 1).'
+
         self.num_ensemble_members = num_ensemble_members
         self.num_layers = num_layers
         self.width = width
         self.lr = lr
         self.num_tr_steps = num_tr_steps
+        self.warm_start = warm_start
+        self.val_fraction = val_fraction
+        self.patience = patience
+        self.min_rel_improvement = min_rel_improvement
 
         self.is_fit = False
-        self.device = 'cuda'
-        self.X_meanvar = None
-        self.y_meanvar = None
+        self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.ensemble = None
+        self.num_steps = 0
+        self.X_meansd = None
+        self.y_meansd = None
+
+        self.rng = np.random.default_rng(seed)
+        self.torch_rng = torch.Generator()
+
+        if seed is not None:
+            self.torch_rng.manual_seed(seed)
 
     def to_cuda(self):
-        for m in self.ensemble:
-            m.cuda()
         self.device = 'cuda'
+        if self.ensemble is not None:
+            self.ensemble.cuda()
 
     def to_cpu(self):
-        for m in self.ensemble:
-            m.cpu()
         self.device = 'cpu'
-    
+        if self.ensemble is not None:
+            self.ensemble.cpu()
+
+    def _get_train_mask(self, num_samples: int) -> np.ndarray:
+        # (num_ensemble_members, num_samples) mask of the samples used for training by each member
+        num_val = int(num_samples * self.val_fraction)
+        train_mask = np.ones((self.num_ensemble_members, num_samples), dtype=bool)
+
+        # Too few samples to hold out any of them
+        if num_val == 0:
+            return train_mask
+
+        for member_mask in train_mask:
+            member_mask[self.rng.choice(num_samples, num_val, replace=False)] = False
+
+        return train_mask
+
     @overrides
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
         assert len(X.shape) == 2
         assert len(y.shape) == 2
 
-        _, num_features = X.shape
+        num_samples, num_features = X.shape
         _, num_objectives = y.shape
 
         self.X_meansd = np.mean(X, axis=0), np.std(X, axis=0)
         self.y_meansd = np.mean(y, axis=0), np.std(y, axis=0)
 
-        # Init ensemble models
-        self.ensemble = [
-            FFEnsembleMember(num_objectives, num_features, self.num_layers, self.width).to(self.device)
-            for _ in range(self.num_ensemble_members)
-        ]
+        # Init ensemble models, reusing previous weights if possible
+        reuse_ensemble = (
+            self.warm_start and self.ensemble is not None and
+            (self.ensemble.input_feat_len, self.ensemble.num_objectives) == (num_features, num_objectives)
+        )
+
+        if not reuse_ensemble:
+            self.ensemble = FFEnsemble(
+                self.num_ensemble_members, num_objectives, num_features,
+                self.num_layers, self.width, generator=self.torch_rng
+            )
+
+        self.ensemble.to(self.device)
 
         # Normalizes features and targets
         X = (X.copy() - self.X_meansd[0]) / (self.X_meansd[1] + 1e-7)
@@ -66,58 +124,124 @@ class PredictiveDNNEnsemble(Predictor):
         Xt = torch.tensor(X, dtype=torch.float32).to(self.device)
         yt = torch.tensor(y, dtype=torch.float32).to(self.device)
 
-        # TODO: should we be splitting data into 
-        # train and val?
-        for member in tqdm(self.ensemble, desc='Training DNN Ensemble...'):
-            criterion = torch.nn.MSELoss(reduction='sum')
-            optimizer = torch.optim.Adam(member.parameters(), lr=self.lr)
-            member.train()
+        train_mask = self._get_train_mask(num_samples)
+        use_early_stopping = not train_mask.all()
+
+        train_mask = torch.tensor(train_mask, dtype=torch.float32, device=self.device).unsqueeze(-1)
+        val_mask = 1.0 - train_mask
+
+        optimizer = torch.optim.Adam(self.ensemble.parameters(), lr=self.lr)
+        self.ensemble.train()
+
+        best_val_loss = torch.full((self.num_ensemble_members,), float('inf'), device=self.device)
+        best_state = {k: v.detach().clone() for k, v in self.ensemble.state_dict().items()}
+        steps_since_best = 0
+        self.num_steps = 0
+
+        for _ in range(self.num_tr_steps):
+            # (num_ensemble_members, num_samples, num_objectives) squared errors
+            sq_error = (self.ensemble(Xt) - yt).pow(2)
+            loss = (sq_error * train_mask).sum()
 
-            for t in range(self.num_tr_steps):
-                y_pred = member(Xt)
-                loss = criterion(y_pred.squeeze(), yt.squeeze())        
+            if use_early_stopping:
+                # Keeps the current weights of the members that improved their held-out loss
+                with torch.no_grad():
+                    val_loss = (sq_error * val_mask).sum(dim=(1, 2))
+                    improved = val_loss < best_val_loss * (1 - self.min_rel_improvement)
 
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
-            
-            # print(f'Final training loss {loss.item()}')
+                    if improved.any():
+                        best_val_loss = torch.where(improved, val_loss, best_val_loss)
+                        best_state = {
+                            k: torch.where(improved.view(-1, *[1] * (v.dim() - 1)), v, best_state[k])
+                            for k, v in self.ensemble.state_dict().items()
+                        }
+                        steps_since_best = 0
+                    else:
+                        steps_since_best += 1
+
+                if steps_since_best >= self.patience:
+                    break
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            self.num_steps += 1
+
+        if use_early_stopping:
+            self.ensemble.load_state_dict(best_state)
 
         self.is_fit = True
 
     @overrides
     def predict(self, X: np.ndarray) -> MeanVar:
         assert len(X.shape) == 2
-        assert self.is_fit, 'PredictiveDNNEnsemble: predict called before fit!' 
+        assert self.is_fit, 'PredictiveDNNEnsemble: predict called before fit!'
 
         X = (X.copy() - self.X_meansd[0]) / (self.X_meansd[1] + 1e-7)
         Xt = torch.tensor(X, dtype=torch.float32).to(self.device)
 
-        preds = []
+        self.ensemble.eval()
         with torch.no_grad():
-            for member in self.ensemble:
-                member.eval()
-                pred = member(Xt).to('cpu').numpy()
-                preds.append(pred * (self.y_meansd[1] + 1e-7) + self.y_meansd[0])
-        
-        preds = np.array(preds)
+            preds = self.ensemble(Xt).to('cpu').numpy()
+
+        preds = preds * (self.y_meansd[1] + 1e-7) + self.y_meansd[0]
         return MeanVar(mean=np.mean(preds, axis=0), var=np.var(preds, axis=0))
 
 
-class FFEnsembleMember(nn.Module):
-    def __init__(self, num_objectives: int = 1, input_feat_len: int = 128,
-                 num_layers: int = 10, width: int = 20):
-        super(FFEnsembleMember, self).__init__()
+class FFEnsemble(nn.Module):
+    def __init__(self, num_members: int = 5, num_objectives: int = 1, input_feat_len: int = 128,
+                 num_layers: int = 10, width: int = 20, generator: Optional[torch.Generator] = None):
+        """Ensemble of independent MLPs evaluated with one batched matrix multiplication per layer.
 
+        Args:
+            num_members (int, optional): Number of ensemble members. Defaults to 5.
+            num_objectives (int, optional): Number of outputs of each member. Defaults to 1.
+            input_feat_len (int, optional): Number of input features. Defaults to 128.
+            num_layers (int, optional): Number of layers of each member. Defaults to 10.
+            width (int, optional): Number of neurons in each hidden layer. Defaults to 20.
+            generator (Optional[torch.Generator], optional): Random generator used to initialize
+                the weights. Defaults to None.
+        """
+        super(FFEnsemble, self).__init__()
+
+        self.num_members = num_members
+        self.num_objectives = num_objectives
         self.input_feat_len = input_feat_len
         self.num_layers = num_layers
         self.width = width
 
-        self.linears = nn.ModuleList([nn.Linear(self.input_feat_len, width)])
-        self.linears.extend([nn.Linear(width, width) for i in range(1, self.num_layers-1)])
-        self.output = nn.Linear(width, num_objectives)
+        dims = [input_feat_len] + [width] * (num_layers - 1) + [num_objectives]
+        self.weights = nn.ParameterList()
+        self.biases = nn.ParameterList()
+
+        # Same initialization as `nn.Linear`, independently for each member
+        for in_dim, out_dim in zip(dims[:-1], dims[1:]):
+            bound = 1 / math.sqrt(in_dim)
+
+            self.weights.append(nn.Parameter(
+                torch.empty(num_members, in_dim, out_dim).uniform_(-bound, bound, generator=generator)
+            ))
+            self.biases.append(nn.Parameter(
+                torch.empty(num_members, 1, out_dim).uniform_(-bound, bound, generator=generator)
+            ))
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        for layer in self.linears:
-            x = f.relu(layer(x))
-        return self.output(x)
+        """Computes the outputs of all members.
+
+        Args:
+            x (torch.Tensor): (N, #features) inputs shared by all members or
+                (#members, N, #features) inputs of each member.
+
+        Returns:
+            torch.Tensor: (#members, N, #objectives) outputs.
+        """
+        if x.dim() == 2:
+            x = x.unsqueeze(0).expand(self.num_members, -1, -1)
+
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = torch.baddbmm(bias, x, weight)
+
+            if i < len(self.weights) - 1:
+                x = f.relu(x)
+
+        return x
@@ -1,6 +1,7 @@
+from functools import partial
 from overrides import overrides
 from random import Random
-from typing import List, Type, Callable, Any
+from typing import List, Type, Callable, Any, Optional
 
 import numpy as np
 import torch
@@ -34,7 +35,24 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                  track_unused_params: bool = True,
                  unused_param_value: int = 0, 
                  model_creation_attempts: int = 1,
+                 lazy_models: bool = False,
                  **model_kwargs):
+        """Search space built from an `ArchParamTree` and a model class that receives an `ArchConfig`.
+
+        Args:
+            model_cls (Type[torch.nn.Module]): Model class. Called as `model_cls(arch_config, **model_kwargs)`.
+            arch_param_tree (ArchParamTree): Architecture parameter tree.
+            seed (int, optional): Random seed. Defaults to 1.
+            mutation_prob (float, optional): Probability of mutating each parameter. Defaults to 0.3.
+            track_unused_params (bool, optional): Whether to track unused parameters in architecture
+                ids and encodings. Defaults to True.
+            unused_param_value (int, optional): Value used to encode unused parameters. Defaults to 0.
+            model_creation_attempts (int, optional): Number of attempts to sample a config that yields a
+                model without raising an exception. Defaults to 1.
+            lazy_models (bool, optional): If True, sampled models are only built on the first access to
+                `ArchaiModel.arch` (see `ArchaiModel.arch_fn`). Since models are not created when sampling,
+                `model_creation_attempts` has no effect. Defaults to False.
+        """
         self.model_cls = model_cls
         self.arch_param_tree = arch_param_tree
         self.mutation_prob = mutation_prob
@@ -42,9 +60,24 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         self.unused_param_value = unused_param_value
         self.model_kwargs = model_kwargs
         self.model_creation_attempts = model_creation_attempts
+        self.lazy_models = lazy_models
 
         self.rng = Random(seed)
 
+    def _build_model(self, config: ArchConfig) -> Optional[torch.nn.Module]:
+        if self.lazy_models:
+            return None
+        
+        return self.model_cls(config, **self.model_kwargs)
+
+    def _get_archai_model(self, model: Optional[torch.nn.Module], config: ArchConfig) -> ArchaiModel:
+        return ArchaiModel(
+            arch=model,
+            archid=self.get_archid(config),
+            metadata={'config': config},
+            arch_fn=partial(self.model_cls, config, **self.model_kwargs) if model is None else None
+        )
+
     def get_archid(self, arch_config: ArchConfig) -> str:
         e = self.arch_param_tree.encode_config(
             arch_config, track_unused_params=self.track_unused_params
@@ -58,13 +91,9 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
     @overrides
     def load_arch(self, path: str) -> ArchaiModel:
         config = ArchConfig.from_json(path)
-        model = self.model_cls(config, **self.model_kwargs)
+        model = self._build_model(config)
         
-        return ArchaiModel(
-            arch=model,
-            archid=self.get_archid(config),
-            metadata={'config': config}
-        )
+        return self._get_archai_model(model, config)
     
     @overrides
     def save_model_weights(self, model: ArchaiModel, path: str) -> None:
@@ -78,16 +107,12 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
     def random_sample(self) -> ArchaiModel:
         def _sample():
             config = self.arch_param_tree.sample_config(self.rng)
-            model = self.model_cls(config, **self.model_kwargs)
+            model = self._build_model(config)
             return model, config
 
         model, config = retry_on_exception(_sample, self.model_creation_attempts)
 
-        return ArchaiModel(
-            arch=model,
-            archid=self.get_archid(config),
-            metadata={'config': config}
-        )
+        return self._get_archai_model(model, config)
 
     @overrides
     def mutate(self, model: ArchaiModel) -> ArchaiModel:
@@ -106,17 +131,13 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             )
 
             mutated_config = build_arch_config(mutated_dict)
-            mutated_model = self.model_cls(mutated_config, **self.model_kwargs)
+            mutated_model = self._build_model(mutated_config)
 
             return mutated_model, mutated_config
         
         mutated_model, mutated_config = retry_on_exception(_mutate, self.model_creation_attempts)
         
-        return ArchaiModel(
-            arch=mutated_model,
-            archid=self.get_archid(mutated_config),
-            metadata={'config': mutated_config}
-        )
+        return self._get_archai_model(mutated_model, mutated_config)
 
     @overrides
     def crossover(self, model_list: List[ArchaiModel]) -> ArchaiModel:
@@ -145,17 +166,13 @@ class ConfigSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             )
 
             cross_config = build_arch_config(cross_dict)
-            cross_model = self.model_cls(cross_config, **self.model_kwargs)
+            cross_model = self._build_model(cross_config)
 
             return cross_model, cross_config
         
         cross_model, cross_config = retry_on_exception(_crossover, self.model_creation_attempts)
         
-        return ArchaiModel(
-            arch=cross_model,
-            archid=self.get_archid(cross_config),
-            metadata={'config': cross_config}
-        )
+        return self._get_archai_model(cross_model, cross_config)
 
     @overrides
     def encode(self, model: ArchaiModel) -> np.ndarray:
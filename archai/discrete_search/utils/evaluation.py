@@ -1,4 +1,6 @@
-from typing import Dict, List, Union
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from tqdm import tqdm
@@ -9,15 +11,136 @@ from archai.discrete_search import (
 )
 
 
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor
+}
+
+
+def _evaluate_objective(obj: Objective, arch: ArchaiModel, dataset: DatasetProvider,
+                        budget: Optional[float] = None) -> float:
+    # Module-level function so it can be pickled by `ProcessPoolExecutor`
+    if budget is None:
+        return obj.evaluate(arch, dataset)
+    
+    return obj.evaluate(arch, dataset, budget=budget)
+
+
+def evaluate_sync_objectives(objectives: Dict[str, Objective],
+                             inputs: Dict[str, List[Tuple[ArchaiModel, DatasetProvider, Optional[float]]]],
+                             executor: Optional[str] = None,
+                             max_workers: Optional[int] = None,
+                             max_concurrency: Optional[Dict[str, int]] = None,
+                             progress_bar: bool = True) -> Dict[str, List[float]]:
+    """Evaluates synchronous objectives on lists of (model, dataset, budget) inputs, optionally
+    running evaluations concurrently using an executor.
+
+    Args:
+        objectives (Dict[str, Objective]): Dictionary mapping an objective identifier to
+            an `Objective` object.
+        
+        inputs (Dict[str, List[Tuple[ArchaiModel, DatasetProvider, Optional[float]]]]): Dictionary mapping
+            each objective identifier to a list of (model, dataset, budget) triplets to be evaluated.
+        
+        executor (Optional[str], optional): Executor used to run evaluations. 
+            * `None`: Evaluations are computed serially, objective by objective.
+            * 'thread': Uses a thread pool, recommended for objectives that release the GIL
+                (e.g ONNX Runtime inference, PyTorch operators).
+            * 'process': Uses a process pool, recommended for pure-Python objectives. Objectives and
+                models must be picklable and objectives are expected to be stateless, since each
+                evaluation runs on a copy of the objective.
+            Defaults to None.
+
+        max_workers (Optional[int], optional): Maximum number of workers of the executor. If `None`,
+            uses the default value of the respective `concurrent.futures` executor. Defaults to None.
+        
+        max_concurrency (Optional[Dict[str, int]], optional): Maximum number of in-flight evaluations
+            for each objective, e.g `{'Latency (ms)': 1}` to avoid concurrent latency measurements. 
+            Objectives not specified are only limited by `max_workers`. Defaults to None.
+        
+        progress_bar (bool, optional): Whether to show progress bars. Defaults to True.
+
+    Returns:
+        Dict[str, List[float]]: Evaluation results for each objective, in the same order of `inputs`.
+    """
+    max_concurrency = max_concurrency or {}
+    results = {obj_name: [None] * len(obj_inputs) for obj_name, obj_inputs in inputs.items()}
+
+    if executor is None:
+        for obj_name, obj in objectives.items():
+            pbar = (
+                tqdm(inputs[obj_name], desc=f'Calculating "{obj_name}"...')
+                if progress_bar else inputs[obj_name]
+            )
+
+            results[obj_name] = [
+                _evaluate_objective(obj, arch, dataset, budget)
+                for arch, dataset, budget in pbar
+            ]
+
+        return results
+
+    assert executor in EXECUTORS, f'`executor` must be one of {list(EXECUTORS.keys())} or None.'
+    assert all(limit > 0 for limit in max_concurrency.values())
+
+    pending = {
+        obj_name: deque(enumerate(inputs[obj_name]))
+        for obj_name in objectives
+    }
+    num_in_flight = defaultdict(int)
+    futures = {}
+
+    pbar = tqdm(
+        total=sum(len(q) for q in pending.values()),
+        desc=f'Calculating {list(objectives.keys())} ({executor} pool)...',
+        disable=not progress_bar
+    )
+
+    with EXECUTORS[executor](max_workers=max_workers) as pool:
+        def _submit_pending_jobs():
+            for obj_name, queue in pending.items():
+                limit = max_concurrency.get(obj_name, float('inf'))
+
+                while queue and num_in_flight[obj_name] < limit:
+                    idx, (arch, dataset, budget) = queue.popleft()
+                    
+                    future = pool.submit(_evaluate_objective, objectives[obj_name], arch, dataset, budget)
+                    futures[future] = (obj_name, idx)
+                    num_in_flight[obj_name] += 1
+
+        _submit_pending_jobs()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                obj_name, idx = futures.pop(future)
+                num_in_flight[obj_name] -= 1
+
+                results[obj_name][idx] = future.result()
+                pbar.update(1)
+
+            # Refills the pool with jobs of objectives that were limited by `max_concurrency`
+            _submit_pending_jobs()
+
+    pbar.close()
+
+    return results
+
+
 def evaluate_models(models: List[ArchaiModel],
                     objectives: Dict[str, Union[Objective, AsyncObjective]],  
                     dataset_providers: Union[DatasetProvider, List[DatasetProvider]],
-                    budgets: Union[Dict[str, float], Dict[str, List[float]], None] = None) -> Dict[str, np.ndarray]:
+                    budgets: Union[Dict[str, float], Dict[str, List[float]], None] = None,
+                    executor: Optional[str] = None,
+                    max_workers: Optional[int] = None,
+                    max_concurrency: Optional[Dict[str, int]] = None) -> Dict[str, np.ndarray]:
     """Evaluates all objective functions on a list of models and dataset(s).
     
     Objectives are evaluated in the following order:
         (1) Asynchronous objectives are dispatched by calling `.send`
-        (2) Synchronous objectives are computed using `.evaluate`
+        (2) Synchronous objectives are computed using `.evaluate`, serially or
+            concurrently if `executor` is set (see `evaluate_sync_objectives`)
         (3) Asynchronous objectives results are gathered by calling `.fetch_all`
 
     Args:
@@ -61,6 +184,14 @@ def evaluate_models(models: List[ArchaiModel],
                 ```
             3. Default budget for all objectives (`budgets=None`)
             Defaults to None.
+
+        executor (Optional[str], optional): Executor used to compute synchronous objectives
+            (None, 'thread' or 'process'). Defaults to None (serial evaluation).
+
+        max_workers (Optional[int], optional): Maximum number of executor workers. Defaults to None.
+
+        max_concurrency (Optional[Dict[str, int]], optional): Maximum number of concurrent evaluations
+            for each synchronous objective. Defaults to None.
     
     Returns:
         Dict[str, np.array]: Evaluation results (`np.array` of size `len(models)`) for each metric passed
@@ -97,20 +228,21 @@ def evaluate_models(models: List[ArchaiModel],
             else:
                 obj.send(arch, dataset)
     
-    # Calculates synchronous objectives in order
-    for obj_name, obj in sync_objectives:
-        pbar = tqdm(inputs, desc=f'Calculating "{obj_name}"...')
-
-        if budgets:
-            objective_results[obj_name] = np.array([
-                obj.evaluate(arch, dataset, budget=budgets[obj_name][arch_idx]) 
-                for arch_idx, (arch, dataset) in pbar
-            ], dtype=np.float64)
-        else:
-            objective_results[obj_name] = np.array([
-                obj.evaluate(arch, dataset) 
-                for _, (arch, dataset) in pbar
-            ], dtype=np.float64)
+    # Calculates synchronous objectives
+    sync_results = evaluate_sync_objectives(
+        dict(sync_objectives),
+        {
+            obj_name: [
+                (arch, dataset, budgets[obj_name][arch_idx] if budgets and obj_name in budgets else None)
+                for arch_idx, (arch, dataset) in inputs
+            ]
+            for obj_name, _ in sync_objectives
+        },
+        executor=executor, max_workers=max_workers, max_concurrency=max_concurrency
+    )
+
+    for obj_name, obj_results in sync_results.items():
+        objective_results[obj_name] = np.array(obj_results, dtype=np.float64)
 
     # Gets results from async objectives
     pbar = tqdm(async_objectives, desc=f'Gathering results from async objectives...')
@@ -1,7 +1,7 @@
+from bisect import bisect_left, bisect_right
 from typing import Dict, List, Union
 
 import numpy as np
-from tqdm import tqdm
 
 from archai.discrete_search import ArchaiModel, AsyncObjective, Objective
 
@@ -50,9 +50,7 @@ def get_non_dominated_sorting(models: List[ArchaiModel],
     # Converts results to an array of shape (len(models), len(objectives))
     results_array = np.vstack(list(inverted_results.values())).T
 
-    frontiers = np.array(
-        _find_non_dominated_sorting(results_array)
-    )
+    frontiers = _find_non_dominated_sorting(results_array)
 
     return [{
         'models': [models[idx] for idx in frontier],
@@ -64,53 +62,109 @@ def get_non_dominated_sorting(models: List[ArchaiModel],
     } for frontier in frontiers]
 
 
-def _find_pareto_frontier_points(all_points: np.ndarray) -> List[int]:
+def _find_pareto_frontier_points(all_points: np.ndarray, block_size: int = 1024) -> List[int]:
     """Takes in a list of n-dimensional points, one per row, returns the list of row indices
         which are Pareto-frontier points.
         
-    Assumes that lower values on every dimension are better.
+    Assumes that lower values on every dimension are better. Duplicated points are
+    considered only once (the first occurrence is returned).
 
     Args:
         all_points: N-dimensional points.
+        block_size: Number of points compared at once in the general (> 3 dimensions) case.
 
     Returns:
-        List of Pareto-frontier indexes.
+        List of Pareto-frontier indexes, sorted by the lexicographical order of the points.
     """
 
-    # For each point see if there exists  any other point which dominates it on all dimensions
-    # If that is true, then it is not a pareto point and vice-versa
-
     # Inputs should alwyas be a two-dimensional array
     assert len(all_points.shape) == 2
 
-    pareto_inds = []
+    # Gets the indices of unique points sorted in lexicographical order.
+    # A point can only be dominated by a point that comes before it in this order
+    _, unique_indices = np.unique(all_points, axis=0, return_index=True)
+    points = all_points[unique_indices]
+
+    if points.shape[0] == 0:
+        return []
 
-    dim = all_points.shape[1]
+    if points.shape[1] == 1:
+        is_pareto = np.zeros(len(points), dtype=bool)
+        is_pareto[0] = True
+    elif points.shape[1] == 2:
+        is_pareto = _find_pareto_mask_2d(points)
+    elif points.shape[1] == 3:
+        is_pareto = _find_pareto_mask_3d(points)
+    else:
+        is_pareto = _find_pareto_mask_nd(points, block_size)
+
+    return unique_indices[is_pareto].tolist()
+
+
+def _find_pareto_mask_2d(points: np.ndarray) -> np.ndarray:
+    """Pareto-frontier mask of unique, lexicographically sorted 2-D points.
+
+    A point is not dominated iff its second coordinate is strictly lower than
+    the second coordinate of every point that comes before it.
+    """
+    y = points[:, 1]
+    prev_min_y = np.minimum.accumulate(np.concatenate([[np.inf], y[:-1]]))
+
+    return y < prev_min_y
+
+
+def _find_pareto_mask_3d(points: np.ndarray) -> np.ndarray:
+    """Pareto-frontier mask of unique, lexicographically sorted 3-D points.
+
+    Sweeps the points in order while keeping the 2-D frontier of the (y, z) projection
+    of already visited points, sorted by increasing y (and thus decreasing z).
+    """
+    is_pareto = np.zeros(len(points), dtype=bool)
+    front_y, front_z = [], []
+
+    for i, (y, z) in enumerate(points[:, 1:].tolist()):
+        # Visited point with the largest y <= `y` has the lowest z among candidates
+        pred = bisect_right(front_y, y) - 1
+
+        if pred >= 0 and front_z[pred] <= z:
+            continue
+
+        is_pareto[i] = True
+
+        # Removes frontier points dominated by the current point
+        start = end = bisect_left(front_y, y)
+        while end < len(front_z) and front_z[end] >= z:
+            end += 1
+
+        front_y[start:end] = [y]
+        front_z[start:end] = [z]
+
+    return is_pareto
 
-    # Gets the indices of unique points
-    _, unique_indices = np.unique(all_points, axis=0, return_index=True)
 
-    for i in unique_indices:
-        this_point = all_points[i,:]
-        is_pareto = True
+def _find_pareto_mask_nd(points: np.ndarray, block_size: int = 1024) -> np.ndarray:
+    """Pareto-frontier mask of unique, lexicographically sorted N-D points.
 
-        for j in unique_indices:
-            if j == i:
-                continue
+    Points are processed in blocks, which are compared against the frontier found so far
+    and against the preceding points of the same block using broadcasting.
+    """
+    is_pareto = np.zeros(len(points), dtype=bool)
+    front = points[:0]
+
+    for start in range(0, len(points), block_size):
+        block = points[start:start + block_size]
+
+        # (block, front) matrix with `True` if front[j] <= block[i] on every dimension
+        dominated = np.all(front[None, :, :] <= block[:, None, :], axis=2).any(axis=1)
 
-            other_point = all_points[j,:]
-            diff = this_point - other_point
+        # Only preceding points of the block can dominate a point (points are unique)
+        block_dom = np.all(block[None, :, :] <= block[:, None, :], axis=2)
+        dominated |= np.tril(block_dom, k=-1).any(axis=1)
 
-            if sum(diff >= 0) == dim:
-                # Other point is smaller/larger on all dimensions
-                # so we have found at least one dominating point
-                is_pareto = False
-                break
-                
-        if is_pareto:
-            pareto_inds.append(i)
+        is_pareto[start:start + block_size] = ~dominated
+        front = np.concatenate([front, block[~dominated]], axis=0)
 
-    return pareto_inds
+    return is_pareto
 
 
 def _find_non_dominated_sorting(all_points: np.ndarray) -> List[List[int]]:
@@ -133,67 +187,92 @@ def _find_non_dominated_sorting(all_points: np.ndarray) -> List[List[int]]:
     """
 
     lex_sorting = np.lexsort(all_points.T[::-1])
-    all_points = all_points.copy()[lex_sorting]
+    all_points = all_points[lex_sorting]
 
-    fronts = []
+    if all_points.shape[1] == 2:
+        ranks = _find_front_ranks_2d(all_points)
+    else:
+        ranks = _find_front_ranks_nd(all_points)
 
-    for idx in range(all_points.shape[0]):
-        front_rank = _find_front_rank(all_points, idx, fronts)        
-        
-        if front_rank >= len(fronts):
-            fronts.append([])
+    num_fronts = ranks.max() + 1 if len(ranks) else 0
 
-        fronts[front_rank].append(idx)
+    # Stable sorting keeps the lexicographical order inside each front
+    order = np.argsort(ranks, kind='stable')
+    boundaries = np.searchsorted(ranks[order], np.arange(1, num_fronts))
 
-    ret = []
-    for front in fronts:
-        ret.append(lex_sorting[front])
+    return [lex_sorting[front] for front in np.split(order, boundaries)] if num_fronts else []
 
-    return ret
 
+def _find_front_ranks_2d(all_points: np.ndarray) -> np.ndarray:
+    """Finds the front rank of lexicographically sorted 2-D points.
 
-def _find_front_rank(all_points: np.ndarray, idx: int, fronts: List[List[int]]) -> int:
-    """Finds the front rank for all_points[idx] given `fronts`.
+    Since points are sorted, a front dominates the current point iff its lowest second coordinate
+    is lower or equal than the second coordinate of the point. Lowest second coordinates are
+    non-decreasing with the front rank, so the rank is found with a binary search.
 
     Args:
-        all_points (np.ndarray): N-dimensional points.
-        idx (int): Point index.
-        fronts (List[List[int]]): Current NDS fronts
+        all_points (np.ndarray): Lexicographically sorted 2-D points.
 
     Returns:
-        int: Front rank for `all_points[idx]`
+        np.ndarray: Front rank of each point.
+    """
+    ranks = np.zeros(len(all_points), dtype=np.int64)
+    fronts_min_y = []
+
+    for idx, y in enumerate(all_points[:, 1].tolist()):
+        rank = bisect_right(fronts_min_y, y)
+
+        if rank == len(fronts_min_y):
+            fronts_min_y.append(y)
+        else:
+            fronts_min_y[rank] = y
+
+        ranks[idx] = rank
+
+    return ranks
+
+
+def _find_front_ranks_nd(all_points: np.ndarray) -> np.ndarray:
+    """Finds the front rank of lexicographically sorted N-D points.
+
+    If a point is dominated by a front, it is also dominated by all previous fronts, so the rank
+    of each point is found with a binary search over fronts (ENS-BS) and dominance
+    checks are vectorized over all members of a front.
+
+    Args:
+        all_points (np.ndarray): Lexicographically sorted N-D points.
+
+    Returns:
+        np.ndarray: Front rank of each point.
     
     Reference:
         Adapted from https://github.com/anyoptimization/pymoo/blob/main/pymoo/util/nds/efficient_non_dominated_sort.py
     """
-    
-    def dominates(x, y):
-        for i in range(len(x)):
-            if y[i] < x[i]:
-                return False
+    ranks = np.zeros(len(all_points), dtype=np.int64)
 
-        return True
+    # Growable buffers with the points of each front
+    fronts, front_sizes = [], []
 
-    num_found_fronts = len(fronts)
-    rank = 0
-    current = all_points[idx]
+    for idx, point in enumerate(all_points):
+        low, high = 0, len(fronts)
 
-    while True:
-        if num_found_fronts == 0:
-            return 0
+        while low < high:
+            mid = (low + high) // 2
+            front = fronts[mid][:front_sizes[mid]]
 
-        fk_indices = fronts[rank]
-        solutions = all_points[fk_indices[::-1]]
-        non_dominated = True
+            if np.all(front <= point, axis=1).any():
+                low = mid + 1
+            else:
+                high = mid
 
-        for s in solutions:
-            if dominates(s, current):
-                non_dominated = False
-                break
+        if low == len(fronts):
+            fronts.append(np.empty((16, all_points.shape[1]), dtype=all_points.dtype))
+            front_sizes.append(0)
+        elif front_sizes[low] == len(fronts[low]):
+            fronts[low] = np.concatenate([fronts[low], np.empty_like(fronts[low])], axis=0)
+        
+        fronts[low][front_sizes[low]] = point
+        front_sizes[low] += 1
+        ranks[idx] = low
 
-        if non_dominated:
-            return rank
-        else:
-            rank += 1
-            if rank >= num_found_fronts:
-                return num_found_fronts
+    return ranks
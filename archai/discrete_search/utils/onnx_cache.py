@@ -0,0 +1,168 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import onnxruntime as rt
+
+
+META_FILE = 'meta.json'
+
+
+class OnnxModelCache():
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_sessions: int = 8,
+                 session_fn: Optional[Callable[[str], rt.InferenceSession]] = None) -> None:
+        """Content-addressed cache of exported ONNX models and their inference sessions.
+
+        Models are stored in `cache_dir/<key>`, where `key` is a hash of the architecture id
+        and of the export settings (see `get_key`). Each export runs in its own temporary
+        directory that is atomically renamed into place, so the cache can be shared by
+        threads, processes and search runs without corrupting entries. Inference sessions
+        of the most recently used models are kept in memory and reused.
+
+        Args:
+            cache_dir (Optional[Union[str, Path]], optional): Directory of the on-disk cache.
+                If `None`, a temporary directory is used and removed when the object is
+                garbage collected. Defaults to None.
+            max_sessions (int, optional): Maximum number of inference sessions kept in
+                memory. Defaults to 8.
+            session_fn (Optional[Callable[[str], rt.InferenceSession]], optional): Function
+                that creates an inference session from a model path. Should be picklable
+                when the cache is sent to other processes. If `None`, uses
+                `onnxruntime.InferenceSession`. Defaults to None.
+        """
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix='archai-onnx-')
+            self._finalizer = weakref.finalize(self, shutil.rmtree, cache_dir, ignore_errors=True)
+        else:
+            self._finalizer = None
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+
+        self.max_sessions = max_sessions
+        self.session_fn = session_fn or rt.InferenceSession
+        self.stats = {'exports': 0, 'disk_hits': 0, 'session_hits': 0}
+
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = defaultdict(threading.Lock)
+
+    def __getstate__(self) -> Dict:
+        # Sessions and locks are process-local, and only the creator removes temporary directories
+        state = self.__dict__.copy()
+
+        for attr in ['_sessions', '_lock', '_key_locks', '_finalizer']:
+            del state[attr]
+
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._finalizer = None
+        self._init_state()
+
+    @staticmethod
+    def get_key(archid: str, settings: Optional[Dict[str, Any]] = None) -> str:
+        """Gets the cache key of an architecture exported with a set of settings.
+
+        Args:
+            archid (str): Architecture identifier.
+            settings (Optional[Dict[str, Any]], optional): Export settings that change
+                the exported graph (e.g input shapes, opset). Defaults to None.
+
+        Returns:
+            str: Cache key.
+        """
+        content = json.dumps({'archid': archid, 'settings': settings}, sort_keys=True, default=repr)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _read_model_path(self, entry_dir: Path) -> Optional[str]:
+        try:
+            with open(entry_dir / META_FILE, 'r', encoding='utf-8') as f:
+                return str(entry_dir / json.load(f)['model'])
+        except FileNotFoundError:
+            return None
+
+    def get_model_path(self, key: str, export_fn: Callable[[str], str]) -> str:
+        """Gets the path of a cached model, exporting it if it is not in the cache.
+
+        Args:
+            key (str): Cache key (see `get_key`).
+            export_fn (Callable[[str], str]): Function that receives an empty directory,
+                exports the model into it and returns the path of the model file.
+
+        Returns:
+            str: Path to the model file.
+        """
+        entry_dir = self.cache_dir / key
+
+        model_path = self._read_model_path(entry_dir)
+        if model_path is not None:
+            self.stats['disk_hits'] += 1
+            return model_path
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f'.{key[:8]}-', dir=self.cache_dir))
+
+        try:
+            exported_path = Path(export_fn(str(tmp_dir))).resolve()
+            relative_path = exported_path.relative_to(tmp_dir.resolve())
+
+            with open(tmp_dir / META_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'model': relative_path.as_posix()}, f)
+
+            # Renaming is atomic, so concurrent readers never see partially exported models
+            os.rename(tmp_dir, entry_dir)
+            self.stats['exports'] += 1
+        except OSError:
+            # Another thread or process exported the same model first
+            if self._read_model_path(entry_dir) is None:
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        return self._read_model_path(entry_dir)
+
+    def get_session(self, key: str, export_fn: Callable[[str], str]) -> rt.InferenceSession:
+        """Gets an inference session of a cached model, exporting the model if needed.
+
+        Args:
+            key (str): Cache key (see `get_key`).
+            export_fn (Callable[[str], str]): Function that receives an empty directory,
+                exports the model into it and returns the path of the model file.
+
+        Returns:
+            rt.InferenceSession: Inference session.
+        """
+        with self._lock:
+            key_lock = self._key_locks[key]
+
+        # Threads evaluating the same model wait for a single export
+        with key_lock:
+            with self._lock:
+                if key in self._sessions:
+                    self._sessions.move_to_end(key)
+                    self.stats['session_hits'] += 1
+                    return self._sessions[key]
+
+            session = self.session_fn(self.get_model_path(key, export_fn))
+
+            with self._lock:
+                self._sessions[key] = session
+
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+        return session
@@ -25,6 +25,26 @@ from archai.nlp.datasets.nvidia.tokenizer_utils.word_vocab import WordVocab
 logger = logging_utils.get_logger(__name__)
 
 
+def get_token_dtype(vocab_size: int) -> np.dtype:
+    """Get the smallest unsigned integer type that is able to store token identifiers.
+
+    Args:
+        vocab_size: Vocabulary size.
+
+    Returns:
+        Token identifiers data type.
+
+    """
+
+    if vocab_size <= np.iinfo(np.uint16).max + 1:
+        return np.dtype(np.uint16)
+
+    if vocab_size <= np.iinfo(np.uint32).max + 1:
+        return np.dtype(np.uint32)
+
+    return np.dtype(np.int64)
+
+
 class Corpus:
     """Creates and trains the vocabulary/tokenizer, loads the dataset and encodes the data."""
 
@@ -36,6 +56,7 @@ class Corpus:
         vocab_type: str,
         vocab_size: Optional[int] = None,
         refresh_cache: Optional[bool] = False,
+        memory_map: Optional[bool] = True,
     ) -> None:
         """Initialize the `Corpus` class by defining attributes and creating
         cache-related paths.
@@ -48,6 +69,9 @@ class Corpus:
                 Valid options are `word`, `bbpe`, `gpt2`, or `bpe`.
             vocab_size: Vocabulary size.
             refresh_cache: Whether to refresh the cache.
+            memory_map: Whether cached splits should be loaded as read-only memory-mapped
+                arrays instead of being read into memory. Memory-mapped splits are
+                shared (through the page cache) by every process that loads the corpus.
 
         """
 
@@ -55,6 +79,7 @@ class Corpus:
         self.dataset = dataset
         self.vocab_type = vocab_type
         self.vocab_size = vocab_size
+        self.memory_map = memory_map
 
         # Corpus cache is created using dataset/vocab_type/vocab_size path
         self.corpus_cache_dir = utils.full_path(
@@ -200,17 +225,31 @@ class Corpus:
         return self.vocab
 
     def _encode_files(self) -> None:
-        """Encode dataset (training, validation and testing sets)."""
+        """Encode dataset (training, validation and testing sets).
+
+        If `memory_map` is enabled, tokens are streamed directly to the cache files and
+        the splits are read-only memory-mapped arrays, so they are never held in memory.
+
+        """
 
         train_filepath, valid_filepath, test_filepath = self._dataset_filepaths()
 
+        # `lm1b` training files are encoded on the fly, so its splits are not cached
+        encode_to_cache = self.memory_map and self.dataset != "lm1b"
+        dtype = get_token_dtype(len(self.vocab))
+
+        def _encode_file(filepath: str, cache_filepath: str) -> Union[np.ndarray, torch.LongTensor]:
+            if encode_to_cache:
+                return self.vocab.encode_file(filepath, output_path=cache_filepath, dtype=dtype)
+            return self.vocab.encode_file(filepath)
+
         if self.dataset == "lm1b":
             self.train = train_filepath
         else:
-            self.train = self.vocab.encode_file(train_filepath)
+            self.train = _encode_file(train_filepath, self.train_cache_filepath)
 
-        self.valid = self.vocab.encode_file(valid_filepath)
-        self.test = self.vocab.encode_file(test_filepath)
+        self.valid = _encode_file(valid_filepath, self.valid_cache_filepath)
+        self.test = _encode_file(test_filepath, self.test_cache_filepath)
 
     def train_and_encode(self) -> None:
         """Train the vocabulary/tokenizer and encodes the corpus."""
@@ -222,8 +261,24 @@ class Corpus:
         self._create_train_vocab()
         self._encode_files()
 
-        train_size = f"{len(self.train)} files" if isinstance(self.train, list) else self.train.size(0)
-        logger.debug(f"Size: train = {train_size} | valid = {self.valid.size(0)} | test = {self.test.size(0)}")
+        train_size = f"{len(self.train)} files" if isinstance(self.train, list) else len(self.train)
+        logger.debug(f"Size: train = {train_size} | valid = {len(self.valid)} | test = {len(self.test)}")
+
+    def _load_split(self, cache_filepath: str) -> Union[np.ndarray, torch.LongTensor]:
+        """Load an encoded split from the cache.
+
+        Args:
+            cache_filepath: Path to the cached split (.npy file).
+
+        Returns:
+            Read-only memory-mapped array (if `memory_map` is enabled) or tensor of tokens.
+
+        """
+
+        if self.memory_map:
+            return np.load(cache_filepath, mmap_mode="r")
+
+        return torch.from_numpy(np.load(cache_filepath).astype(np.int64, copy=False))
 
     def load(self) -> bool:
         """Load a pre-trained corpus.
@@ -250,13 +305,11 @@ class Corpus:
 
             self.vocab.load()
 
-            self.train = torch.from_numpy(np.load(self.train_cache_filepath))
-            self.valid = torch.from_numpy(np.load(self.valid_cache_filepath))
-            self.test = torch.from_numpy(np.load(self.test_cache_filepath))
+            self.train = self._load_split(self.train_cache_filepath)
+            self.valid = self._load_split(self.valid_cache_filepath)
+            self.test = self._load_split(self.test_cache_filepath)
 
-            logger.debug(
-                f"Size: train = {self.train.size(0)} | valid = {self.valid.size(0)} | test = {self.test.size(0)}"
-            )
+            logger.debug(f"Size: train = {len(self.train)} | valid = {len(self.valid)} | test = {len(self.test)}")
 
             return True
 
@@ -270,13 +323,30 @@ class Corpus:
         return False
 
     def save_cache(self) -> None:
-        """Save the cache."""
+        """Save the cache.
+
+        Tokens are stored with the smallest data type that fits the vocabulary,
+        e.g., `uint16` for vocabularies up to 65536 tokens.
+
+        """
 
         assert self.vocab is not None and self.vocab.is_trained()
 
-        np.save(self.train_cache_filepath, self.train.numpy())
-        np.save(self.valid_cache_filepath, self.valid.numpy())
-        np.save(self.test_cache_filepath, self.test.numpy())
+        dtype = get_token_dtype(len(self.vocab))
+
+        for input_ids, cache_filepath in [
+            (self.train, self.train_cache_filepath),
+            (self.valid, self.valid_cache_filepath),
+            (self.test, self.test_cache_filepath),
+        ]:
+            # Splits encoded with `memory_map` are already stored in the cache
+            if isinstance(input_ids, np.memmap) and os.path.abspath(input_ids.filename) == os.path.abspath(
+                cache_filepath
+            ):
+                continue
+
+            input_ids = input_ids.numpy() if isinstance(input_ids, torch.Tensor) else np.asarray(input_ids)
+            np.save(cache_filepath, input_ids.astype(dtype, copy=False))
 
     def get_iterator(
         self,
@@ -345,6 +415,7 @@ def load_corpus(
     vocab_type: str,
     vocab_size: Optional[int] = None,
     refresh_cache=False,
+    memory_map: Optional[bool] = True,
 ) -> Corpus:
     """Load a pre-trained corpus if available, or pre-trains a new one.
 
@@ -355,18 +426,37 @@ def load_corpus(
         vocab_type: Type of vocabulary/tokenizer.
         vocab_size: Vocabulary size.
         refresh_cache: Whether cache should be refreshed.
+        memory_map: Whether cached splits should be memory-mapped.
 
     Returns:
         Corpus with pre-trained vocabulary and encoded data.
 
     """
 
-    corpus = Corpus(dataset, dataset_dir, cache_dir, vocab_type, vocab_size=vocab_size, refresh_cache=refresh_cache)
+    corpus = Corpus(
+        dataset,
+        dataset_dir,
+        cache_dir,
+        vocab_type,
+        vocab_size=vocab_size,
+        refresh_cache=refresh_cache,
+        memory_map=memory_map,
+    )
     if not corpus.load():
-        corpus.train_and_encode()
+        if memory_map and dataset != "lm1b":
+            # Splits are encoded directly to the cache by a single process, and every process
+            # memory-maps the shared cache once it has been written
+            with distributed_utils.sync_workers() as rank:
+                if rank == 0:
+                    corpus.train_and_encode()
+
+            corpus.refresh_cache = False
+            corpus.load()
+        else:
+            corpus.train_and_encode()
 
-        with distributed_utils.sync_workers() as rank:
-            if rank == 0 and dataset != "lm1b":
-                corpus.save_cache()
+            with distributed_utils.sync_workers() as rank:
+                if rank == 0 and dataset != "lm1b":
+                    corpus.save_cache()
 
     return corpus
@@ -121,7 +121,10 @@ def all_reduce(tensor: Union[int, float, torch.Tensor], op: Optional[str] = "sum
         else:
             raise RuntimeError(f"Distributed backend: {backend} is not supported yet.")
 
-        tensor = torch.tensor(tensor, device=device)
+        if isinstance(tensor, torch.Tensor):
+            tensor = tensor.detach().clone().to(device)
+        else:
+            tensor = torch.tensor(tensor, device=device)
         torch.distributed.all_reduce(tensor, torch_op)
         if op == "mean":
             tensor /= get_world_size()
@@ -4,21 +4,31 @@
 
 """Language modeling-based iterators."""
 
-from typing import Generator, Iterator, List, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
 
+from archai.nlp import logging_utils
 from archai.nlp.datasets.nvidia import distributed_utils
 from archai.nlp.datasets.nvidia.tokenizer_utils.vocab_base import VocabBase
 
+logger = logging_utils.get_logger(__name__)
+
 
 class LMOrderedIterator:
-    """Iterator that provides contiguous batches of input tokens without padding."""
+    """Iterator that provides contiguous batches of input tokens without padding.
+
+    Batches are gathered on-the-fly from the flat sequence of tokens, which is never copied,
+    so the input can be a read-only memory-mapped array (see `Corpus`) shared by all processes.
+
+    """
 
     def __init__(
         self,
-        input_ids: torch.LongTensor,
+        input_ids: Union[torch.LongTensor, np.ndarray],
         bsz: int,
         bptt: int,
         device: Optional[str] = "cpu",
@@ -29,7 +39,7 @@ class LMOrderedIterator:
         """Initialize the iterator with the input sequence and batch parameters.
 
         Args:
-            input_ids: Input sequence of tokens.
+            input_ids: Input sequence of tokens (tensor, array or memory-mapped array).
             bsz: Batch size.
             bptt: Sequence length (backpropagation through time).
             device: Device to place the iterator.
@@ -47,25 +57,31 @@ class LMOrderedIterator:
         self.warmup = warmup
         self.last_iter = None
 
-        # Divides cleanly the inputs into batches and trims the remaining elements
-        n_step = input_ids.size(0) // bsz
-        input_ids = input_ids[: n_step * bsz]
-        self.input_ids = input_ids.view(bsz, -1).contiguous().pin_memory()
+        self.input_ids = input_ids.cpu().numpy() if isinstance(input_ids, torch.Tensor) else input_ids
 
-        # Creates warmup batches if memory is being used
+        # Divides cleanly the inputs into `bsz` rows and trims the remaining elements
+        self.row_len = len(self.input_ids) // bsz
+
+        # Creates warmup batches if memory is being used, i.e., each row is prepended with
+        # the last elements of the previous row
+        self.warmup_batches, self.warmup_elems, self.warmup_len = 0, 0, 0
         if mem_len and warmup:
             self.warmup_batches = (mem_len + bptt - 1) // bptt
             self.warmup_elems = self.warmup_batches * bptt
+            self.warmup_len = min(self.warmup_elems, self.row_len)
 
-            warmup_ids = self.input_ids.roll((self.warmup_elems, 1), (1, 0))[:, : self.warmup_elems]
-            self.input_ids = torch.cat((warmup_ids, self.input_ids), dim=-1)
+        self.n_cols = self.warmup_len + self.row_len
 
-        # Chunks the inputs for distributed training (if available)
+        # Chunks the rows for distributed training (if available)
         world_size = distributed_utils.get_world_size()
         rank = distributed_utils.get_rank()
-        self.input_ids = self.input_ids.chunk(world_size, dim=0)[rank]
+        chunk_size = (bsz + world_size - 1) // world_size
+        self.rows = np.arange(bsz)[rank * chunk_size : (rank + 1) * chunk_size]
+
+        # Circular shift of each row (see `roll()`)
+        self.shifts = np.zeros(len(self.rows), dtype=np.int64)
 
-        self.n_batch = (self.input_ids.size(1) + self.bptt - 1) // self.bptt
+        self.n_batch = (self.n_cols + self.bptt - 1) // self.bptt
 
     def roll(self, seed: int) -> None:
         """Rolls/shifts the data according to a random seed.
@@ -82,13 +98,33 @@ class LMOrderedIterator:
         rng = torch.Generator()
         rng.manual_seed(seed)
 
-        for i in range(self.input_ids.size(0)):
-            shift = torch.randint(0, self.input_ids.size(1), (1,), generator=rng)
+        for i in range(len(self.rows)):
+            shift = torch.randint(0, self.n_cols, (1,), generator=rng).item()
+            self.shifts[i] = (self.shifts[i] + shift) % self.n_cols
 
-            row = self.input_ids[i, :]
-            row = torch.cat((row[shift:], row[:shift]))
+    def _gather(self, start: int, end: int) -> torch.LongTensor:
+        """Gather the columns `[start, end)` of every row of the current rank.
 
-            self.input_ids[i, :] = row
+        Args:
+            start: Start column.
+            end: End column.
+
+        Returns:
+            Tensor with shape `[n_rows, end - start]`.
+
+        """
+
+        cols = (np.arange(start, end)[None, :] + self.shifts[:, None]) % self.n_cols
+        rows = self.rows[:, None]
+
+        # Warmup columns are read from the end of the previous row
+        flat_idx = np.where(
+            cols < self.warmup_len,
+            ((rows - 1) % self.bsz) * self.row_len + (cols - self.warmup_elems) % self.row_len,
+            rows * self.row_len + cols - self.warmup_len,
+        )
+
+        return torch.from_numpy(self.input_ids[flat_idx].astype(np.int64, copy=False))
 
     def get_batch(self, i: int, bptt: Optional[int] = None) -> Tuple[torch.LongTensor, torch.LongTensor, int, bool]:
         """Get a batch of `bptt` size.
@@ -105,13 +141,15 @@ class LMOrderedIterator:
         if bptt is None:
             bptt = self.bptt
 
-        seq_len = min(bptt, self.input_ids.size(1) - 1 - i)
+        seq_len = min(bptt, self.n_cols - 1 - i)
 
         start_idx = max(0, i - self.ext_len)
         end_idx = i + seq_len
 
-        input_ids = self.input_ids[:, start_idx:end_idx].to(self.device, non_blocking=True)
-        labels = self.input_ids[:, i + 1 : i + 1 + seq_len].to(self.device, non_blocking=True)
+        # Inputs and labels are gathered at once since they overlap
+        tokens = self._gather(start_idx, end_idx + 1)
+        input_ids = tokens[:, : end_idx - start_idx].to(self.device, non_blocking=True)
+        labels = tokens[:, i + 1 - start_idx :].to(self.device, non_blocking=True)
 
         warmup = True
         if self.mem_len and self.warmup:
@@ -142,7 +180,7 @@ class LMOrderedIterator:
         if start != 0:
             start += self.bptt
 
-        for i in range(start, self.input_ids.size(1) - 1, self.bptt):
+        for i in range(start, self.n_cols - 1, self.bptt):
             self.last_iter = i
             yield self.get_batch(i)
 
@@ -186,7 +224,7 @@ class LMOrderedIterator:
             i += seq_len
 
             yield input_ids, labels, seq_len
-            if i >= self.input_ids.size(1) - 2:
+            if i >= self.n_cols - 2:
                 break
 
     def __iter__(self) -> Generator[Tuple, None, None]:
@@ -270,69 +308,56 @@ class LMMultiFileIterator:
 
         """
 
-        sequences = self.vocab.encode_file(path)
+        # Runs in the prefetch thread of a (possibly CUDA) training process, which
+        # should not fork a pool of encoding processes
+        sequences = self.vocab.encode_file(path, num_workers=1)
         if self.shuffle:
             np.random.shuffle(sequences)
 
         return sequences
 
-    def stream_iterator(self, iterator: Iterator) -> Generator[Tuple, None, None]:
+    def stream_iterator(self, sequences: torch.LongTensor) -> Generator[Tuple, None, None]:
         """Create a streaming-based iterator.
 
+        Each row of a batch is a contiguous span of `bptt + 1` tokens, i.e., consecutive
+        rows and batches consume consecutive spans of `sequences`, which are sliced
+        at once instead of being read token by token. Remaining tokens that do not fill
+        a batch are discarded.
+
         Args:
-            iterator: Iterator with chunks of sequences.
+            sequences: Chunk of sequences.
 
         Yields:
             Stream-based batch.
 
         """
 
-        input_ids = torch.LongTensor(self.bsz, self.bptt)
-        labels = torch.LongTensor(self.bsz, self.bptt)
+        span_len = self.bsz * (self.bptt + 1)
+        n_batch = sequences.size(0) // span_len
 
-        n_retain = 0
+        # batches: [n_batch x bsz x bptt+1]
+        batches = sequences[: n_batch * span_len].view(n_batch, self.bsz, self.bptt + 1)
 
-        while True:
-            # input_ids: [bsz x n_retain+bptt]
-            # labels: [bsz x bptt]
-            input_ids[:, n_retain:].fill_(-1)
-            labels.fill_(-1)
-
-            valid_batch = True
-            for i in range(self.bsz):
-                n_filled = 0
-                try:
-                    while n_filled < self.bptt:
-                        stream = torch.LongTensor([next(iterator) for _ in range(self.bptt + 1)])
-
-                        # Number of new tokens to be filled in
-                        n_tokens = min(len(stream) - 1, self.bptt - n_filled)
-
-                        # First n_tokens are retained from last batch
-                        input_ids[i, n_retain + n_filled : n_retain + n_filled + n_tokens] = stream[:n_tokens]
-                        labels[i, n_filled : n_filled + n_tokens] = stream[1 : n_tokens + 1]
+        input_ids = None
+        for batch in batches:
+            # Inputs and labels are moved to the device at once since they overlap
+            batch = batch.to(self.device, non_blocking=True)
 
-                        n_filled += n_tokens
-                except StopIteration:
-                    valid_batch = False
-                    break
-
-            if not valid_batch:
-                return
-
-            input_ids = input_ids.to(self.device)
-            labels = labels.to(self.device)
+            # Prepends the last `ext_len` inputs from previous batch (if available)
+            if self.ext_len > 0 and input_ids is not None:
+                input_ids = torch.cat((input_ids[:, -self.ext_len :], batch[:, :-1]), dim=1)
+            else:
+                input_ids = batch[:, :-1].contiguous()
+            labels = batch[:, 1:].contiguous()
 
             yield input_ids, labels, self.bptt, True
 
-            n_retain = min(input_ids.size(1), self.ext_len)
-            if n_retain > 0:
-                input_ids[:, :n_retain] = input_ids[:, -n_retain:]
-            input_ids.resize_(input_ids.size(0), n_retain + self.bptt)
-
     def __iter__(self) -> Generator[Tuple, None, None]:
         """Default the standard iteration to stream-based batches.
 
+        The encoding of the next file is prefetched by a background thread while
+        batches of the current file are consumed.
+
         Yields:
             Stream-based batches.
 
@@ -341,12 +366,31 @@ class LMMultiFileIterator:
         if self.shuffle:
             np.random.shuffle(self.paths)
 
-        for path in self.paths:
-            sequences = self.get_sequences(path)
-            sequences_chunks = torch.chunk(sequences, self.n_chunks, 0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_sequences = executor.submit(self.get_sequences, self.paths[0]) if self.paths else None
+
+            for path_idx, path in enumerate(self.paths):
+                sequences = next_sequences.result()
+                if path_idx + 1 < len(self.paths):
+                    next_sequences = executor.submit(self.get_sequences, self.paths[path_idx + 1])
+
+                sequences_chunks = torch.chunk(sequences, self.n_chunks, 0)
+
+                # Only accounts for the time spent building batches
+                n_batches, elapsed_time = 0, 0.0
+                start_time = time.time()
+
+                for i in range(len(sequences_chunks)):
+                    for idx, batch in enumerate(self.stream_iterator(sequences_chunks[i])):
+                        n_batches += 1
+                        elapsed_time += time.time() - start_time
+
+                        yield batch
+
+                        start_time = time.time()
+                        self.last_iter = idx
 
-            for i in range(self.n_chunks):
-                iterator = iter(sequences_chunks[i])
-                for idx, batch in enumerate(self.stream_iterator(iterator)):
-                    yield batch
-                    self.last_iter = idx
+                elapsed_time += time.time() - start_time
+                logger.debug(
+                    f"Streamed {n_batches} batches from {path} ({n_batches / max(elapsed_time, 1e-6):.2f} batches/sec)."
+                )
@@ -146,6 +146,23 @@ class BbpeVocab(VocabBase):
 
         return toks
 
+    @overrides
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        texts = [self._preprocess_text(text) for text in texts]
+
+        # Batches are encoded in parallel by the Rust-based tokenizer
+        batch_toks = self._tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+        if self.encode_special_tokens:
+            batch_toks = [self.bos_id + toks + self.eos_id for toks in batch_toks]
+
+        return batch_toks
+
+    @overrides
+    def _default_encoding_workers(self) -> int:
+        # `encode_batch` is already multi-threaded
+        return 1
+
     @overrides
     def decode_text(self, ids: List[int]) -> str:
         return self._tokenizer.decode(ids, skip_special_tokens=self.decode_special_tokens)
@@ -297,7 +314,7 @@ class BbpeVocab(VocabBase):
         for file in open_files:
             file.close()
 
-        if len(added_tokens):
+        if added_tokens:
             tokenizer.add_tokens(added_tokens)
 
         tokenizer.save(self._tokenizer_filepath, pretty=True)
@@ -3,14 +3,22 @@
 
 """Utilities for tokenization pipelines with huggingface/tokenizers."""
 
+import io
+import itertools
+import os
+import shutil
+import time
 from abc import abstractmethod
 from collections import abc
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 from overrides import EnforceOverrides
 
 from archai.nlp import logging_utils
+from archai.nlp.datasets.nvidia import distributed_utils
 from archai.nlp.datasets.nvidia.tokenizer_utils.token_config import SpecialTokenEnum
 
 logger = logging_utils.get_logger(__name__)
@@ -142,17 +150,59 @@ class VocabBase(EnforceOverrides, abc.Sized):
 
         return [self.id_to_token(id) for id in ids]
 
-    def encode_file(self, path: str, verbose: Optional[bool] = True) -> torch.Tensor:
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        """Encode a batch of texts into tokens.
+
+        The default implementation calls `encode_text` for each text. Subclasses
+        backed by tokenizers with a native batch API should override this method.
+
+        Args:
+            texts: The input texts to encode.
+
+        Returns:
+            The encoded texts (tokens).
+
+        """
+
+        return [self.encode_text(text) for text in texts]
+
+    def _default_encoding_workers(self) -> int:
+        """Get the default number of processes used by `encode_file`.
+
+        Returns:
+            Number of processes, shared among the distributed workers.
+
+        """
+
+        return max(1, (os.cpu_count() or 1) // distributed_utils.get_world_size())
+
+    def encode_file(
+        self,
+        path: str,
+        verbose: Optional[bool] = True,
+        num_workers: Optional[int] = None,
+        chunk_size: Optional[int] = 16 * 1024 * 1024,
+        output_path: Optional[str] = None,
+        dtype: Optional[np.dtype] = np.int64,
+    ) -> Union[torch.Tensor, np.ndarray]:
         """Encode text from an input file.
 
-        This method reads text from the specified file and encodes it using
-        the `encode_text` method. It also includes options for verbosity and
-        efficiently handling large datasets by converting the encoded tokens
-        to a `torch.Tensor` every 500k lines.
+        The file is split into chunks of `chunk_size` bytes (aligned to line boundaries),
+        which are encoded with `encode_batch` by a pool of `num_workers` processes and
+        gathered in order. The encoded tokens are either concatenated into a single
+        tensor or streamed to a `.npy` file on disk, so the whole file never needs to
+        be held in memory as Python lists.
 
         Args:
             path: The path to the input file.
-            verbose: Whether to add verbosity to the logger.
+            verbose: Whether to add verbosity (progress and throughput) to the logger.
+            num_workers: Number of processes used to encode the chunks. If `None`,
+                the available CPUs are shared among the distributed workers. If `1`,
+                chunks are encoded in the current process.
+            chunk_size: Approximate size (in bytes) of each chunk.
+            output_path: Path to the `.npy` file where tokens should be written. If
+                supplied, a read-only memory-mapped array is returned instead of a tensor.
+            dtype: Data type of the `output_path` array.
 
         Returns:
             The encoded tokens.
@@ -161,24 +211,138 @@ class VocabBase(EnforceOverrides, abc.Sized):
 
         logger.info(f"Encoding file: {path}")
 
-        encoded = []
-        tensor_encoded = torch.LongTensor()
+        if num_workers is None:
+            num_workers = self._default_encoding_workers()
 
-        with open(path, "r", encoding="utf-8") as f:
-            for idx, line in enumerate(f):
-                # Converts to tensor.Tensor every 500k lines,
-                # otherwise Python list uses a lot of RAM
-                if idx > 0 and idx % 500000 == 0:
-                    tensor_encoded = torch.cat((tensor_encoded, torch.LongTensor(encoded)))
-                    encoded = []
+        chunks = _get_file_chunks(path, chunk_size)
+        num_workers = min(num_workers, len(chunks))
 
-                if verbose and idx > 0 and idx % 500000 == 0:
-                    logger.debug(f"Completed line: {format(idx)}")
+        if num_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(self,))
+            encoded_chunks = executor.map(_encode_chunk, [(path, start, end, dtype) for start, end in chunks])
+        else:
+            executor = None
+            encoded_chunks = (self._encode_chunk(path, start, end, dtype) for start, end in chunks)
+
+        output_file = open(output_path + ".tmp", "wb") if output_path else None
+        tensors = []
+
+        n_tokens, n_bytes = 0, 0
+        start_time = time.time()
+
+        try:
+            for (start, end), encoded in zip(chunks, encoded_chunks):
+                if output_file:
+                    encoded.tofile(output_file)
+                else:
+                    tensors.append(torch.from_numpy(encoded.astype(np.int64, copy=False)))
+
+                n_tokens += len(encoded)
+                n_bytes += end - start
+
+                if verbose:
+                    elapsed_time = max(time.time() - start_time, 1e-6)
+                    logger.debug(
+                        f"Completed: {n_bytes / 1024**2:.1f}/{chunks[-1][1] / 1024**2:.1f} MB | "
+                        f"{n_tokens / elapsed_time:.0f} tokens/sec"
+                    )
+        finally:
+            if executor:
+                executor.shutdown()
+            if output_file:
+                output_file.close()
+
+        elapsed_time = max(time.time() - start_time, 1e-6)
+        logger.info(f"Encoded {n_tokens} tokens in {elapsed_time:.2f}s ({n_tokens / elapsed_time:.0f} tokens/sec).")
+
+        if output_path:
+            _write_npy_file(output_path, output_path + ".tmp", dtype, n_tokens)
+            return np.load(output_path, mmap_mode="r")
+
+        return torch.cat(tensors) if tensors else torch.LongTensor()
+
+    def _encode_chunk(self, path: str, start: int, end: int, dtype: np.dtype) -> np.ndarray:
+        """Encode the lines of a file chunk.
+
+        Args:
+            path: The path to the input file.
+            start: Start byte of the chunk.
+            end: End byte of the chunk.
+            dtype: Data type of the encoded tokens.
+
+        Returns:
+            The encoded tokens.
+
+        """
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+
+        # Lines are read with the same (universal newlines) semantics as `open(path, "r")`
+        lines = list(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+        encoded = self.encode_batch(lines)
+
+        return np.fromiter(itertools.chain.from_iterable(encoded), dtype=dtype, count=sum(map(len, encoded)))
+
+
+_worker_vocab = None
+
+
+def _init_worker(vocab: VocabBase) -> None:
+    global _worker_vocab
+    _worker_vocab = vocab
+
+
+def _encode_chunk(args: Tuple[str, int, int, np.dtype]) -> np.ndarray:
+    return _worker_vocab._encode_chunk(*args)
+
+
+def _get_file_chunks(path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges that start and end at line boundaries.
+
+    Args:
+        path: The path to the input file.
+        chunk_size: Approximate size (in bytes) of each range.
+
+    Returns:
+        Start and end bytes of each range.
+
+    """
+
+    file_size = os.path.getsize(path)
+    chunks = []
+
+    with open(path, "rb") as f:
+        start = 0
+        while start < file_size:
+            f.seek(min(start + chunk_size, file_size))
+            f.readline()
+
+            end = min(f.tell(), file_size)
+            chunks.append((start, end))
+            start = end
+
+    return chunks
+
+
+def _write_npy_file(path: str, raw_path: str, dtype: np.dtype, length: int) -> None:
+    """Write a `.npy` file from a raw (headerless) binary file, which is removed.
+
+    Args:
+        path: The path to the output `.npy` file.
+        raw_path: The path to the raw binary file.
+        dtype: Data type of the array.
+        length: Number of elements of the array.
+
+    """
 
-                tokens = self.encode_text(line)
-                encoded.extend(tokens)
+    with open(path, "wb") as f:
+        np.lib.format.write_array_header_1_0(
+            f, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (length,)}
+        )
 
-        if len(encoded) > 0:
-            tensor_encoded = torch.cat((tensor_encoded, torch.LongTensor(encoded)))
+        with open(raw_path, "rb") as raw_f:
+            shutil.copyfileobj(raw_f, f, 16 * 1024 * 1024)
 
-        return tensor_encoded
+    os.remove(raw_path)
@@ -3,6 +3,8 @@
 
 """Harness-based evaluation."""
 
+import time
+from itertools import islice
 from typing import Any, Dict, Optional
 
 from tqdm import tqdm
@@ -16,17 +18,25 @@ def evaluate(
     harness_task: HarnessTask,
     n_few_shot: Optional[int] = 0,
     description: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    n_scheduled_samples: Optional[int] = 256,
 ) -> Dict[str, Any]:
     """Evaluate a harness-based model on a harness-based task.
 
     This function performs the evaluation of a harness-based model on a harness-based task
     using a few-shot evaluation approach.
 
+    Calls from `n_scheduled_samples` samples are gathered and run at once, so `log_likelihood`
+    calls can be batched by length and share their contexts (see `HarnessModel.run_calls`).
+
     Args:
         harness_model: Harness-based model to be evaluated.
         harness_task: Harness-based task on which the model is evaluated.
         n_few_shot: Number of few-shot samples to be used for the evaluation.
         description: Additional description to be added to the few-shot context.
+        batch_size: Maximum number of sequences per forward pass. If not supplied,
+            uses the batch size of `harness_model`.
+        n_scheduled_samples: Number of samples whose calls are scheduled together.
 
     Returns:
         Output configuration and evaluation metrics.
@@ -42,22 +52,48 @@ def evaluate(
     else:
         raise RuntimeError("`harness_task` should either have `test_set` or `validation_set`.")
 
-    for sample in tqdm(eval_set):
-        # Creates the context based on the number of few-shot samples
-        context = harness_task.create_context(sample, n_few_shot=n_few_shot, description=description)
+    # `batch_size` only overrides the batch size of `harness_model` during this evaluation
+    original_batch_size = harness_model.batch_size
+    if batch_size is not None:
+        harness_model.batch_size = batch_size
+
+    try:
+        n_samples = 0
+        start_time = time.time()
+
+        eval_iterator = iter(tqdm(eval_set))
+        while True:
+            samples = list(islice(eval_iterator, n_scheduled_samples))
+            if not samples:
+                break
+
+            sample_calls = []
+            for sample in samples:
+                # Creates the context based on the number of few-shot samples
+                context = harness_task.create_context(sample, n_few_shot=n_few_shot, description=description)
+
+                # Creates the sampling procedure calls and ensures they are encoded in a list
+                calls = harness_task.create_sampling_calls(sample, context)
+                if not isinstance(calls, (list, tuple)):
+                    calls = [calls]
+                sample_calls.append(calls)
+
+            # Performs the sampling of all calls at once and process the outputs
+            results = harness_model.run_calls([call for calls in sample_calls for call in calls])
 
-        # Creates the sampling procedure calls and ensures they are encoded in a list
-        calls = harness_task.create_sampling_calls(sample, context)
-        if not isinstance(calls, (list, tuple)):
-            calls = [calls]
+            offset = 0
+            for sample, calls in zip(samples, sample_calls):
+                harness_task.compute_results(sample, tuple(results[offset : offset + len(calls)]))
+                offset += len(calls)
 
-        # Performs the sampling and process the outputs
-        results = tuple(getattr(harness_model, call.call_name)(*call.args, **call.kwargs) for call in calls)
-        harness_task.compute_results(sample, results)
+            n_samples += len(samples)
+    finally:
+        harness_model.batch_size = original_batch_size
 
     # Calculates the final metrics
     output = harness_task.config
     output["eval"] = harness_task.compute_metrics()
     output["eval"]["n_few_shot"] = n_few_shot
+    output["eval"]["samples_per_second"] = n_samples / (time.time() - start_time)
 
     return output
@@ -3,7 +3,9 @@
 
 """Harness-based model."""
 
-from typing import List, Optional, Tuple, Union
+import inspect
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import torch
 import torch.nn.functional as F
@@ -13,7 +15,10 @@ from transformers.models.auto.tokenization_auto import AutoTokenizer
 from archai.nlp.datasets.hf.tokenizer_utils.pre_trained_tokenizer import (
     ArchaiPreTrainedTokenizerFast,
 )
-from archai.nlp.eval.harness.harness_utils import MultipleTokenStoppingCriteria
+from archai.nlp.eval.harness.harness_utils import (
+    HarnessCall,
+    MultipleTokenStoppingCriteria,
+)
 
 
 class HarnessModel:
@@ -23,12 +28,19 @@ class HarnessModel:
         self,
         model: torch.nn.Module,
         tokenizer: Union[AutoTokenizer, ArchaiPreTrainedTokenizerFast],
+        batch_size: Optional[int] = 8,
+        share_context: Optional[bool] = True,
     ) -> None:
         """Initialize the `HarnessModel` object with the specified model and tokenizer.
 
         Args:
             model: The pre-trained model.
             tokenizer: The pre-trained tokenizer.
+            batch_size: Maximum number of sequences per forward pass when
+                computing log-likelihoods of multiple requests.
+            share_context: Whether requests with the same context (e.g., choices of a
+                multiple-choice sample) should compute the context only once and score
+                the targets from its cached past key/values.
 
         """
 
@@ -38,6 +50,9 @@ class HarnessModel:
         self.tokenizer = tokenizer
         self.tokenizer.pad_token = self.tokenizer.eos_token
 
+        self.batch_size = batch_size
+        self.share_context = share_context
+
     def __call__(self, **kwargs) -> Tuple[torch.FloatTensor, ...]:
         """Performs a forward pass over the pre-trained model without storing gradients.
 
@@ -215,36 +230,202 @@ class HarnessModel:
 
         """
 
-        if not context:
-            context = self.eos_token
+        output = self.log_likelihood_batch([(context, target)])[0]
+
+        if return_exact_match:
+            return output
 
-        encoded_context = self.encode(context)
-        encoded_target = self.encode(target)
+        return output[0]
 
-        # Truncates the `input_ids` from the left to keep `max_length` constant
-        # Removes the last token as it will be the predicted one
-        input_ids = torch.cat((encoded_context, encoded_target), dim=1)[:, -(self.max_length + 1) :]
-        input_ids = input_ids[:, :-1]
+    def _encode_unique(self, texts: List[str]) -> Dict[str, List[int]]:
+        """Encode unique texts with the tokenizer.
 
-        # Calculates the truncated inputs and original target lengths
-        sequence_length = input_ids.shape[-1]
-        target_length = encoded_target.shape[-1]
+        Args:
+            texts: The texts to be encoded.
+
+        Returns:
+            Dictionary mapping texts to their tokens.
 
-        # Performs the forward pass to retrieve the `logits`
-        # and calculates their log-probabilities
-        logits = self(input_ids=input_ids).logits
-        probs = F.log_softmax(logits, dim=-1)
+        """
 
-        # Slices to original sequence length (without target)
-        # and retrieves log-probabilities at corresponding target indices
-        probs = probs[:, sequence_length - target_length : sequence_length, :]
-        target_probs = torch.gather(probs, 2, encoded_target.unsqueeze(-1)).squeeze(-1)
+        unique_texts = list(dict.fromkeys(texts))
+        input_ids = self.tokenizer(unique_texts, add_special_tokens=False, return_attention_mask=False).input_ids
 
-        # Calculates whether generated tokens are fully equal to target
-        if return_exact_match:
-            generated_tokens = probs.argmax(dim=-1)
-            is_exact_match = (generated_tokens == encoded_target).all()
+        return dict(zip(unique_texts, input_ids))
+
+    def _score_continuations(
+        self,
+        continuations: List[List[int]],
+        targets: List[List[int]],
+        offsets: List[int],
+        past_key_values: Optional[Tuple[Tuple[torch.Tensor, ...], ...]] = None,
+    ) -> List[Tuple[float, bool]]:
+        """Compute the log-likelihood of targets with a single padded forward pass.
+
+        Sequences are right-padded, which does not change the log-probabilities of previous
+        positions since attention is causal. If `past_key_values` are supplied, they should
+        have a batch size of 1 and are shared by all continuations.
+
+        Args:
+            continuations: Input tokens of each sequence.
+            targets: Target tokens of each sequence.
+            offsets: Position of each sequence that predicts its first target token.
+            past_key_values: Cached past key/values of a shared context.
+
+        Returns:
+            Log-likelihood of each target and whether its greedy tokens match the target.
+
+        """
+
+        batch_size = len(continuations)
+        seq_len = max(len(continuation) for continuation in continuations)
+
+        input_ids = torch.full((batch_size, seq_len), self.eos_token_id, dtype=torch.long)
+        for i, continuation in enumerate(continuations):
+            input_ids[i, : len(continuation)] = torch.tensor(continuation, dtype=torch.long)
+
+        kwargs = {}
+        if past_key_values is not None:
+            # Works for both [batch_size, ...] and [batch_size * n_head, ...] layouts
+            kwargs["past_key_values"] = tuple(
+                tuple(past.repeat(batch_size, *([1] * (past.dim() - 1))) for past in layer_past)
+                for layer_past in past_key_values
+            )
+
+        logits = self(input_ids=input_ids.to(self.device), **kwargs).logits
+        log_probs = F.log_softmax(logits.float(), dim=-1)
+
+        # Gathers the log-probabilities and greedy tokens at target positions
+        positions = torch.zeros((batch_size, max(len(target) for target in targets)), dtype=torch.long)
+        labels = torch.zeros_like(positions)
+        mask = torch.zeros_like(positions, dtype=torch.bool)
+        for i, (target, offset) in enumerate(zip(targets, offsets)):
+            positions[i, : len(target)] = torch.arange(offset, offset + len(target))
+            labels[i, : len(target)] = torch.tensor(target, dtype=torch.long)
+            mask[i, : len(target)] = True
+
+        positions, labels, mask = positions.to(self.device), labels.to(self.device), mask.to(self.device)
+        log_probs = torch.gather(log_probs, 1, positions.unsqueeze(-1).expand(-1, -1, log_probs.shape[-1]))
+
+        target_log_probs = torch.gather(log_probs, 2, labels.unsqueeze(-1)).squeeze(-1)
+        target_log_probs = (target_log_probs * mask).sum(dim=-1).cpu().tolist()
+
+        is_exact_match = ((log_probs.argmax(dim=-1) == labels) | ~mask).all(dim=-1).cpu().tolist()
+
+        return list(zip(target_log_probs, is_exact_match))
+
+    def log_likelihood_batch(self, requests: List[Tuple[str, str]]) -> List[Tuple[float, bool]]:
+        """Compute the log-likelihood of generating targets from contexts for a list of requests.
+
+        Requests that share their context are scored from a single forward pass over the
+        context, while the remaining requests are sorted by length and scored in padded
+        batches of `batch_size` sequences.
+
+        Args:
+            requests: Tuples of (context, target).
+
+        Returns:
+            Log-likelihood of achieving each target from its context and whether generated
+                targets are fully equal to provided target.
+
+        """
+
+        requests = [(context or self.eos_token, target) for context, target in requests]
+        encodings = self._encode_unique([text for request in requests for text in request])
+
+        # Splits each request into the context tokens that are not used for scoring (prefix)
+        # and the remaining tokens, where the last context token predicts the first target token
+        prefixes, continuations, targets = [], [], []
+        for context, target in requests:
+            encoded_target = encodings[target]
+
+            # Truncates the `input_ids` from the left to keep `max_length` constant
+            # Removes the last token as it will be the predicted one
+            input_ids = (encodings[context] + encoded_target)[-(self.max_length + 1) :][:-1]
+            target_length = min(len(encoded_target), len(input_ids))
+
+            prefixes.append(tuple(input_ids[: len(input_ids) - target_length]))
+            continuations.append(input_ids[len(input_ids) - target_length :])
+            targets.append(encoded_target[len(encoded_target) - target_length :])
+
+        groups = defaultdict(list)
+        for i, prefix in enumerate(prefixes):
+            groups[prefix].append(i)
+
+        outputs = [None] * len(requests)
+        independent_indices = []
+
+        for prefix, indices in groups.items():
+            # Empty targets have a log-likelihood of zero
+            for i in [i for i in indices if len(targets[i]) == 0]:
+                outputs[i] = (0.0, True)
+            indices = [i for i in indices if len(targets[i]) > 0]
+
+            if not self.share_context or len(indices) <= 1 or len(prefix) == 0:
+                independent_indices += indices
+                continue
+
+            # Computes the shared context only once
+            prefix_outputs = self(input_ids=torch.tensor([prefix], device=self.device), use_cache=True)
+            past_key_values = getattr(prefix_outputs, "past_key_values", None)
+            if past_key_values is None:
+                independent_indices += indices
+                continue
+
+            for j in range(0, len(indices), self.batch_size):
+                batch_indices = indices[j : j + self.batch_size]
+                batch_outputs = self._score_continuations(
+                    [continuations[i] for i in batch_indices],
+                    [targets[i] for i in batch_indices],
+                    [0] * len(batch_indices),
+                    past_key_values=past_key_values,
+                )
+                for i, output in zip(batch_indices, batch_outputs):
+                    outputs[i] = output
+
+        # Sorts by length to reduce the amount of padding
+        independent_indices.sort(key=lambda i: len(prefixes[i]) + len(continuations[i]), reverse=True)
+        for j in range(0, len(independent_indices), self.batch_size):
+            batch_indices = independent_indices[j : j + self.batch_size]
+            batch_outputs = self._score_continuations(
+                [list(prefixes[i]) + continuations[i] for i in batch_indices],
+                [targets[i] for i in batch_indices],
+                [len(prefixes[i]) for i in batch_indices],
+            )
+            for i, output in zip(batch_indices, batch_outputs):
+                outputs[i] = output
+
+        return outputs
+
+    def run_calls(self, calls: List[HarnessCall]) -> List[Any]:
+        """Run a list of calls, where `log_likelihood` calls are scheduled in batches.
+
+        Args:
+            calls: The calls to be run.
+
+        Returns:
+            The output of each call.
+
+        """
+
+        outputs = [None] * len(calls)
+
+        requests, request_indices, return_exact_matches = [], [], []
+        for i, call in enumerate(calls):
+            if call.call_name != "log_likelihood":
+                outputs[i] = getattr(self, call.call_name)(*call.args, **call.kwargs)
+                continue
+
+            arguments = inspect.signature(self.log_likelihood).bind(*call.args, **call.kwargs)
+            arguments.apply_defaults()
+
+            requests.append((arguments.arguments["context"], arguments.arguments["target"]))
+            request_indices.append(i)
+            return_exact_matches.append(arguments.arguments["return_exact_match"])
 
-            return float(target_probs.cpu().sum()), bool(is_exact_match.cpu())
+        for i, output, return_exact_match in zip(
+            request_indices, self.log_likelihood_batch(requests), return_exact_matches
+        ):
+            outputs[i] = output if return_exact_match else output[0]
 
-        return float(target_probs.cpu().sum())
+        return outputs
@@ -3,11 +3,11 @@
 
 """ONNX-based manual evaluation."""
 
-import copy
 import math
 import time
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
 import torch
 from onnxruntime.capi.onnxruntime_inference_collection import InferenceSession
 from torch.utils.data.dataloader import DataLoader
@@ -17,7 +17,141 @@ from tqdm import tqdm
 from archai.nlp.eval.eval_utils import lm_accuracy
 
 
-def generate(onnx_session: InferenceSession, max_length: Optional[int] = 1, **inputs) -> torch.LongTensor:
+def _get_logits_name(onnx_session: InferenceSession) -> str:
+    """Get the name of the output that holds the next-token scores.
+
+    Args:
+        onnx_session: An already instantiated ONNX-based session.
+
+    Returns:
+        Name of the output (`logits` or `probs`).
+
+    """
+
+    output_names = [output.name for output in onnx_session.get_outputs()]
+
+    return "logits" if "logits" in output_names else "probs"
+
+
+def _get_past_inputs(onnx_session: InferenceSession) -> List[Any]:
+    """Get the past key/values inputs of an ONNX model (exported with `use_past=True`).
+
+    Args:
+        onnx_session: An already instantiated ONNX-based session.
+
+    Returns:
+        Past key/values inputs' metadata (`past_0`, ..., `past_n`).
+
+    """
+
+    past_inputs = [onnx_input for onnx_input in onnx_session.get_inputs() if onnx_input.name.startswith("past_")]
+
+    return sorted(past_inputs, key=lambda onnx_input: int(onnx_input.name.split("_")[-1]))
+
+
+def _greedy_token(scores: np.ndarray) -> np.ndarray:
+    """Select the tokens with highest scores of the last position.
+
+    Args:
+        scores: Logits or probabilities with shape `[batch_size, vocab_size]`
+            or `[batch_size, seq_len, vocab_size]`.
+
+    Returns:
+        Selected tokens with shape `[batch_size, 1]`.
+
+    """
+
+    if scores.ndim == 3:
+        scores = scores[:, -1]
+
+    return np.argmax(scores, axis=-1)[:, None].astype(np.int64)
+
+
+def _generate_with_past(onnx_session: InferenceSession, input_ids: np.ndarray, max_length: int) -> np.ndarray:
+    """Generate tokens with greedy search by feeding past key/values back to the ONNX model.
+
+    The prompt is encoded once and each further step only encodes the last predicted token,
+    thus the cost is linear in the number of generated tokens.
+
+    Args:
+        onnx_session: An already instantiated ONNX-based session with past key/values inputs.
+        input_ids: Input tokens with shape `[batch_size, seq_len]`.
+        max_length: Maximum number of tokens to generate.
+
+    Returns:
+        Generated tokens with shape `[batch_size, max_length]`.
+
+    """
+
+    past_inputs = _get_past_inputs(onnx_session)
+    past_names = [past_input.name for past_input in past_inputs]
+    present_names = [name.replace("past_", "present_") for name in past_names]
+    logits_name = _get_logits_name(onnx_session)
+
+    # Empty past key/values: [past_key_values, batch_size, n_head, 0, d_head]
+    batch_size = input_ids.shape[0]
+    past = {
+        past_input.name: np.zeros(
+            [dim if isinstance(dim, int) else (batch_size if i == 1 else 0) for i, dim in enumerate(past_input.shape)],
+            dtype=np.float16 if past_input.type == "tensor(float16)" else np.float32,
+        )
+        for past_input in past_inputs
+    }
+
+    generated_ids = []
+    step_ids = input_ids
+    for _ in range(max_length):
+        scores, *presents = onnx_session.run([logits_name] + present_names, {"input_ids": step_ids, **past})
+
+        step_ids = _greedy_token(scores)
+        generated_ids.append(step_ids)
+
+        past = dict(zip(past_names, presents))
+
+    return np.concatenate(generated_ids, axis=-1) if generated_ids else np.zeros((batch_size, 0), dtype=np.int64)
+
+
+def _generate_without_past(onnx_session: InferenceSession, max_length: int, **inputs) -> np.ndarray:
+    """Generate tokens with greedy search by re-encoding the whole sequence at each step.
+
+    Args:
+        onnx_session: An already instantiated ONNX-based session.
+        max_length: Maximum number of tokens to generate.
+
+    Returns:
+        Generated tokens with shape `[batch_size, max_length]`.
+
+    """
+
+    input_names = [onnx_input.name for onnx_input in onnx_session.get_inputs()]
+    logits_name = _get_logits_name(onnx_session)
+
+    input_ids = inputs["input_ids"]
+    batch_size = input_ids.shape[0]
+
+    generated_ids = []
+    for _ in range(max_length):
+        # Gathers the inputs ready for ONNX, extending the ones that depend on the sequence length
+        input_onnx = {"input_ids": input_ids}
+        if "attention_mask" in input_names:
+            input_onnx["attention_mask"] = np.ones_like(input_ids)
+        if "labels" in input_names:
+            input_onnx["labels"] = input_ids
+
+        scores = onnx_session.run([logits_name], input_onnx)[0]
+
+        step_ids = _greedy_token(scores)
+        generated_ids.append(step_ids)
+
+        # Concatenates the predicted tokens with the inputs
+        input_ids = np.concatenate((input_ids, step_ids), axis=-1)
+
+    return np.concatenate(generated_ids, axis=-1) if generated_ids else np.zeros((batch_size, 0), dtype=np.int64)
+
+
+def generate(
+    onnx_session: InferenceSession, max_length: Optional[int] = 1, use_past: Optional[bool] = None, **inputs
+) -> torch.LongTensor:
     """Generate a sequence of tokens using greedy search with an ONNX model.
 
     This function generates a sequence of tokens by repeatedly running the provided
@@ -25,27 +159,32 @@ def generate(onnx_session: InferenceSession, max_length: Optional[int] = 1, **in
     predicted probability at each step. The process is repeated for the specified
     maximum number of steps.
 
+    If the ONNX model has past key/values inputs (exported with `use_past=True`), they are
+    fed back to the model, so only the new token is encoded at each step (incremental decoding).
+    Otherwise, the whole sequence is re-encoded at each step.
+
     Args:
         onnx_session: An already instantiated ONNX-based session to use for prediction.
         max_length: Maximum number of tokens to generate.
+        use_past: Whether to use incremental decoding with past key/values. If not supplied,
+            it is used whenever the ONNX model supports it.
 
     Returns:
         Tensor holding the input tokens plus the predicted tokens.
 
     """
 
-    for _ in range(max_length):
-        # Gathers the inputs ready for ONNX
-        input_onnx = {k: v.cpu().detach().numpy() for k, v in inputs.items()}
+    if use_past is None:
+        use_past = len(_get_past_inputs(onnx_session)) > 0
 
-        # Passes through model and gathers the predictions
-        logits = torch.from_numpy(onnx_session.run(["logits"], input_onnx)[0])
-        sampled_logits = torch.argmax(logits[:, -1], dim=1).unsqueeze(-1)
+    input_ids = inputs["input_ids"].cpu().detach().numpy().astype(np.int64)
 
-        # Concatenates the predicted tokens with the inputs
-        inputs["input_ids"] = torch.cat((inputs["input_ids"], sampled_logits), dim=-1)
+    if use_past:
+        generated_ids = _generate_with_past(onnx_session, input_ids, max_length)
+    else:
+        generated_ids = _generate_without_past(onnx_session, max_length, input_ids=input_ids)
 
-    return inputs["input_ids"]
+    return torch.from_numpy(np.concatenate((input_ids, generated_ids), axis=-1))
 
 
 def manual_evaluate(
@@ -58,6 +197,9 @@ def manual_evaluate(
 ) -> Dict[str, Any]:
     """Evaluate an ONNX model.
 
+    Since tokens are generated with greedy search, the tokens used by "acc@i" are a prefix
+    of the ones used by "acc@n", thus they are generated only once per batch.
+
     Args:
         onnx_session: An already instantiated ONNX-based session to use for prediction.
         eval_dataset: Evaluation (testing) dataset.
@@ -67,60 +209,63 @@ def manual_evaluate(
         n_accuracy_type: Number of accuracies to calculate, ranging from "acc@1" to "acc@n".
 
     Returns:
-        A dictionary containing the evaluation metrics and runtime statistics.
+        A dictionary containing the evaluation metrics and runtime statistics. The loss
+            (and perplexity) is only available if the ONNX model has a `loss` output.
 
     """
 
     # Creates a DataLoader with receiving arguments
     data_loader = DataLoader(eval_dataset, collate_fn=data_collator, batch_size=batch_size)
 
+    input_names = [onnx_input.name for onnx_input in onnx_session.get_inputs()]
+    has_loss = "loss" in [output.name for output in onnx_session.get_outputs()]
+
     # Defines initial evaluation metrics
     eval_loss = 0.0
     eval_acc = {f"acc@{i+1}": 0.0 for i in range(n_accuracy_type)}
+    n_generated_tokens, generation_time = 0, 0.0
     start_time = time.time()
 
     # Iterates through all samples
     for step, inputs in enumerate(tqdm(data_loader)):
-        # Gathers a list of possible accuracies (acc@1, ..., acc@n)
-        acc_types = [(n_seed_tokens, n_seed_tokens + i) for i in range(1, n_accuracy_type + 1)]
-
-        for acc_type in acc_types:
-            # Defines the name of current key
-            key = f"acc@{acc_type[1]-acc_type[0]}"
-
-            # Resizes both inputs and labels to correspond to accuracy type
-            resized_inputs = copy.deepcopy(inputs)
-            resized_inputs = {k: v[:, 0 : acc_type[0]] for k, v in resized_inputs.items()}
-            resized_labels = copy.deepcopy(inputs["labels"])[:, acc_type[0] : acc_type[1]]
-
-            # Generates a set of tokens
-            outputs = generate(onnx_session, **resized_inputs, max_length=acc_type[1] - acc_type[0])
-            outputs = outputs[:, acc_type[0] : acc_type[1]]
+        # Generates the tokens for the largest accuracy type (acc@n) from the seed tokens
+        generation_start_time = time.time()
+        outputs = generate(
+            onnx_session, input_ids=inputs["input_ids"][:, :n_seed_tokens], max_length=n_accuracy_type
+        )
+        generation_time += time.time() - generation_start_time
+        n_generated_tokens += outputs.size(0) * n_accuracy_type
 
-            # Calculates the accuracy
-            eval_acc[key] += lm_accuracy(outputs, resized_labels)["lm_accuracy"]
+        # Calculates the accuracies (acc@1, ..., acc@n) over prefixes of the generated tokens
+        for i in range(1, n_accuracy_type + 1):
+            eval_acc[f"acc@{i}"] += lm_accuracy(
+                outputs[:, n_seed_tokens : n_seed_tokens + i],
+                inputs["labels"][:, n_seed_tokens : n_seed_tokens + i],
+            )["lm_accuracy"]
 
         # Performs the forward pass and calculates the evaluation loss
-        input_onnx = {k: v.cpu().detach().numpy() for k, v in inputs.items()}
-        eval_loss += onnx_session.run(["loss"], input_onnx)[0]
+        if has_loss:
+            input_onnx = {k: v.cpu().detach().numpy() for k, v in inputs.items() if k in input_names}
+            eval_loss += onnx_session.run(["loss"], input_onnx)[0]
 
     # Defines ending time and number of steps
     end_time = time.time()
     step += 1
 
     # Calculates final evaluation metrics
-    eval_loss = (eval_loss / step).item()
+    eval_loss = (eval_loss / step).item() if has_loss else None
     eval_acc = {k: (v / step).item() for k, v in eval_acc.items()}
     eval_runtime = end_time - start_time
 
     # Generates the output dictionary with some metrics
     output = {
         "eval_loss": eval_loss,
-        "eval_ppl": math.exp(eval_loss),
+        "eval_ppl": math.exp(eval_loss) if has_loss else None,
         "eval_acc": eval_acc,
         "eval_runtime": eval_runtime,
         "eval_samples_per_second": len(eval_dataset) / eval_runtime,
         "eval_steps_per_second": step / eval_runtime,
+        "eval_generated_tokens_per_second": n_generated_tokens / max(generation_time, 1e-6),
         "step": step,
     }
 
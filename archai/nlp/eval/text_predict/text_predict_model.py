@@ -5,7 +5,7 @@
 
 import functools
 import os
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import onnxruntime as ort
@@ -22,17 +22,24 @@ class TextPredictModel:
         self,
         space_token_id: int,
         max_seq_length: Optional[int] = 30,
+        probs_batch_size: Optional[int] = 32,
     ) -> None:
         """Initialize the `TextPredictModel` with the given arguments.
 
         Args:
             space_token_id: The identifier for the space token.
             max_seq_length: The maximum length of the input sequence.
+            probs_batch_size: Maximum number of sequences per forward pass when
+                calculating next token's probabilities of multiple sequences.
 
         """
 
         self.space_token_id = space_token_id
         self.max_seq_length = max_seq_length
+        self.probs_batch_size = probs_batch_size
+
+        # Next token's probabilities are indexed by tuples of tokens
+        self.next_token_probs_cache = LRUCache(maxsize=1024)
 
     @functools.lru_cache(maxsize=1024)
     def _create_fixed_length_tensor(self, inputs: Tuple[int, ...]) -> torch.Tensor:
@@ -86,26 +93,89 @@ class TextPredictModel:
 
             return loss / n_labels
 
-    @functools.lru_cache(maxsize=1024)
-    def get_next_token_probs(self, input_ids: Tuple[int, ...]) -> List[float]:
-        """Calculate the probabilities of next token.
+    def get_losses(self, sequences: List[Tuple[int, ...]]) -> List[float]:
+        """Calculate the loss of the model on a list of sequences.
 
         Args:
-            input_ids: The input tokens.
+            sequences: The sequences of input tokens.
 
         Returns:
-            Next token's probabilities.
+            The loss of each sequence.
 
         """
 
-        input_ids = self._create_fixed_length_tensor(input_ids)
+        return [self.get_loss(tuple(input_ids)) for input_ids in sequences]
 
-        with torch.no_grad():
-            output = self.model(input_ids)
-            next_token_probs = torch.exp(output.logits[-1][0]).tolist()
+    def _compute_next_token_probs(self, sequences: List[Tuple[int, ...]]) -> List[np.ndarray]:
+        """Core computation of the probabilities of next token for a batch of sequences.
+
+        Args:
+            sequences: The sequences of input tokens.
+
+        Returns:
+            Next token's probabilities of each sequence.
+
+        """
+
+        # Sequences are left-padded to a fixed length (except for empty sequences), thus
+        # those with the same length can be stacked and their last position is the next token
+        tensors = [self._create_fixed_length_tensor(input_ids) for input_ids in sequences]
+
+        next_token_probs = [None] * len(sequences)
+        for seq_len in {tensor.size(1) for tensor in tensors}:
+            indices = [i for i, tensor in enumerate(tensors) if tensor.size(1) == seq_len]
+            input_ids = torch.cat([tensors[i] for i in indices], dim=0)
+
+            with torch.no_grad():
+                output = self.model(input_ids)
+                probs = torch.softmax(output.logits[:, -1].float(), dim=-1).cpu().numpy()
+
+            for i, seq_probs in zip(indices, probs):
+                next_token_probs[i] = seq_probs
 
         return next_token_probs
 
+    def get_next_token_probs_batch(self, sequences: List[Tuple[int, ...]]) -> List[np.ndarray]:
+        """Calculate the probabilities of next token for a list of sequences.
+
+        Sequences that are not cached are computed in batches of `probs_batch_size`.
+
+        Args:
+            sequences: The sequences of input tokens.
+
+        Returns:
+            Next token's probabilities of each sequence.
+
+        """
+
+        sequences = [tuple(input_ids) for input_ids in sequences]
+
+        next_token_probs = {}
+        for input_ids in sequences:
+            if input_ids in self.next_token_probs_cache:
+                next_token_probs[input_ids] = self.next_token_probs_cache[input_ids]
+
+        missing_sequences = [input_ids for input_ids in dict.fromkeys(sequences) if input_ids not in next_token_probs]
+        for i in range(0, len(missing_sequences), self.probs_batch_size):
+            batch = missing_sequences[i : i + self.probs_batch_size]
+            for input_ids, probs in zip(batch, self._compute_next_token_probs(batch)):
+                next_token_probs[input_ids] = self.next_token_probs_cache[input_ids] = probs
+
+        return [next_token_probs[input_ids] for input_ids in sequences]
+
+    def get_next_token_probs(self, input_ids: Tuple[int, ...]) -> np.ndarray:
+        """Calculate the probabilities of next token.
+
+        Args:
+            input_ids: The input tokens.
+
+        Returns:
+            Next token's probabilities.
+
+        """
+
+        return self.get_next_token_probs_batch([input_ids])[0]
+
     @functools.lru_cache(maxsize=1024)
     def get_top_next_token_probs(self, input_ids: Tuple[int, ...]) -> Tuple[int, float]:
         """Calculate the probability of top-1 next token.
@@ -119,9 +189,9 @@ class TextPredictModel:
         """
 
         probs = self.get_next_token_probs(tuple(input_ids))
-        idx = np.argmax(probs)
+        idx = int(np.argmax(probs))
 
-        return (idx, probs[idx])
+        return (idx, float(probs[idx]))
 
 
 class TextPredictTorchModel(TextPredictModel):
@@ -133,6 +203,7 @@ class TextPredictTorchModel(TextPredictModel):
         space_token_id: int,
         max_seq_length: Optional[int] = 30,
         device: Optional[str] = None,
+        probs_batch_size: Optional[int] = 32,
     ) -> None:
         """Override initialization method.
 
@@ -141,10 +212,12 @@ class TextPredictTorchModel(TextPredictModel):
             space_token_id: The space token identifier.
             max_seq_length: The maximum sequence length.
             device: The device where the model should be placed.
+            probs_batch_size: Maximum number of sequences per forward pass when
+                calculating next token's probabilities of multiple sequences.
 
         """
 
-        super().__init__(space_token_id, max_seq_length=max_seq_length)
+        super().__init__(space_token_id, max_seq_length=max_seq_length, probs_batch_size=probs_batch_size)
 
         self.model = model
         self.device = next(self.model.parameters()).device if device is None else device
@@ -161,17 +234,28 @@ class TextPredictONNXModel(TextPredictModel):
         onnx_model_path: str,
         space_token_id: int,
         max_seq_length: Optional[int] = 30,
+        loss_batch_size: Optional[int] = 64,
+        past_cache_max_bytes: Optional[int] = 256 * 1024**2,
+        probs_batch_size: Optional[int] = 32,
     ) -> None:
         """Override initialization method.
 
+        If the ONNX model outputs the probabilities of all positions (exported with
+        `task="causal-lm-all-positions"`), sequences are scored with a single forward pass.
+
         Args:
             onnx_model_path: A path to the ONNX model file.
             space_token_id: The space token identifier.
             max_seq_length: The maximum sequence length.
+            loss_batch_size: Number of rows (of at most `max_seq_length` tokens) scored
+                per forward pass when calculating the loss.
+            past_cache_max_bytes: Maximum number of bytes held by the past key/values cache.
+            probs_batch_size: Maximum number of sequences per forward pass when calculating
+                next token's probabilities of multiple sequences (requires all positions).
 
         """
 
-        super().__init__(space_token_id, max_seq_length=max_seq_length)
+        super().__init__(space_token_id, max_seq_length=max_seq_length, probs_batch_size=probs_batch_size)
 
         config_path = os.path.join(os.path.dirname(onnx_model_path), "config.json")
         self.config = AutoConfig.from_pretrained(config_path, local_files_only=True)
@@ -186,10 +270,32 @@ class TextPredictONNXModel(TextPredictModel):
 
         self.input_names = [i.name for i in self.session.get_inputs()]
         self.batch_size = 1
+        self.loss_batch_size = loss_batch_size
+
+        # Whether probabilities are available for all positions, i.e., [batch_size, seq_len, vocab_size]
+        self.all_positions = len(self.session.get_outputs()[0].shape) == 3
 
-        self.past_cache = LRUCache(maxsize=1024)
+        # Past key/values are indexed by tuples of tokens
+        self.past_cache = LRUCache(maxsize=1024, maxbytes=past_cache_max_bytes)
         self.min_past_cache_length = 8
 
+    def _get_empty_past(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """Create empty past key/values inputs.
+
+        Args:
+            batch_size: Batch size.
+
+        Returns:
+            Past key/values inputs with zero length.
+
+        """
+
+        past_key_values = self.config.past_key_values if hasattr(self.config, "past_key_values") else 2
+        d_head = self.config.d_head if hasattr(self.config, "d_head") else int(self.config.d_model / self.config.n_head)
+        past_shape = [past_key_values, batch_size, self.config.n_head, 0, d_head]
+
+        return {f"past_{i}": np.zeros(past_shape, dtype=np.float32, order="C") for i in range(self.config.n_layer)}
+
     def _get_past_cache(
         self,
         input_ids: Tuple[int, ...],
@@ -212,9 +318,9 @@ class TextPredictONNXModel(TextPredictModel):
             return None, len(input_ids)
 
         for i in range(min_cutoff, max_cutoff + 1):
-            past_key = str(input_ids[: (-1 * i)])
+            past_key = tuple(input_ids[: (-1 * i)])
             if past_key in self.past_cache:
-                return (self.past_cache[past_key], len(input_ids[: (-1 * i)]))
+                return (self.past_cache[past_key], len(past_key))
 
         return None, len(input_ids)
 
@@ -230,61 +336,90 @@ class TextPredictONNXModel(TextPredictModel):
         if len(input_ids) < self.min_past_cache_length:
             return
 
-        self.past_cache[str(input_ids)] = past_ids
+        self.past_cache[tuple(input_ids)] = past_ids
 
-    @functools.lru_cache(maxsize=1024)
-    def get_next_token_probs(self, input_ids: Tuple[int, ...]) -> List[float]:
-        """Calculate the probabilities of next token.
+    def _truncate_input_ids(self, input_ids: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Truncate the input tokens to the maximum sequence length.
 
         Args:
             input_ids: The input tokens.
 
         Returns:
-            A list with the next tokens' probabilities.
+            The truncated input tokens, or the space token if they are empty.
 
         """
 
         if len(input_ids) == 0:
-            input_ids = (self.space_token_id,)
-        elif len(input_ids) > self.max_seq_length:
-            input_ids = input_ids[(-1 * self.max_seq_length) :]
+            return (self.space_token_id,)
+
+        return tuple(input_ids[(-1 * self.max_seq_length) :])
+
+    def _compute_next_token_probs(self, sequences: List[Tuple[int, ...]]) -> List[np.ndarray]:
+        """Core computation of the probabilities of next token for a batch of sequences.
+
+        If the probabilities of all positions are available, sequences are right-padded
+        and run with a single forward pass, where the probabilities are gathered from the
+        last position of each sequence. Otherwise, sequences are run one at a time
+        using the past key/values cache.
+
+        Args:
+            sequences: The sequences of input tokens.
+
+        Returns:
+            Next token's probabilities of each sequence.
+
+        """
+
+        if len(sequences) == 1 or not self.all_positions:
+            return [self._compute_next_token_probs_with_past(input_ids) for input_ids in sequences]
+
+        sequences = [self._truncate_input_ids(input_ids) for input_ids in sequences]
+        lengths = np.array([len(input_ids) for input_ids in sequences])
+
+        input_ids = np.full((len(sequences), lengths.max()), self.space_token_id, dtype=np.int64)
+        for i, sequence in enumerate(sequences):
+            input_ids[i, : len(sequence)] = sequence
+
+        ort_inputs = {"input_ids": input_ids, **self._get_empty_past(len(sequences))}
+        probs = self.session.run([self.session.get_outputs()[0].name], ort_inputs)[0]
+
+        return list(probs[np.arange(len(sequences)), lengths - 1])
+
+    def _compute_next_token_probs_with_past(self, input_ids: Tuple[int, ...]) -> np.ndarray:
+        """Calculate the probabilities of next token using the past key/values cache.
+
+        Args:
+            input_ids: The input tokens.
+
+        Returns:
+            Next token's probabilities.
+
+        """
+
+        input_ids = self._truncate_input_ids(input_ids)
+
+        original_input_ids = tuple(input_ids)
 
         past_ids, past_length = self._get_past_cache(input_ids)
-        if past_ids is None:
-            past_sequence_length = 0
-        else:
+        if past_ids is not None:
             input_ids = input_ids[past_length:]
-            past_sequence_length = past_length
 
         ort_inputs = {}
         ort_inputs["input_ids"] = np.ascontiguousarray(np.array(input_ids).reshape(self.batch_size, len(input_ids)))
 
         if past_ids is None:
-            past_key_values = self.config.past_key_values if hasattr(self.config, "past_key_values") else 2
-            d_head = (
-                self.config.d_head if hasattr(self.config, "d_head") else int(self.config.d_model / self.config.n_head)
-            )
-            past_shape = [
-                past_key_values,
-                self.batch_size,
-                self.config.n_head,
-                past_sequence_length,
-                d_head,
-            ]
-            for i in range(self.config.n_layer):
-                ort_inputs[f"past_{i}"] = np.zeros(past_shape, dtype=np.float32, order="C")
+            ort_inputs.update(self._get_empty_past(self.batch_size))
         else:
             for i in range(self.config.n_layer):
                 ort_inputs[f"past_{i}"] = np.ascontiguousarray(past_ids[i])
 
         ort_outputs = self.session.run(None, ort_inputs)
         past_ids = ort_outputs[1:]
-        probs = ort_outputs[0][0, :]
+        probs = ort_outputs[0][0, -1] if self.all_positions else ort_outputs[0][0, :]
 
-        original_input_ids = input_ids
         self._update_past_cache(original_input_ids, past_ids)
 
-        return probs.tolist()
+        return probs
 
     def get_loss(self, input_ids: Tuple[int, ...]) -> float:
         """Calculate the model's loss.
@@ -297,6 +432,77 @@ class TextPredictONNXModel(TextPredictModel):
 
         """
 
+        return self.get_losses([input_ids])[0]
+
+    def get_losses(self, sequences: List[Tuple[int, ...]]) -> List[float]:
+        """Calculate the model's loss on a list of sequences.
+
+        If the probabilities of all positions are available, the first `max_seq_length` tokens
+        of each sequence are scored with a single forward pass, while the remaining tokens use
+        one row per token with a sliding context of `max_seq_length` tokens (as in
+        `get_next_token_probs`). Rows are sorted by length, right-padded and run in batches.
+        Since attention is causal, padding does not change the probabilities of previous positions.
+
+        Otherwise, each token is scored with a forward pass over its preceding tokens.
+
+        Args:
+            sequences: The sequences of input tokens.
+
+        Returns:
+            The loss of each sequence.
+
+        """
+
+        if not self.all_positions:
+            return [self._get_loss_per_token(tuple(input_ids)) for input_ids in sequences]
+
+        # Rows are given by (sequence index, inputs, labels, index of first scored position)
+        rows = []
+        for seq_idx, input_ids in enumerate(sequences):
+            inputs = (self.space_token_id,) + tuple(input_ids)
+            n_tokens = min(len(input_ids), self.max_seq_length)
+            if n_tokens > 0:
+                rows.append((seq_idx, inputs[:n_tokens], tuple(input_ids[:n_tokens]), 0))
+
+            for i in range(self.max_seq_length, len(input_ids)):
+                row_inputs = inputs[i - self.max_seq_length + 1 : i + 1]
+                rows.append((seq_idx, row_inputs, (input_ids[i],), self.max_seq_length - 1))
+        rows.sort(key=lambda row: len(row[1]))
+
+        losses = np.zeros(len(sequences))
+        for batch_idx in range(0, len(rows), self.loss_batch_size):
+            batch = rows[batch_idx : batch_idx + self.loss_batch_size]
+            seq_len = max(len(row_inputs) for _, row_inputs, _, _ in batch)
+
+            input_ids = np.full((len(batch), seq_len), self.space_token_id, dtype=np.int64)
+            labels = np.zeros((len(batch), seq_len), dtype=np.int64)
+            mask = np.zeros((len(batch), seq_len), dtype=bool)
+            for i, (_, row_inputs, row_labels, start) in enumerate(batch):
+                input_ids[i, : len(row_inputs)] = row_inputs
+                labels[i, start : start + len(row_labels)] = row_labels
+                mask[i, start : start + len(row_labels)] = True
+
+            ort_inputs = {"input_ids": input_ids, **self._get_empty_past(len(batch))}
+            probs = self.session.run([self.session.get_outputs()[0].name], ort_inputs)[0]
+
+            # Gathers the probabilities of the labels and sums their negative log per sequence
+            label_probs = np.take_along_axis(probs, labels[..., None], axis=-1)[..., 0]
+            row_losses = np.where(mask, -np.log(label_probs), 0.0).sum(axis=-1)
+            np.add.at(losses, [seq_idx for seq_idx, _, _, _ in batch], row_losses)
+
+        return [loss / len(input_ids) if len(input_ids) > 0 else 0.0 for loss, input_ids in zip(losses, sequences)]
+
+    def _get_loss_per_token(self, input_ids: Tuple[int, ...]) -> float:
+        """Calculate the model's loss by scoring one token per forward pass.
+
+        Args:
+            input_ids: The input tokens.
+
+        Returns:
+            The loss.
+
+        """
+
         if len(input_ids) == 0:
             return 0.0
 
@@ -10,12 +10,11 @@ import os
 import re
 from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import ftfy
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
 
 from archai.nlp.eval.eval_utils import cached_property
 from archai.nlp.eval.text_predict.text_predict_model import TextPredictModel
@@ -55,7 +54,7 @@ class TextPredictPrediction:
         self.text = text
 
         self.probability = probability
-        self.score = score
+        self._score = score
 
         self.input_ids = input_ids
         self.token_ids = token_ids
@@ -143,6 +142,21 @@ class TextPredictPrediction:
 
         return len(self) * self.p_accept()
 
+    def score(self) -> float:
+        """Return the score of the prediction.
+
+        If a score has not been supplied, it is given by the expected number of accepted characters.
+
+        Returns:
+            Prediction score.
+
+        """
+
+        if self._score is not None:
+            return self._score
+
+        return self.p_char_accept()
+
     def all_ids(self) -> Tuple[int, ...]:
         """Return the combined `input_ids` and `token_ids` of the prediction.
 
@@ -581,7 +595,7 @@ class TextPredictionSequence(OrderedDict):
                 )
 
                 length_type = prediction.length_type()
-                prediction_odict = prediction.to_odict()
+                prediction_odict = OrderedDict(prediction.to_dict())
                 p_accept_given_match = prediction.p_accept_given_match()
             else:
                 body_continued, min_length, last_matched_char = True, 0, 0
@@ -637,44 +651,19 @@ class TextPredictionSequence(OrderedDict):
 
         """
 
-        triggered_predictions = []
-
         if predictions_df is None:
             predictions_df = self.get_predictions()
 
-        # Keeps count where prediction has triggered
-        line_id = -1
-        char_id = -1
-
         # Triggered is an array that denotes if suggestion is regarded as 'triggered'
         # -1: score was too low
         #  0: score OK, but something is being shown and current suggestion could not be shown
         #  1: suggestion shown
-        triggered = np.full((len(predictions_df.index),), -1)
-
-        score_values = predictions_df["Score"].values
-        for i in tqdm(range(predictions_df.shape[0]), desc=f"Scoring with {min_score:.2f}"):
-            if score_values[i] < min_score:
-                continue
-
-            if predictions_df["Line"][i] < line_id:
-                msg = f"Incorrect order of lines in the file (current line = {line_id}, "
-                msg += f'processed line = {predictions_df["Line"][i]}; current char = {char_id}, '
-                msg += f'processed char = {predictions_df["Char"][i]}'
-
-                raise ValueError(msg)
-
-            triggered[i] = 0
-            if predictions_df["Line"][i] > line_id or predictions_df["Char"][i] > char_id:
-                d = predictions_df.iloc[i].to_dict()
+        triggered = np.where(predictions_df["Score"].values >= min_score, 0, -1)
 
-                line_id = d["Line"]
-                char_id = d["Char"] + d["LastMatchChar"]
+        triggered_idx = find_triggered_indices(predictions_df, min_score)
+        triggered[triggered_idx] = 1
 
-                triggered_predictions.append(d)
-                triggered[i] = 1
-
-        triggered_df = pd.DataFrame(triggered_predictions)
+        triggered_df = predictions_df.iloc[triggered_idx].reset_index(drop=True)
         triggered_column_name = f"Trigger: {min_score}"
         predictions_df[triggered_column_name] = triggered
 
@@ -692,17 +681,18 @@ class TextPredictionSequence(OrderedDict):
 
         """
 
-        loss = 0.0
-        token_ids_length = 0
-
+        sequences = []
         for unique_id in self._filter_keys_char_id(1):
             text = self[unique_id].body + self[unique_id].body_continued
             text = tokenizer.clean_text(text)
 
-            token_ids = tokenizer.encode(text)
-            token_ids_length += len(token_ids)
+            sequences.append(tuple(tokenizer.encode(text)))
 
-            loss += len(token_ids) * model.get_loss(tuple(token_ids))
+        # Sequences are scored at once, so models are able to batch them
+        losses = model.get_losses(sequences)
+
+        loss = sum(len(token_ids) * seq_loss for token_ids, seq_loss in zip(sequences, losses))
+        token_ids_length = sum(len(token_ids) for token_ids in sequences)
 
         perplexity = np.exp(loss / token_ids_length)
 
@@ -738,49 +728,196 @@ class TextPredictionSequence(OrderedDict):
         summary["TotalWordCount"] = self.word_count
         summary["Perplexity"] = self.perplexity
         summary["SuggestionsShown"] = len(triggered_df.index)
-        summary["SuggestionsMatched"] = int(np.sum(triggered_df["Match"])) if len(triggered_df.columns) else 0
+        summary["SuggestionsMatched"] = int(np.sum(triggered_df["Match"])) if len(triggered_df.index) else 0
         summary["SuggestionsAccepted"] = (
-            int(np.sum(triggered_df["Match"] * triggered_df["PAcceptGivenMatch"])) if len(triggered_df.columns) else 0
+            int(np.sum(triggered_df["Match"] * triggered_df["PAcceptGivenMatch"])) if len(triggered_df.index) else 0
         )
         summary["SuggestionRatePerWord"] = summary["SuggestionsShown"] / summary["TotalWordCount"]
         summary["SuggestionRatePerChar"] = summary["SuggestionsShown"] / summary["TotalEvalPoints"]
-        summary["MatchRate"] = np.mean(triggered_df["Match"]) if len(triggered_df.columns) else 0
+        summary["MatchRate"] = np.mean(triggered_df["Match"]) if len(triggered_df.index) else 0
         summary["AcceptRate"] = (
-            np.mean(triggered_df["Match"] * triggered_df["PAcceptGivenMatch"]) if len(triggered_df.columns) else 0
+            np.mean(triggered_df["Match"] * triggered_df["PAcceptGivenMatch"]) if len(triggered_df.index) else 0
         )
         summary["CharMatched"] = (
-            int(np.sum(triggered_df["Match"] * triggered_df["Length"])) if len(triggered_df.columns) else 0
+            int(np.sum(triggered_df["Match"] * triggered_df["Length"])) if len(triggered_df.index) else 0
         )
         summary["CharAccepted"] = (
             int(np.sum(triggered_df["Match"] * triggered_df["PAcceptGivenMatch"] * triggered_df["Length"]))
-            if len(triggered_df.columns)
+            if len(triggered_df.index)
             else 0
         )
         summary["CharMatchRate"] = summary["CharMatched"] / summary["TotalEvalPoints"]
         summary["CharAcceptRate"] = summary["CharAccepted"] / summary["TotalEvalPoints"]
         summary["SuggestionsShownByType"] = (
-            triggered_df.groupby(["Type"]).size().to_dict() if len(triggered_df.columns) else None
+            triggered_df.groupby(["Type"]).size().to_dict() if len(triggered_df.index) else None
         )
         summary["SuggestionsMatchedByType"] = (
-            triggered_df[triggered_df["Match"]].groupby(["Type"]).size().to_dict() if len(triggered_df.columns) else 0
+            triggered_df[triggered_df["Match"]].groupby(["Type"]).size().to_dict() if len(triggered_df.index) else 0
         )
         summary["MatchRateByType"] = (
             triggered_df.groupby(["Type"]).agg({"Match": "mean"}).to_dict()["Match"]
-            if len(triggered_df.columns)
+            if len(triggered_df.index)
             else None
         )
         summary["SuggestionsShownByWordCount"] = (
-            triggered_df.groupby(["WordCount"]).size().to_dict() if len(triggered_df.columns) else None
+            triggered_df.groupby(["WordCount"]).size().to_dict() if len(triggered_df.index) else None
         )
         summary["SuggestionsMatchedByWordCount"] = (
             triggered_df[triggered_df["Match"]].groupby(["WordCount"]).size().to_dict()
-            if len(triggered_df.columns)
+            if len(triggered_df.index)
             else None
         )
         summary["MatchRateByWordCount"] = (
             triggered_df.groupby(["WordCount"]).agg({"Match": "mean"}).to_dict()["Match"]
-            if len(triggered_df.columns)
+            if len(triggered_df.index)
             else None
         )
 
         return summary
+
+
+def _get_next_free_indices(predictions_df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Calculate, for each prediction, the index of the first prediction that can be shown
+    after it has been shown, i.e., the first prediction beyond its matched characters.
+
+    Args:
+        predictions_df: The predictions data frame.
+
+    Returns:
+        Indices of the first prediction that can be shown after each prediction, or `None`
+            if predictions are not sorted by line and character.
+
+    """
+
+    lines = predictions_df["Line"].values.astype(np.int64)
+    chars = predictions_df["Char"].values.astype(np.int64)
+    last_matched_chars = predictions_df["LastMatchChar"].values.astype(np.int64)
+
+    if len(lines) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Lines and characters are combined into a single sortable key
+    key_stride = chars.max() + max(last_matched_chars.max(), 0) + 2
+    keys = lines * key_stride + chars
+    if np.any(np.diff(keys) < 0):
+        return None
+
+    return np.searchsorted(keys, keys + last_matched_chars, side="right")
+
+
+def find_triggered_indices(
+    predictions_df: pd.DataFrame, min_score: float, next_free_idx: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Find the predictions that are shown (triggered) for a minimum score.
+
+    A prediction is triggered if its score is at least `min_score` and it is not
+    covered by the matched characters of the last triggered prediction.
+
+    Args:
+        predictions_df: The predictions data frame.
+        min_score: The minimum score.
+        next_free_idx: Pre-computed indices of the first prediction that can be shown
+            after each prediction (see `_get_next_free_indices`).
+
+    Returns:
+        Indices of triggered predictions.
+
+    """
+
+    scores = predictions_df["Score"].values
+    n_predictions = len(scores)
+
+    if next_free_idx is None:
+        next_free_idx = _get_next_free_indices(predictions_df)
+
+    if next_free_idx is None:
+        # Predictions are not sorted, thus they are iterated in order
+        lines = predictions_df["Line"].values
+        chars = predictions_df["Char"].values
+        last_matched_chars = predictions_df["LastMatchChar"].values
+
+        line_id, char_id = -1, -1
+        triggered_idx = []
+
+        for i in np.flatnonzero(scores >= min_score):
+            if lines[i] < line_id:
+                msg = f"Incorrect order of lines in the file (current line = {line_id}, "
+                msg += f"processed line = {lines[i]}; current char = {char_id}, "
+                msg += f"processed char = {chars[i]}"
+
+                raise ValueError(msg)
+
+            if lines[i] > line_id or chars[i] > char_id:
+                line_id, char_id = lines[i], chars[i] + last_matched_chars[i]
+                triggered_idx.append(i)
+
+        return np.array(triggered_idx, dtype=np.int64)
+
+    # Index of the first prediction with enough score at or after each index
+    next_scored_idx = np.where(scores >= min_score, np.arange(n_predictions), n_predictions)
+    next_scored_idx = np.append(np.minimum.accumulate(next_scored_idx[::-1])[::-1], n_predictions)
+
+    # Jumps from each triggered prediction to the next one
+    triggered_idx = []
+    i = next_scored_idx[0]
+    while i < n_predictions:
+        triggered_idx.append(i)
+        i = next_scored_idx[next_free_idx[i]]
+
+    return np.array(triggered_idx, dtype=np.int64)
+
+
+def calculate_threshold_curve(predictions_df: pd.DataFrame, min_scores: Sequence[float]) -> pd.DataFrame:
+    """Calculate the triggered predictions' metrics for a set of minimum scores.
+
+    The indices needed to skip predictions covered by a shown suggestion are computed once,
+    so that each minimum score only costs a few array operations over its triggered predictions.
+
+    Args:
+        predictions_df: The predictions data frame (see `TextPredictionSequence.get_predictions`).
+        min_scores: The minimum scores.
+
+    Returns:
+        A data frame with a row per minimum score, including the number of shown, matched and
+            accepted suggestions, their match rate (precision), the rate of matched characters
+            (recall) and the number of accepted characters (saved keystrokes).
+
+    """
+
+    next_free_idx = _get_next_free_indices(predictions_df)
+
+    match = predictions_df["Match"].fillna(False).values.astype(np.float64)
+    accept = match * predictions_df["PAcceptGivenMatch"].values
+    char_match = match * predictions_df["Length"].values
+    char_accept = accept * predictions_df["Length"].values
+
+    total_eval_points = len(predictions_df.index)
+
+    curve = []
+    for min_score in min_scores:
+        triggered_idx = find_triggered_indices(predictions_df, min_score, next_free_idx=next_free_idx)
+        n_shown = len(triggered_idx)
+
+        n_matched = match[triggered_idx].sum()
+        n_accepted = accept[triggered_idx].sum()
+        n_char_matched = int(char_match[triggered_idx].sum())
+        n_char_accepted = int(char_accept[triggered_idx].sum())
+
+        curve.append(
+            OrderedDict(
+                [
+                    ("Score", min_score),
+                    ("SuggestionsShown", n_shown),
+                    ("SuggestionsMatched", int(n_matched)),
+                    ("SuggestionsAccepted", int(n_accepted)),
+                    ("MatchRate", n_matched / n_shown if n_shown else 0),
+                    ("AcceptRate", n_accepted / n_shown if n_shown else 0),
+                    ("CharMatched", n_char_matched),
+                    ("CharAccepted", n_char_accepted),
+                    ("CharMatchRate", n_char_matched / total_eval_points if total_eval_points else 0),
+                    ("CharAcceptRate", n_char_accepted / total_eval_points if total_eval_points else 0),
+                ]
+            )
+        )
+
+    return pd.DataFrame(curve)
@@ -3,12 +3,11 @@
 
 """Text Predict-based predictor."""
 
-import copy
-import functools
 import re
 import time
-from typing import List, Optional, Tuple, Union
+from typing import Generator, List, Optional, Tuple, Union
 
+import numpy as np
 from scipy.interpolate import interp1d
 from tqdm import tqdm
 
@@ -37,6 +36,10 @@ class Predictor:
     PREFIX_MAX_NEXT_CANDIDATE_FORWARD_PASS = 5
     PREFIX_MAX_NEXT_CANDIDATE_RANK = 10
 
+    # Number of most probable candidates kept per filtering, where remaining candidates
+    # only contribute to the probability mass since they can not reach the expansion rank
+    PREFIX_MAX_CANDIDATES = PREFIX_MAX_NEXT_CANDIDATE_RANK + PREFIX_MAX_NEXT_CANDIDATE_FORWARD_PASS + 1
+
     # Maximum number of characters to lookback the probability mask
     PREFIX_MAX_CHAR_LOOKBACK = 20
 
@@ -97,13 +100,17 @@ class Predictor:
 
         return text
 
-    @functools.lru_cache(maxsize=1024)
-    def _check_end_with_complete_word(self, input_ids: Tuple[int, ...]) -> bool:
+    def _check_end_with_complete_word(
+        self, input_ids: Tuple[int, ...]
+    ) -> Generator[Tuple[int, ...], np.ndarray, bool]:
         """Check if predicted word (set of tokens) is complete according to threshold.
 
         Args:
             input_ids: The tokens that identify predicted word.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
             Whether predicted word is complete or not.
 
@@ -112,19 +119,22 @@ class Predictor:
         if len(input_ids) > 0 and self.tokenizer[input_ids[-1]][-1] in SEPARATOR_TOKENS_SET:
             return True
 
-        probs = self.model.get_probs(input_ids)
-        probs_sum = sum(
-            [prob for idx, prob in enumerate(probs) if idx in self.tokenizer.TOKENIZER_WORD_TOKEN_SEPARATOR]
-        )
+        probs = yield input_ids
+        probs_sum = probs[self.tokenizer.separator_token_ids].sum()
 
         return probs_sum > Predictor.COMPLETE_WORD_PROB_THRESHOLD
 
-    def _update_end_with_complete_word(self, prediction: TextPredictPrediction) -> bool:
+    def _update_end_with_complete_word(
+        self, prediction: TextPredictPrediction
+    ) -> Generator[Tuple[int, ...], np.ndarray, bool]:
         """Update whether prediction defines a complete word or not.
 
         Args:
             prediction: The prediction.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
             Whether prediction defines a complete word or not.
 
@@ -133,18 +143,23 @@ class Predictor:
         if prediction.input_ids is None or prediction.token_ids is None:
             raise ValueError(f"Unable to determine if `{prediction}` ends with a complete word.")
 
-        prediction.end_with_complete_word = self._check_end_with_complete_word(
+        prediction.end_with_complete_word = yield from self._check_end_with_complete_word(
             tuple(prediction.input_ids + prediction.token_ids)
         )
 
         return prediction.end_with_complete_word
 
-    def _check_valid_prediction(self, prediction: TextPredictPrediction) -> bool:
+    def _check_valid_prediction(
+        self, prediction: TextPredictPrediction
+    ) -> Generator[Tuple[int, ...], np.ndarray, bool]:
         """Check whether prediction is valid or not.
 
         Args:
             prediction: The prediction.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
             Whether prediction is valid or not.
 
@@ -160,57 +175,61 @@ class Predictor:
             return False
 
         if prediction.end_with_complete_word is None:
-            self._update_end_with_complete_word(prediction)
+            yield from self._update_end_with_complete_word(prediction)
 
         if not prediction.end_with_complete_word:
             return False
 
         return True
 
-    @functools.lru_cache(maxsize=1024)
     def _initial_filter_next_tokens(
-        self, input_ids: Optional[Tuple[int, ...]] = None, filter_prefix: Optional[str] = ""
-    ) -> Tuple[int, ...]:
-        """Core computation to predict and filter tokens according to the supplied prefix.
+        self, next_token_probs: np.ndarray, filter_prefix: Optional[str] = ""
+    ) -> Tuple[List[Tuple[Tuple[int, ...], float, int]], float]:
+        """Core computation to filter tokens according to the supplied prefix.
+
+        Only the `PREFIX_MAX_CANDIDATES` most probable tokens are returned as candidates,
+        while the probability of the remaining tokens is returned as a sum.
 
         Args:
-            input_ids: The input tokens.
+            next_token_probs: The next token's probabilities.
             filter_prefix: The prefix to filter.
 
         Returns:
-            A list of filtered tokens.
+            Tuple with the filtered tokens sorted by probability and the probability
+                of the remaining filtered tokens.
 
         """
 
-        next_token_probs = self.model.get_next_token_probs(input_ids)
-
         filter_prefix_length = len(filter_prefix)
         if filter_prefix_length == 0:
-            filtered_tokens = [((idx,), prob, len(self.tokenizer[idx])) for idx, prob in enumerate(next_token_probs)]
+            token_ids = np.arange(len(next_token_probs))
         else:
-            filtered_tokens = self.tokenizer.filter_tokens(filter_prefix)
-            filtered_tokens = tuple((idx,) for idx in filtered_tokens)
-            filtered_tokens = [
-                (
-                    tuple_idx,
-                    next_token_probs[tuple_idx[0]],
-                    len(self.tokenizer[tuple_idx[0]]) - filter_prefix_length,
-                )
-                for tuple_idx in filtered_tokens
-            ]
+            token_ids = self.tokenizer.filter_tokens(filter_prefix)
+
+        probs = next_token_probs[token_ids]
+
+        n_candidates = min(self.PREFIX_MAX_CANDIDATES, len(probs))
+        if n_candidates == 0:
+            return [], 0.0
 
-        filtered_tokens = tuple(sorted(filtered_tokens, key=lambda x: -x[1]))
+        top_idxs = np.argpartition(-probs, n_candidates - 1)[:n_candidates]
+        top_idxs = top_idxs[np.argsort(-probs[top_idxs], kind="stable")]
 
-        return filtered_tokens
+        filtered_tokens = [
+            ((int(token_ids[i]),), float(probs[i]), len(self.tokenizer[int(token_ids[i])]) - filter_prefix_length)
+            for i in top_idxs
+        ]
+        remaining_prob = float(probs.sum() - probs[top_idxs].sum())
+
+        return filtered_tokens, remaining_prob
 
-    @functools.lru_cache(maxsize=1024)
     def _filter_next_tokens(
         self,
         input_ids: Tuple[int, ...],
         filter_prefix: Optional[str] = "",
-        idxs: Optional[List[int]] = None,
+        idxs: Optional[Tuple[int, ...]] = None,
         global_prob: Optional[float] = 1.0,
-    ) -> Tuple[int, ...]:
+    ) -> Generator[Tuple[int, ...], np.ndarray, Tuple[List[Tuple[Tuple[int, ...], float, int]], float]]:
         """Predict and filter tokens according to the supplied prefix.
 
         Args:
@@ -219,35 +238,37 @@ class Predictor:
             idxs: Additional indexes from the expansion procedure.
             global_prob: The global probability of the expansion procedure.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
-            A list of filtered tokens.
+            Tuple with the filtered tokens sorted by probability and the probability
+                of the remaining filtered tokens.
 
         """
 
-        filtered_tokens = self._initial_filter_next_tokens(input_ids, filter_prefix)
+        next_token_probs = yield input_ids
+        filtered_tokens, remaining_prob = self._initial_filter_next_tokens(next_token_probs, filter_prefix)
 
-        if idxs is None:
-            if global_prob != 1.0:
-                filtered_tokens = [
-                    (idx, prob * global_prob, extra_token_length) for idx, prob, extra_token_length in filtered_tokens
-                ]
-            else:
-                filtered_tokens = copy.copy(filtered_tokens)
-        else:
-            filtered_tokens = [
-                (idxs + idx, prob * global_prob, extra_token_length)
-                for idx, prob, extra_token_length in filtered_tokens
-            ]
+        idxs = idxs or ()
+        filtered_tokens = [
+            (idxs + idx, prob * global_prob, extra_token_length) for idx, prob, extra_token_length in filtered_tokens
+        ]
 
-        return filtered_tokens
+        return filtered_tokens, remaining_prob * global_prob
 
-    def _find_initial_prediction(self, input_ids: Tuple[int, ...], prefix: str) -> TextPredictPrediction:
+    def _find_initial_prediction(
+        self, input_ids: Tuple[int, ...], prefix: str
+    ) -> Generator[Tuple[int, ...], np.ndarray, TextPredictPrediction]:
         """Predict prefix from a supplied word.
 
         Args:
             input_ids: The input tokens.
             prefix: The prefix to predict.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
             The initial prediction.
 
@@ -257,7 +278,7 @@ class Predictor:
             return TextPredictPrediction.empty()
 
         # List of (idxs + [idx], prob * global_prob, extra_token_length)
-        filtered_tokens = list(self._filter_next_tokens(input_ids, prefix))
+        filtered_tokens, remaining_prob = yield from self._filter_next_tokens(input_ids, prefix)
 
         n_forward_pass = 0
         while n_forward_pass < Predictor.PREFIX_MAX_NEXT_CANDIDATE_FORWARD_PASS:
@@ -288,18 +309,19 @@ class Predictor:
             idxs, prob, filtered_length = filtered_tokens.pop(unexpanded_token_idx)
             unexpanded_token = prefix[filtered_length:]
 
-            filtered_unexpanded_token = self._filter_next_tokens(
+            filtered_unexpanded_token, unexpanded_remaining_prob = yield from self._filter_next_tokens(
                 tuple(input_ids + idxs), unexpanded_token, tuple(idxs), prob
             )
             filtered_tokens.extend(filtered_unexpanded_token)
             filtered_tokens = sorted(filtered_tokens, key=lambda x: -x[1])
+            remaining_prob += unexpanded_remaining_prob
 
         prediction = TextPredictPrediction.empty()
 
         # If empty or first suggestion does not complete the token,
         # do not go in (i.e. maintain empty result)
         if len(filtered_tokens) > 0 and filtered_tokens[0][2] >= 0:
-            probs_sum = sum([prob for _, prob, _ in filtered_tokens])
+            probs_sum = sum([prob for _, prob, _ in filtered_tokens]) + remaining_prob
             idxs, prob, filtered_length = filtered_tokens[0]
 
             text = self.tokenizer.decode(idxs)[len(prefix) :]
@@ -307,12 +329,19 @@ class Predictor:
 
         return prediction
 
-    def _predict(self, text: str) -> TextPredictPrediction:
+    def _predict_steps(self, text: str) -> Generator[Tuple[int, ...], np.ndarray, TextPredictPrediction]:
         """Core computation to perform the prediction pipeline.
 
+        The pipeline is implemented as a generator that yields the input tokens whose
+        next token's probabilities are required and receives them, so that model calls
+        of several texts can be batched together.
+
         Args:
             text: The text to predict.
 
+        Yields:
+            Input tokens whose next token's probabilities are required.
+
         Returns:
             The prediction.
 
@@ -328,11 +357,11 @@ class Predictor:
         if self.bos_token_id is not None and is_full_length:
             input_ids = (self.bos_token_id,) + input_ids
 
-        prediction = self._find_initial_prediction(input_ids, prefix)
+        prediction = yield from self._find_initial_prediction(input_ids, prefix)
         if prediction.probability == 0.0:
             return TextPredictPrediction.empty()
 
-        if self._check_valid_prediction(prediction):
+        if (yield from self._check_valid_prediction(prediction)):
             best_prediction = prediction
         else:
             best_prediction = TextPredictPrediction.empty()
@@ -342,58 +371,128 @@ class Predictor:
         while total_prob > self.MIN_PROB_CUTOFF and n_forward_pass < self.MAX_FORWARD_PASS:
             n_forward_pass += 1
 
-            next_token_id, next_prob = self.model.get_top_next_token_probs(tuple(prediction.all_ids()))
+            next_token_probs = yield tuple(prediction.all_ids())
+            next_token_id = int(np.argmax(next_token_probs))
+            next_prob = float(next_token_probs[next_token_id])
             next_text = self.tokenizer.decode([next_token_id])
 
             prediction = TextPredictPrediction.next_prediction(prediction, next_text, next_prob, next_token_id)
-            self._update_end_with_complete_word(prediction)
+            yield from self._update_end_with_complete_word(prediction)
 
             total_prob = prediction.probability
 
             if (
                 len(prediction) >= self.min_pred_length
-                and prediction._check_valid_prediction()
+                and (yield from self._check_valid_prediction(prediction))
                 and prediction.score() >= best_prediction.score()
                 and prediction.probability > self.MIN_PROB_CUTOFF
             ):
                 best_prediction = prediction
 
-        if len(best_prediction) >= self.min_pred_length and best_prediction._check_valid_prediction():
+        if len(best_prediction) >= self.min_pred_length and (yield from self._check_valid_prediction(best_prediction)):
             return best_prediction
 
         return TextPredictPrediction.empty()
 
-    def predict(self, sequences: List[TextPredictionSequence], output_file: Optional[str] = None) -> None:
-        """Predict a set of sequences.
+    def _predict(self, text: str) -> TextPredictPrediction:
+        """Perform the prediction pipeline.
 
         Args:
-            sequences: List of sequences to predict.
-            output_file: Optional output file to write the predictions.
+            text: The text to predict.
+
+        Returns:
+            The prediction.
 
         """
 
-        for i, pos in enumerate(tqdm(sequences.values(), desc="Predicting")):
-            start_time = time.time()
+        steps = self._predict_steps(text)
 
-            text = pos.body
-            if sequences.current_paragraph_only:
-                text = re.sub("^(.*\n)", "", text, flags=re.M)
-            if len(text) > sequences.max_body_length:
-                text = pos.body[(-1 * sequences.max_body_length) :]
-                text = text[text.find(" ") :]
+        try:
+            input_ids = next(steps)
+            while True:
+                input_ids = steps.send(self.model.get_next_token_probs(input_ids))
+        except StopIteration as e:
+            return e.value
 
-            prediction = self._predict(text)
+    def predict(
+        self,
+        sequences: List[TextPredictionSequence],
+        output_file: Optional[str] = None,
+        batch_size: Optional[int] = 1,
+    ) -> None:
+        """Predict a set of sequences.
 
-            end_time = time.time()
-            pos.time = int(1000 * (end_time - start_time))
+        Positions are predicted concurrently in groups of `batch_size`, where the next token's
+        probabilities required by all positions are calculated with a single model call.
+        When `batch_size > 1`, the time of each position includes the time spent by the others.
 
-            if len(prediction) >= sequences.min_pred_length and prediction.score() >= sequences.min_score:
-                pos.prediction = prediction
-            else:
-                pos.prediction = None
+        Args:
+            sequences: List of sequences to predict.
+            output_file: Optional output file to write the predictions.
+            batch_size: Number of positions predicted concurrently.
+
+        """
 
-            if output_file is not None and ((i + 1) % sequences.save_step == 0 or i == (len(sequences) - 1)):
-                sequences.save(output_file)
+        positions = iter(sequences.values())
+        n_predicted = 0
+
+        # Active positions are given by [position, steps, required input tokens, start time]
+        active = []
+
+        with tqdm(total=len(sequences), desc="Predicting") as pbar:
+            while True:
+                finished = []
+
+                while len(active) < batch_size:
+                    pos = next(positions, None)
+                    if pos is None:
+                        break
+
+                    text = pos.body
+                    if sequences.current_paragraph_only:
+                        text = re.sub("^(.*\n)", "", text, flags=re.M)
+                    if len(text) > sequences.max_body_length:
+                        text = pos.body[(-1 * sequences.max_body_length) :]
+                        text = text[text.find(" ") :]
+
+                    start_time = time.time()
+                    steps = self._predict_steps(text)
+                    try:
+                        active.append([pos, steps, next(steps), start_time])
+                    except StopIteration as e:
+                        finished.append((pos, e.value, start_time))
+
+                if len(active) > 0:
+                    next_token_probs = self.model.get_next_token_probs_batch(
+                        [input_ids for _, _, input_ids, _ in active]
+                    )
+
+                    still_active = []
+                    for (pos, steps, _, start_time), probs in zip(active, next_token_probs):
+                        try:
+                            still_active.append([pos, steps, steps.send(probs), start_time])
+                        except StopIteration as e:
+                            finished.append((pos, e.value, start_time))
+                    active = still_active
+
+                for pos, prediction, start_time in finished:
+                    pos.time = int(1000 * (time.time() - start_time))
+
+                    if len(prediction) >= sequences.min_pred_length and prediction.score() >= sequences.min_score:
+                        pos.prediction = prediction
+                    else:
+                        pos.prediction = None
+
+                    n_predicted += 1
+                    pbar.update(1)
+
+                    if output_file is not None and (
+                        n_predicted % sequences.save_step == 0 or n_predicted == len(sequences)
+                    ):
+                        sequences.save(output_file)
+
+                if len(active) == 0 and len(finished) == 0:
+                    break
 
     def score(
         self,
@@ -7,13 +7,14 @@ import functools
 import re
 from typing import List, Optional, Set, Tuple, Union
 
+import numpy as np
 from transformers.models.auto.tokenization_auto import AutoTokenizer
 
 from archai.nlp.datasets.hf.tokenizer_utils.pre_trained_tokenizer import (
     ArchaiPreTrainedTokenizerFast,
 )
 from archai.nlp.eval.eval_utils import cached_property
-from archai.nlp.eval.text_predict.text_predict_utils import LRUCache
+from archai.nlp.eval.text_predict.text_predict_utils import VocabTrie
 
 SEPARATOR_TOKENS = "Ġ \nĊ\t\.;:,'\"`<>\(\)\{\}\[\]\|\!@\#\$\%\^\&\*=\+\?/\\_\-~"
 SEPARATOR_TOKENS_SET = set(SEPARATOR_TOKENS)
@@ -23,7 +24,6 @@ class TextPredictTokenizer:
     """Wrapper for a tokenizer used in the Text Predict framework."""
 
     BOS_TEXT = "\n "
-    FILTER_TOKENS_CACHE_SIZE = 65536
     INVALID_TOKENS = {50256}
 
     REGEX_SPLIT = re.compile("^(.*)([" + SEPARATOR_TOKENS + "].*)$", re.MULTILINE | re.DOTALL)
@@ -39,7 +39,6 @@ class TextPredictTokenizer:
         """
 
         self.tokenizer = tokenizer
-        self.filter_tokens_cache = LRUCache(self.FILTER_TOKENS_CACHE_SIZE)
 
     def __iter__(self) -> int:
         """Provide an iterator over the tokenizer's vocabulary.
@@ -96,6 +95,28 @@ class TextPredictTokenizer:
 
         return set([i for i in range(len(self)) if self[i][0] in SEPARATOR_TOKENS_SET])
 
+    @cached_property
+    def separator_token_ids(self) -> np.ndarray:
+        """Compute the identifiers of tokens separators.
+
+        Returns:
+            Sorted identifiers of token separators.
+
+        """
+
+        return np.array(sorted(self.separator_tokens), dtype=np.int64)
+
+    @cached_property
+    def vocab_trie(self) -> VocabTrie:
+        """Build a character trie over the vocabulary.
+
+        Returns:
+            Vocabulary trie.
+
+        """
+
+        return VocabTrie(self.tokenizer.vocab)
+
     @cached_property
     def upper_tokens(self) -> Set:
         """Compute the upper-cased tokens.
@@ -136,60 +157,36 @@ class TextPredictTokenizer:
 
         return self.tokenizer.decode(tokens)
 
-    def _filter_tokens(self, filter_prefix: str) -> Tuple[int, ...]:
+    def _filter_tokens(self, filter_prefix: str) -> np.ndarray:
         """Core computation to filter tokens according to the supplied prefix.
 
         Args:
             filter_prefix: The prefix to filter tokens.
 
         Returns:
-            A list of filtered tokens.
+            An array of filtered tokens.
 
         """
 
         if len(filter_prefix) > 0 and filter_prefix[0] == " ":
             filter_prefix = "Ġ" + filter_prefix[1:]
 
-        filtered_tokens = None
-        filter_prefix_len = len(filter_prefix)
-
-        cached_filter_prefix = next(
-            (
-                filter_prefix[:i]
-                for i in reversed(range(1, len(filter_prefix) - 1))
-                if filter_prefix[:i] in self.filter_tokens_cache
-            ),
-            None,
-        )
-
-        if len(filter_prefix) > 0 and cached_filter_prefix is not None:
-            pre_filtered_tokens = self.filter_tokens_cache[cached_filter_prefix]
-            filtered_tokens = [
-                (idx, token)
-                for idx, token in pre_filtered_tokens
-                if token[: min(len(token), filter_prefix_len)] == filter_prefix[: min(len(token), filter_prefix_len)]
-            ]
-        else:
-            filtered_tokens = [
-                (idx, token)
-                for token, idx in self.tokenizer.vocab.items()
-                if token[: min(len(token), filter_prefix_len)] == filter_prefix[: min(len(token), filter_prefix_len)]
-            ]
+        filtered_tokens = self.vocab_trie.filter(filter_prefix)
 
-        self.filter_tokens_cache[filter_prefix] = filtered_tokens
-        filtered_tokens = tuple(idx for idx, _ in filtered_tokens)
+        # Cached arrays are shared by callers, thus they should not be modified
+        filtered_tokens.setflags(write=False)
 
         return filtered_tokens
 
     @functools.lru_cache(maxsize=32768)
-    def filter_tokens(self, filter_prefix: str) -> Tuple[int, ...]:
+    def filter_tokens(self, filter_prefix: str) -> np.ndarray:
         """Filter tokens according to the supplied prefix.
 
         Args:
             filter_prefix: The prefix to filter tokens.
 
         Returns:
-            A list of filtered tokens.
+            An array of filtered tokens.
 
         """
 
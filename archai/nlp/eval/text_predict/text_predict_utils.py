@@ -1,32 +1,56 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-"""Text Predict-based utilities, such as caching mechanism."""
+"""Text Predict-based utilities, such as caching mechanism and vocabulary trie."""
 
 from collections import OrderedDict
-from typing import Any, Optional
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+def _get_nbytes(value: Any) -> int:
+    """Get the number of bytes of arrays (or lists/tuples of arrays).
+
+    Args:
+        value: Value to be measured.
+
+    Returns:
+        Number of bytes, where values that are not arrays count as zero bytes.
+
+    """
+
+    if isinstance(value, (list, tuple)):
+        return sum(_get_nbytes(v) for v in value)
+
+    return getattr(value, "nbytes", 0)
 
 
 class LRUCache(OrderedDict):
     """Least-Recently Used (LRU) Cache.
 
     This class extends the OrderedDict class to implement a cache with LRU eviction policy.
+    Keys should be hashable, e.g., tuples of token identifiers.
 
     """
 
-    def __init__(self, maxsize: Optional[int] = 128) -> None:
+    def __init__(self, maxsize: Optional[int] = 128, maxbytes: Optional[int] = None) -> None:
         """Initialize an `LRUCache` object.
 
         Args:
             maxsize: Maximum size of the cache.
+            maxbytes: Maximum number of bytes held by array-based values (e.g., past key/values).
+                If not supplied, memory is only bounded by `maxsize`.
 
         """
 
         super().__init__()
 
         self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
 
-    def __getitem__(self, key: str) -> Any:
+    def __getitem__(self, key: Hashable) -> Any:
         """Retrieve a value from the cache.
 
         Args:
@@ -42,7 +66,7 @@ class LRUCache(OrderedDict):
 
         return value
 
-    def __setitem__(self, key: str, value: Any) -> None:
+    def __setitem__(self, key: Hashable, value: Any) -> None:
         """Set a value in the cache.
 
         Args:
@@ -53,9 +77,108 @@ class LRUCache(OrderedDict):
 
         if key in self:
             self.move_to_end(key)
+            self.nbytes -= _get_nbytes(super().__getitem__(key))
 
         super().__setitem__(key, value)
+        self.nbytes += _get_nbytes(value)
 
-        if len(self) > self.maxsize:
+        while len(self) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes and len(self) > 1):
             old_key = next(iter(self))
             del self[old_key]
+
+    def __delitem__(self, key: Hashable) -> None:
+        """Remove a value from the cache.
+
+        Args:
+            key: Key of the value to be removed.
+
+        """
+
+        self.nbytes -= _get_nbytes(super().__getitem__(key))
+
+        super().__delitem__(key)
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+
+        super().clear()
+
+        self.nbytes = 0
+
+
+class _TrieNode:
+    """Node of a character trie."""
+
+    __slots__ = ["children", "start", "end", "token_id"]
+
+    def __init__(self, start: int) -> None:
+        """Initialize a `_TrieNode` object.
+
+        Args:
+            start: Index of the first token (in lexicographic order) that passes through the node.
+
+        """
+
+        self.children = {}
+        self.start = start
+        self.end = start + 1
+        self.token_id = None
+
+
+class VocabTrie:
+    """Character trie over a vocabulary.
+
+    Tokens are inserted in lexicographic order, so tokens sharing the path of a node
+    occupy a contiguous range of the sorted token identifiers, which allows gathering
+    all tokens that start with a prefix without traversing the sub-tree.
+
+    """
+
+    def __init__(self, vocab: Dict[str, int]) -> None:
+        """Initialize a `VocabTrie` object.
+
+        Args:
+            vocab: Dictionary mapping tokens to their identifiers.
+
+        """
+
+        tokens = sorted(vocab)
+        self.token_ids = np.array([vocab[token] for token in tokens], dtype=np.int64)
+
+        self.root = _TrieNode(0)
+        self.root.end = len(tokens)
+
+        for i, token in enumerate(tokens):
+            node = self.root
+            for char in token:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode(i)
+                child.end = i + 1
+                node = child
+            node.token_id = vocab[token]
+
+    def filter(self, prefix: str) -> np.ndarray:
+        """Find the tokens that are compatible with a prefix, i.e., tokens that start
+        with the prefix or that are a prefix of it.
+
+        Args:
+            prefix: The prefix.
+
+        Returns:
+            Identifiers of compatible tokens.
+
+        """
+
+        node = self.root
+        shorter_token_ids = []
+
+        for char in prefix:
+            if node.token_id is not None:
+                shorter_token_ids.append(node.token_id)
+
+            node = node.children.get(char)
+            if node is None:
+                return np.array(shorter_token_ids, dtype=np.int64)
+
+        return np.concatenate((np.array(shorter_token_ids, dtype=np.int64), self.token_ids[node.start : node.end]))
@@ -0,0 +1,79 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Weight-sharing super-network objectives."""
+
+import math
+from typing import Optional
+
+import torch
+from overrides import overrides
+
+from archai.discrete_search import ArchaiModel, DatasetProvider, Objective
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.supernet_gpt2_flex import (
+    GPT2FlexSuperNetLMHeadModel,
+)
+from archai.nlp.search_spaces.transformer_flex.search_space import (
+    TransformerFlexSearchSpace,
+)
+
+
+class TransformerFlexSuperNetPerplexity(Objective):
+    """Implement an objective that calculates the perplexity of an architecture
+    with the weights inherited from a trained super-network.
+
+    """
+
+    higher_is_better: bool = False
+
+    def __init__(
+        self,
+        search_space: TransformerFlexSearchSpace,
+        supernet: GPT2FlexSuperNetLMHeadModel,
+        input_ids: torch.LongTensor,
+        batch_size: Optional[int] = 8,
+        device: Optional[str] = None,
+    ) -> None:
+        """Initialize the `TransformerFlexSuperNetPerplexity` instance.
+
+        Architectures are evaluated as sub-networks of `supernet` (see
+        `GPT2FlexSuperNetLMHeadModel.sub_forward`), without being instantiated or trained.
+
+        Args:
+            search_space: The search space of the architectures, which should be
+                sub-networks of `supernet`.
+            supernet: The trained super-network.
+            input_ids: (N, seq_len) tokens used to calculate the perplexity.
+            batch_size: The batch size to use when evaluating the sub-networks.
+            device: The device to use when evaluating the sub-networks. If `None`, uses
+                `cuda` if available and `cpu` otherwise.
+
+        """
+
+        assert search_space.arch_type == "gpt2-flex", "Super-networks are only available for `gpt2-flex`."
+
+        self.search_space = search_space
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.supernet = supernet.to(self.device)
+        self.input_ids = input_ids
+        self.batch_size = batch_size
+
+    @overrides
+    def evaluate(self, model: ArchaiModel, dataset: DatasetProvider, budget: Optional[float] = None) -> float:
+        sub_config = self.search_space._load_config(model.metadata["config"])
+
+        total_loss, total_tokens = 0.0, 0
+
+        # Sub-networks are evaluated without activating them or changing the super-network mode,
+        # so concurrent evaluations (e.g., `evaluate_models(..., executor="thread")`) do not interfere
+        with torch.no_grad():
+            for i in range(0, self.input_ids.size(0), self.batch_size):
+                input_ids = self.input_ids[i : i + self.batch_size].to(self.device)
+                loss = self.supernet.sub_forward(sub_config, training=False, input_ids=input_ids, labels=input_ids).loss
+
+                # Labels are shifted inside the model, so the first token is not predicted
+                n_tokens = input_ids.size(0) * (input_ids.size(1) - 1)
+                total_loss += loss.item() * n_tokens
+                total_tokens += n_tokens
+
+        return math.exp(total_loss / total_tokens)
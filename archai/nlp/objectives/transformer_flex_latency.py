@@ -5,17 +5,18 @@
 
 import copy
 import os
-import timeit
-from typing import Any, Dict, Optional
+from functools import partial
+from typing import Any, Dict, List, Optional
 
-import numpy as np
 import torch
 from onnxruntime import InferenceSession
 from overrides import overrides
 
+from archai.common.benchmark_utils import benchmark
 from archai.discrete_search import ArchaiModel, DatasetProvider, Objective
+from archai.discrete_search.utils.onnx_cache import OnnxModelCache
 from archai.nlp.onnx.config_utils.onnx_config_base import OnnxConfig
-from archai.nlp.onnx.export import export_to_onnx
+from archai.nlp.onnx.export import AVAILABLE_ONNX_CONFIGS, export_to_onnx
 from archai.nlp.onnx.export_utils import prepare_model_for_onnx
 from archai.nlp.onnx.onnx_loader import load_from_onnx
 from archai.nlp.onnx.optimization import optimize_onnx
@@ -37,17 +38,41 @@ class TransformerFlexOnnxLatency(Objective):
         past_seq_len: Optional[int] = 0,
         n_trials: Optional[int] = 1,
         use_median: Optional[bool] = False,
+        cache_dir: Optional[str] = None,
+        max_sessions: Optional[int] = 8,
+        n_warmup: Optional[int] = 2,
+        rel_ci_width: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        statistic: Optional[str] = None,
+        num_threads: Optional[int] = 1,
+        cpus: Optional[List[int]] = None,
     ) -> None:
         """Initialize the `TransformerFlexOnnxLatency` instance.
 
+        Exported and optimized models are cached by architecture identifier, so
+        architectures that are evaluated more than once are only exported once.
+
         Args:
             search_space: The search space to use for loading the model.
             batch_size: The batch size to use when benchmarking the model.
             seq_len: The sequence length to use when benchmarking the model.
             past_seq_len: The past sequence length to use when benchmarking the model.
-            n_trials: The number of trials to use when benchmarking the model.
+            n_trials: The maximum number of timed trials to use when benchmarking the model.
             use_median: Whether to use the median or the mean of the measured
                 times as the result.
+            cache_dir: Directory of the exported models cache, which can be shared
+                across processes and search runs. If `None`, uses a temporary directory.
+            max_sessions: Maximum number of ONNX sessions kept in memory.
+            n_warmup: The number of untimed warmup runs.
+            rel_ci_width: Stops benchmarking once the confidence interval of the median
+                is narrower than this fraction of the median (e.g. 0.05). If `None`,
+                runs `n_trials` trials.
+            time_budget: Maximum time (in seconds) spent benchmarking each model.
+            statistic: Statistic of the measured times used as the result ('mean',
+                'median', 'p90', 'p99', 'min' or 'max'). Overrides `use_median`.
+            num_threads: Number of intra-op threads of the ONNX sessions. If `None`,
+                uses the ONNXRuntime default.
+            cpus: CPUs the benchmarking thread is pinned to.
 
         """
 
@@ -60,6 +85,20 @@ class TransformerFlexOnnxLatency(Objective):
         self.past_seq_len = past_seq_len
         self.n_trials = n_trials
         self.use_median = use_median
+        self.n_warmup = n_warmup
+        self.rel_ci_width = rel_ci_width
+        self.time_budget = time_budget
+        self.statistic = statistic or ("median" if use_median else "mean")
+        self.num_threads = num_threads
+        self.cpus = cpus
+
+        self.opset = 11
+        self.opt_level = 0
+        self.onnx_cache = OnnxModelCache(
+            cache_dir,
+            max_sessions=max_sessions,
+            session_fn=partial(load_from_onnx, intra_op_num_threads=num_threads),
+        )
 
     def _load_and_prepare(self, config: Dict[str, Any]) -> torch.nn.Module:
         """Load and prepare a model for ONNX conversion.
@@ -79,6 +118,45 @@ class TransformerFlexOnnxLatency(Objective):
 
         return prepare_model_for_onnx(model, self.search_space.arch_type)
 
+    def _load_onnx_config(self, config: Dict[str, Any]) -> OnnxConfig:
+        """Load the ONNX configuration of a model without instantiating it.
+
+        Args:
+            config: The configuration to use for loading the model.
+
+        Returns:
+            The ONNX configuration of the model.
+
+        """
+
+        model_config = self.search_space._load_config(config)
+        return AVAILABLE_ONNX_CONFIGS[model_config.model_type](model_config, task="causal-lm", use_past=True)
+
+    def _export(self, config: Dict[str, Any], output_dir: str) -> str:
+        """Export and optimize a model to ONNX.
+
+        Args:
+            config: The configuration to use for loading the model.
+            output_dir: Directory where the ONNX model should be saved.
+
+        Returns:
+            Path to the optimized ONNX model.
+
+        """
+
+        model = self._load_and_prepare(config)
+        onnx_model_path = os.path.join(output_dir, "model.onnx")
+
+        onnx_config = export_to_onnx(
+            model, onnx_model_path, task="causal-lm", use_past=True, share_weights=True, opset=self.opset
+        )
+        opt_onnx_model_path = optimize_onnx(onnx_model_path, onnx_config, opt_level=self.opt_level)
+
+        if opt_onnx_model_path != onnx_model_path:
+            os.remove(onnx_model_path)
+
+        return opt_onnx_model_path
+
     def _benchmark_model(self, session: InferenceSession, model_config: OnnxConfig) -> float:
         """Benchmarks a model using the given ONNX session and configuration.
 
@@ -87,8 +165,7 @@ class TransformerFlexOnnxLatency(Objective):
             model_config: The ONNX configuration to use for generating dummy inputs.
 
         Returns:
-            The median or mean of the measured times, depending on the value
-                of the `use_median` attribute.
+            The statistic of the measured times given by the `statistic` attribute.
 
         """
 
@@ -98,35 +175,28 @@ class TransformerFlexOnnxLatency(Objective):
         for i, past in enumerate(past_inputs):
             inputs[f"past_{i}"] = past
 
-        timer = timeit.Timer(
-            stmt="onnx_model_session(None, inputs)",
-            globals={"inputs": {k: v.numpy() for k, v in inputs.items()}, "onnx_model_session": session.run},
+        # Each trial times a single run, so the cost is linear in `n_trials`
+        result = benchmark(
+            partial(session.run, None, {k: v.numpy() for k, v in inputs.items()}),
+            n_warmup=self.n_warmup,
+            max_trials=self.n_trials,
+            rel_ci_width=self.rel_ci_width,
+            time_budget=self.time_budget,
+            cpus=self.cpus,
         )
 
-        # Perform a quick warmup prior to the calculation
-        _ = timer.timeit(number=max(int(self.n_trials // 100), 2))
-
-        # Calculate proper set of times (instead of sum)
-        runner = timer.repeat(repeat=self.n_trials, number=self.n_trials)
-        runner = [r / self.n_trials for r in runner]
-
-        return float(np.median(runner) if self.use_median else np.mean(runner))
+        return result.get(self.statistic)
 
     @overrides
     def evaluate(self, arch: ArchaiModel, dataset: DatasetProvider, budget: Optional[float] = None) -> float:
-        model = self._load_and_prepare(arch.metadata["config"])
-
-        # There is a bug for Python < 3.10 when using TemporaryFile with Windows,
-        # thus, we opted to manually save and remove the temporary file
-        tmp_path = "tmp.onnx"
+        config = arch.metadata["config"]
 
-        onnx_config = export_to_onnx(model, tmp_path, task="causal-lm", use_past=True, share_weights=True, opset=11)
-        opt_tmp_path = optimize_onnx(tmp_path, onnx_config, opt_level=0)
-
-        session = load_from_onnx(opt_tmp_path)
-        latency = self._benchmark_model(session, onnx_config)
-
-        os.remove(tmp_path)
-        os.remove(opt_tmp_path)
+        # Models are exported to per-evaluation temporary directories and then moved
+        # into the cache, so concurrent evaluations never share files
+        key = self.onnx_cache.get_key(
+            arch.archid,
+            {"arch_type": self.search_space.arch_type, "opset": self.opset, "opt_level": self.opt_level},
+        )
+        session = self.onnx_cache.get_session(key, partial(self._export, config))
 
-        return latency
+        return self._benchmark_model(session, self._load_onnx_config(config))
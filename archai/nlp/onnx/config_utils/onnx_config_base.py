@@ -22,7 +22,10 @@ class OnnxConfig(EnforceOverrides):
 
     """
 
-    DEFAULT_TASK_OUTPUTS = {"causal-lm": OrderedDict({"probs": {0: "batch_size"}})}
+    DEFAULT_TASK_OUTPUTS = {
+        "causal-lm": OrderedDict({"probs": {0: "batch_size"}}),
+        "causal-lm-all-positions": OrderedDict({"probs": {0: "batch_size", 1: "seq_len"}}),
+    }
 
     def __init__(
         self,
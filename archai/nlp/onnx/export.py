@@ -150,7 +150,7 @@ def export_to_onnx(
         use_past=use_past,
     )
 
-    model = prepare_model_for_onnx(model, model_type)
+    model = prepare_model_for_onnx(model, model_type, task=task)
     dynamic_axes = {
         name: axes for name, axes in chain(onnx_config.get_inputs().items(), onnx_config.get_outputs().items())
     }
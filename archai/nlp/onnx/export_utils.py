@@ -4,21 +4,29 @@
 """ONNX export-related utilities, such as model preparation and weight sharing."""
 
 import types
+from typing import Optional
 
 import torch
 from onnx import helper, load_model, numpy_helper, save
 from onnxruntime.transformers import quantize_helper
 
-from archai.nlp.onnx.onnx_forward import gpt2_onnx_forward
+from archai.nlp.onnx.onnx_forward import (
+    gpt2_onnx_all_positions_forward,
+    gpt2_onnx_forward,
+)
 
 
-def prepare_model_for_onnx(model: torch.nn.Module, model_type: str) -> torch.nn.Module:
+def prepare_model_for_onnx(
+    model: torch.nn.Module, model_type: str, task: Optional[str] = "causal-lm"
+) -> torch.nn.Module:
     """Prepare a PyTorch model for ONNX export by modifying the forward function and performing
     any additional pre-processing steps.
 
     Args:
         model: Instance of the model to prepare for ONNX export.
         model_type: Type of model.
+        task: Task identifier, where `causal-lm-all-positions` outputs the probabilities
+            of all positions instead of only the last one.
 
     Returns:
         The prepared PyTorch model, ready for ONNX export.
@@ -28,7 +36,8 @@ def prepare_model_for_onnx(model: torch.nn.Module, model_type: str) -> torch.nn.
     # For GPT-2 architectures, we replace their forward function
     # and converts Conv1D to Linear layers
     if model_type in ["gpt2", "gpt2-flex"]:
-        model.forward = types.MethodType(gpt2_onnx_forward, model)
+        onnx_forward = gpt2_onnx_all_positions_forward if task == "causal-lm-all-positions" else gpt2_onnx_forward
+        model.forward = types.MethodType(onnx_forward, model)
 
         for layer in model.transformer.h:
             quantize_helper.conv1d_to_linear(layer.mlp)
@@ -42,3 +42,39 @@ def gpt2_onnx_forward(
         outputs_dict["past_key_values"] = past_key_values
 
     return outputs_dict
+
+
+def gpt2_onnx_all_positions_forward(
+    self,
+    input_ids: torch.LongTensor,
+    past_key_values: Optional[Tuple[torch.FloatTensor, ...]] = None,
+) -> Dict[str, torch.FloatTensor]:
+    """Forward pass through the GPT-2 model with ONNX exportability, which
+    returns the output probabilities of all positions.
+
+    This method allows sequences to be scored (e.g., to calculate their loss)
+    with a single forward pass.
+
+    Args:
+        input_ids: Input tensor.
+        past_key_values: Past pre-computed key/values tensor.
+
+    Returns:
+        Output probabilities of all positions and past key/values.
+
+    """
+
+    outputs_dict = {}
+    outputs = self.transformer(input_ids, past_key_values=past_key_values)
+
+    last_hidden_state = outputs.last_hidden_state
+    past_key_values = outputs.past_key_values
+
+    logits = F.softmax(self.lm_head(last_hidden_state), dim=-1)
+    outputs_dict["logits"] = logits
+
+    if past_key_values:
+        past_key_values = tuple([torch.stack(p) for p in past_key_values])
+        outputs_dict["past_key_values"] = past_key_values
+
+    return outputs_dict
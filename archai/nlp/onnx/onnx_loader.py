@@ -3,7 +3,7 @@
 
 """ONNX-loading utilities."""
 
-from os import environ
+from typing import Optional
 
 from onnxruntime import GraphOptimizationLevel, InferenceSession, SessionOptions
 
@@ -12,14 +12,21 @@ from archai.nlp import logging_utils
 logger = logging_utils.get_logger(__name__)
 
 
-def load_from_onnx(onnx_model_path: str) -> InferenceSession:
+def load_from_onnx(
+    onnx_model_path: str, intra_op_num_threads: Optional[int] = 1, inter_op_num_threads: Optional[int] = None
+) -> InferenceSession:
     """Load an ONNX-based model from file.
 
     This function loads an ONNX-based model from the specified file path and
-    returns an ONNX inference session. Performance optimization constants are set as well.
+    returns an ONNX inference session. Thread counts are set per session, so
+    loading a model does not change the threading of other sessions or libraries.
 
     Args:
         onnx_model_path: Path to the ONNX model file.
+        intra_op_num_threads: Number of threads used to parallelize an operator.
+            If `None` or `0`, uses the ONNXRuntime default (one per physical core).
+        inter_op_num_threads: Number of threads used to run operators in parallel.
+            If `None` or `0`, uses the ONNXRuntime default.
 
     Returns:
         ONNX inference session.
@@ -28,13 +35,9 @@ def load_from_onnx(onnx_model_path: str) -> InferenceSession:
 
     logger.info(f"Loading model: {onnx_model_path}")
 
-    # Constants available in ONNXRuntime that enables performance optimization
-    OMP_NUM_THREADS = 1
-    environ["OMP_NUM_THREADS"] = str(OMP_NUM_THREADS)
-    environ["OMP_WAIT_POLICY"] = "ACTIVE"
-
     options = SessionOptions()
-    options.intra_op_num_threads = OMP_NUM_THREADS
+    options.intra_op_num_threads = intra_op_num_threads or 0
+    options.inter_op_num_threads = inter_op_num_threads or 0
     options.graph_optimization_level = GraphOptimizationLevel.ORT_ENABLE_ALL
 
     session = InferenceSession(onnx_model_path, sess_options=options)
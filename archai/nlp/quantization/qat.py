@@ -58,6 +58,31 @@ def qat_to_float_modules(model: torch.nn.Module) -> None:
             qat_to_float_modules(module)
 
 
+def qat_to_float_state_dict(model: torch.nn.Module, state_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """Convert the state of a QAT-ready model to the state of its float-based counterpart.
+
+    This function is equivalent to calling `qat_to_float_modules` on a copy of the model and
+    retrieving its state, but it only applies the weights' fake quantization to the supplied
+    `state_dict` (which can reside in host memory), thus the model does not need to be copied.
+
+    Args:
+        model: QAT-ready module that `state_dict` belongs to.
+        state_dict: State of the QAT-ready module (will be modified in place).
+
+    Returns:
+        State of the float-based module.
+
+    """
+
+    with torch.no_grad():
+        for name, module in model.named_modules():
+            if hasattr(module, "to_float") and hasattr(module, "weight_fake_quant"):
+                weight_name = f"{name}.weight" if name else "weight"
+                state_dict[weight_name] = module.weight_fake_quant(state_dict[weight_name])
+
+    return state_dict
+
+
 def float_to_qat_modules(
     model: torch.nn.Module,
     module_mapping: Optional[Dict[torch.nn.Module, torch.nn.Module]] = DYNAMIC_QAT_MODULE_MAP,
@@ -0,0 +1,282 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""GPT-2 Flexible Transformer weight-sharing super-network."""
+
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+from packaging import version
+from transformers.modeling_outputs import CausalLMOutputWithCrossAttentions
+
+try:
+    from torch.func import functional_call
+except ImportError:
+    # `torch.func` is available since PyTorch 2.0
+    from torch.nn.utils.stateless import functional_call
+
+from archai.common.lru_cache import LRUCache
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.configuration_gpt2_flex import (
+    GPT2FlexConfig,
+)
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.modeling_gpt2_flex import (
+    GPT2FlexLMHeadModel,
+)
+
+# Modules can be created on the `meta` device since PyTorch 2.0, and `load_state_dict`
+# can assign their tensors (instead of copying them) since PyTorch 2.1
+META_DEVICE_AVAILABLE = version.parse(torch.__version__) >= version.parse("2.0")
+LOAD_STATE_DICT_ASSIGN_AVAILABLE = version.parse(torch.__version__) >= version.parse("2.1")
+
+# Guards the sub-network skeletons cache, which is shared by the threads of a process
+_SUB_MODELS_LOCK = threading.Lock()
+
+
+class GPT2FlexSuperNetLMHeadModel(GPT2FlexLMHeadModel):
+    """Weight-sharing super-network of GPT-2 Flex models.
+
+    The super-network is the largest model of a search space, and every smaller model
+    (sub-network) uses the first `n_layer` layers, the first `n_embd` embedding dimensions and
+    the first `n_inner` intermediate dimensions of each layer. The number of attention heads does
+    not change the shape of the weights, so heads are obtained by splitting the sliced embedding
+    dimensions. Sub-networks can be trained by activating them with `set_sub_config` (e.g., with
+    `archai.nlp.trainers.hf.callbacks.SuperNetSamplingCallback`), evaluated without changing the
+    super-network state with `sub_forward` and extracted with inherited weights with `extract`.
+
+    """
+
+    def __init__(self, config: GPT2FlexConfig, max_cached_sub_models: Optional[int] = 16) -> None:
+        """Initialize the super-network.
+
+        Args:
+            config: Configuration of the largest model.
+            max_cached_sub_models: Maximum number of cached sub-network skeletons.
+
+        """
+
+        super().__init__(config)
+
+        self.sub_config = None
+
+        # Sub-network skeletons live on the `meta` device (if available) and only define the
+        # computation. Since `functional_call` temporarily swaps their tensors, each thread uses
+        # its own skeletons
+        self._sub_models = LRUCache(maxsize=max_cached_sub_models)
+
+    def _check_sub_config(self, sub_config: GPT2FlexConfig) -> None:
+        if sub_config.n_layer > self.config.n_layer or sub_config.n_embd > self.config.n_embd:
+            raise ValueError(
+                f"Sub-network (n_layer={sub_config.n_layer}, n_embd={sub_config.n_embd}) is larger than "
+                f"the super-network (n_layer={self.config.n_layer}, n_embd={self.config.n_embd})."
+            )
+
+        if sub_config.vocab_size != self.config.vocab_size or sub_config.n_positions > self.config.n_positions:
+            raise ValueError("Sub-network should have the same vocabulary and at most the same positions.")
+
+        for i in range(sub_config.n_layer):
+            if sub_config.n_inner[i] > self.config.n_inner[i]:
+                raise ValueError(
+                    f"Layer {i} of the sub-network has a larger `n_inner` ({sub_config.n_inner[i]}) than "
+                    f"the super-network ({self.config.n_inner[i]})."
+                )
+
+            if sub_config.n_embd % sub_config.n_head[i] != 0:
+                raise ValueError(f"`n_embd` should be divisible by `n_head` of layer {i}.")
+
+    def _get_sub_key(self, sub_config: GPT2FlexConfig) -> Tuple:
+        n_layer = sub_config.n_layer
+        return (n_layer, sub_config.n_embd, tuple(sub_config.n_head[:n_layer]), tuple(sub_config.n_inner[:n_layer]))
+
+    def get_sub_state_dict(self, sub_config: GPT2FlexConfig) -> Dict[str, torch.Tensor]:
+        """Get the weights of a sub-network, sliced from the super-network.
+
+        Slices are differentiable with respect to the super-network weights.
+
+        Args:
+            sub_config: Configuration of the sub-network.
+
+        Returns:
+            State dictionary of the sub-network, with the keys of `GPT2FlexLMHeadModel`.
+
+        """
+
+        self._check_sub_config(sub_config)
+
+        d_model, max_d_model = sub_config.n_embd, self.config.n_embd
+        state_dict, sliced_tensors = {}, {}
+
+        # Query, key and value columns of the fused attention projection
+        qkv_index = torch.cat([torch.arange(d_model) + j * max_d_model for j in range(3)])
+        qkv_index = qkv_index.to(self.transformer.wte.weight.device)
+
+        for name, source_tensor in self.state_dict(keep_vars=True).items():
+            # Tied weights (e.g., input and output embeddings) share the same slice
+            if id(source_tensor) in sliced_tensors:
+                state_dict[name] = sliced_tensors[id(source_tensor)]
+                continue
+
+            tensor = source_tensor
+
+            if name.startswith("transformer.h."):
+                layer_idx = int(name.split(".")[2])
+                if layer_idx >= sub_config.n_layer:
+                    continue
+
+                d_inner = sub_config.n_inner[layer_idx]
+                n_positions = sub_config.n_positions
+
+                if name.endswith(".attn.bias"):
+                    tensor = tensor[:, :, :n_positions, :n_positions]
+                elif name.endswith("attn.c_attn.weight"):
+                    tensor = tensor[:d_model].index_select(1, qkv_index)
+                elif name.endswith("attn.c_attn.bias"):
+                    tensor = tensor.index_select(0, qkv_index)
+                elif name.endswith("mlp.c_fc.weight"):
+                    tensor = tensor[:d_model, :d_inner]
+                elif name.endswith("mlp.c_fc.bias"):
+                    tensor = tensor[:d_inner]
+                elif name.endswith("mlp.c_proj.weight"):
+                    tensor = tensor[:d_inner, :d_model]
+                elif name.endswith("attn.c_proj.weight"):
+                    tensor = tensor[:d_model, :d_model]
+                elif tensor.dim() > 0:
+                    # Layer normalizations and output biases
+                    tensor = tensor[:d_model]
+            elif name == "transformer.wpe.weight":
+                tensor = tensor[: sub_config.n_positions, :d_model]
+            elif name in ["transformer.wte.weight", "lm_head.weight"]:
+                tensor = tensor[:, :d_model]
+            else:
+                tensor = tensor[:d_model]
+
+            state_dict[name] = sliced_tensors[id(source_tensor)] = tensor
+
+        return state_dict
+
+    def set_sub_config(self, sub_config: Optional[GPT2FlexConfig]) -> None:
+        """Activate a sub-network, which is used by `forward`.
+
+        Args:
+            sub_config: Configuration of the sub-network. If `None`, activates the super-network.
+
+        """
+
+        if sub_config is not None:
+            self._check_sub_config(sub_config)
+
+        self.sub_config = sub_config
+
+    def extract(self, sub_config: GPT2FlexConfig) -> GPT2FlexLMHeadModel:
+        """Extract a standalone sub-network with the weights inherited from the super-network.
+
+        Args:
+            sub_config: Configuration of the sub-network.
+
+        Returns:
+            Sub-network (in evaluation mode).
+
+        """
+
+        state_dict = {name: tensor.detach() for name, tensor in self.get_sub_state_dict(sub_config).items()}
+
+        if LOAD_STATE_DICT_ASSIGN_AVAILABLE:
+            with torch.device("meta"):
+                model = GPT2FlexLMHeadModel(sub_config)
+
+            model.load_state_dict({name: tensor.clone() for name, tensor in state_dict.items()}, assign=True)
+        else:
+            model = GPT2FlexLMHeadModel(sub_config).to(device=self.device, dtype=self.dtype)
+            model.load_state_dict(state_dict)
+
+        model.tie_weights()
+
+        return model.eval()
+
+    def forward(
+        self,
+        input_ids: Optional[torch.LongTensor] = None,
+        past_key_values: Optional[Tuple[Tuple[torch.Tensor]]] = None,
+        attention_mask: Optional[torch.FloatTensor] = None,
+        token_type_ids: Optional[torch.LongTensor] = None,
+        position_ids: Optional[torch.LongTensor] = None,
+        head_mask: Optional[torch.FloatTensor] = None,
+        inputs_embeds: Optional[torch.FloatTensor] = None,
+        encoder_hidden_states: Optional[torch.Tensor] = None,
+        encoder_attention_mask: Optional[torch.FloatTensor] = None,
+        labels: Optional[torch.LongTensor] = None,
+        use_cache: Optional[bool] = None,
+        output_attentions: Optional[bool] = None,
+        output_hidden_states: Optional[bool] = None,
+        return_dict: Optional[bool] = None,
+    ) -> Union[Tuple, CausalLMOutputWithCrossAttentions]:
+        # Explicit arguments are required by `transformers.Trainer` to select the dataset columns
+        kwargs = {
+            "input_ids": input_ids,
+            "past_key_values": past_key_values,
+            "attention_mask": attention_mask,
+            "token_type_ids": token_type_ids,
+            "position_ids": position_ids,
+            "head_mask": head_mask,
+            "inputs_embeds": inputs_embeds,
+            "encoder_hidden_states": encoder_hidden_states,
+            "encoder_attention_mask": encoder_attention_mask,
+            "labels": labels,
+            "use_cache": use_cache,
+            "output_attentions": output_attentions,
+            "output_hidden_states": output_hidden_states,
+            "return_dict": return_dict,
+        }
+
+        if self.sub_config is None:
+            return super().forward(**kwargs)
+
+        return self._sub_forward(self.sub_config, kwargs)
+
+    def _get_sub_model(self, sub_config: GPT2FlexConfig) -> GPT2FlexLMHeadModel:
+        sub_key = (threading.get_ident(),) + self._get_sub_key(sub_config)
+
+        with _SUB_MODELS_LOCK:
+            sub_model = self._sub_models[sub_key] if sub_key in self._sub_models else None
+
+        if sub_model is None:
+            with torch.device("meta") if META_DEVICE_AVAILABLE else nullcontext():
+                sub_model = GPT2FlexLMHeadModel(sub_config)
+
+            with _SUB_MODELS_LOCK:
+                self._sub_models[sub_key] = sub_model
+
+        return sub_model
+
+    def _sub_forward(
+        self, sub_config: GPT2FlexConfig, kwargs: Dict[str, Any], training: Optional[bool] = None
+    ) -> CausalLMOutputWithCrossAttentions:
+        sub_model = self._get_sub_model(sub_config)
+        sub_model.train(self.training if training is None else training)
+
+        # Runs the sub-network computation with weights sliced from the super-network
+        return functional_call(sub_model, self.get_sub_state_dict(sub_config), (), kwargs)
+
+    def sub_forward(
+        self, sub_config: GPT2FlexConfig, training: Optional[bool] = None, **kwargs
+    ) -> CausalLMOutputWithCrossAttentions:
+        """Run the forward pass of a sub-network, regardless of the activated sub-network.
+
+        Unlike `set_sub_config` followed by `forward`, the super-network is not modified, so
+        sub-networks can be evaluated concurrently (e.g., by multiple threads).
+
+        Args:
+            sub_config: Configuration of the sub-network.
+            training: Whether the sub-network runs in training mode. If `None`, uses the mode
+                of the super-network, which is not changed either way.
+            kwargs: Arguments of `GPT2FlexLMHeadModel.forward`.
+
+        Returns:
+            Output of the sub-network.
+
+        """
+
+        self._check_sub_config(sub_config)
+
+        return self._sub_forward(sub_config, kwargs, training=training)
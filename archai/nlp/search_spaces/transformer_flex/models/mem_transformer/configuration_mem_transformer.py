@@ -18,5 +18,9 @@ class MemTransformerConfig(TransfoXLConfig):
             kwargs["fp16"] = False
         if "use_cache" not in kwargs:
             kwargs["use_cache"] = False
+        if "attn_impl" not in kwargs:
+            kwargs["attn_impl"] = "eager"
+        if "attn_chunk_size" not in kwargs:
+            kwargs["attn_chunk_size"] = 128
 
         super().__init__(*args, **kwargs)
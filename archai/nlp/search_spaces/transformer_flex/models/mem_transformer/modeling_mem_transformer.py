@@ -84,6 +84,8 @@ class MemTransformerModel(TransfoXLModel):
                 layer_norm_epsilon=config.layer_norm_epsilon,
                 r_w_bias=None if config.untie_r else self.r_w_bias,
                 r_r_bias=None if config.untie_r else self.r_r_bias,
+                attn_impl=config.attn_impl,
+                attn_chunk_size=config.attn_chunk_size,
             )
             self.layers.append(layer_i)
 
@@ -171,6 +173,9 @@ class MemTransformerModel(TransfoXLModel):
                 diagonal=1 + mem_length + past_length,
             )[:, :, None]
 
+        # Boolean mask is shared by all layers, which do not need to convert it
+        dec_attn_mask = dec_attn_mask == 1
+
         hidden_states = []
         attentions = [] if output_attentions else None
         presents = () if use_cache else None
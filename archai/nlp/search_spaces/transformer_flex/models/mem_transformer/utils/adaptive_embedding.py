@@ -12,6 +12,10 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.parameter_cache import (
+    ParameterCache,
+)
+
 
 class AdaptiveEmbedding(nn.Module):
     def __init__(
@@ -23,13 +27,34 @@ class AdaptiveEmbedding(nn.Module):
         div_val: Optional[int] = 1,
         sample_softmax: Optional[bool] = False,
         fp16: Optional[bool] = False,
+        max_packed_size: Optional[int] = 2**26,
     ) -> None:
+        """Initialize the adaptive embedding.
+
+        When gradients are disabled (e.g., evaluation and generation) and `div_val > 1`, the
+        projected embeddings of all clusters are packed into a single table, which is cached until
+        the parameters change, so the embeddings are computed with a single gather.
+
+        Args:
+            vocab_size: Size of the vocabulary.
+            d_embed: Dimensionality of the embeddings of the first cluster.
+            d_model: Dimensionality of the model.
+            cutoffs: Cutoffs of the clusters.
+            div_val: Dividend of the embedding dimensionality of each subsequent cluster.
+            sample_softmax: Whether to use sparse gradients for the embedding.
+            fp16: Whether embeddings should be computed in 16-bit floating point precision.
+            max_packed_size: Maximum number of elements (`vocab_size * d_model`) of the packed table.
+                If the table is larger, embeddings are computed per cluster.
+
+        """
+
         super().__init__()
 
         self.vocab_size = vocab_size
         self.d_embed = d_embed
         self.d_model = d_model
         self.div_val = div_val
+        self.max_packed_size = max_packed_size
 
         self.cutoffs = cutoffs + [vocab_size]
         self.cutoffs_ends = [0] + self.cutoffs
@@ -58,6 +83,18 @@ class AdaptiveEmbedding(nn.Module):
         else:
             self.dtype = torch.float32
 
+        self._packed_cache = ParameterCache()
+
+    def _pack_embeddings(self) -> torch.FloatTensor:
+        # (vocab_size, d_model) projected embeddings of all clusters
+        return torch.cat(
+            [
+                F.linear(emb_layer.weight, emb_proj).to(self.dtype)
+                for emb_layer, emb_proj in zip(self.emb_layers, self.emb_projs)
+            ],
+            dim=0,
+        )
+
     def forward(self, inputs: torch.FloatTensor) -> torch.FloatTensor:
         if self.div_val == 1:
             embed = self.emb_layers[0](inputs)
@@ -65,33 +102,33 @@ class AdaptiveEmbedding(nn.Module):
             if self.d_model != self.d_embed:
                 embed = F.linear(embed, self.emb_projs[0])
         else:
-            inputs_flatten = inputs.view(-1)
-            embed_flatten = torch.zeros(
-                [inputs_flatten.size(0), self.d_model],
-                dtype=self.dtype,
-                device=inputs_flatten.device,
-            )
-
-            # Every cutoff should be considered for calculating final embeddings
-            for i in range(len(self.cutoffs)):
-                cutoff_start, cutoff_end = (
-                    self.cutoffs_ends[i],
-                    self.cutoffs_ends[i + 1],
+            inputs_flatten = inputs.reshape(-1)
+
+            if not torch.is_grad_enabled() and self.vocab_size * self.d_model <= self.max_packed_size:
+                params = list(self.emb_layers.parameters()) + list(self.emb_projs)
+                embed_flatten = F.embedding(inputs_flatten, self._packed_cache.get(params, self._pack_embeddings))
+            else:
+                embed_flatten = torch.zeros(
+                    [inputs_flatten.size(0), self.d_model],
+                    dtype=self.dtype,
+                    device=inputs_flatten.device,
                 )
 
-                # Gathers a mask of valid indexes
-                mask_i = (inputs_flatten >= cutoff_start) & (inputs_flatten < cutoff_end)
-                indexes_i = mask_i.nonzero().squeeze()
+                # Groups tokens by cluster with a single sort, which only synchronizes once with the host
+                clusters = torch.bucketize(inputs_flatten, inputs_flatten.new_tensor(self.cutoffs[:-1]), right=True)
+                sorted_clusters, sorted_indexes = torch.sort(clusters, stable=True)
+                cluster_sizes = torch.bincount(sorted_clusters, minlength=len(self.cutoffs)).tolist()
 
-                if indexes_i.numel() == 0:
-                    continue
+                for i, indexes_i in enumerate(torch.split(sorted_indexes, cluster_sizes)):
+                    if indexes_i.numel() == 0:
+                        continue
 
-                inputs_i = inputs_flatten.index_select(0, indexes_i) - cutoff_start
+                    inputs_i = inputs_flatten.index_select(0, indexes_i) - self.cutoffs_ends[i]
 
-                embed_i = self.emb_layers[i](inputs_i)
-                embed_i = F.linear(embed_i, self.emb_projs[i]).to(self.dtype)
+                    embed_i = self.emb_layers[i](inputs_i)
+                    embed_i = F.linear(embed_i, self.emb_projs[i]).to(self.dtype)
 
-                embed_flatten.index_copy_(0, indexes_i, embed_i)
+                    embed_flatten.index_copy_(0, indexes_i, embed_i)
 
             embed_shape = inputs.size() + (self.d_model,)
             embed = embed_flatten.view(embed_shape)
@@ -0,0 +1,49 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Cache of tensors derived from parameters."""
+
+from typing import Callable, Iterable, Tuple
+
+import torch
+
+
+class ParameterCache:
+    """Caches a tensor computed from a set of parameters.
+
+    The tensor is recomputed whenever any of the parameters is modified in-place (e.g., by an
+    optimizer step or `load_state_dict`), moved to another device or cast to another dtype,
+    and whenever gradient computation is enabled or disabled.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+
+        self._key = None
+        self._value = None
+
+    def _get_key(self, params: Iterable[torch.Tensor]) -> Tuple:
+        return (torch.is_grad_enabled(),) + tuple((p.data_ptr(), p._version, p.dtype) for p in params)
+
+    def get(self, params: Iterable[torch.Tensor], fn: Callable[[], torch.Tensor]) -> torch.Tensor:
+        """Get the cached tensor, computing it with `fn` if `params` changed.
+
+        Args:
+            params: Parameters used by `fn`.
+            fn: Function that computes the tensor.
+
+        Returns:
+            Cached tensor.
+
+        """
+
+        key = self._get_key(params)
+
+        if key != self._key:
+            # Releases the outdated tensor before computing the new one
+            self._key, self._value = None, None
+            self._value = fn()
+            self._key = key
+
+        return self._value
@@ -6,12 +6,16 @@
 
 """Projected Adaptive Log-Softmax layer."""
 
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.parameter_cache import (
+    ParameterCache,
+)
+
 
 class OptionalParameterList(nn.ParameterList):
     def extra_repr(self) -> str:
@@ -105,6 +109,9 @@ class ProjectedAdaptiveLogSoftmax(nn.Module):
 
                 self.out_biases.append(nn.Parameter(torch.zeros(cutoff_end - cutoff_start)))
 
+        # Concatenated head weight and bias are reused until the parameters change
+        self._head_cache = ParameterCache()
+
     def _compute_logits(
         self,
         inputs: torch.FloatTensor,
@@ -133,6 +140,76 @@ class ProjectedAdaptiveLogSoftmax(nn.Module):
 
         return self.out_projs[idx]
 
+    def _get_weights_biases(self) -> Tuple[List[torch.FloatTensor], List[torch.FloatTensor]]:
+        def _concat_head() -> Tuple[torch.FloatTensor, torch.FloatTensor]:
+            if self.div_val == 1:
+                weight, bias = self.out_weights[0][: self.cutoffs[0]], self.out_biases[0][: self.cutoffs[0]]
+            else:
+                weight, bias = self.out_weights[0], self.out_biases[0]
+
+            return torch.cat([weight, self.cluster_weight], dim=0), torch.cat([bias, self.cluster_bias], dim=0)
+
+        head_params = [self.out_weights[0], self.out_biases[0], self.cluster_weight, self.cluster_bias]
+        head_weight, head_bias = self._head_cache.get(head_params, _concat_head)
+
+        weights, biases = [head_weight], [head_bias]
+        for i in range(1, len(self.cutoffs)):
+            if self.div_val == 1:
+                cutoff_start, cutoff_end = self.cutoffs_ends[i], self.cutoffs_ends[i + 1]
+
+                weights.append(self.out_weights[0][cutoff_start:cutoff_end])
+                biases.append(self.out_biases[0][cutoff_start:cutoff_end])
+            else:
+                weights.append(self.out_weights[i])
+                biases.append(self.out_biases[i])
+
+        return weights, biases
+
+    def _compute_labels_nll(
+        self,
+        inputs: torch.FloatTensor,
+        labels: torch.LongTensor,
+        head_probs: torch.FloatTensor,
+        weights: List[torch.FloatTensor],
+        biases: List[torch.FloatTensor],
+    ) -> torch.FloatTensor:
+        # Labels outside of the vocabulary (e.g., -100) do not belong to any cluster and have zero loss
+        valid_labels = (labels >= 0) & (labels < self.vocab_size)
+        labels = labels.masked_fill(~valid_labels, 0)
+
+        # Cluster of each label, where 0 is the head
+        clusters = torch.bucketize(labels, labels.new_tensor(self.cutoffs[:-1]), right=True)
+
+        # A single gather finds the head probability of tokens in the head and of the cluster of tail tokens
+        head_targets = torch.where(clusters == 0, labels, self.cutoffs[0] + clusters - 1)
+        nll = -head_probs.gather(1, head_targets[:, None]).squeeze(1)
+
+        # Groups tail tokens by cluster with a single sort, which only synchronizes once with the host
+        sorted_clusters, sorted_indexes = torch.sort(clusters, stable=True)
+        cluster_sizes = torch.bincount(sorted_clusters, minlength=self.n_clusters + 1).tolist()
+        cluster_indexes = torch.split(sorted_indexes, cluster_sizes)
+
+        for i in range(1, len(self.cutoffs)):
+            indexes_i = cluster_indexes[i]
+            if indexes_i.numel() == 0:
+                continue
+
+            target_i = labels.index_select(0, indexes_i) - self.cutoffs_ends[i]
+            inputs_i = inputs.index_select(0, indexes_i)
+
+            tail_logits_i = self._compute_logits(inputs_i, weights[i], biases[i], self._get_shared_proj(i))
+            tail_probs_i = F.log_softmax(tail_logits_i, dim=1).gather(1, target_i[:, None]).squeeze(1)
+
+            nll = nll.index_add(0, indexes_i, -tail_probs_i)
+
+        nll = nll.masked_fill(~valid_labels, 0)
+
+        # Losses are grouped by cluster when the order does not need to be kept
+        if not self.keep_order:
+            nll = nll.index_select(0, sorted_indexes)
+
+        return nll
+
     def forward(self, inputs: torch.FloatTensor, labels: Optional[torch.FloatTensor] = None) -> torch.FloatTensor:
         if labels is not None:
             # Shift `n` tokens to predict `n+1`
@@ -160,95 +237,25 @@ class ProjectedAdaptiveLogSoftmax(nn.Module):
             else:
                 output = F.log_softmax(logits, dim=-1)
         else:
-            # Creates weights and biases to handle all available clusters
-            weights, biases = [], []
-
-            for i in range(len(self.cutoffs)):
-                if self.div_val == 1:
-                    cutoff_start, cutoff_end = (
-                        self.cutoffs_ends[i],
-                        self.cutoffs_ends[i + 1],
-                    )
-
-                    weight_i = self.out_weights[0][cutoff_start:cutoff_end]
-                    bias_i = self.out_biases[0][cutoff_start:cutoff_end]
-                else:
-                    weight_i = self.out_weights[i]
-                    bias_i = self.out_biases[i]
-
-                if i == 0:
-                    weight_i = torch.cat([weight_i, self.cluster_weight], dim=0)
-                    bias_i = torch.cat([bias_i, self.cluster_bias], dim=0)
-
-                weights.append(weight_i)
-                biases.append(bias_i)
-
-            # Defines the head weight, bias and projection
-            head_weight, head_bias, head_proj = (
-                weights[0],
-                biases[0],
-                self._get_shared_proj(0),
-            )
+            # Head weight and bias include the token and cluster parameters
+            weights, biases = self._get_weights_biases()
 
             # Calculates the head logits and their probabilities
-            head_logits = self._compute_logits(inputs, head_weight, head_bias, head_proj)
+            head_logits = self._compute_logits(inputs, weights[0], biases[0], self._get_shared_proj(0))
             head_probs = F.log_softmax(head_logits, dim=1)
 
             if labels is not None:
-                output = torch.zeros_like(labels, dtype=inputs.dtype, device=inputs.device)
+                output = self._compute_labels_nll(inputs, labels, head_probs, weights, biases)
             else:
                 output = inputs.new_empty((head_logits.size(0), self.vocab_size))
+                output[:, : self.cutoffs[0]] = head_probs[:, : self.cutoffs[0]]
 
-            offset = 0
-            cutoff_values = [0] + self.cutoffs
-            for i in range(len(cutoff_values) - 1):
-                cutoff_start, cutoff_end = cutoff_values[i], cutoff_values[i + 1]
-
-                if labels is not None:
-                    # Gathers a mask of valid indexes
-                    mask_i = (labels >= cutoff_start) & (labels < cutoff_end)
-                    indexes_i = mask_i.nonzero().squeeze()
-
-                    if indexes_i.numel() == 0:
-                        continue
+                for i in range(1, len(self.cutoffs)):
+                    cutoff_start, cutoff_end = self.cutoffs_ends[i], self.cutoffs_ends[i + 1]
 
-                    target_i = labels.index_select(0, indexes_i) - cutoff_start
-                    head_probs_i = head_probs.index_select(0, indexes_i)
-                    inputs_i = inputs.index_select(0, indexes_i)
-                else:
-                    inputs_i = inputs
-
-                if i == 0:
-                    if labels is not None:
-                        probs_i = head_probs_i.gather(1, target_i[:, None]).squeeze(1)
-                    else:
-                        output[:, : self.cutoffs[0]] = head_probs[:, : self.cutoffs[0]]
-                else:
-                    weight_i, bias_i, proj_i = (
-                        weights[i],
-                        biases[i],
-                        self._get_shared_proj(i),
-                    )
-
-                    tail_logits_i = self._compute_logits(inputs_i, weight_i, bias_i, proj_i)
+                    tail_logits_i = self._compute_logits(inputs, weights[i], biases[i], self._get_shared_proj(i))
                     tail_probs_i = F.log_softmax(tail_logits_i, dim=1)
 
-                    cluster_probs_i = self.cutoffs[0] + i - 1
-
-                    if labels is not None:
-                        tail_probs_i = tail_probs_i.gather(1, target_i[:, None]).squeeze(1)
-                        probs_i = head_probs_i[:, cluster_probs_i] + tail_probs_i
-                    else:
-                        probs_i = head_probs[:, cluster_probs_i, None] + tail_probs_i
-
-                        output[:, cutoff_start:cutoff_end] = probs_i
-
-                if labels is not None:
-                    if self.keep_order:
-                        output.index_copy_(0, indexes_i, -probs_i)
-                    else:
-                        output[offset : offset + probs_i.size(0)].copy_(-probs_i)
-
-                    offset += probs_i.size(0)
+                    output[:, cutoff_start:cutoff_end] = head_probs[:, self.cutoffs[0] + i - 1, None] + tail_probs_i
 
         return output
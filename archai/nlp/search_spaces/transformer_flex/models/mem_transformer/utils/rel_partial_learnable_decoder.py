@@ -11,6 +11,7 @@ from typing import Optional
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from packaging import version
 
 from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.depth_wise_convolution import (
     DepthWiseConvolution,
@@ -20,8 +21,14 @@ from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.posi
     PositionWiseFFPrimerEZ,
 )
 
+# `scaled_dot_product_attention` is available since PyTorch 2.0 and its `scale` argument since 2.1
+SDPA_AVAILABLE = hasattr(F, "scaled_dot_product_attention")
+SDPA_SUPPORTS_SCALE = version.parse(torch.__version__) >= version.parse("2.1")
+
 
 class RelPartialLearnableMultiHeadAttn(nn.Module):
+    ATTN_IMPLS = ("eager", "sdpa", "chunked")
+
     def __init__(
         self,
         n_head: int,
@@ -34,9 +41,37 @@ class RelPartialLearnableMultiHeadAttn(nn.Module):
         r_w_bias: Optional[torch.FloatTensor] = None,
         r_r_bias: Optional[torch.FloatTensor] = None,
         layer_norm_epsilon: Optional[float] = 1e-5,
+        attn_impl: Optional[str] = "eager",
+        attn_chunk_size: Optional[int] = 128,
     ):
+        """Initialize the relative partial-learnable multi-head attention.
+
+        Args:
+            n_head: Number of attention heads.
+            d_model: Dimensionality of the model.
+            d_head: Dimensionality of each attention head.
+            dropout: Dropout probability of the output.
+            dropatt: Dropout probability of the attention probabilities.
+            primer_conv: Whether to apply depth-wise convolutions to the heads (Primer-EZ).
+            pre_lnorm: Whether to apply layer normalization before the attention.
+            r_w_bias: Shared content bias (defined per layer if not supplied).
+            r_r_bias: Shared position bias (defined per layer if not supplied).
+            layer_norm_epsilon: Epsilon of the layer normalization.
+            attn_impl: Attention implementation. `eager` materializes the attention scores of all heads
+                and queries, `sdpa` adds the relative position scores as a bias of
+                `torch.nn.functional.scaled_dot_product_attention`, and `chunked` computes the attention
+                of `attn_chunk_size` queries at a time. `sdpa` and `chunked` fall back to `eager`
+                when `head_mask` or `output_attentions` are used, and `sdpa` also falls back to
+                `eager` with PyTorch < 2.0.
+            attn_chunk_size: Number of queries of each chunk when `attn_impl` is `chunked`.
+
+        """
+
         super().__init__()
 
+        if attn_impl not in self.ATTN_IMPLS:
+            raise ValueError(f"`attn_impl` should be one of {self.ATTN_IMPLS}, but got `{attn_impl}`.")
+
         self.n_head = n_head
         self.d_model = d_model
         self.d_head = d_head
@@ -44,6 +79,8 @@ class RelPartialLearnableMultiHeadAttn(nn.Module):
         self.primer_conv = primer_conv
         self.pre_lnorm = pre_lnorm
         self.scale = 1 / (d_head**0.5)
+        self.attn_impl = attn_impl
+        self.attn_chunk_size = attn_chunk_size
 
         self.qkv = nn.Linear(d_model, 3 * n_head * d_head, bias=False)
         self.o = nn.Linear(n_head * d_head, d_model, bias=False)
@@ -77,6 +114,111 @@ class RelPartialLearnableMultiHeadAttn(nn.Module):
 
         return output
 
+    def _shifted_position_scores(
+        self, head_r_rq: torch.FloatTensor, head_rk: torch.FloatTensor, start: int, end: int
+    ) -> torch.FloatTensor:
+        # Equivalent to `_relational_shift` of the position scores, restricted to the queries
+        # in [start, end). Shifted rows are read from the zero-padded and flattened scores,
+        # which only requires one extra row of scores after the chunk
+        q_length, r_length = head_r_rq.size(0), head_rk.size(0)
+        stop = min(end + 1, q_length)
+
+        # (stop - start, r_length + 1, batch_size, n_head)
+        BD = torch.einsum("ibnd,jnd->ijbn", (head_r_rq[start:stop], head_rk))
+        BD = F.pad(BD, (0, 0, 0, 0, 1, 0))
+
+        i = torch.arange(start, end, device=BD.device)[:, None]
+        j = torch.arange(r_length, device=BD.device)[None, :]
+        index = q_length + i * r_length + j - start * (r_length + 1)
+
+        # (end - start, r_length, batch_size, n_head)
+        return BD.flatten(0, 1)[index]
+
+    def _mask_fill_value(self) -> float:
+        # Standard filling for 32-bit float precision
+        fill = -1e30
+
+        # If using 16-bit float precision, `fill` should be smaller
+        if next(self.parameters()).dtype == torch.float16:
+            fill = -65000
+
+        return fill
+
+    def _sdpa_attention(
+        self,
+        head_wq: torch.FloatTensor,
+        head_wk: torch.FloatTensor,
+        head_wv: torch.FloatTensor,
+        head_rk: torch.FloatTensor,
+        attn_mask: Optional[torch.BoolTensor],
+    ) -> torch.FloatTensor:
+        q_length = head_wq.size(0)
+
+        # Relative position scores are added to the content scores as an attention bias
+        # (batch_size, n_head, q_length, k_length)
+        attn_bias = self._shifted_position_scores(head_wq + self.r_r_bias, head_rk, 0, q_length)
+        attn_bias = attn_bias.permute(2, 3, 0, 1).mul_(self.scale)
+
+        if attn_mask is not None:
+            # (batch_size, 1, q_length, k_length)
+            attn_mask = attn_mask[None, None] if attn_mask.dim() == 2 else attn_mask.permute(2, 0, 1)[:, None]
+            attn_bias = attn_bias.masked_fill(attn_mask, self._mask_fill_value())
+
+        head_r_wq = head_wq + self.r_w_bias
+        sdpa_kwargs = {"scale": self.scale}
+
+        if not SDPA_SUPPORTS_SCALE:
+            # Queries are rescaled since the default scale is `1 / sqrt(d_head)`
+            head_r_wq = head_r_wq * (self.scale * self.d_head**0.5)
+            sdpa_kwargs = {}
+
+        # (batch_size, n_head, q_length, d_head)
+        attn_vec = F.scaled_dot_product_attention(
+            head_r_wq.permute(1, 2, 0, 3),
+            head_wk.permute(1, 2, 0, 3),
+            head_wv.permute(1, 2, 0, 3),
+            attn_mask=attn_bias,
+            dropout_p=self.dropatt.p if self.training else 0.0,
+            **sdpa_kwargs,
+        )
+
+        # (q_length, batch_size, n_head, d_head)
+        return attn_vec.permute(2, 0, 1, 3)
+
+    def _chunked_attention(
+        self,
+        head_wq: torch.FloatTensor,
+        head_wk: torch.FloatTensor,
+        head_wv: torch.FloatTensor,
+        head_rk: torch.FloatTensor,
+        attn_mask: Optional[torch.BoolTensor],
+    ) -> torch.FloatTensor:
+        q_length = head_wq.size(0)
+
+        head_r_wq = head_wq + self.r_w_bias
+        head_r_rq = head_wq + self.r_r_bias
+
+        attn_vecs = []
+        for start in range(0, q_length, self.attn_chunk_size):
+            end = min(start + self.attn_chunk_size, q_length)
+
+            # (chunk_size, k_length, batch_size, n_head)
+            AC = torch.einsum("ibnd,jbnd->ijbn", (head_r_wq[start:end], head_wk))
+            BD = self._shifted_position_scores(head_r_rq, head_rk, start, end)
+
+            attn_score = AC.add_(BD).mul_(self.scale)
+
+            if attn_mask is not None:
+                # (chunk_size, k_length, batch_size, 1)
+                chunk_mask = attn_mask[start:end, :, None] if attn_mask.dim() == 2 else attn_mask[start:end]
+                attn_score = attn_score.masked_fill_(chunk_mask[..., None], self._mask_fill_value())
+
+            attn_prob = self.dropatt(F.softmax(attn_score, dim=1))
+            attn_vecs.append(torch.einsum("ijbn,jbnd->ibnd", (attn_prob, head_wv)))
+
+        # (q_length, batch_size, n_head, d_head)
+        return torch.cat(attn_vecs, dim=0)
+
     def forward(
         self,
         w: torch.FloatTensor,
@@ -140,47 +282,51 @@ class RelPartialLearnableMultiHeadAttn(nn.Module):
         else:
             present = None
 
-        # Attention score
-        # (q_length, batch_size, n_head, d_head)
-        head_r_wq = head_wq + self.r_w_bias
-        head_r_rq = head_wq + self.r_r_bias
+        # Switches to a boolean mask (`MemTransformerModel` already supplies it as boolean)
+        if attn_mask is not None and attn_mask.dtype != torch.bool:
+            attn_mask = attn_mask == 1
 
-        # (q_length, k_length, batch_size, n_head)
-        AC = torch.einsum("ibnd,jbnd->ijbn", (head_r_wq, head_wk))
-        BD = torch.einsum("ibnd,jnd->ijbn", (head_r_rq, head_rk))
-        BD = self._relational_shift(BD)
+        use_eager = self.attn_impl == "eager" or head_mask is not None or output_attentions
 
-        # (q_length, k_length, batch_size, h_head)
-        attn_score = AC + BD
-        attn_score.mul_(self.scale)
+        if self.attn_impl == "sdpa" and SDPA_AVAILABLE and not use_eager:
+            attn_vec = self._sdpa_attention(head_wq, head_wk, head_wv, head_rk, attn_mask)
+        elif self.attn_impl == "chunked" and not use_eager:
+            attn_vec = self._chunked_attention(head_wq, head_wk, head_wv, head_rk, attn_mask)
+        else:
+            # Attention score
+            # (q_length, batch_size, n_head, d_head)
+            head_r_wq = head_wq + self.r_w_bias
+            head_r_rq = head_wq + self.r_r_bias
 
-        # Attention probability
-        if attn_mask is not None and torch.sum(attn_mask).item():
-            # Switches to a boolean mask
-            attn_mask = attn_mask == 1
+            # (q_length, k_length, batch_size, n_head)
+            AC = torch.einsum("ibnd,jbnd->ijbn", (head_r_wq, head_wk))
+            BD = torch.einsum("ibnd,jnd->ijbn", (head_r_rq, head_rk))
+            BD = self._relational_shift(BD)
 
-            # Standard filling for 32-bit float precision
-            fill = -1e30
+            # (q_length, k_length, batch_size, h_head)
+            attn_score = AC + BD
+            attn_score.mul_(self.scale)
 
-            # If using 16-bit float precision, `fill` should be smaller
-            if next(self.parameters()).dtype == torch.float16:
-                fill = -65000
+            # Attention probability
+            if attn_mask is not None:
+                # Masking with an empty mask is a no-op, so the mask is not checked on the host
+                fill = self._mask_fill_value()
 
-            if attn_mask.dim() == 2:
-                attn_score = attn_score.float().masked_fill(attn_mask[None, :, :, None], fill).type_as(attn_score)
-            elif attn_mask.dim() == 3:
-                attn_score = attn_score.float().masked_fill(attn_mask[:, :, :, None], fill).type_as(attn_score)
+                if attn_mask.dim() == 2:
+                    attn_score = attn_score.float().masked_fill(attn_mask[None, :, :, None], fill).type_as(attn_score)
+                elif attn_mask.dim() == 3:
+                    attn_score = attn_score.float().masked_fill(attn_mask[:, :, :, None], fill).type_as(attn_score)
 
-        # (q_length, k_length, batch_size, n_head)
-        attn_prob = F.softmax(attn_score, dim=1)
-        attn_prob = self.dropatt(attn_prob)
+            # (q_length, k_length, batch_size, n_head)
+            attn_prob = F.softmax(attn_score, dim=1)
+            attn_prob = self.dropatt(attn_prob)
 
-        # Whether heads should be masked or not
-        if head_mask is not None:
-            attn_prob = attn_prob * head_mask
+            # Whether heads should be masked or not
+            if head_mask is not None:
+                attn_prob = attn_prob * head_mask
 
-        # Attention vector
-        attn_vec = torch.einsum("ijbn,jbnd->ibnd", (attn_prob, head_wv))
+            # Attention vector
+            attn_vec = torch.einsum("ijbn,jbnd->ibnd", (attn_prob, head_wv))
 
         # (q_length, batch_size, n_head, d_head)
         attn_vec = attn_vec.contiguous().view(attn_vec.size(0), attn_vec.size(1), self.n_head * self.d_head)
@@ -219,6 +365,8 @@ class RelPartialLearnableDecoderLayer(nn.Module):
         layer_norm_epsilon: Optional[float] = 1e-5,
         r_w_bias: Optional[torch.FloatTensor] = None,
         r_r_bias: Optional[torch.FloatTensor] = None,
+        attn_impl: Optional[str] = "eager",
+        attn_chunk_size: Optional[int] = 128,
     ) -> None:
         super().__init__()
 
@@ -233,6 +381,8 @@ class RelPartialLearnableDecoderLayer(nn.Module):
             layer_norm_epsilon=layer_norm_epsilon,
             r_w_bias=r_w_bias,
             r_r_bias=r_r_bias,
+            attn_impl=attn_impl,
+            attn_chunk_size=attn_chunk_size,
         )
 
         if primer_square:
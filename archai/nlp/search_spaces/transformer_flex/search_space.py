@@ -5,12 +5,14 @@
 
 import json
 from copy import deepcopy
+from functools import partial
 from hashlib import sha1
 from random import Random
 from typing import Any, Dict, List, Optional
 
 import torch
 from overrides import overrides
+from transformers.configuration_utils import PretrainedConfig
 from transformers.models.auto.configuration_auto import AutoConfig
 from transformers.models.auto.modeling_auto import AutoModelForCausalLM
 
@@ -50,6 +52,9 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
     such as the number of layers, embedding dimensions, and number of attention heads.
     It also supports different Transformer variants, such as CodeGen, GPT-2, and Transformer-XL.
 
+    Sampled, mutated and crossovered architectures are lazily materialized, i.e., the model
+    is only instantiated on the first access to `ArchaiModel.arch`.
+
     """
 
     _DEFAULT_MODELS = {
@@ -144,6 +149,22 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         self.max_sequence_length = max_sequence_length
         self.att_dropout_rate = att_dropout_rate
 
+    def _load_config(self, model_config: Dict[str, Any]) -> PretrainedConfig:
+        """Loads a model configuration (without instantiating the model) from a configuration dictionary.
+
+        Args:
+            model_config: Configuration dictionary.
+
+        Returns:
+            A `PretrainedConfig` object.
+
+        """
+
+        param_map = self._DEFAULT_MODELS[self.arch_type]
+        mapped_config = {param_map.get(p_name, p_name): p_value for p_name, p_value in model_config.items()}
+
+        return AutoConfig.for_model(self.arch_type, **mapped_config)
+
     def _load_model_from_config(self, model_config: Dict[str, Any]) -> torch.nn.Module:
         """Loads a model from a configuration dictionary.
 
@@ -155,11 +176,25 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
 
         """
 
-        param_map = self._DEFAULT_MODELS[self.arch_type]
-        mapped_config = {param_map.get(p_name, p_name): p_value for p_name, p_value in model_config.items()}
+        return AutoModelForCausalLM.from_config(self._load_config(model_config))
 
-        config = AutoConfig.for_model(self.arch_type, **mapped_config)
-        return AutoModelForCausalLM.from_config(config)
+    def _get_archai_model(self, model_config: Dict[str, Any]) -> ArchaiModel:
+        """Creates an `ArchaiModel` that instantiates the model only when it is accessed.
+
+        Args:
+            model_config: Configuration dictionary.
+
+        Returns:
+            A lazily-materialized `ArchaiModel` object.
+
+        """
+
+        return ArchaiModel(
+            arch=None,
+            archid=self.get_archid(model_config),
+            metadata={"config": model_config},
+            arch_fn=partial(self._load_model_from_config, deepcopy(model_config)),
+        )
 
     def get_archid(self, config: Dict[str, Any]) -> str:
         """Returns a unique identifier for a given configuration.
@@ -182,9 +217,55 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
         arch_str = json.dumps(pruned_config, sort_keys=True, ensure_ascii=True)
         return f'{self.arch_type}_{sha1(arch_str.encode("ascii")).hexdigest()}'
 
+    def _get_bound_config(self, largest: bool) -> Dict[str, Any]:
+        bound = max if largest else min
+
+        config = {
+            "vocab_size": self.vocab_size,
+            "dropatt": self.att_dropout_rate,
+            "max_sequence_length": self.max_sequence_length,
+            "n_layer": self.max_layers if largest else self.min_layers,
+        }
+
+        for param, param_opts in self.options.items():
+            value = bound(param_opts["values"])
+            config[param] = value if param_opts["share"] else [value] * self.max_layers
+
+        # Number of heads does not change the size of the model, but should divide `d_model`
+        n_head_options = [n_head for n_head in self.options["n_head"]["values"] if config["d_model"] % n_head == 0]
+        if not n_head_options:
+            raise ValueError(f"No `n_head` option divides `d_model` ({config['d_model']}).")
+        config["n_head"] = bound(n_head_options)
+
+        return config
+
+    def get_largest_config(self) -> Dict[str, Any]:
+        """Returns the configuration of the largest architecture of the search space.
+
+        Every architecture of the search space has at most as many layers, model and
+        intermediate dimensions as the largest architecture, which can be used as a weight-sharing
+        super-network (see `GPT2FlexSuperNetLMHeadModel`).
+
+        Returns:
+            Configuration dictionary.
+
+        """
+
+        return self._get_bound_config(largest=True)
+
+    def get_smallest_config(self) -> Dict[str, Any]:
+        """Returns the configuration of the smallest architecture of the search space.
+
+        Returns:
+            Configuration dictionary.
+
+        """
+
+        return self._get_bound_config(largest=False)
+
     @overrides
     def random_sample(self) -> ArchaiModel:
-        model = None
+        is_valid_config = False
 
         # Fixed params
         config = {
@@ -193,7 +274,7 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             "max_sequence_length": self.max_sequence_length,
         }
 
-        while model is None:
+        while not is_valid_config:
             config["n_layer"] = self.rng.randint(self.min_layers, self.max_layers)
 
             for param, param_opts in self.options.items():
@@ -202,10 +283,9 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                 else:
                     config[param] = [self.rng.choice(param_opts["values"]) for _ in range(self.max_layers)]
 
-            if config["d_model"] % config["n_head"] == 0:
-                model = self._load_model_from_config(config)
+            is_valid_config = config["d_model"] % config["n_head"] == 0
 
-        return ArchaiModel(arch=model, archid=self.get_archid(config), metadata={"config": config})
+        return self._get_archai_model(config)
 
     @overrides
     def save_arch(self, model: ArchaiModel, path: str) -> None:
@@ -225,11 +305,7 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
             f"Arch type value ({arch_type}) is different from the search space" f"arch type ({self.arch_type})."
         )
 
-        return ArchaiModel(
-            arch=self._load_model_from_config(arch_config),
-            archid=self.get_archid(arch_config),
-            metadata={"config": arch_config},
-        )
+        return self._get_archai_model(arch_config)
 
     @overrides
     def save_model_weights(self, model: ArchaiModel, path: str) -> None:
@@ -256,9 +332,7 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                     for c in config[param]
                 ]
 
-        return ArchaiModel(
-            arch=self._load_model_from_config(config), archid=self.get_archid(config), metadata={"config": config}
-        )
+        return self._get_archai_model(config)
 
     @overrides
     def crossover(self, arch_list: List[ArchaiModel]) -> ArchaiModel:
@@ -276,7 +350,7 @@ class TransformerFlexSearchSpace(EvolutionarySearchSpace, BayesOptSearchSpace):
                 for layer in range(self.max_layers):
                     c0[param][layer] = self.rng.choice([c0[param][layer], c1[param][layer]])
 
-        return ArchaiModel(arch=self._load_model_from_config(c0), archid=self.get_archid(c0), metadata={"config": c0})
+        return self._get_archai_model(c0)
 
     @overrides
     def encode(self, model: ArchaiModel) -> List[float]:
@@ -4,11 +4,17 @@
 """Customizable callbacks with huggingface/transformers."""
 
 import math
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
+import torch
 from transformers.trainer_callback import TrainerCallback, TrainerControl, TrainerState
 from transformers.training_args import TrainingArguments
 
+if TYPE_CHECKING:
+    from archai.nlp.search_spaces.transformer_flex.search_space import (
+        TransformerFlexSearchSpace,
+    )
+
 
 class BPCTrainerCallback(TrainerCallback):
     """A `TrainerCallback` that adds bits per character metrics to the logs."""
@@ -142,3 +148,79 @@ class PerplexityTrainerCallback(TrainerCallback):
                 metrics["test_ppl"] = math.exp(metrics["test_loss"])
             except OverflowError:
                 metrics["test_ppl"] = math.inf
+
+
+class SuperNetSamplingCallback(TrainerCallback):
+    """A `TrainerCallback` that trains a different sub-network of a super-network at every step.
+
+    The model should be a `GPT2FlexSuperNetLMHeadModel` built from the largest architecture of the
+    search space. Sub-networks are deactivated at the end of every step, so evaluation and saving use
+    the whole super-network.
+
+    """
+
+    def __init__(self, search_space: "TransformerFlexSearchSpace", cyclic: Optional[bool] = True) -> None:
+        """Initialize the `SuperNetSamplingCallback`.
+
+        Args:
+            search_space: Search space of the sub-networks.
+            cyclic: Whether to cycle between the largest, the smallest and a random sub-network
+                (one per step), instead of only sampling random sub-networks. Unlike the sandwich
+                rule, the gradients of the three sub-networks are not accumulated in a single step.
+
+        """
+
+        super().__init__()
+
+        self.search_space = search_space
+        self.cyclic = cyclic
+
+    def _sample_config(self, step: int) -> Optional[Dict]:
+        if self.cyclic and step % 3 == 0:
+            return None
+
+        if self.cyclic and step % 3 == 1:
+            return self.search_space.get_smallest_config()
+
+        return self.search_space.random_sample().metadata["config"]
+
+    def on_step_begin(
+        self,
+        args: TrainingArguments,
+        state: TrainerState,
+        control: TrainerControl,
+        model: Optional[torch.nn.Module] = None,
+        **kwargs
+    ) -> None:
+        """Activate the sub-network of the current step.
+
+        Args:
+            args: The training arguments.
+            state: The trainer state.
+            control: The trainer control.
+            model: The super-network.
+
+        """
+
+        config = self._sample_config(state.global_step)
+        model.set_sub_config(self.search_space._load_config(config) if config is not None else None)
+
+    def on_step_end(
+        self,
+        args: TrainingArguments,
+        state: TrainerState,
+        control: TrainerControl,
+        model: Optional[torch.nn.Module] = None,
+        **kwargs
+    ) -> None:
+        """Activate the whole super-network.
+
+        Args:
+            args: The training arguments.
+            state: The trainer state.
+            control: The trainer control.
+            model: The super-network.
+
+        """
+
+        model.set_sub_config(None)
@@ -10,6 +10,7 @@ import os
 import shutil
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Iterator, Optional, Tuple
 
 import torch
@@ -22,7 +23,7 @@ from archai.nlp import logging_utils
 from archai.nlp.datasets.nvidia import distributed_utils
 from archai.nlp.datasets.nvidia.corpus import load_corpus
 from archai.nlp.quantization.mixed_qat import MixedQAT
-from archai.nlp.quantization.qat import prepare_with_qat, qat_to_float_modules
+from archai.nlp.quantization.qat import prepare_with_qat, qat_to_float_state_dict
 from archai.nlp.trainers.nvidia.cyclic_cosine_scheduler import CyclicCosineDecayLR
 from archai.nlp.trainers.nvidia.optimizers import JITLamb, Lamb
 from archai.nlp.trainers.nvidia.training_args import NvidiaTrainingArguments
@@ -30,6 +31,98 @@ from archai.nlp.trainers.nvidia.training_args import NvidiaTrainingArguments
 logger = logging_utils.get_logger(__name__)
 
 
+def _to_host(obj: Any) -> Any:
+    """Recursively copy the tensors of an object (e.g., a state dictionary) to host memory.
+
+    Device tensors are copied asynchronously to pinned memory, thus the copies are only
+    guaranteed to be finished after the current CUDA stream is synchronized.
+
+    Args:
+        obj: Object to be copied.
+
+    Returns:
+        Copy of the object with tensors in host memory.
+
+    """
+
+    if isinstance(obj, torch.Tensor):
+        if obj.is_cuda:
+            host_tensor = torch.empty(obj.size(), dtype=obj.dtype, device="cpu", pin_memory=True)
+            return host_tensor.copy_(obj.detach(), non_blocking=True)
+        return obj.detach().clone()
+
+    if isinstance(obj, dict):
+        return obj.__class__((key, _to_host(value)) for key, value in obj.items())
+
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, "_fields"):
+        return obj.__class__(_to_host(value) for value in obj)
+
+    return copy.deepcopy(obj)
+
+
+def _link_or_copy(src_path: str, dst_path: str) -> None:
+    """Hard-link a file, or copy it if the file system does not support hard links.
+
+    Args:
+        src_path: Path to the source file.
+        dst_path: Path to the destination file.
+
+    """
+
+    tmp_path = dst_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    try:
+        os.link(src_path, tmp_path)
+    except OSError:
+        shutil.copy(src_path, tmp_path)
+
+    os.replace(tmp_path, dst_path)
+
+
+def _write_checkpoint(
+    state: Dict[str, Any],
+    output_dir: str,
+    step: int,
+    prefix: Optional[str] = "",
+    save_all_checkpoints: Optional[bool] = False,
+    is_best_model: Optional[bool] = False,
+) -> None:
+    """Write a checkpoint's state to the output folder.
+
+    The state is written to a temporary file that atomically replaces the last checkpoint, which
+    is then hard-linked (instead of re-written) as the best and/or step-based checkpoints.
+
+    Args:
+        state: Checkpoint's state.
+        output_dir: Folder where checkpoint should be saved.
+        step: Current step.
+        prefix: Prefix which should be added to the checkpoint's file name.
+        save_all_checkpoints: Whether all `eval_steps` steps should be saved.
+        is_best_model: Whether best model should be saved.
+
+    """
+
+    checkpoint_path = os.path.join(output_dir, prefix + "checkpoint-last.pt")
+
+    logger.info(f"Saving checkpoint: {checkpoint_path}")
+    torch.save(state, checkpoint_path + ".tmp")
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+    if is_best_model:
+        checkpoint_step_path = os.path.join(output_dir, prefix + "checkpoint-best.pt")
+
+        logger.info(f"Saving checkpoint: {checkpoint_step_path}")
+        _link_or_copy(checkpoint_path, checkpoint_step_path)
+
+    if save_all_checkpoints:
+        checkpoint_step_path = os.path.join(output_dir, prefix + f"checkpoint-{step}.pt")
+
+        logger.info(f"Saving checkpoint: {checkpoint_step_path}")
+        _link_or_copy(checkpoint_path, checkpoint_step_path)
+
+
 def save_checkpoint(
     output_dir: str,
     model: torch.nn.Module,
@@ -77,28 +170,119 @@ def save_checkpoint(
         "trainer_state": trainer_state,
     }
 
-    checkpoint_name = prefix + "checkpoint-last.pt"
-
     with distributed_utils.sync_workers() as rank:
-        checkpoint_path = os.path.join(output_dir, checkpoint_name)
-
         if rank == 0:
-            logger.info(f"Saving checkpoint: {checkpoint_path}")
-            torch.save(state, checkpoint_path)
+            _write_checkpoint(
+                state,
+                output_dir,
+                trainer_state["step"],
+                prefix=prefix,
+                save_all_checkpoints=save_all_checkpoints,
+                is_best_model=is_best_model,
+            )
+
+
+class AsyncCheckpointWriter:
+    """Save checkpoints in a background thread.
+
+    The checkpoint's state is snapshotted to (pinned) host memory, without copying the model,
+    and written by a background thread while the training continues. At most one checkpoint is
+    written at a time, i.e., saving a new checkpoint waits for the previous one to be written.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize the background thread."""
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint_writer")
+        self._future = None
+
+    def save(
+        self,
+        output_dir: str,
+        model: torch.nn.Module,
+        optimizer: torch.optim.Optimizer,
+        scheduler: torch.optim.lr_scheduler._LRScheduler,
+        scaler: torch.cuda.amp.GradScaler,
+        trainer_state: Dict[str, Any],
+        fp16: bool,
+        prefix: Optional[str] = "",
+        save_all_checkpoints: Optional[bool] = False,
+        is_best_model: Optional[bool] = False,
+        qat: Optional[bool] = False,
+    ) -> None:
+        """Snapshot the checkpoint's state and schedule it to be written.
 
-            if is_best_model:
-                checkpoint_step_name = prefix + "checkpoint-best.pt"
-                checkpoint_step_path = os.path.join(output_dir, checkpoint_step_name)
+        Only the main process (rank 0) saves the checkpoint.
 
-                logger.info(f"Saving checkpoint: {checkpoint_step_path}")
-                shutil.copy(checkpoint_path, checkpoint_step_path)
+        Args:
+            output_dir: Folder where checkpoint should be saved.
+            model: Instance of model.
+            optimizer: Instance of optimizer.
+            scheduler: Instance of scheduler.
+            scaler: Instance of scaler.
+            trainer_state: Current trainer state.
+            fp16: Whether fp16 precision is used or not.
+            prefix: Prefix which should be added to the checkpoint's file name.
+            save_all_checkpoints: Whether all `eval_steps` steps should be saved.
+            is_best_model: Whether best model should be saved.
+            qat: Whether QAT-ready modules should be converted to float-based modules
+                (on the snapshot) before writing the checkpoint.
 
-            if save_all_checkpoints:
-                checkpoint_step_name = prefix + f"checkpoint-{trainer_state['step']}.pt"
-                checkpoint_step_path = os.path.join(output_dir, checkpoint_step_name)
+        """
 
-                logger.info(f"Saving checkpoint: {checkpoint_step_path}")
-                shutil.copy(checkpoint_path, checkpoint_step_path)
+        if distributed_utils.get_rank() != 0:
+            return
+
+        self.wait()
+
+        state = _to_host(
+            {
+                "model_config": model.config,
+                "model_state": model.state_dict(),
+                "optimizer_state": optimizer.state_dict(),
+                "scheduler_state": scheduler.state_dict() if scheduler else None,
+                "scaler_state": scaler.state_dict() if fp16 else None,
+                "trainer_state": trainer_state,
+            }
+        )
+
+        # Marks when the asynchronous copies to host memory are finished
+        copy_event = None
+        if torch.cuda.is_available() and torch.cuda.is_initialized():
+            copy_event = torch.cuda.Event()
+            copy_event.record()
+
+        def _write() -> None:
+            if copy_event is not None:
+                copy_event.synchronize()
+
+            if qat:
+                qat_to_float_state_dict(model, state["model_state"])
+
+            _write_checkpoint(
+                state,
+                output_dir,
+                trainer_state["step"],
+                prefix=prefix,
+                save_all_checkpoints=save_all_checkpoints,
+                is_best_model=is_best_model,
+            )
+
+        self._future = self._executor.submit(_write)
+
+    def wait(self) -> None:
+        """Wait for the checkpoint being written (if any) and re-raise its errors."""
+
+        if self._future is not None:
+            future, self._future = self._future, None
+            future.result()
+
+    def close(self) -> None:
+        """Wait for the pending checkpoint and stop the background thread."""
+
+        self.wait()
+        self._executor.shutdown()
 
 
 class NvidiaTrainer:
@@ -133,6 +317,7 @@ class NvidiaTrainer:
             self.args.vocab,
             vocab_size=self.args.vocab_size,
             refresh_cache=self.args.dataset_refresh_cache,
+            memory_map=self.args.dataset_memory_map,
         )
 
         self.model.to(self.args.device)
@@ -145,6 +330,9 @@ class NvidiaTrainer:
             "best_eval_loss": 1e300,
             "log_history": [],
         }
+        self.n_train_tokens = 0
+
+        self.checkpoint_writer = AsyncCheckpointWriter()
 
     def load_checkpoint(self, checkpoint_file_path: str) -> Tuple[int, int, int, int]:
         """Load states from a checkpoint file.
@@ -296,9 +484,28 @@ class NvidiaTrainer:
         elif self.args.strategy == "dp":
             self.dist_model = nn.DataParallel(self.model, dim=1)
 
+    def setup_torch_compile(self) -> None:
+        """Setup whether the (distributed) model should be compiled with `torch.compile`.
+
+        Batches from `LMOrderedIterator` have a fixed shape (except for the last one of each epoch,
+        which triggers a single re-compilation), so `reduce-overhead` mode is able to replay
+        the training step with CUDA graphs.
+
+        """
+
+        if not self.args.torch_compile:
+            return
+
+        if version.parse(torch.__version__) < version.parse("2.0"):
+            logger.warning("`torch_compile` requires PyTorch >= 2.0 and will be ignored.")
+            return
+
+        logger.info(f"Compiling model with mode: {self.args.torch_compile_mode or 'default'}")
+        self.dist_model = torch.compile(self.dist_model, mode=self.args.torch_compile_mode, dynamic=False)
+
     def training_step_chunk(
         self, input_ids: torch.LongTensor, labels: torch.LongTensor, autocast: torch.autocast
-    ) -> float:
+    ) -> torch.Tensor:
         """Perform the training step of a single chunk.
 
         Args:
@@ -308,7 +515,7 @@ class NvidiaTrainer:
                 fp16 or bf16 precision.
 
         Returns:
-            Training loss chunk.
+            Training loss chunk (detached and kept on device to avoid synchronizing with the host).
 
         """
 
@@ -321,7 +528,7 @@ class NvidiaTrainer:
         else:
             loss.backward()
 
-        return loss.float().item()
+        return loss.detach().float()
 
     def training_step(
         self,
@@ -346,7 +553,9 @@ class NvidiaTrainer:
 
         self.model.train()
 
-        train_loss, log_step, n_labels_tokens = 0.0, 0, 0
+        # Loss is accumulated on device and only synchronized with the host when logging
+        train_loss = torch.zeros((), device=self.args.device)
+        log_step, n_labels_tokens = 0, 0
         best_eval_loss = self.trainer_state["best_eval_loss"]
 
         start_time = time.time()
@@ -366,6 +575,7 @@ class NvidiaTrainer:
         for batch, (input_ids, labels, _, _) in enumerate(train_iterator, start=start_batch + 1):
             log_step += 1
             n_labels_tokens += labels.numel()
+            self.n_train_tokens += labels.numel()
 
             for param in self.model.parameters():
                 param.grad = None
@@ -416,8 +626,8 @@ class NvidiaTrainer:
 
                 lr = self.optimizer.param_groups[0]["lr"]
 
-                loss = train_loss / log_step
-                loss = distributed_utils.all_reduce(loss, op="mean")
+                loss = distributed_utils.all_reduce(train_loss / log_step, op="mean")
+                loss = loss.item() if isinstance(loss, torch.Tensor) else loss
 
                 batch_time = elapsed_time / log_step
                 batch_time = distributed_utils.all_reduce(batch_time, op="max")
@@ -425,7 +635,8 @@ class NvidiaTrainer:
                 throughput = n_labels_tokens / elapsed_time
                 throughput = distributed_utils.all_reduce(throughput, op="sum")
 
-                train_loss, log_step, n_labels_tokens = 0.0, 0, 0
+                train_loss.zero_()
+                log_step, n_labels_tokens = 0, 0
 
                 self.trainer_state["log_history"].append(
                     {
@@ -472,7 +683,7 @@ class NvidiaTrainer:
                 )
 
                 iterator = train_dataloader.last_iter
-                save_model = copy.deepcopy(self.model)
+                save_model = self.model
                 prefix = ""
 
                 self.trainer_state["iterator"] = iterator
@@ -480,14 +691,13 @@ class NvidiaTrainer:
                 self.trainer_state["batch"] = batch
                 self.trainer_state["step"] = step
 
-                # Model needs to be converted back to FP32 when using QAT
+                # Model needs to be converted back to FP32 when using QAT (done on the saved state)
                 if self.args.qat:
-                    qat_to_float_modules(save_model)
                     prefix = "qat-"
 
                 # Save original FP32 model when using MixedQAT
                 if self.args.mixed_qat:
-                    save_model = save_model.model
+                    save_model = self.model.model
                     prefix = "mixed-qat-"
 
                 # Check if current model is the best one
@@ -496,7 +706,7 @@ class NvidiaTrainer:
                     best_eval_loss = eval_loss
                     self.trainer_state["best_eval_loss"] = best_eval_loss
 
-                save_checkpoint(
+                self.checkpoint_writer.save(
                     self.args.output_dir,
                     save_model,
                     self.optimizer,
@@ -507,7 +717,10 @@ class NvidiaTrainer:
                     prefix=prefix,
                     save_all_checkpoints=self.args.save_all_checkpoints,
                     is_best_model=is_best_model,
+                    qat=self.args.qat,
                 )
+                if not self.args.async_checkpoint:
+                    self.checkpoint_writer.wait()
 
             if is_final_step:
                 break
@@ -540,6 +753,7 @@ class NvidiaTrainer:
 
         self.setup_qat()
         self.setup_distributed_training()
+        self.setup_torch_compile()
 
         train_dataloader = self.get_dataloader("train")
         eval_dataloader = self.get_dataloader("valid")
@@ -547,6 +761,8 @@ class NvidiaTrainer:
         logger.info("Starting training ...")
         logger.debug(f"Training arguments: {self.args.to_dict()}")
 
+        self.n_train_tokens = 0
+
         start_time = time.time()
         try:
             for epoch in itertools.count(start=start_epoch):
@@ -563,10 +779,16 @@ class NvidiaTrainer:
 
         except KeyboardInterrupt:
             logger.info("Exiting from training ...")
+        finally:
+            self.checkpoint_writer.wait()
         end_time = time.time()
 
         train_time = end_time - start_time
-        logger.info(f"Training time: {train_time:.3f} seconds")
+        throughput = distributed_utils.all_reduce(self.n_train_tokens / train_time, op="sum")
+        logger.info(
+            f"Training time: {train_time:.3f} seconds | tok/s: {throughput:.0f} | "
+            f"torch.compile: {(self.args.torch_compile_mode or 'default') if self.args.torch_compile else 'disabled'}"
+        )
 
     def evaluation_step(self, eval_dataloader: Iterator) -> Tuple[float, float]:
         """Perform the evaluation over the supplied data loader.
@@ -581,16 +803,16 @@ class NvidiaTrainer:
 
         self.model.eval()
 
-        eval_loss, n_tokens = 0.0, 0
+        eval_loss, n_tokens = torch.zeros((), device=self.args.device), 0
         start_time = time.time()
         with torch.no_grad():
             for _, (input_ids, _, _, warm) in enumerate(eval_dataloader):
                 loss = self.model(input_ids, labels=input_ids)[0]
                 tokens = input_ids.numel()
                 if warm:
-                    eval_loss += tokens * loss.float().mean().item()
+                    eval_loss += tokens * loss.float().mean()
                     n_tokens += tokens
-            eval_loss /= n_tokens
+            eval_loss = eval_loss.item() / n_tokens
         end_time = time.time()
 
         self.model.train()
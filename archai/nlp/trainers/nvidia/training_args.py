@@ -5,7 +5,7 @@
 
 import os
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import numpy as np
 import torch
@@ -27,10 +27,12 @@ class NvidiaTrainingArguments:
         do_eval: Whether to enable evaluation.
         eval_steps: Number of steps between evaluations.
         save_all_checkpoints: Whether to save all checkpoints from `eval_steps` steps.
+        async_checkpoint: Whether checkpoints should be written in background while training continues.
         dataset: Name of the dataset.
         dataset_dir: Dataset folder.
         dataset_cache_dir: Dataset cache folder.
         dataset_refresh_cache: Whether cache should be refreshed.
+        dataset_memory_map: Whether cached dataset splits should be memory-mapped.
         vocab: Name of the tokenizer.
         vocab_size: Size of the vocabulary.
         iterator_roll: Whether iterator should be rolled.
@@ -57,6 +59,9 @@ class NvidiaTrainingArguments:
         lr_scheduler_decay_rate: Scheduler decay rate.
         qat: Whether QAT should be used during training.
         mixed_qat: Whether MixedQAT should be used during training.
+        torch_compile: Whether the model should be compiled with `torch.compile` (requires PyTorch >= 2.0).
+        torch_compile_mode: Compilation mode, e.g., `reduce-overhead` to capture CUDA graphs of
+            the fixed-shape batches.
 
     """
 
@@ -80,6 +85,10 @@ class NvidiaTrainingArguments:
         default=False, metadata={"help": "Whether to save all checkpoints from `eval_steps` steps."}
     )
 
+    async_checkpoint: bool = field(
+        default=True, metadata={"help": "Whether checkpoints should be written in background."}
+    )
+
     dataset: str = field(default="wt103", metadata={"help": "Name of the dataset."})
 
     dataset_dir: str = field(default="", metadata={"help": "Dataset folder."})
@@ -88,6 +97,10 @@ class NvidiaTrainingArguments:
 
     dataset_refresh_cache: bool = field(default=False, metadata={"help": "Whether cache should be refreshed."})
 
+    dataset_memory_map: bool = field(
+        default=True, metadata={"help": "Whether cached dataset splits should be memory-mapped."}
+    )
+
     vocab: str = field(default="gpt2", metadata={"help": "Name of the tokenizer."})
 
     vocab_size: int = field(default=10000, metadata={"help": "Size of the vocabulary"})
@@ -140,6 +153,12 @@ class NvidiaTrainingArguments:
 
     mixed_qat: bool = field(default=False, metadata={"help": "Whether MixedQAT should be used during training."})
 
+    torch_compile: bool = field(default=False, metadata={"help": "Whether the model should be compiled."})
+
+    torch_compile_mode: Optional[str] = field(
+        default=None, metadata={"help": "Compilation mode (`default`, `reduce-overhead` or `max-autotune`)."}
+    )
+
     @property
     def device(self) -> torch.device:
         """Return a PyTorch device instance.
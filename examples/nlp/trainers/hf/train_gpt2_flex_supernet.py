@@ -0,0 +1,88 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import argparse
+
+from transformers import DataCollatorForLanguageModeling, TrainingArguments
+
+from archai.nlp.datasets.hf.loaders import encode_dataset, load_dataset
+from archai.nlp.datasets.hf.tokenizer_utils.pre_trained_tokenizer import (
+    ArchaiPreTrainedTokenizerFast,
+)
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.supernet_gpt2_flex import (
+    GPT2FlexSuperNetLMHeadModel,
+)
+from archai.nlp.search_spaces.transformer_flex.search_space import (
+    TransformerFlexSearchSpace,
+)
+from archai.nlp.trainers.hf.callbacks import (
+    PerplexityTrainerCallback,
+    SuperNetSamplingCallback,
+)
+from archai.nlp.trainers.hf.trainer import HfTrainer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Trains a GPT-2 Flex weight-sharing super-network.")
+
+    parser.add_argument("-od", "--output_dir", type=str, default="hf-gpt2-flex-supernet", help="Output folder.")
+    parser.add_argument("-ms", "--max_steps", type=int, default=10000, help="Number of training steps.")
+    parser.add_argument("-bs", "--batch_size", type=int, default=16, help="Batch size per device.")
+    parser.add_argument("-lr", "--learning_rate", type=float, default=1e-3, help="Learning rate.")
+    parser.add_argument("--no_cyclic", action="store_true", help="Only trains random sub-networks.")
+
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    tokenizer = ArchaiPreTrainedTokenizerFast.from_pretrained("gpt2", model_max_length=192)
+    tokenizer.add_special_tokens({"pad_token": "[PAD]"})
+
+    collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+
+    dataset = load_dataset("wikitext", "wikitext-103-v1")
+    dataset = encode_dataset(dataset, tokenizer)
+
+    # Every architecture of the search space is a sub-network of its largest architecture
+    search_space = TransformerFlexSearchSpace(
+        "gpt2-flex",
+        min_layers=2,
+        max_layers=12,
+        d_model_options=[256, 384, 512],
+        d_inner_options=[512, 1024, 2048],
+        n_head_options=[2, 4, 8],
+        share_d_inner=False,
+        vocab_size=50257 + 1,
+        max_sequence_length=192,
+    )
+
+    config = search_space._load_config(search_space.get_largest_config())
+    model = GPT2FlexSuperNetLMHeadModel(config)
+
+    print(f"Total super-network parameters: {sum(p.numel() for p in model.parameters())}")
+
+    training_args = TrainingArguments(
+        args.output_dir,
+        evaluation_strategy="steps",
+        eval_steps=500,
+        logging_steps=10,
+        per_device_train_batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        weight_decay=0.0,
+        max_steps=args.max_steps,
+    )
+    trainer = HfTrainer(
+        model=model,
+        args=training_args,
+        data_collator=collator,
+        train_dataset=dataset["train"],
+        eval_dataset=dataset["validation"],
+        callbacks=[SuperNetSamplingCallback(search_space, cyclic=not args.no_cyclic), PerplexityTrainerCallback],
+    )
+
+    trainer.train()
+    trainer.save_model()
@@ -0,0 +1,91 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks the throughput (tokens/s) of the adaptive embedding and log-softmax of
+`mem_transformer` at the WikiText-103 vocabulary size."""
+
+import argparse
+import time
+
+import torch
+
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.adaptive_embedding import (
+    AdaptiveEmbedding,
+)
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.projected_adaptive_log_softmax import (
+    ProjectedAdaptiveLogSoftmax,
+)
+
+# WikiText-103 vocabulary and cutoffs used by Transformer-XL
+VOCAB_SIZE = 267735
+CUTOFFS = [19997, 39997, 199997]
+
+
+def zipf_tokens(batch_size: int, seq_len: int, device: str) -> torch.LongTensor:
+    # Token frequencies follow a Zipf distribution, as in natural language
+    probs = 1.0 / torch.arange(1, VOCAB_SIZE + 1, dtype=torch.float)
+    return torch.multinomial(probs, batch_size * seq_len, replacement=True).view(batch_size, seq_len).to(device)
+
+
+def run(div_val: int, d_model: int, batch_size: int, seq_len: int, n_steps: int, device: str) -> None:
+    emb = AdaptiveEmbedding(VOCAB_SIZE, d_model, d_model, list(CUTOFFS), div_val=div_val).to(device)
+    crit = ProjectedAdaptiveLogSoftmax(
+        VOCAB_SIZE,
+        d_model,
+        d_model,
+        list(CUTOFFS),
+        [div_val > 1] * (len(CUTOFFS) + 1),
+        emb_projs=emb.emb_projs,
+        emb_weights=[emb_layer.weight for emb_layer in emb.emb_layers],
+        div_val=div_val,
+    ).to(device)
+
+    params = list(emb.parameters()) + [p for p in crit.parameters() if all(p is not q for q in emb.parameters())]
+    for p in params:
+        torch.nn.init.normal_(p, std=0.02)
+    optimizer = torch.optim.SGD(params, lr=1e-3)
+
+    def _train_step() -> None:
+        input_ids = zipf_tokens(batch_size, seq_len, device)
+
+        loss = crit(emb(input_ids), input_ids).mean()
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+
+    def _eval_step() -> None:
+        input_ids = zipf_tokens(batch_size, seq_len, device)
+
+        with torch.no_grad():
+            crit(emb(input_ids), input_ids)
+
+    for name, step_fn in [("train", _train_step), ("eval", _eval_step)]:
+        step_fn()
+        if device == "cuda":
+            torch.cuda.synchronize()
+
+        start_time = time.time()
+        for _ in range(n_steps):
+            step_fn()
+        if device == "cuda":
+            torch.cuda.synchronize()
+
+        tokens_per_sec = n_steps * batch_size * seq_len / (time.time() - start_time)
+        print(f"{div_val:>7} {name:>5} {tokens_per_sec:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the adaptive embedding and log-softmax.")
+    parser.add_argument("--d_model", type=int, default=512, help="Dimensionality of the model.")
+    parser.add_argument("--batch_size", type=int, default=16, help="Batch size.")
+    parser.add_argument("--seq_len", type=int, default=192, help="Sequence length.")
+    parser.add_argument("--n_steps", type=int, default=10, help="Number of timed steps.")
+    parser.add_argument("--div_val", type=int, nargs="+", default=[1, 4], help="Dividends of the clusters.")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+
+    print(f"{'div_val':>7} {'mode':>5} {'tokens/s':>12}")
+    for div_val in args.div_val:
+        run(div_val, args.d_model, args.batch_size, args.seq_len, args.n_steps, args.device)
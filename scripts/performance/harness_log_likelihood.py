@@ -0,0 +1,81 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks batched, context-shared log-likelihood of the harness-based model
+against one forward pass per request, using a tiny GPT-2 and synthetic multiple-choice samples."""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from archai.nlp.eval.harness.harness_model import HarnessModel
+
+
+def get_tokenizer(vocab_size: int) -> PreTrainedTokenizerFast:
+    vocab = {"<eos>": 0, "<unk>": 1, **{f"w{i}": i + 2 for i in range(vocab_size - 2)}}
+
+    tokenizer = Tokenizer(WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = Whitespace()
+
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>", unk_token="<unk>")
+
+
+def get_requests(n_samples: int, n_choices: int, context_length: int, target_length: int, vocab_size: int):
+    rng = np.random.default_rng(0)
+
+    def text(length):
+        return " ".join(f"w{i}" for i in rng.integers(0, vocab_size - 2, size=length))
+
+    requests = []
+    for _ in range(n_samples):
+        context = text(context_length)
+        requests += [(context, " " + text(rng.integers(1, target_length + 1))) for _ in range(n_choices)]
+
+    return requests
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks harness-based log-likelihood.")
+    parser.add_argument("--n_samples", type=int, default=64, help="Number of samples.")
+    parser.add_argument("--n_choices", type=int, default=4, help="Number of choices per sample.")
+    parser.add_argument("--context_length", type=int, default=128, help="Number of context tokens.")
+    parser.add_argument("--target_length", type=int, default=8, help="Maximum number of target tokens.")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 32], help="Batch sizes.")
+    args = parser.parse_args()
+
+    vocab_size = 1000
+    tokenizer = get_tokenizer(vocab_size)
+    model = GPT2LMHeadModel(GPT2Config(vocab_size=vocab_size, n_positions=256, n_layer=4, n_embd=128, n_head=4))
+
+    requests = get_requests(args.n_samples, args.n_choices, args.context_length, args.target_length, vocab_size)
+    harness_model = HarnessModel(model, tokenizer)
+
+    # Warms up kernels and memory allocations
+    harness_model.log_likelihood_batch(requests[: 2 * args.n_choices])
+
+    start_time = time.time()
+    expected = [harness_model.log_likelihood(context, target) for context, target in requests]
+    per_request_time = time.time() - start_time
+    print(f"{'mode':>16} {'batch_size':>10} {'requests/s':>10} {'speedup':>8}")
+    print(f"{'per-request':>16} {1:>10} {len(requests) / per_request_time:>10.1f} {1.0:>7.1f}x")
+
+    for share_context in [False, True]:
+        for batch_size in args.batch_sizes:
+            harness_model.batch_size = batch_size
+            harness_model.share_context = share_context
+
+            start_time = time.time()
+            outputs = harness_model.log_likelihood_batch(requests)
+            elapsed_time = time.time() - start_time
+
+            assert np.allclose([output[0] for output in outputs], expected, atol=1e-3)
+
+            mode = "shared-context" if share_context else "batched"
+            speedup = per_request_time / elapsed_time
+            print(f"{mode:>16} {batch_size:>10} {len(requests) / elapsed_time:>10.1f} {speedup:>7.1f}x")
@@ -0,0 +1,77 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks the throughput of `TensorpackLmdbImageDataset` on a synthetic LMDB, comparing
+per-sample float normalization against `uint8` samples normalized in batches with a decode cache."""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import lmdb
+import msgpack
+import numpy as np
+import torch
+
+from archai.discrete_search.datasets.lmdb_image_provider import (
+    TensorpackLmdbImageDataset,
+    normalize_images,
+)
+
+
+def create_lmdb(path: str, n_images: int, img_size: int) -> None:
+    rng = np.random.default_rng(0)
+
+    db = lmdb.open(path, subdir=False, map_size=1 << 34)
+    with db.begin(write=True) as txn:
+        for i in range(n_images):
+            img = rng.integers(0, 256, size=(img_size, img_size, 3), dtype=np.uint8)
+            mask = (img[..., 0] > 127).astype(np.uint8)
+
+            sample = {"img": cv2.imencode(".png", img)[1].tobytes(), "mask": cv2.imencode(".png", mask)[1].tobytes()}
+            txn.put(f"{i:08d}".encode(), msgpack.dumps(sample))
+    db.close()
+
+
+def run(lmdb_path: str, normalize: bool, cache_size: int, num_workers: int, n_epochs: int, batch_size: int) -> None:
+    start_time = time.time()
+    dataset = TensorpackLmdbImageDataset(
+        lmdb_path, "img", mask_key="mask", normalize=normalize, cache_size=cache_size
+    )
+    init_time = time.time() - start_time
+
+    loader = torch.utils.data.DataLoader(
+        dataset, batch_size=batch_size, num_workers=num_workers, persistent_workers=num_workers > 0
+    )
+
+    start_time = time.time()
+    for _ in range(n_epochs):
+        for batch in loader:
+            images = batch["image"] if normalize else normalize_images(batch["image"])
+            assert images.dtype == torch.float
+    elapsed_time = time.time() - start_time
+
+    mode = "float" if normalize else f"uint8 (cache={cache_size})"
+    print(f"{mode:>20} {num_workers:>7} {init_time * 1000:>9.1f} {n_epochs * len(dataset) / elapsed_time:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the LMDB image dataset.")
+    parser.add_argument("--n_images", type=int, default=2000, help="Number of images.")
+    parser.add_argument("--img_size", type=int, default=128, help="Image height and width.")
+    parser.add_argument("--n_epochs", type=int, default=3, help="Number of epochs.")
+    parser.add_argument("--batch_size", type=int, default=32, help="Batch size.")
+    parser.add_argument("--num_workers", type=int, nargs="+", default=[0, 2], help="Data loader workers.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lmdb_path = os.path.join(tmp_dir, "images.lmdb")
+        create_lmdb(lmdb_path, args.n_images, args.img_size)
+
+        print(f"{'mode':>20} {'workers':>7} {'init (ms)':>9} {'images/s':>10}")
+        for num_workers in args.num_workers:
+            run(lmdb_path, True, 0, num_workers, args.n_epochs, args.batch_size)
+            run(lmdb_path, False, 0, num_workers, args.n_epochs, args.batch_size)
+            run(lmdb_path, False, args.n_images, num_workers, args.n_epochs, args.batch_size)
@@ -0,0 +1,107 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks Pareto-frontier and non-dominated sorting implementations
+against the previous pure-Python implementations."""
+
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from archai.discrete_search.utils.multi_objective import (
+    _find_non_dominated_sorting, _find_pareto_frontier_points
+)
+
+
+def legacy_find_pareto_frontier_points(all_points: np.ndarray) -> List[int]:
+    pareto_inds = []
+    dim = all_points.shape[1]
+    _, unique_indices = np.unique(all_points, axis=0, return_index=True)
+
+    for i in unique_indices:
+        this_point = all_points[i, :]
+        is_pareto = True
+
+        for j in unique_indices:
+            if j == i:
+                continue
+
+            if sum((this_point - all_points[j, :]) >= 0) == dim:
+                is_pareto = False
+                break
+
+        if is_pareto:
+            pareto_inds.append(i)
+
+    return pareto_inds
+
+
+def legacy_find_non_dominated_sorting(all_points: np.ndarray) -> List[List[int]]:
+    def dominates(x, y):
+        for i in range(len(x)):
+            if y[i] < x[i]:
+                return False
+        return True
+
+    lex_sorting = np.lexsort(all_points.T[::-1])
+    all_points = all_points.copy()[lex_sorting]
+    fronts = []
+
+    for idx in range(all_points.shape[0]):
+        rank = 0
+        while rank < len(fronts):
+            if not any(dominates(s, all_points[idx]) for s in all_points[fronts[rank][::-1]]):
+                break
+            rank += 1
+
+        if rank >= len(fronts):
+            fronts.append([])
+        fronts[rank].append(idx)
+
+    return [lex_sorting[front] for front in fronts]
+
+
+def timeit(fn: Callable, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num_points', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--num_objectives', type=int, nargs='+', default=[2, 3, 4])
+    parser.add_argument('--legacy_max_points', type=int, default=10_000,
+                        help='Skips legacy implementations above this number of points.')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    print(f'{"function":>28} {"#obj":>5} {"#points":>8} {"legacy (s)":>11} {"current (s)":>12} {"speedup":>8}')
+
+    for num_objectives in args.num_objectives:
+        for num_points in args.num_points:
+            # Negatively correlated objectives yield large frontiers, as in NAS trade-offs
+            points = rng.rand(num_points, num_objectives)
+            points[:, -1] = 1.0 - points[:, 0] + 0.1 * points[:, -1]
+
+            for name, legacy_fn, fn in [
+                ('_find_pareto_frontier_points', legacy_find_pareto_frontier_points, _find_pareto_frontier_points),
+                ('_find_non_dominated_sorting', legacy_find_non_dominated_sorting, _find_non_dominated_sorting)
+            ]:
+                current_t = timeit(fn, points)
+                legacy_t = (
+                    timeit(legacy_fn, points)
+                    if num_points <= args.legacy_max_points else float('nan')
+                )
+
+                print(
+                    f'{name:>28} {num_objectives:>5} {num_points:>8} {legacy_t:>11.3f} '
+                    f'{current_t:>12.3f} {legacy_t / current_t:>7.1f}x'
+                )
+
+
+if __name__ == '__main__':
+    main()
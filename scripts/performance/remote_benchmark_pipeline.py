@@ -0,0 +1,126 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks the remote benchmark pipeline offline, using a local storage with simulated
+request latency and a simulated remote worker, against serial uploads and per-architecture polling."""
+
+import argparse
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import torch
+from overrides import overrides
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.objectives.remote_benchmark import (
+    LocalBenchmarkStorage,
+    RemoteBenchmarkObjective,
+)
+
+
+class SlowStorage(LocalBenchmarkStorage):
+    """Local storage that simulates the round-trip time of a remote storage."""
+
+    def __init__(self, root_dir: str, latency: float) -> None:
+        super().__init__(root_dir)
+
+        self.latency = latency
+        self.n_requests = 0
+
+    def _request(self) -> None:
+        self.n_requests += 1
+        time.sleep(self.latency)
+
+    @overrides
+    def get_entity(self, archid: str) -> Optional[Dict]:
+        self._request()
+        return super().get_entity(archid)
+
+    @overrides
+    def get_entities(self, archids: List[str]) -> Dict[str, Dict]:
+        self._request()
+        return super().get_entities(archids)
+
+    @overrides
+    def update_entity(self, archid: str, entity: Dict) -> None:
+        self._request()
+        super().update_entity(archid, entity)
+
+    @overrides
+    def upload_blob(self, src_path: str, dst_path: str) -> None:
+        self._request()
+        super().upload_blob(src_path, dst_path)
+
+
+def remote_worker(storage: LocalBenchmarkStorage, archids: List[str], stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        for archid, entity in LocalBenchmarkStorage.get_entities(storage, archids).items():
+            if entity["status"] == "new":
+                LocalBenchmarkStorage.update_entity(storage, archid, dict(entity, status="complete", latency=1.0))
+
+        stop_event.wait(0.05)
+
+
+def run(models: List[ArchaiModel], latency: float, max_workers: Optional[int], retry_interval: float) -> None:
+    with tempfile.TemporaryDirectory() as root_dir:
+        storage = SlowStorage(root_dir, latency)
+        objective = RemoteBenchmarkObjective(
+            (1, 3, 32, 32), storage, "latency", max_retries=100, retry_interval=retry_interval,
+            max_workers=max_workers or 1,
+        )
+
+        stop_event = threading.Event()
+        worker = threading.Thread(target=remote_worker, args=(storage, [m.archid for m in models], stop_event))
+        worker.start()
+
+        start_time = time.time()
+
+        if max_workers is None:
+            # Serial uploads in `send` and one request per architecture in each poll
+            for model in models:
+                objective._export_and_upload(model)
+            send_time = time.time() - start_time
+
+            results = [None] * len(models)
+            while any(r is None for r in results):
+                for i, model in enumerate(models):
+                    entity = storage.get_entity(model.archid)
+                    if entity.get("latency"):
+                        results[i] = entity["latency"]
+                if any(r is None for r in results):
+                    time.sleep(retry_interval)
+        else:
+            for model in models:
+                objective.send(model, None)
+            send_time = time.time() - start_time
+
+            results = objective.fetch_all()
+
+        total_time = time.time() - start_time
+        stop_event.set()
+        worker.join()
+
+        assert all(r == 1.0 for r in results)
+
+        mode = "serial" if max_workers is None else f"pipeline ({max_workers} workers)"
+        print(f"{mode:>22} {send_time:>9.2f} {total_time:>9.2f} {storage.n_requests:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the remote benchmark pipeline.")
+    parser.add_argument("--n_models", type=int, default=100, help="Number of architectures.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated request latency (seconds).")
+    parser.add_argument("--retry_interval", type=float, default=0.1, help="Initial interval between polls.")
+    parser.add_argument("--max_workers", type=int, nargs="+", default=[1, 4, 16], help="Upload workers.")
+    args = parser.parse_args()
+
+    models = [
+        ArchaiModel(torch.nn.Sequential(torch.nn.Conv2d(3, 8, 3), torch.nn.ReLU()), f"arch{i}")
+        for i in range(args.n_models)
+    ]
+
+    print(f"{'mode':>22} {'send (s)':>9} {'total (s)':>9} {'requests':>8}")
+    for max_workers in [None] + args.max_workers:
+        run(models, args.latency, max_workers, args.retry_interval)
@@ -0,0 +1,103 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""Benchmarks the rank correlation of zero-cost proxies with the test accuracy of
+NATS-Bench (topology search space) architectures, and their evaluation time on CPU."""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from overrides import overrides
+from scipy import stats
+from torchvision import datasets, transforms
+
+from archai.discrete_search import DatasetProvider
+from archai.discrete_search.objectives.lookup import NatsbenchMetric
+from archai.discrete_search.objectives.zero_cost import (
+    GradNorm,
+    JacobianCovariance,
+    NtkConditionNumber,
+    Snip,
+    Synflow,
+)
+from archai.discrete_search.search_spaces.natsbench_tss.search_space import (
+    NatsbenchTssSearchSpace,
+)
+
+PROXIES = {
+    "grad_norm": GradNorm,
+    "snip": Snip,
+    "synflow": Synflow,
+    "jacob_cov": JacobianCovariance,
+    "ntk_cond": NtkConditionNumber,
+}
+
+CIFAR_STATS = {
+    "cifar10": ([0.4914, 0.4822, 0.4465], [0.2470, 0.2435, 0.2616]),
+    "cifar100": ([0.5071, 0.4865, 0.4409], [0.2673, 0.2564, 0.2762]),
+}
+
+
+class CifarProvider(DatasetProvider):
+    def __init__(self, dataset: str, root: str):
+        self.dataset = dataset
+        self.root = root
+
+    @overrides
+    def get_train_val_datasets(self):
+        dataset_cls = datasets.CIFAR10 if self.dataset == "cifar10" else datasets.CIFAR100
+        transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize(*CIFAR_STATS[self.dataset])])
+
+        return (
+            dataset_cls(self.root, train=True, download=True, transform=transform),
+            dataset_cls(self.root, train=False, download=True, transform=transform),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks zero-cost proxies on NATS-Bench.")
+    parser.add_argument("natsbench_location", type=str, help="Path to the NATS-Bench TSS benchmark files.")
+    parser.add_argument("--dataset", type=str, default="cifar10", choices=list(CIFAR_STATS.keys()))
+    parser.add_argument("--dataset_root", type=str, default="dataroot", help="CIFAR download folder.")
+    parser.add_argument("--num_archs", type=int, default=100, help="Number of sampled architectures.")
+    parser.add_argument("--batch_size", type=int, default=64, help="Minibatch size.")
+    parser.add_argument("--num_batches", type=int, default=1, help="Number of minibatches.")
+    parser.add_argument("--max_workers", type=int, default=1, help="Concurrent evaluations.")
+    parser.add_argument("--proxies", type=str, nargs="+", default=list(PROXIES.keys()), choices=list(PROXIES.keys()))
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+
+    search_space = NatsbenchTssSearchSpace(args.natsbench_location, args.dataset, seed=args.seed)
+    dataset = CifarProvider(args.dataset, args.dataset_root)
+
+    # Test accuracy after the full (200 epochs) training schedule
+    accuracy = NatsbenchMetric(
+        search_space, "test-accuracy", higher_is_better=True, more_info_kwargs={"hp": "200"}
+    )
+
+    models = [search_space.random_sample() for _ in range(args.num_archs)]
+    accuracies = np.array([accuracy.evaluate(m, dataset) for m in models])
+
+    print(f"{'proxy':>10} {'kendall':>8} {'spearman':>8} {'s/arch':>8}")
+    for proxy_name in args.proxies:
+        proxy = PROXIES[proxy_name](
+            batch_size=args.batch_size, num_batches=args.num_batches, max_workers=args.max_workers, seed=args.seed
+        )
+
+        # Minibatches are loaded once and are not timed
+        proxy.get_batches(dataset)
+
+        start_time = time.time()
+        scores = np.array(proxy.evaluate_batch(models, dataset))
+        elapsed_time = (time.time() - start_time) / len(models)
+
+        # Correlations are positive when the proxy ranks architectures as the accuracy does
+        scores = scores if proxy.higher_is_better else -scores
+        kendall = stats.kendalltau(scores, accuracies).correlation
+        spearman = stats.spearmanr(scores, accuracies).correlation
+
+        print(f"{proxy_name:>10} {kendall:>8.3f} {spearman:>8.3f} {elapsed_time:>8.3f}")
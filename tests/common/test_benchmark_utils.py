@@ -0,0 +1,74 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import os
+import threading
+import time
+
+import numpy as np
+import torch
+
+from archai.common.benchmark_utils import BenchmarkResult, benchmark, median_ci
+from archai.common.ml_perf_utils import inference_latency
+
+
+def test_benchmark_result():
+    result = BenchmarkResult(np.arange(1, 101) / 100)
+
+    assert result.median == 0.505
+    assert result.p99 > result.p90 > result.median
+    assert result.get('max') == 1.0
+
+    lower, upper = result.median_ci
+    assert lower < result.median < upper
+
+    # Too few trials to bound the median
+    assert median_ci(np.ones(3)) is None
+    assert BenchmarkResult([1.0, 2.0]).rel_ci_width == float('inf')
+
+
+def test_benchmark_stopping():
+    calls = []
+
+    # Fixed number of trials after the warmup
+    result = benchmark(lambda: calls.append(None), n_warmup=3, max_trials=20)
+    assert len(result) == 20 and len(calls) == 23
+
+    # Stable timings reach the target confidence interval early
+    result = benchmark(lambda: time.sleep(0.001), min_trials=10, max_trials=1000, rel_ci_width=0.5)
+    assert 10 <= len(result) < 1000
+
+    # Time budget bounds the number of trials
+    result = benchmark(lambda: time.sleep(0.01), max_trials=1000, time_budget=0.05)
+    assert 1 <= len(result) <= 10
+
+
+def test_benchmark_cpu_affinity():
+    if not hasattr(os, 'sched_setaffinity'):
+        return
+
+    cpus = sorted(os.sched_getaffinity(0))
+    pinned = {}
+
+    def _benchmark(cpu):
+        benchmark(lambda: pinned.setdefault(cpu, os.sched_getaffinity(0)), n_warmup=0, max_trials=1, cpus=[cpu])
+
+    # Concurrent benchmarks only pin their own threads
+    threads = [threading.Thread(target=_benchmark, args=(cpu,)) for cpu in cpus[:2]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pinned == {cpu: {cpu} for cpu in cpus[:2]}
+    assert sorted(os.sched_getaffinity(0)) == cpus
+
+
+def test_inference_latency():
+    model = torch.nn.Linear(8, 4)
+    n_threads = torch.get_num_threads()
+
+    result = inference_latency(model, n_threads=1, benchmark_kwargs={'max_trials': 5}, input=torch.randn(2, 8))
+
+    assert len(result) == 5 and result.min > 0
+    assert torch.get_num_threads() == n_threads
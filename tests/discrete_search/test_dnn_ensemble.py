@@ -0,0 +1,51 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import torch
+
+from archai.discrete_search.predictors.dnn_ensemble import FFEnsemble, PredictiveDNNEnsemble
+
+
+def test_ff_ensemble():
+    ensemble = FFEnsemble(num_members=3, num_objectives=2, input_feat_len=4, num_layers=3, width=8)
+    x = torch.randn(10, 4)
+
+    # Each member is an independent MLP
+    for i, output in enumerate(ensemble(x)):
+        h = x
+        for j, (weight, bias) in enumerate(zip(ensemble.weights, ensemble.biases)):
+            h = h @ weight[i] + bias[i]
+            h = torch.relu(h) if j < len(ensemble.weights) - 1 else h
+
+        assert torch.allclose(output, h, atol=1e-6)
+
+
+def test_predictive_dnn_ensemble():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(size=(200, 4))
+    y = np.stack([X.sum(axis=1), X[:, 0] - X[:, 1]], axis=1)
+
+    predictor = PredictiveDNNEnsemble(
+        num_ensemble_members=4, num_layers=3, width=32, lr=1e-2, num_tr_steps=1000, patience=20,
+        device='cpu', seed=0
+    )
+    predictor.fit(X[:150], y[:150])
+
+    pred = predictor.predict(X[150:])
+    assert pred.mean.shape == pred.var.shape == (50, 2)
+    assert np.mean((pred.mean - y[150:]) ** 2) < 0.05 * np.var(y[150:])
+    assert (pred.var > 0).all()
+
+    # Refitting with more data continues from the previous weights
+    ensemble = predictor.ensemble
+    first_num_steps = predictor.num_steps
+    predictor.fit(X, y)
+
+    assert predictor.ensemble is ensemble
+    assert predictor.num_steps < first_num_steps
+
+    # Without a held-out split, the maximum number of steps is used
+    predictor = PredictiveDNNEnsemble(num_layers=2, num_tr_steps=20, device='cpu', val_fraction=0.0)
+    predictor.fit(X, y)
+    assert predictor.num_steps == 20
@@ -0,0 +1,34 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import time
+
+import pytest
+from overrides import overrides
+
+from archai.discrete_search import ArchaiModel, Objective
+from archai.discrete_search.utils.evaluation import evaluate_models
+
+
+class ArchidLength(Objective):
+    @overrides
+    def evaluate(self, model, dataset, budget=None):
+        # Evaluation time is inversely proportional to the result
+        time.sleep(0.01 / len(model.archid))
+        return float(len(model.archid)) * (budget or 1.0)
+
+
+@pytest.mark.parametrize('executor', [None, 'thread', 'process'])
+def test_evaluate_models_executor(executor):
+    models = [ArchaiModel(None, 'a' * (i + 1)) for i in range(10)]
+    objectives = {'len': ArchidLength(), 'len_2': ArchidLength()}
+
+    results = evaluate_models(
+        models, objectives, None,
+        budgets={'len_2': 2.0},
+        executor=executor, max_workers=4,
+        max_concurrency={'len': 2}
+    )
+
+    assert list(results['len']) == [float(i + 1) for i in range(10)]
+    assert list(results['len_2']) == [2.0 * (i + 1) for i in range(10)]
@@ -0,0 +1,144 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import json
+import random
+import threading
+import time
+
+import pytest
+from overrides import overrides
+
+from archai.discrete_search import ArchaiModel, EvolutionarySearchSpace, Objective
+from archai.discrete_search.algos.evolution_pareto import EvolutionParetoSearch
+
+
+class IntVectorSearchSpace(EvolutionarySearchSpace):
+    def __init__(self, size=4, max_value=9, seed=0):
+        self.size = size
+        self.max_value = max_value
+        self.rng = random.Random(seed)
+
+    def _get_model(self, values):
+        return ArchaiModel(None, '-'.join(map(str, values)), metadata={'values': values})
+
+    @overrides
+    def random_sample(self):
+        return self._get_model([self.rng.randint(0, self.max_value) for _ in range(self.size)])
+
+    @overrides
+    def mutate(self, arch):
+        values = list(arch.metadata['values'])
+        values[self.rng.randrange(self.size)] = self.rng.randint(0, self.max_value)
+        return self._get_model(values)
+
+    @overrides
+    def crossover(self, arch_list):
+        return self._get_model([self.rng.choice(values) for values in zip(*[a.metadata['values'] for a in arch_list])])
+
+    @overrides
+    def save_arch(self, model, path):
+        with open(path, 'w') as f:
+            json.dump(model.metadata['values'], f)
+
+    @overrides
+    def load_arch(self, path):
+        with open(path) as f:
+            return self._get_model(json.load(f))
+
+    @overrides
+    def save_model_weights(self, model, path):
+        pass
+
+    @overrides
+    def load_model_weights(self, model, path):
+        pass
+
+
+class SumObjective(Objective):
+    higher_is_better = False
+
+    def __init__(self, index=None, sleep=0.0):
+        self.index = index
+        self.sleep = sleep
+        self.max_concurrency = 0
+        self._num_running = 0
+        self._lock = threading.Lock()
+
+    @overrides
+    def evaluate(self, arch, dataset, budget=None):
+        with self._lock:
+            self._num_running += 1
+            self.max_concurrency = max(self.max_concurrency, self._num_running)
+
+        time.sleep(self.sleep * (1 + arch.metadata['values'][0]))
+        values = arch.metadata['values']
+
+        with self._lock:
+            self._num_running -= 1
+
+        return float(sum(values) if self.index is None else -values[self.index])
+
+
+@pytest.mark.parametrize('steady_state', [False, True])
+def test_evolution_pareto_search(tmp_path, steady_state):
+    objectives = {'sum': SumObjective(sleep=0.001), 'first': SumObjective(index=0)}
+
+    algo = EvolutionParetoSearch(
+        IntVectorSearchSpace(), objectives, None, str(tmp_path), num_iters=4, init_num_models=6,
+        num_random_mix=2, max_unseen_population=5, num_crossovers=2, steady_state=steady_state, max_in_flight=3
+    )
+
+    iteration_starts = []
+    algo.on_search_iteration_start = lambda current_pop: iteration_starts.append(algo.iter_num)
+
+    search_results = algo.search()
+
+    # Iteration callbacks are called in both modes
+    assert iteration_starts == [1, 2, 3, 4]
+
+    state_df = search_results.get_search_state_df()
+    iter_sizes = list(state_df['iteration_num'].value_counts().sort_index())
+    assert state_df['archid'].is_unique
+
+    # Steady-state iterations have the maximum size of generational iterations
+    if steady_state:
+        assert iter_sizes == [6, 5, 5, 5]
+    else:
+        assert len(iter_sizes) == 4 and iter_sizes[0] == 6 and max(iter_sizes[1:]) <= 5
+
+    for i in range(1, 5):
+        assert (tmp_path / f'search_state_{i}.csv').exists()
+        assert (tmp_path / f'pareto_models_iter_{i}').is_dir()
+
+    if steady_state:
+        assert objectives['sum'].max_concurrency == 3
+        assert len(algo.all_pop) == len(state_df)
+
+        # Steady-state archive matches the frontier of all recorded results
+        pareto_archids = {m.archid for m in search_results.get_pareto_frontier()['models']}
+        assert {m.archid for m in algo._archive_models} == pareto_archids
+
+
+class OptionalScoreObjective(Objective):
+    higher_is_better = True
+
+    @overrides
+    def evaluate(self, arch, dataset, budget=None):
+        # Models with an odd first value cannot be evaluated
+        values = arch.metadata['values']
+        return None if values[0] % 2 else float(values[1])
+
+
+def test_evolution_pareto_search_steady_state_missing_results(tmp_path):
+    objectives = {'sum': SumObjective(), 'score': OptionalScoreObjective()}
+
+    algo = EvolutionParetoSearch(
+        IntVectorSearchSpace(), objectives, None, str(tmp_path), num_iters=3, init_num_models=6,
+        num_random_mix=2, max_unseen_population=5, num_crossovers=2, steady_state=True, max_in_flight=2
+    )
+    algo.search()
+
+    # Models without results are not added to the archive
+    assert algo._archive_models
+    assert all(m.metadata['values'][0] % 2 == 0 for m in algo._archive_models)
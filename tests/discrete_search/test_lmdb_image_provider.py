@@ -0,0 +1,79 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import cv2
+import lmdb
+import msgpack
+import numpy as np
+import pytest
+import torch
+
+from archai.discrete_search.datasets.lmdb_image_provider import (
+    TensorpackLmdbImageDataset,
+    normalize_images,
+)
+
+
+@pytest.fixture
+def lmdb_path(tmp_path):
+    path = str(tmp_path / 'images.lmdb')
+    rng = np.random.default_rng(0)
+
+    db = lmdb.open(path, subdir=False, map_size=1 << 26)
+    with db.begin(write=True) as txn:
+        for i in range(10):
+            img = rng.integers(0, 256, size=(16, 12, 3), dtype=np.uint8)
+            mask = (img[..., 0] > 127).astype(np.uint8)
+
+            sample = {'img': cv2.imencode('.png', img)[1].tobytes(), 'mask': cv2.imencode('.png', mask)[1].tobytes()}
+            txn.put(f'{i:04d}'.encode(), msgpack.dumps(sample))
+
+        txn.put(b'__keys__', msgpack.dumps([]))
+    db.close()
+
+    return path
+
+
+def test_lmdb_image_dataset(lmdb_path):
+    dataset = TensorpackLmdbImageDataset(lmdb_path, 'img', mask_key='mask', img_size=(8, 8))
+    assert len(dataset) == 10
+
+    sample = dataset[3]
+    assert sample['key'] == b'0003'
+    assert sample['image'].shape == (3, 8, 8) and sample['image'].dtype == torch.float
+    assert sample['mask'].shape == (8, 8) and sample['mask'].dtype == torch.long
+
+    # `uint8` images normalized in batches match per-sample normalization
+    uint8_dataset = TensorpackLmdbImageDataset(
+        lmdb_path, 'img', mask_key='mask', img_size=(8, 8), normalize=False, cache_size=4
+    )
+
+    for _ in range(2):
+        uint8_sample = uint8_dataset[3]
+
+        assert uint8_sample['image'].dtype == torch.uint8
+        assert torch.equal(normalize_images(uint8_sample['image'][None])[0], sample['image'])
+        assert torch.equal(uint8_sample['mask'], sample['mask'])
+
+    assert len(uint8_dataset.cache) == 1
+
+
+def test_lmdb_image_dataset_index(lmdb_path):
+    TensorpackLmdbImageDataset(lmdb_path, 'img', mask_key='mask')
+
+    # Keys are read from the index file while the LMDB is unchanged
+    with open(f'{lmdb_path}.keys', 'rb') as f:
+        index = msgpack.load(f)
+
+    with open(f'{lmdb_path}.keys', 'wb') as f:
+        msgpack.dump(dict(index, keys=index['keys'][:5]), f)
+
+    assert len(TensorpackLmdbImageDataset(lmdb_path, 'img', mask_key='mask')) == 5
+
+
+def test_lmdb_image_dataset_workers(lmdb_path):
+    dataset = TensorpackLmdbImageDataset(lmdb_path, 'img', ones_mask=True, normalize=False)
+    loader = torch.utils.data.DataLoader(dataset, batch_size=4, num_workers=2)
+
+    keys = [key for batch in loader for key in batch['key']]
+    assert keys == dataset.keys
@@ -0,0 +1,61 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+
+from archai.discrete_search.utils.multi_objective import (
+    _find_non_dominated_sorting, _find_pareto_frontier_points
+)
+
+
+def _brute_force_pareto(points):
+    _, unique_indices = np.unique(points, axis=0, return_index=True)
+
+    return [
+        i for i in unique_indices
+        if not any(
+            j != i and np.all(points[j] <= points[i])
+            for j in unique_indices
+        )
+    ]
+
+
+def _brute_force_nds(points):
+    remaining = list(np.lexsort(points.T[::-1]))
+    fronts = []
+
+    while remaining:
+        # Duplicated points are placed in different fronts
+        front = []
+        for i in remaining:
+            if not any(np.all(points[j] <= points[i]) for j in front):
+                front.append(i)
+
+        fronts.append(front)
+        remaining = [i for i in remaining if i not in front]
+
+    return fronts
+
+
+@pytest.mark.parametrize('num_objectives', [1, 2, 3, 5])
+def test_find_pareto_frontier_points(num_objectives):
+    rng = np.random.RandomState(num_objectives)
+
+    # Small integer grid to create ties and duplicates
+    points = rng.randint(0, 8, size=(300, num_objectives)).astype(np.float64)
+
+    assert _find_pareto_frontier_points(points, block_size=32) == _brute_force_pareto(points)
+    assert _find_pareto_frontier_points(points[:0]) == []
+
+
+@pytest.mark.parametrize('num_objectives', [2, 3, 4])
+def test_find_non_dominated_sorting(num_objectives):
+    rng = np.random.RandomState(num_objectives)
+    points = rng.randint(0, 6, size=(200, num_objectives)).astype(np.float64)
+
+    fronts = _find_non_dominated_sorting(points)
+    expected_fronts = _brute_force_nds(points)
+
+    assert len(fronts) == len(expected_fronts)
+    assert all(list(f) == list(e) for f, e in zip(fronts, expected_fronts))
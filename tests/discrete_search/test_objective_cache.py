@@ -0,0 +1,92 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+from overrides import overrides
+
+from archai.discrete_search import ArchaiModel, DatasetProvider, Objective
+from archai.discrete_search.api.objective_cache import SqliteObjectiveCache
+from archai.discrete_search.api.search_objectives import SearchObjectives
+
+
+class DummyDatasetProvider(DatasetProvider):
+    def __init__(self, name: str):
+        self.name = name
+
+    @overrides
+    def get_train_val_datasets(self):
+        return None, None
+
+
+class CountingObjective(Objective):
+    def __init__(self):
+        self.num_calls = 0
+
+    @overrides
+    def evaluate(self, model, dataset, budget=None):
+        self.num_calls += 1
+        return float(len(model.archid))
+
+
+@pytest.fixture
+def models():
+    return [ArchaiModel(None, archid) for archid in ['a', 'bb', 'ccc']]
+
+
+def test_sqlite_objective_cache_persistence(tmp_path, models):
+    cache_path = tmp_path / 'cache.db'
+    obj = CountingObjective()
+
+    search_objs = SearchObjectives(cache=SqliteObjectiveCache(cache_path))
+    search_objs.add_cheap_objective('len', obj, higher_is_better=False)
+
+    results, _ = search_objs.eval_cheap_objs(models, DummyDatasetProvider('data'))
+    assert list(results['len']) == [1.0, 2.0, 3.0]
+    assert obj.num_calls == 3
+    assert search_objs.cache_stats['len'] == {'hits': 0, 'misses': 3}
+
+    # A new search run with an equivalent dataset provider reuses the stored results
+    search_objs = SearchObjectives(cache=SqliteObjectiveCache(cache_path))
+    search_objs.add_cheap_objective('len', obj, higher_is_better=False)
+
+    results, _ = search_objs.eval_cheap_objs(models, DummyDatasetProvider('data'))
+    assert list(results['len']) == [1.0, 2.0, 3.0]
+    assert obj.num_calls == 3
+    assert search_objs.cache_stats['len'] == {'hits': 3, 'misses': 0}
+
+    # Different data is not shared
+    search_objs.eval_cheap_objs(models, DummyDatasetProvider('other_data'))
+    assert obj.num_calls == 6
+    assert len(search_objs.cache) == 6
+
+
+class TensorDatasetProvider(DatasetProvider):
+    def __init__(self, data):
+        self.data = data
+
+    @overrides
+    def get_train_val_datasets(self):
+        return self.data, None
+
+
+class DataSumObjective(Objective):
+    @overrides
+    def evaluate(self, model, dataset, budget=None):
+        return float(dataset.data.sum())
+
+
+def test_objective_cache_non_serializable_provider(tmp_path, models):
+    search_objs = SearchObjectives(cache=SqliteObjectiveCache(tmp_path / 'cache.db'))
+    search_objs.add_cheap_objective('sum', DataSumObjective(), higher_is_better=False)
+
+    # Providers that only differ in non-serializable attributes are not cached
+    with pytest.warns(UserWarning, match='fingerprint'):
+        results, _ = search_objs.eval_cheap_objs(models, TensorDatasetProvider(torch.zeros(2)))
+    assert list(results['sum']) == [0.0] * 3
+
+    with pytest.warns(UserWarning, match='fingerprint'):
+        results, _ = search_objs.eval_cheap_objs(models, TensorDatasetProvider(torch.ones(2)))
+    assert list(results['sum']) == [2.0] * 3
+
+    assert len(search_objs.cache) == 0
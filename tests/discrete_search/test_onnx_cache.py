@@ -0,0 +1,84 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import onnxruntime as rt
+import torch
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.objectives.onnx_model import AvgOnnxLatency
+from archai.discrete_search.utils.onnx_cache import OnnxModelCache
+
+
+def _export_linear(output_dir, calls=None):
+    if calls is not None:
+        calls.append(output_dir)
+
+    output_path = os.path.join(output_dir, 'model.onnx')
+    torch.onnx.export(torch.nn.Linear(4, 2), (torch.randn(1, 4),), output_path, input_names=['input_0'])
+
+    return output_path
+
+
+def test_onnx_model_cache(tmp_path):
+    cache = OnnxModelCache(tmp_path, max_sessions=1)
+    key = cache.get_key('linear', {'input_shapes': [[1, 4]]})
+
+    assert key == cache.get_key('linear', {'input_shapes': [[1, 4]]})
+    assert key != cache.get_key('linear', {'input_shapes': [[2, 4]]})
+
+    # Concurrent evaluations of the same model run a single export
+    calls = []
+    with ThreadPoolExecutor(4) as executor:
+        sessions = list(executor.map(lambda _: cache.get_session(key, lambda d: _export_linear(d, calls)), range(8)))
+
+    assert len(calls) == 1
+    assert all(session is sessions[0] for session in sessions)
+    assert not os.path.exists(calls[0])
+
+    # Evicted sessions are re-created from disk
+    other_key = cache.get_key('other')
+    cache.get_session(other_key, _export_linear)
+    cache.get_session(key, lambda d: _export_linear(d, calls))
+
+    assert len(calls) == 1
+    assert cache.stats['exports'] == 2 and cache.stats['disk_hits'] == 1
+
+    # Unpickled caches (e.g. in other processes) share the exported models
+    new_cache = pickle.loads(pickle.dumps(cache))
+    new_cache.get_session(key, lambda d: _export_linear(d, calls))
+
+    assert len(calls) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([key, other_key])
+
+
+def test_avg_onnx_latency_cache():
+    built = []
+
+    def arch_fn():
+        built.append(True)
+        return torch.nn.Linear(4, 2)
+
+    objective = AvgOnnxLatency(input_shape=(1, 4), num_trials=2)
+
+    assert objective.evaluate(ArchaiModel(None, 'linear', arch_fn=arch_fn), None) > 0.0
+    assert objective.evaluate(ArchaiModel(None, 'linear', arch_fn=arch_fn), None) > 0.0
+
+    # Cached architectures are not built again
+    assert len(built) == 1
+    assert objective.onnx_cache.stats['exports'] == 1
+
+
+def test_avg_onnx_latency_session_options():
+    sess_options = rt.SessionOptions()
+    sess_options.intra_op_num_threads = 4
+    sess_options.log_severity_level = 3
+
+    objective = AvgOnnxLatency(input_shape=(1, 4), num_threads=1, inf_session_kwargs={'sess_options': sess_options})
+    objective.evaluate(ArchaiModel(torch.nn.Linear(4, 2), 'linear'), None)
+
+    # User-supplied session options are not modified
+    assert sess_options.intra_op_num_threads == 4
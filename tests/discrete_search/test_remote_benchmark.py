@@ -0,0 +1,79 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import threading
+
+import torch
+
+from archai.discrete_search.api.archai_model import ArchaiModel
+from archai.discrete_search.objectives.remote_benchmark import (
+    LocalBenchmarkStorage,
+    RemoteBenchmarkObjective,
+)
+
+
+def _benchmark_worker(storage, archids, stop_event):
+    # Simulates a remote worker that benchmarks uploaded models
+    while not stop_event.is_set():
+        for archid, entity in storage.get_entities(archids).items():
+            if entity['status'] == 'new':
+                assert (storage.blob_dir / archid / 'model.onnx').is_file()
+                storage.update_entity(archid, dict(entity, status='complete', latency=float(archid[-1]) + 1))
+
+        stop_event.wait(0.01)
+
+
+def test_remote_benchmark_objective(tmp_path):
+    storage = LocalBenchmarkStorage(tmp_path)
+    storage.update_entity('arch9', {'status': 'complete', 'latency': 0.5})
+
+    objective = RemoteBenchmarkObjective((1, 4), storage, 'latency', max_retries=50, retry_interval=0.01, max_workers=2)
+    archids = ['arch0', 'arch1', 'arch0', 'arch9', 'arch2']
+
+    for archid in archids:
+        objective.send(ArchaiModel(torch.nn.Linear(4, 2), archid), None)
+
+    stop_event = threading.Event()
+    worker = threading.Thread(target=_benchmark_worker, args=(storage, sorted(set(archids)), stop_event))
+    worker.start()
+
+    try:
+        results = objective.fetch_all()
+    finally:
+        stop_event.set()
+        worker.join()
+
+    assert results == [1.0, 2.0, 1.0, 0.5, 3.0]
+
+    # Already benchmarked architectures are not uploaded again
+    assert not (storage.blob_dir / 'arch9').exists()
+    assert objective.archids == [] and objective.jobs == {}
+
+
+def test_remote_benchmark_objective_timeout(tmp_path):
+    storage = LocalBenchmarkStorage(tmp_path)
+    objective = RemoteBenchmarkObjective((1, 4), storage, 'latency', max_retries=3, retry_interval=0.01)
+
+    objective.send(ArchaiModel(torch.nn.Linear(4, 2), 'arch0'), None)
+
+    assert objective.fetch_all() == [None]
+    assert storage.get_entity('arch0')['status'] == 'new'
+    assert 'node' not in storage.get_entity('arch0')
+
+
+class _FailingModule(torch.nn.Module):
+    def forward(self, x):
+        raise RuntimeError('Export failure.')
+
+
+def test_remote_benchmark_objective_failed_export(tmp_path):
+    storage = LocalBenchmarkStorage(tmp_path)
+    storage.update_entity('arch1', {'status': 'complete', 'latency': 2.0})
+
+    objective = RemoteBenchmarkObjective((1, 4), storage, 'latency', max_retries=3, retry_interval=0.01)
+    objective.send(ArchaiModel(_FailingModule(), 'arch0'), None)
+    objective.send(ArchaiModel(torch.nn.Linear(4, 2), 'arch1'), None)
+
+    # Failed architectures do not abort the batch
+    assert objective.fetch_all() == [None, 2.0]
+    assert storage.get_entity('arch0') is None
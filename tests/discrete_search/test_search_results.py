@@ -0,0 +1,52 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+
+from archai.discrete_search import ArchaiModel, SearchResults
+from archai.discrete_search.utils.multi_objective import get_pareto_frontier
+
+
+class DummyObjective():
+    def __init__(self, higher_is_better: bool):
+        self.higher_is_better = higher_is_better
+
+
+def test_search_results_incremental_pareto_frontier(tmp_path):
+    rng = np.random.RandomState(0)
+    objectives = {'accuracy': DummyObjective(True), 'latency': DummyObjective(False)}
+    search_results = SearchResults(None, objectives)
+
+    all_models, all_results = [], {'accuracy': [], 'latency': []}
+
+    for it in range(5):
+        models = [ArchaiModel(None, f'{it}_{i}') for i in range(20)]
+        results = {obj_name: rng.randint(0, 10, size=20).astype(np.float64) for obj_name in objectives}
+        search_results.add_iteration_results(models, results, extra_model_data={'it': [it] * 20})
+
+        all_models += models
+        for obj_name in objectives:
+            all_results[obj_name].append(results[obj_name])
+
+        # Compares incremental archive with a full recomputation
+        expected = get_pareto_frontier(
+            all_models, {k: np.concatenate(v) for k, v in all_results.items()}, objectives
+        )
+        pareto = search_results.get_pareto_frontier()
+
+        assert list(pareto['indices']) == list(expected['indices'])
+        assert [m.archid for m in pareto['models']] == [m.archid for m in expected['models']]
+
+    # Partial frontiers are relative to `start_iteration`
+    pareto = search_results.get_pareto_frontier(start_iteration=2, end_iteration=4)
+    assert all(2 <= it < 4 for it in pareto['iteration_nums'])
+    assert all(m.archid == all_models[40 + idx].archid for m, idx in zip(pareto['models'], pareto['indices']))
+
+    state_df = search_results.get_search_state_df()
+    assert len(state_df) == 100
+    assert state_df['is_pareto'].sum() == len(search_results.get_pareto_frontier()['models'])
+    assert list(state_df['it']) == list(state_df['iteration_num'])
+    assert len(search_results.results) == 5
+
+    search_results.save_all_2d_pareto_evolution_plots(tmp_path)
+    assert (tmp_path / 'pareto_accuracy_vs_latency.png').exists()
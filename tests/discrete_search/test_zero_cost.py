@@ -0,0 +1,150 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import math
+
+import pytest
+import torch
+from overrides import overrides
+from torch import nn
+
+from archai.discrete_search import ArchaiModel, DatasetProvider
+from archai.discrete_search.objectives.zero_cost import (
+    BatchedZeroCostProxy, GradNorm, JacobianCovariance,
+    NtkConditionNumber, Snip, Synflow, get_prunable_weights
+)
+from archai.discrete_search.utils.evaluation import evaluate_models
+
+
+class RandomImageDataset(DatasetProvider):
+    def __init__(self, num_samples: int = 64):
+        self.num_samples = num_samples
+
+    @overrides
+    def get_train_val_datasets(self):
+        generator = torch.Generator().manual_seed(0)
+        dataset = torch.utils.data.TensorDataset(
+            torch.randn(self.num_samples, 3, 8, 8, generator=generator),
+            torch.randint(0, 10, (self.num_samples,), generator=generator)
+        )
+
+        return dataset, dataset
+
+
+def conv_model(channels: int) -> ArchaiModel:
+    arch = nn.Sequential(
+        nn.Conv2d(3, channels, 3, padding=1), nn.BatchNorm2d(channels), nn.ReLU(),
+        nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(channels, 10)
+    )
+
+    return ArchaiModel(arch, f'conv-{channels}')
+
+
+@pytest.fixture
+def models():
+    torch.manual_seed(0)
+    return [conv_model(c) for c in [2, 4, 8]]
+
+
+@pytest.mark.parametrize('proxy_cls', [GradNorm, Snip, Synflow, JacobianCovariance, NtkConditionNumber])
+def test_zero_cost_proxy(proxy_cls, models):
+    dataset = RandomImageDataset()
+    proxy = proxy_cls(batch_size=8, num_batches=2)
+
+    state_dicts = [{k: v.clone() for k, v in m.arch.state_dict().items()} for m in models]
+    scores = [proxy.evaluate(m, dataset) for m in models]
+
+    assert all(math.isfinite(s) for s in scores)
+
+    # Models are not modified
+    for m, state_dict in zip(models, state_dicts):
+        assert all(torch.equal(v, state_dict[k]) for k, v in m.arch.state_dict().items())
+        assert all(p.grad is None for p in m.arch.parameters())
+
+    # Batched and concurrent evaluations use the same minibatches
+    assert proxy.evaluate_batch(models, dataset) == pytest.approx(scores)
+
+    proxy.max_workers = 2
+    assert proxy.evaluate_batch(models, dataset) == pytest.approx(scores)
+
+
+def test_synflow_linear():
+    # Synflow of a linear layer with an all-ones input is the sum of its absolute weights
+    model = ArchaiModel(nn.Sequential(nn.Flatten(), nn.Linear(3 * 8 * 8, 10, bias=False)), 'linear')
+    score = Synflow(batch_size=8).evaluate(model, RandomImageDataset())
+
+    assert score == pytest.approx(model.arch[1].weight.abs().sum().item())
+
+
+def test_ntk_condition_number():
+    torch.manual_seed(0)
+    model = conv_model(4)
+
+    proxy = NtkConditionNumber(batch_size=8, ntk_batch_size=4)
+    x, _ = proxy.get_batches(RandomImageDataset())[0]
+
+    # Reference kernel computed from the full Jacobian of the logits
+    arch = model.arch.train()
+    weights = get_prunable_weights(arch)
+    names = [n for n, p in arch.named_parameters() if any(p is w for w in weights)]
+
+    def summed_logits(*w):
+        return torch.func.functional_call(arch, dict(zip(names, w)), (x[:4],)).sum(dim=1)
+
+    jacobian = torch.autograd.functional.jacobian(summed_logits, tuple(weights))
+    grads = torch.cat([j.reshape(4, -1) for j in jacobian], dim=1).double()
+    eigvals = torch.linalg.eigvalsh(grads @ grads.t())
+
+    assert proxy.evaluate(model, RandomImageDataset()) == pytest.approx((eigvals[-1] / eigvals[0]).item())
+
+
+def test_get_batches():
+    dataset = RandomImageDataset(num_samples=32)
+    proxy = GradNorm(batch_size=8, num_batches=2, max_cached_datasets=1)
+
+    batches = proxy.get_batches(dataset)
+    assert len(batches) == 2 and batches[0][0].shape == (8, 3, 8, 8)
+
+    # Budget scales the number of minibatches, reusing the cached ones
+    assert len(proxy.get_batches(dataset, num_batches=4)) == 4
+    assert torch.equal(proxy.get_batches(dataset, num_batches=4)[0][0], batches[0][0])
+
+    proxy.get_batches(RandomImageDataset(num_samples=16))
+    assert len(proxy._batches) == 1
+
+    with pytest.raises(ValueError):
+        proxy.get_batches(dataset, num_batches=5)
+
+
+def test_batched_zero_cost_proxy(models):
+    dataset = RandomImageDataset()
+    proxy = Snip(batch_size=8)
+
+    results = evaluate_models(
+        models, {'snip': BatchedZeroCostProxy(proxy), 'snip_sync': proxy}, dataset,
+        budgets={'snip': [None, 2.0, None]}
+    )
+
+    assert list(results['snip'][[0, 2]]) == pytest.approx(list(results['snip_sync'][[0, 2]]))
+    assert results['snip'][1] == pytest.approx(proxy.evaluate(models[1], dataset, budget=2.0))
+
+
+class TensorImageDataset(DatasetProvider):
+    def __init__(self, x: torch.Tensor):
+        self.x = x
+
+    @overrides
+    def get_train_val_datasets(self):
+        dataset = torch.utils.data.TensorDataset(self.x, torch.zeros(len(self.x), dtype=torch.long))
+        return dataset, dataset
+
+
+def test_get_batches_non_serializable_provider():
+    proxy = GradNorm(batch_size=8)
+
+    # Providers without a fingerprint do not share minibatches
+    with pytest.warns(UserWarning):
+        zeros_batch = proxy.get_batches(TensorImageDataset(torch.zeros(8, 3, 8, 8)))[0][0]
+        ones_batch = proxy.get_batches(TensorImageDataset(torch.ones(8, 3, 8, 8)))[0][0]
+
+    assert zeros_batch.sum() == 0 and ones_batch.sum() == ones_batch.numel()
@@ -0,0 +1,103 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+import torch
+
+from archai.nlp.datasets.nvidia.lm_iterators import (
+    LMMultiFileIterator,
+    LMOrderedIterator,
+)
+from archai.nlp.datasets.nvidia.tokenizer_utils.word_vocab import WordVocab
+
+
+def _reference_batches(input_ids, bsz, bptt, mem_len, ext_len, seeds):
+    # In-memory implementation that `LMOrderedIterator` should reproduce
+    n_step = input_ids.size(0) // bsz
+    data = input_ids[: n_step * bsz].view(bsz, -1).contiguous()
+
+    warmup_elems = 0
+    if mem_len:
+        warmup_elems = ((mem_len + bptt - 1) // bptt) * bptt
+        warmup_ids = data.roll((warmup_elems, 1), (1, 0))[:, :warmup_elems]
+        data = torch.cat((warmup_ids, data), dim=-1)
+
+    for seed in seeds:
+        rng = torch.Generator()
+        rng.manual_seed(seed)
+
+        for i in range(data.size(0)):
+            shift = torch.randint(0, data.size(1), (1,), generator=rng)
+            row = data[i, :]
+            data[i, :] = torch.cat((row[shift:], row[:shift]))
+
+    batches = []
+    for i in range(0, data.size(1) - 1, bptt):
+        seq_len = min(bptt, data.size(1) - 1 - i)
+        start_idx = max(0, i - ext_len)
+        batches.append((data[:, start_idx : i + seq_len], data[:, i + 1 : i + 1 + seq_len], seq_len))
+
+    return batches
+
+
+@pytest.mark.parametrize(
+    "bsz,bptt,mem_len,ext_len,seeds",
+    [(4, 8, 0, 0, []), (3, 7, 16, 0, [0]), (5, 6, 10, 3, [1, 2]), (2, 4, 400, 0, [3])],
+)
+def test_lm_ordered_iterator(tmp_path, bsz, bptt, mem_len, ext_len, seeds):
+    input_ids = torch.randint(0, 1000, (503,))
+
+    # Tensors and memory-mapped arrays should produce the same batches
+    np.save(tmp_path / "train.npy", input_ids.numpy().astype(np.uint16))
+    memmap_ids = np.load(tmp_path / "train.npy", mmap_mode="r")
+
+    expected = _reference_batches(input_ids.clone(), bsz, bptt, mem_len, ext_len, seeds)
+
+    for data in [input_ids, memmap_ids]:
+        iterator = LMOrderedIterator(data, bsz, bptt, mem_len=mem_len, ext_len=ext_len)
+        for seed in seeds:
+            iterator.roll(seed)
+
+        batches = list(iterator)
+        assert len(batches) == len(expected)
+
+        for (inputs, labels, seq_len, _), (exp_inputs, exp_labels, exp_seq_len) in zip(batches, expected):
+            assert seq_len == exp_seq_len
+            assert inputs.dtype == torch.int64
+            assert torch.equal(inputs, exp_inputs)
+            assert torch.equal(labels, exp_labels)
+
+
+def test_lm_multi_file_iterator(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"train_{i}.txt"
+        path.write_text("\n".join(f"file {i} line {j} " + "word " * (j % 5) for j in range(200)), encoding="utf-8")
+        paths.append(str(path))
+
+    vocab = WordVocab(str(tmp_path))
+    vocab.train(paths)
+
+    bsz, bptt, n_chunks = 3, 5, 2
+    iterator = LMMultiFileIterator(paths, vocab, bsz, bptt, n_chunks=n_chunks)
+
+    # Each row is filled with consecutive spans of `bptt + 1` tokens
+    expected = []
+    for path in paths:
+        for chunk in torch.chunk(vocab.encode_file(path, num_workers=1), n_chunks):
+            tokens = iter(chunk.tolist())
+            while True:
+                try:
+                    rows = [[next(tokens) for _ in range(bptt + 1)] for _ in range(bsz)]
+                except StopIteration:
+                    break
+                expected.append(torch.LongTensor(rows))
+
+    batches = list(iterator)
+    assert len(batches) == len(expected)
+
+    for (inputs, labels, seq_len, _), exp_rows in zip(batches, expected):
+        assert seq_len == bptt
+        assert torch.equal(inputs, exp_rows[:, :-1])
+        assert torch.equal(labels, exp_rows[:, 1:])
@@ -0,0 +1,48 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+import torch
+
+from archai.nlp.datasets.nvidia.tokenizer_utils.bbpe_vocab import BbpeVocab
+from archai.nlp.datasets.nvidia.tokenizer_utils.word_vocab import WordVocab
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    lines = [f"line {i} with some wörds and {'repeated ' * (i % 7)}tokens" for i in range(500)]
+    lines[10] = ""
+
+    text_file = tmp_path / "train.txt"
+    text_file.write_bytes("\r\n".join(lines).encode("utf-8"))
+
+    return str(text_file)
+
+
+def _encode_lines(vocab, path):
+    encoded = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            encoded.extend(vocab.encode_text(line))
+
+    return torch.LongTensor(encoded)
+
+
+@pytest.mark.parametrize("vocab_cls", [WordVocab, BbpeVocab])
+def test_encode_file(tmp_path, text_file, vocab_cls):
+    vocab = vocab_cls(str(tmp_path / "vocab"), vocab_size=300) if vocab_cls == BbpeVocab else vocab_cls(str(tmp_path))
+    vocab.train([text_file])
+
+    expected = _encode_lines(vocab, text_file)
+    assert len(expected) > 0
+
+    for num_workers in [1, 2]:
+        encoded = vocab.encode_file(text_file, num_workers=num_workers, chunk_size=1000)
+        assert encoded.dtype == torch.int64
+        assert torch.equal(encoded, expected)
+
+    output_path = str(tmp_path / "train.npy")
+    encoded = vocab.encode_file(text_file, num_workers=2, chunk_size=1000, output_path=output_path, dtype=np.uint16)
+    assert isinstance(encoded, np.memmap)
+    assert np.array_equal(encoded, expected.numpy())
@@ -0,0 +1,107 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+import torch.nn.functional as F
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from archai.nlp.eval.harness.harness_eval import evaluate
+from archai.nlp.eval.harness.harness_model import HarnessModel
+from archai.nlp.eval.harness.harness_utils import call_factory
+
+WORDS = ["<eos>", "<unk>"] + [f"w{i}" for i in range(30)]
+
+
+@pytest.fixture
+def tokenizer():
+    tokenizer = Tokenizer(WordLevel({word: i for i, word in enumerate(WORDS)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = Whitespace()
+
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>", unk_token="<unk>")
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(WORDS), n_positions=16, n_layer=2, n_embd=32, n_head=4)
+
+    return GPT2LMHeadModel(config=config).eval()
+
+
+def _reference_log_likelihood(model, tokenizer, context, target):
+    # Unbatched implementation with a forward pass per request
+    context = context or tokenizer.eos_token
+    encoded_context = tokenizer(context, add_special_tokens=False, return_tensors="pt").input_ids
+    encoded_target = tokenizer(target, add_special_tokens=False, return_tensors="pt").input_ids
+
+    input_ids = torch.cat((encoded_context, encoded_target), dim=1)[:, -(model.config.n_positions + 1) :]
+    input_ids = input_ids[:, :-1]
+    sequence_length, target_length = input_ids.shape[-1], encoded_target.shape[-1]
+
+    with torch.no_grad():
+        probs = F.log_softmax(model(input_ids=input_ids).logits, dim=-1)
+    probs = probs[:, sequence_length - target_length : sequence_length, :]
+    target_probs = torch.gather(probs, 2, encoded_target.unsqueeze(-1)).squeeze(-1)
+
+    return float(target_probs.sum()), bool((probs.argmax(dim=-1) == encoded_target).all())
+
+
+@pytest.mark.parametrize("share_context", [True, False])
+def test_harness_model_log_likelihood_batch(model, tokenizer, share_context):
+    contexts = ["w1 w2 w3", "", "w4", " ".join(f"w{i % 30}" for i in range(20))]
+    targets = [" w5", " w6 w7", " w8 w9 w10", " w11"]
+    requests = [(context, target) for context in contexts for target in targets]
+
+    expected = [_reference_log_likelihood(model, tokenizer, context, target) for context, target in requests]
+
+    harness_model = HarnessModel(model, tokenizer, batch_size=3, share_context=share_context)
+    outputs = harness_model.log_likelihood_batch(requests)
+
+    for (log_likelihood, is_exact_match), (exp_log_likelihood, exp_is_exact_match) in zip(outputs, expected):
+        assert log_likelihood == pytest.approx(exp_log_likelihood, abs=1e-4)
+        assert is_exact_match == exp_is_exact_match
+
+    # Assert that scheduled calls return the same outputs as individual calls
+    calls = [call_factory.log_likelihood(context, target) for context, target in requests[:4]]
+    calls.append(call_factory.log_likelihood(*requests[4], return_exact_match=True))
+    results = harness_model.run_calls(calls)
+
+    assert results[:4] == pytest.approx([output[0] for output in outputs[:4]], abs=1e-4)
+    assert results[4][0] == pytest.approx(harness_model.log_likelihood(*requests[4]), abs=1e-4)
+
+
+class _LogLikelihoodTask:
+    # Minimal task that records the log-likelihood of each sample
+    has_test_set = True
+    test_set = [("w1 w2", " w3"), ("w4", " w5 w6"), ("", " w7")]
+    config = {}
+
+    def __init__(self):
+        self.results = []
+
+    def create_context(self, sample, n_few_shot=0, description=None):
+        return sample[0]
+
+    def create_sampling_calls(self, sample, context):
+        return call_factory.log_likelihood(context, sample[1])
+
+    def compute_results(self, sample, results):
+        self.results.append(results[0])
+
+    def compute_metrics(self):
+        return {}
+
+
+def test_evaluate_batch_size(model, tokenizer):
+    harness_model = HarnessModel(model, tokenizer, batch_size=3)
+
+    task = _LogLikelihoodTask()
+    evaluate(harness_model, task, batch_size=1)
+
+    # Overridden batch size is only used during the evaluation
+    assert harness_model.batch_size == 3
+    assert task.results == pytest.approx([harness_model.log_likelihood(*sample) for sample in task.test_set], abs=1e-4)
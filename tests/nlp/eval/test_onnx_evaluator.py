@@ -0,0 +1,38 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from archai.nlp.eval.onnx_evaluator import generate, manual_evaluate
+from archai.nlp.onnx.export import export_to_onnx
+from archai.nlp.onnx.onnx_loader import load_from_onnx
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return GPT2LMHeadModel(config=GPT2Config(vocab_size=128, n_layer=2, n_embd=32, n_head=4)).eval()
+
+
+@pytest.mark.parametrize("use_past", [True, False])
+def test_generate(tmp_path, model, use_past):
+    input_ids = torch.randint(0, 128, (3, 4))
+    with torch.no_grad():
+        expected = model.generate(input_ids, max_length=14, do_sample=False, pad_token_id=0)
+
+    onnx_model_path = str(tmp_path / "model.onnx")
+    export_to_onnx(model, onnx_model_path, use_past=use_past, share_weights=False)
+    session = load_from_onnx(onnx_model_path)
+
+    # Assert that incremental and full decoding match the PyTorch greedy search
+    outputs = generate(session, input_ids=input_ids, max_length=10)
+    assert torch.equal(outputs, expected)
+
+    # Assert that the acc@n accuracies are calculated from a single generation
+    eval_dataset = [{"input_ids": ids, "labels": ids} for ids in expected]
+    eval_outputs = manual_evaluate(session, eval_dataset, batch_size=2, n_seed_tokens=4, n_accuracy_type=3)
+    assert eval_outputs["eval_acc"] == {"acc@1": 1.0, "acc@2": 1.0, "acc@3": 1.0}
+    assert eval_outputs["eval_loss"] is None
+    assert eval_outputs["eval_generated_tokens_per_second"] > 0
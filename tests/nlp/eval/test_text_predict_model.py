@@ -0,0 +1,89 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pytest
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from archai.nlp.eval.text_predict.text_predict_model import (
+    TextPredictONNXModel,
+    TextPredictTorchModel,
+)
+from archai.nlp.eval.text_predict.text_predict_utils import LRUCache
+from archai.nlp.onnx.export import export_to_onnx
+
+
+@pytest.fixture
+def onnx_model_path(tmp_path):
+    torch.manual_seed(0)
+
+    config = GPT2Config(vocab_size=128, n_layer=2, n_embd=32, n_head=4)
+    model = GPT2LMHeadModel(config=config).eval()
+
+    onnx_model_path = str(tmp_path / "model.onnx")
+    export_to_onnx(model, onnx_model_path, task="causal-lm-all-positions", use_past=True, share_weights=False)
+
+    # `TextPredictONNXModel` loads the configuration from the model's folder
+    config.d_head = config.n_embd // config.n_head
+    config.save_pretrained(str(tmp_path))
+
+    return onnx_model_path
+
+
+def test_text_predict_onnx_model_get_losses(onnx_model_path):
+    model = TextPredictONNXModel(onnx_model_path, space_token_id=1, max_seq_length=8, loss_batch_size=3)
+    assert model.all_positions
+
+    rng = np.random.default_rng(0)
+    sequences = [tuple(rng.integers(0, 128, size=n).tolist()) for n in [0, 1, 5, 8, 13, 20]]
+
+    # Assert that the batched losses match scoring one token per forward pass
+    losses = model.get_losses(sequences)
+    assert losses[0] == 0.0
+
+    for input_ids, loss in zip(sequences[1:], losses[1:]):
+        expected = []
+        for i, token in enumerate(input_ids):
+            probs = model.get_next_token_probs((model.space_token_id,) + input_ids[:i])
+            expected.append(-np.log(probs[token]))
+
+        assert loss == pytest.approx(np.mean(expected), rel=1e-5)
+
+    assert model.get_loss(sequences[2]) == pytest.approx(losses[2], rel=1e-6)
+
+
+def test_text_predict_torch_model_get_next_token_probs_batch():
+    torch.manual_seed(0)
+
+    config = GPT2Config(vocab_size=128, n_layer=2, n_embd=32, n_head=4)
+    model = TextPredictTorchModel(GPT2LMHeadModel(config=config).eval(), space_token_id=1, max_seq_length=8)
+
+    rng = np.random.default_rng(0)
+    sequences = [tuple(rng.integers(0, 128, size=n).tolist()) for n in [0, 3, 8, 13]]
+
+    # Assert that the batched probabilities match one forward pass per sequence
+    probs = model.get_next_token_probs_batch(sequences)
+
+    for input_ids, seq_probs in zip(sequences, probs):
+        with torch.no_grad():
+            logits = model.model(model._create_fixed_length_tensor(input_ids)).logits[0, -1]
+
+        assert seq_probs.sum() == pytest.approx(1.0, rel=1e-5)
+        np.testing.assert_allclose(seq_probs, torch.softmax(logits, dim=-1).numpy(), rtol=1e-4, atol=1e-6)
+
+
+def test_lru_cache_maxbytes():
+    cache = LRUCache(maxsize=10, maxbytes=3 * 80)
+    for i in range(5):
+        cache[(i,)] = [np.zeros(10), np.zeros(0)]
+
+    # Assert that the least-recently used values are evicted when exceeding `maxbytes`
+    assert list(cache.keys()) == [(2,), (3,), (4,)]
+    assert cache.nbytes == 3 * 80
+
+    del cache[(2,)]
+    assert cache.nbytes == 2 * 80
+
+    cache.clear()
+    assert cache.nbytes == 0
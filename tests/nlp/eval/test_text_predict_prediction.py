@@ -0,0 +1,121 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from archai.nlp.eval.text_predict.text_predict_prediction import (
+    TextPredictionPosition,
+    TextPredictionSequence,
+    calculate_threshold_curve,
+)
+
+
+def _legacy_triggered_predictions(min_score, predictions_df):
+    # Row-by-row implementation that the vectorized scoring should reproduce
+    triggered_predictions = []
+    line_id, char_id = -1, -1
+    triggered = np.full((len(predictions_df.index),), -1)
+
+    score_values = predictions_df["Score"].values
+    for i in range(predictions_df.shape[0]):
+        if score_values[i] < min_score:
+            continue
+
+        triggered[i] = 0
+        if predictions_df["Line"][i] > line_id or predictions_df["Char"][i] > char_id:
+            d = predictions_df.iloc[i].to_dict()
+
+            line_id = d["Line"]
+            char_id = d["Char"] + d["LastMatchChar"]
+
+            triggered_predictions.append(d)
+            triggered[i] = 1
+
+    return pd.DataFrame(triggered_predictions), triggered
+
+
+def _get_predictions_df(n_lines, n_chars, sort):
+    rng = np.random.default_rng(0)
+
+    lines = np.repeat(np.arange(n_lines), n_chars)
+    chars = np.tile(np.arange(n_chars), n_lines)
+    if not sort:
+        # Characters of a line are out of order, which is handled sequentially
+        chars = rng.permutation(chars.reshape(n_lines, n_chars).T).T.ravel()
+
+    length = rng.integers(1, 15, size=len(lines))
+    match = rng.random(len(lines)) < 0.4
+
+    return pd.DataFrame(
+        {
+            "Line": lines,
+            "Char": chars,
+            "Score": np.round(rng.random(len(lines)) * 5, 2),
+            "Length": length,
+            "Match": match,
+            "LastMatchChar": np.where(match, length, rng.integers(0, 4, size=len(lines))),
+            "PAcceptGivenMatch": rng.random(len(lines)),
+            "Type": rng.choice(["0:XS", "1:S", "2:M"], size=len(lines)),
+        }
+    )
+
+
+@pytest.mark.parametrize("sort", [True, False])
+def test_calculate_triggered_predictions(sort):
+    predictions_df = _get_predictions_df(20, 50, sort)
+    legacy_predictions_df = predictions_df.copy()
+
+    sequence = TextPredictionSequence()
+    min_scores = [0.0, 1.0, 2.5, 4.9, 5.1]
+
+    for min_score in min_scores:
+        triggered_df = sequence.calculate_triggered_predictions(min_score, predictions_df)
+        expected_df, expected_triggered = _legacy_triggered_predictions(min_score, legacy_predictions_df)
+        legacy_predictions_df[f"Trigger: {min_score}"] = expected_triggered
+
+        assert np.array_equal(predictions_df[f"Trigger: {min_score}"].values, expected_triggered)
+        assert len(triggered_df.index) == len(expected_df.index)
+        if len(expected_df.index):
+            pd.testing.assert_frame_equal(triggered_df, expected_df, check_dtype=False)
+
+    # Assert that the threshold curve matches the statistics of legacy triggered predictions
+    curve_df = calculate_threshold_curve(predictions_df, min_scores)
+    assert curve_df["Score"].tolist() == min_scores
+
+    for min_score, row in zip(min_scores, curve_df.to_dict("records")):
+        expected_df, _ = _legacy_triggered_predictions(min_score, legacy_predictions_df)
+        n_shown = len(expected_df.index)
+        assert row["SuggestionsShown"] == n_shown
+
+        if n_shown:
+            match = expected_df["Match"].astype(float)
+            accept = match * expected_df["PAcceptGivenMatch"]
+
+            assert row["SuggestionsMatched"] == int(np.sum(match))
+            assert row["SuggestionsAccepted"] == int(np.sum(accept))
+            assert row["MatchRate"] == pytest.approx(np.mean(match))
+            assert row["AcceptRate"] == pytest.approx(np.mean(accept))
+            assert row["CharMatched"] == int(np.sum(match * expected_df["Length"]))
+            assert row["CharAccepted"] == int(np.sum(accept * expected_df["Length"]))
+            assert row["CharMatchRate"] == pytest.approx(row["CharMatched"] / len(predictions_df.index))
+        else:
+            assert row["SuggestionsMatched"] == 0 and row["MatchRate"] == 0
+
+
+def test_score_triggered_predictions_no_suggestions():
+    predictions_df = _get_predictions_df(2, 10, True)
+
+    sequence = TextPredictionSequence()
+    sequence["0-1"] = TextPredictionPosition(line_id=0, char_id=1, body="Hello", body_continued=" world")
+    sequence.perplexity = 1.0
+
+    # Assert that scoring without triggered predictions yields zero counts and rates
+    triggered_df = sequence.calculate_triggered_predictions(5.1, predictions_df)
+    summary = sequence.score_triggered_predictions(triggered_df, None, None, min_score=5.1)
+
+    assert summary["SuggestionsShown"] == 0
+    assert summary["SuggestionsMatched"] == 0 and summary["SuggestionsAccepted"] == 0
+    assert summary["MatchRate"] == 0 and summary["AcceptRate"] == 0
+    assert summary["CharMatched"] == 0 and summary["CharAccepted"] == 0
@@ -0,0 +1,86 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+from tokenizers import ByteLevelBPETokenizer
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from archai.nlp.eval.text_predict.text_predict_model import TextPredictONNXModel
+from archai.nlp.eval.text_predict.text_predict_prediction import TextPredictionSequence
+from archai.nlp.eval.text_predict.text_predict_predictor import Predictor
+from archai.nlp.eval.text_predict.text_predict_tokenizer import TextPredictTokenizer
+from archai.nlp.onnx.export import export_to_onnx
+
+TEXT = "the quick brown fox jumps over the lazy dog and then the quick brown fox sleeps. "
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    tokenizer = ByteLevelBPETokenizer()
+    tokenizer.train_from_iterator([TEXT] * 10, vocab_size=300, special_tokens=["<|endoftext|>"])
+
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<|endoftext|>")
+
+
+@pytest.fixture(scope="module")
+def onnx_model_path(tmp_path_factory, tokenizer):
+    torch.manual_seed(0)
+    tmp_path = tmp_path_factory.mktemp("model")
+
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=64, n_layer=2, n_embd=64, n_head=4)
+    model = GPT2LMHeadModel(config=config)
+
+    # Fits the repeated text, so predictions are confident enough to be triggered
+    input_ids = torch.tensor(tokenizer.encode(TEXT * 4)[:64]).unsqueeze(0)
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-2)
+    for _ in range(50):
+        loss = model(input_ids=input_ids, labels=input_ids).loss
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+
+    onnx_model_path = str(tmp_path / "model.onnx")
+    export_to_onnx(model.eval(), onnx_model_path, task="causal-lm-all-positions", use_past=True, share_weights=False)
+
+    config.d_head = config.n_embd // config.n_head
+    config.save_pretrained(str(tmp_path))
+
+    return onnx_model_path
+
+
+def test_text_predict_tokenizer_filter_tokens(tokenizer):
+    tp_tokenizer = TextPredictTokenizer(tokenizer)
+
+    for prefix in ["", " ", " qu", "quick", " brown fox", "ox", "zzz", "the"]:
+        filter_prefix = "Ġ" + prefix[1:] if prefix.startswith(" ") else prefix
+
+        # Assert that the trie finds the same tokens as scanning the vocabulary
+        expected = {
+            idx
+            for token, idx in tokenizer.vocab.items()
+            if token[: min(len(token), len(filter_prefix))] == filter_prefix[: min(len(token), len(filter_prefix))]
+        }
+        assert sorted(tp_tokenizer.filter_tokens(prefix).tolist()) == sorted(expected)
+
+
+def test_predictor_predict_batch(tmp_path, tokenizer, onnx_model_path):
+    text_file_path = tmp_path / "text.txt"
+    text_file_path.write_text(TEXT * 2 + "\n\n" + TEXT, encoding="utf-8")
+
+    space_token_id = tokenizer.encode(" ")[0]
+    tp_tokenizer = TextPredictTokenizer(tokenizer)
+
+    predictions = []
+    for batch_size in [1, 16]:
+        tp_model = TextPredictONNXModel(onnx_model_path, space_token_id, max_seq_length=32)
+        predictor = Predictor(tp_model, tp_tokenizer, min_pred_length=2)
+
+        sequence = TextPredictionSequence.from_file(str(text_file_path), min_pred_length=2, min_score=0.0)
+        predictor.predict(sequence, batch_size=batch_size)
+
+        predictions.append([(pos.prediction.text if pos.prediction else None) for pos in sequence.values()])
+
+    # Assert that batched predictions match the serial predictions
+    assert predictions[0] == predictions[1]
+    assert sum(prediction is not None for prediction in predictions[0]) > 0
@@ -0,0 +1,62 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import math
+
+import pytest
+import torch
+from packaging import version
+
+from archai.discrete_search.utils.evaluation import evaluate_models
+from archai.nlp.objectives.supernet_perplexity import TransformerFlexSuperNetPerplexity
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.supernet_gpt2_flex import (
+    GPT2FlexSuperNetLMHeadModel,
+)
+from archai.nlp.search_spaces.transformer_flex.search_space import (
+    TransformerFlexSearchSpace,
+)
+
+# Super-networks are only tested with PyTorch >= 2.0 (`meta` device and `torch.func`)
+pytestmark = pytest.mark.skipif(
+    version.parse(torch.__version__) < version.parse("2.0"), reason="Super-networks require PyTorch >= 2.0."
+)
+
+
+def test_transformer_flex_supernet_perplexity():
+    torch.manual_seed(0)
+    search_space = TransformerFlexSearchSpace(
+        "gpt2-flex",
+        min_layers=1,
+        max_layers=3,
+        d_inner_options=[32, 64],
+        d_model_options=[16, 32],
+        n_head_options=[2, 4],
+        share_d_inner=False,
+        vocab_size=64,
+        max_sequence_length=16,
+    )
+
+    largest_config = search_space.get_largest_config()
+    assert largest_config["n_layer"] == 3 and largest_config["d_model"] == 32 and largest_config["d_inner"] == [64] * 3
+    assert search_space.get_smallest_config()["d_inner"] == [32] * 3
+
+    supernet = GPT2FlexSuperNetLMHeadModel(search_space._load_config(largest_config))
+    input_ids = torch.randint(0, 64, (5, 16))
+    objective = TransformerFlexSuperNetPerplexity(search_space, supernet, input_ids, batch_size=2, device="cpu")
+
+    # Perplexity of the sub-network matches the perplexity of the extracted model
+    arch = search_space.random_sample()
+    sub_model = supernet.extract(search_space._load_config(arch.metadata["config"]))
+
+    with torch.no_grad():
+        expected_ppl = math.exp(sub_model(input_ids, labels=input_ids).loss.item())
+
+    assert math.isclose(objective.evaluate(arch, None), expected_ppl, rel_tol=1e-4)
+    assert supernet.sub_config is None and supernet.training
+
+    # Concurrent evaluations do not interfere with each other
+    archs = [search_space.random_sample() for _ in range(6)]
+    serial_results = evaluate_models(archs, {"ppl": objective}, None)["ppl"]
+    thread_results = evaluate_models(archs, {"ppl": objective}, None, executor="thread", max_workers=3)["ppl"]
+
+    assert list(thread_results) == list(serial_results)
@@ -13,6 +13,7 @@ from archai.nlp.quantization.qat import (
     float_to_qat_modules,
     prepare_with_qat,
     qat_to_float_modules,
+    qat_to_float_state_dict,
 )
 
 
@@ -39,6 +40,19 @@ def test_qat_to_float_modules(model):
     assert isinstance(model.linear, torch.nn.Linear)
 
 
+def test_qat_to_float_state_dict(model):
+    # Assert that converting the state is equivalent to converting a copy of the model
+    prepare_with_qat(model, onnx_compatible=True)
+    float_model = copy.deepcopy(model)
+    qat_to_float_modules(float_model)
+
+    state_dict = qat_to_float_state_dict(model, {k: v.clone() for k, v in model.state_dict().items()})
+    float_state_dict = float_model.state_dict()
+    assert state_dict.keys() == float_state_dict.keys()
+    for key in state_dict:
+        assert torch.equal(state_dict[key], float_state_dict[key])
+
+
 def test_prepare_with_qat(model):
     # Assert normal QAT preparation
     model_copy = copy.deepcopy(model)
@@ -0,0 +1,70 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+from packaging import version
+
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.configuration_gpt2_flex import (
+    GPT2FlexConfig,
+)
+from archai.nlp.search_spaces.transformer_flex.models.gpt2_flex.supernet_gpt2_flex import (
+    GPT2FlexSuperNetLMHeadModel,
+)
+
+# Super-networks are only tested with PyTorch >= 2.0 (`meta` device and `torch.func`)
+pytestmark = pytest.mark.skipif(
+    version.parse(torch.__version__) < version.parse("2.0"), reason="Super-networks require PyTorch >= 2.0."
+)
+
+
+@pytest.fixture
+def supernet():
+    torch.manual_seed(0)
+    config = GPT2FlexConfig(vocab_size=128, n_positions=32, n_embd=64, n_layer=4, n_head=8, n_inner=[128, 128, 96, 128])
+
+    return GPT2FlexSuperNetLMHeadModel(config).eval()
+
+
+@pytest.fixture
+def sub_config():
+    return GPT2FlexConfig(vocab_size=128, n_positions=32, n_embd=32, n_layer=2, n_head=[2, 4], n_inner=[64, 96])
+
+
+def test_gpt2_flex_supernet_sub_network(supernet, sub_config):
+    input_ids = torch.randint(0, 128, (2, 16))
+
+    # Sub-networks computed by the super-network match the extracted sub-networks
+    supernet.set_sub_config(sub_config)
+    output = supernet(input_ids, labels=input_ids)
+
+    sub_model = supernet.extract(sub_config)
+    sub_output = sub_model(input_ids, labels=input_ids)
+
+    assert sub_model.transformer.h[1].mlp.c_fc.weight.shape == (32, 96)
+    assert sub_model.lm_head.weight is sub_model.transformer.wte.weight
+    assert torch.allclose(output.logits, sub_output.logits, atol=1e-5)
+    assert torch.allclose(output.loss, sub_output.loss, atol=1e-5)
+
+    # Gradients only reach the weights of the sub-network
+    output.loss.backward()
+
+    c_fc_grad = supernet.transformer.h[0].mlp.c_fc.weight.grad
+    assert c_fc_grad[:32, :64].abs().sum() > 0
+    assert c_fc_grad[32:].abs().sum() == 0 and c_fc_grad[:, 64:].abs().sum() == 0
+    assert supernet.transformer.h[2].mlp.c_fc.weight.grad is None
+
+    # Super-network is the largest sub-network
+    supernet.set_sub_config(None)
+    assert torch.allclose(supernet.sub_forward(sub_config, input_ids=input_ids).logits, output.logits, atol=1e-5)
+    assert supernet.sub_config is None
+
+    assert torch.allclose(supernet(input_ids).logits, supernet.extract(supernet.config)(input_ids).logits, atol=1e-5)
+
+
+def test_gpt2_flex_supernet_invalid_sub_config(supernet):
+    with pytest.raises(ValueError):
+        supernet.set_sub_config(GPT2FlexConfig(vocab_size=128, n_positions=32, n_embd=64, n_layer=5, n_head=8))
+
+    with pytest.raises(ValueError):
+        supernet.set_sub_config(GPT2FlexConfig(vocab_size=128, n_positions=32, n_embd=64, n_layer=3, n_inner=256))
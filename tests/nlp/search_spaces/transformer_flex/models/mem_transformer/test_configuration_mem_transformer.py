@@ -15,3 +15,5 @@ def test_mem_transformer_config():
     assert not config.primer_square
     assert not config.fp16
     assert not config.use_cache
+    assert config.attn_impl == "eager"
+    assert config.attn_chunk_size == 128
@@ -0,0 +1,47 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import torch
+
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.adaptive_embedding import (
+    AdaptiveEmbedding,
+)
+
+
+def _expected_embeddings(emb, inputs):
+    embeds = []
+    for token in inputs.view(-1).tolist():
+        i = sum(token >= c for c in emb.cutoffs[:-1])
+        embed = emb.emb_layers[i].weight[token - emb.cutoffs_ends[i]] @ emb.emb_projs[i].t()
+        embeds.append(embed * emb.emb_scale)
+
+    return torch.stack(embeds).view(inputs.size() + (emb.d_model,))
+
+
+def test_adaptive_embedding():
+    torch.manual_seed(0)
+
+    emb = AdaptiveEmbedding(64, 16, 8, [8, 24], div_val=2)
+    for p in emb.parameters():
+        torch.nn.init.normal_(p)
+
+    inputs = torch.randint(0, 64, (3, 10))
+    expected_embeds = _expected_embeddings(emb, inputs)
+
+    # Grouped by cluster when computing gradients
+    embeds = emb(inputs)
+    assert embeds.requires_grad
+    assert torch.allclose(embeds, expected_embeds, atol=1e-5)
+
+    # Single gather over the packed table otherwise
+    with torch.no_grad():
+        assert torch.allclose(emb(inputs), expected_embeds, atol=1e-5)
+
+        # Packed table is rebuilt when the parameters change
+        emb.emb_projs[1].mul_(2)
+        assert torch.allclose(emb(inputs), _expected_embeddings(emb, inputs), atol=1e-5)
+
+    # Tables larger than `max_packed_size` are not packed
+    emb.max_packed_size = 0
+    with torch.no_grad():
+        assert torch.allclose(emb(inputs), _expected_embeddings(emb, inputs), atol=1e-5)
@@ -0,0 +1,69 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.projected_adaptive_log_softmax import (
+    ProjectedAdaptiveLogSoftmax,
+)
+
+
+@pytest.fixture(params=[1, 2])
+def crit(request):
+    torch.manual_seed(0)
+
+    div_val = request.param
+    crit = ProjectedAdaptiveLogSoftmax(64, 16, 8, [8, 24], [False] * 3, emb_projs=[], div_val=div_val)
+    for p in crit.parameters():
+        torch.nn.init.normal_(p)
+
+    return crit
+
+
+def test_projected_adaptive_log_softmax_labels(crit):
+    inputs = torch.randn(3, 10, crit.d_model, requires_grad=True)
+    labels = torch.randint(0, crit.vocab_size, (3, 10))
+    labels[0, 4] = -100
+
+    # Losses of labels match the full log-probabilities of the next tokens
+    log_probs = crit(inputs[:, :-1].contiguous())
+    expected_nll = -log_probs.gather(1, labels[:, 1:].clamp(min=0).reshape(-1, 1)).squeeze(1)
+    expected_nll = expected_nll.masked_fill(labels[:, 1:].reshape(-1) < 0, 0)
+
+    nll = crit(inputs, labels)
+    assert torch.allclose(nll, expected_nll, atol=1e-5)
+
+    grads = torch.autograd.grad(nll.sum(), [inputs] + list(crit.parameters()))
+    expected_grads = torch.autograd.grad(expected_nll.sum(), [inputs] + list(crit.parameters()))
+    assert all(torch.allclose(g, e, atol=1e-4) for g, e in zip(grads, expected_grads))
+
+    # Losses are grouped by cluster when the order is not kept
+    crit.keep_order = False
+    assert torch.allclose(crit(inputs, labels).sort()[0], nll.sort()[0], atol=1e-5)
+
+
+def test_projected_adaptive_log_softmax_head_cache(crit):
+    inputs = torch.randn(2, 6, crit.d_model)
+    labels = torch.randint(0, crit.vocab_size, (2, 6))
+    optimizer = torch.optim.SGD(crit.parameters(), lr=0.1)
+
+    # Cached head is reused by gradient accumulation steps
+    for _ in range(2):
+        crit(inputs, labels).sum().backward()
+    cluster_grad = crit.cluster_weight.grad.clone()
+
+    crit.zero_grad()
+    crit(inputs, labels).sum().backward()
+    assert torch.allclose(cluster_grad, 2 * crit.cluster_weight.grad)
+
+    # Head is recomputed after the parameters are updated
+    optimizer.step()
+
+    fresh_crit = ProjectedAdaptiveLogSoftmax(
+        crit.vocab_size, crit.d_embed, crit.d_model, crit.cutoffs[:-1], crit.tie_projs, emb_projs=[],
+        div_val=crit.div_val,
+    )
+    fresh_crit.load_state_dict(crit.state_dict())
+
+    assert torch.allclose(crit(inputs, labels), fresh_crit(inputs, labels), atol=1e-5)
@@ -0,0 +1,117 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+import pytest
+import torch
+
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.configuration_mem_transformer import (
+    MemTransformerConfig,
+)
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.modeling_mem_transformer import (
+    MemTransformerLMHeadModel,
+)
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils import (
+    rel_partial_learnable_decoder,
+)
+from archai.nlp.search_spaces.transformer_flex.models.mem_transformer.utils.rel_partial_learnable_decoder import (
+    RelPartialLearnableMultiHeadAttn,
+)
+
+
+def _attn(attn_impl, state_dict=None):
+    attn = RelPartialLearnableMultiHeadAttn(4, 32, 8, 0.0, attn_impl=attn_impl, attn_chunk_size=3)
+
+    if state_dict is None:
+        torch.nn.init.normal_(attn.r_w_bias)
+        torch.nn.init.normal_(attn.r_r_bias)
+    else:
+        attn.load_state_dict(state_dict)
+
+    return attn.eval()
+
+
+@pytest.mark.parametrize("attn_impl", ["sdpa", "chunked"])
+@pytest.mark.parametrize("mem_length", [0, 5])
+@pytest.mark.parametrize("same_length", [False, True])
+def test_rel_partial_learnable_multi_head_attn_impls(attn_impl, mem_length, same_length):
+    torch.manual_seed(0)
+    q_length, batch_size = 8, 2
+    k_length = q_length + mem_length
+
+    w = torch.randn(q_length, batch_size, 32)
+    r = torch.randn(k_length, 32)
+    mems = torch.randn(mem_length, batch_size, 32) if mem_length else None
+
+    # Same masks as `MemTransformerModel`
+    all_ones = torch.ones(q_length, k_length, dtype=torch.uint8)
+    attn_mask = torch.triu(all_ones, 1 + mem_length)
+    if same_length:
+        attn_mask = attn_mask + torch.tril(all_ones, -3)
+    attn_mask = attn_mask[:, :, None]
+
+    eager_attn = _attn("eager")
+    attn = _attn(attn_impl, eager_attn.state_dict())
+
+    with torch.no_grad():
+        eager_output = eager_attn(w, r, attn_mask=attn_mask, mems=mems)[0]
+        output = attn(w, r, attn_mask=attn_mask, mems=mems)[0]
+        bool_mask_output = attn(w, r, attn_mask=attn_mask == 1, mems=mems)[0]
+
+    assert torch.allclose(output, eager_output, atol=1e-5)
+    assert torch.equal(output, bool_mask_output)
+
+
+def test_rel_partial_learnable_multi_head_attn_fallback():
+    attn = _attn("sdpa")
+    w, r = torch.randn(4, 1, 32), torch.randn(4, 32)
+    attn_mask = torch.triu(torch.ones(4, 4, dtype=torch.uint8), 1)[:, :, None]
+
+    # Attention probabilities are only available from the eager implementation
+    output = attn(w, r, attn_mask=attn_mask, output_attentions=True)
+    assert output[2].shape == (4, 4, 1, 4)
+
+    with pytest.raises(ValueError):
+        RelPartialLearnableMultiHeadAttn(4, 32, 8, 0.0, attn_impl="flash")
+
+
+@pytest.mark.parametrize("sdpa_flag", ["SDPA_SUPPORTS_SCALE", "SDPA_AVAILABLE"])
+def test_rel_partial_learnable_multi_head_attn_sdpa_versions(monkeypatch, sdpa_flag):
+    torch.manual_seed(0)
+    w, r = torch.randn(6, 2, 32), torch.randn(6, 32)
+    attn_mask = torch.triu(torch.ones(6, 6, dtype=torch.uint8), 1)[:, :, None]
+
+    eager_attn = _attn("eager")
+    attn = _attn("sdpa", eager_attn.state_dict())
+    attn.scale = eager_attn.scale = 0.2
+
+    # Older PyTorch versions without the `scale` argument (or SDPA) give the same outputs
+    monkeypatch.setattr(rel_partial_learnable_decoder, sdpa_flag, False)
+
+    with torch.no_grad():
+        assert torch.allclose(attn(w, r, attn_mask=attn_mask)[0], eager_attn(w, r, attn_mask=attn_mask)[0], atol=1e-5)
+
+
+def test_mem_transformer_attn_impls():
+    torch.manual_seed(0)
+    config = MemTransformerConfig(
+        vocab_size=64, d_embed=32, d_model=32, d_head=8, n_head=4, d_inner=64,
+        n_layer=2, cutoffs=[16], div_val=1, mem_len=6, tgt_len=8,
+    )
+
+    eager_model = MemTransformerLMHeadModel(config).eval()
+    input_ids = torch.randint(0, config.vocab_size, (2, 8))
+
+    for attn_impl in ["sdpa", "chunked"]:
+        config.attn_impl, config.attn_chunk_size = attn_impl, 3
+        model = MemTransformerLMHeadModel(config).eval()
+        model.load_state_dict(eager_model.state_dict())
+
+        eager_mems, mems = None, None
+        with torch.no_grad():
+            # Second segment attends to the memories of the first one
+            for _ in range(2):
+                eager_output = eager_model(input_ids, mems=eager_mems)
+                output = model(input_ids, mems=mems)
+
+                assert torch.allclose(output.prediction_scores, eager_output.prediction_scores, atol=1e-4)
+                eager_mems, mems = eager_output.mems, output.mems
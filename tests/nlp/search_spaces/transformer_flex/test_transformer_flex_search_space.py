@@ -120,3 +120,16 @@ def test_transformer_flex_search_space_encode(config):
     arch_model = search_space.random_sample()
     gene = search_space.encode(arch_model)
     assert gene == [2, 256, 1024, 4]
+
+
+def test_transformer_flex_search_space_lazy_materialization(config):
+    # Assert that models are only instantiated when `arch` is accessed
+    search_space = TransformerFlexSearchSpace(**config)
+    arch_model = search_space.random_sample()
+    mutated_arch_model = search_space.mutate(arch_model)
+    assert not arch_model.is_materialized
+    assert not mutated_arch_model.is_materialized
+
+    assert isinstance(mutated_arch_model.arch, GPT2LMHeadModel)
+    assert mutated_arch_model.is_materialized
+    assert not arch_model.is_materialized
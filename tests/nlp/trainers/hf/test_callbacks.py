@@ -6,9 +6,13 @@ from unittest.mock import MagicMock
 
 from transformers import TrainerControl, TrainerState, TrainingArguments
 
+from archai.nlp.search_spaces.transformer_flex.search_space import (
+    TransformerFlexSearchSpace,
+)
 from archai.nlp.trainers.hf.callbacks import (
     BPCTrainerCallback,
     PerplexityTrainerCallback,
+    SuperNetSamplingCallback,
 )
 
 
@@ -50,3 +54,36 @@ def test_perplexity_trainer_callback():
     callback.on_evaluate(args, state, control, metrics)
     assert metrics["eval_ppl"] == math.exp(0.25)
     assert metrics["test_ppl"] == math.exp(0.2)
+
+
+def test_supernet_sampling_callback():
+    search_space = TransformerFlexSearchSpace(
+        "gpt2-flex", min_layers=1, max_layers=3, d_inner_options=[32, 64], d_model_options=[16, 32], vocab_size=64
+    )
+    callback = SuperNetSamplingCallback(search_space)
+
+    args = MagicMock(spec=TrainingArguments)
+    state = MagicMock(spec=TrainerState)
+    control = MagicMock(spec=TrainerControl)
+    model = MagicMock()
+
+    # Assert that the schedule cycles between the largest, smallest and random sub-networks
+    sub_configs = []
+    for step in range(3):
+        state.global_step = step
+        callback.on_step_begin(args, state, control, model=model)
+        sub_configs.append(model.set_sub_config.call_args[0][0])
+
+    assert sub_configs[0] is None
+    assert sub_configs[1].n_layer == 1 and sub_configs[1].n_embd == 16
+    assert sub_configs[2] is not None
+
+    # Assert that the whole super-network is activated after each step
+    callback.on_step_end(args, state, control, model=model)
+    model.set_sub_config.assert_called_with(None)
+
+    # Assert that only random sub-networks are sampled without the cyclic schedule
+    callback = SuperNetSamplingCallback(search_space, cyclic=False)
+    state.global_step = 0
+    callback.on_step_begin(args, state, control, model=model)
+    assert model.set_sub_config.call_args[0][0] is not None
@@ -7,7 +7,7 @@ import tempfile
 import torch
 from transformers import GPT2Config, GPT2LMHeadModel
 
-from archai.nlp.trainers.nvidia.trainer import save_checkpoint
+from archai.nlp.trainers.nvidia.trainer import AsyncCheckpointWriter, save_checkpoint
 
 
 def test_save_checkpoint():
@@ -71,3 +71,39 @@ def test_save_checkpoint():
         assert checkpoint["scheduler_state"][key] == scheduler.state_dict()[key]
     assert checkpoint["scaler_state"] is None
     assert checkpoint["trainer_state"] == trainer_state
+
+
+def test_async_checkpoint_writer():
+    output_dir = tempfile.mkdtemp()
+    model = GPT2LMHeadModel(config=GPT2Config(vocab_size=1, n_layer=1))
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.01)
+    trainer_state = {"step": 1, "log_history": []}
+
+    writer = AsyncCheckpointWriter()
+    writer.save(output_dir, model, optimizer, None, None, trainer_state, False, is_best_model=True)
+
+    # Assert that the snapshot is not affected by changes after `save()`
+    weight = model.state_dict()["transformer.wte.weight"].clone()
+    with torch.no_grad():
+        model.transformer.wte.weight.add_(1.0)
+    trainer_state["log_history"].append({"loss": 1.0})
+    writer.wait()
+
+    checkpoint_path = os.path.join(output_dir, "checkpoint-last.pt")
+    best_checkpoint_path = os.path.join(output_dir, "checkpoint-best.pt")
+    checkpoint = torch.load(checkpoint_path, weights_only=False)
+    assert torch.equal(checkpoint["model_state"]["transformer.wte.weight"], weight)
+    assert checkpoint["trainer_state"] == {"step": 1, "log_history": []}
+
+    # Assert that the best checkpoint is linked and not overwritten by the next checkpoint
+    assert os.path.samefile(checkpoint_path, best_checkpoint_path)
+
+    trainer_state["step"] = 2
+    writer.save(output_dir, model, optimizer, None, None, trainer_state, False, save_all_checkpoints=True)
+    writer.close()
+
+    assert os.path.samefile(checkpoint_path, os.path.join(output_dir, "checkpoint-2.pt"))
+    assert not os.path.samefile(checkpoint_path, best_checkpoint_path)
+
+    best_checkpoint = torch.load(best_checkpoint_path, weights_only=False)
+    assert torch.equal(best_checkpoint["model_state"]["transformer.wte.weight"], weight)